@@ -11,6 +11,7 @@ from agency_analysis.forms import AgencyGraph, AgencyQuadrant, AgencyTable
 from base.entities.currency import Currency
 from base.helpers.permissions import has_access
 from base.middlewares import attach_figure_id, attach_story_text, cache
+from base.redis import CacheNamespace
 from base.service import BaseService
 from dds.repository import DdsRepository
 
@@ -92,7 +93,7 @@ class AgencyService(BaseService):
     }
 
     @has_access("MSD", ["/agency-analysis"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_story_text(STORY_TEXTS["get_agency_table"])
     def get_agency_table(self, form: AgencyTable):
         periods = self.get_periods()
@@ -400,7 +401,7 @@ class AgencyService(BaseService):
         return [{e: self.AGENCY_COL_CONV[e]} for e in cols], table_vals
 
     @has_access("MSD", ["/agency-analysis"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_story_text(STORY_TEXTS["get_agency_quadrant"])
     @attach_figure_id(["fig_agency_diag"])
     def get_agency_quadrant(self, form: AgencyQuadrant):
@@ -477,7 +478,7 @@ class AgencyService(BaseService):
         return response
 
     @has_access("MSD", ["/agency-analysis"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_story_text(STORY_TEXTS["get_agency_graphs"])
     @attach_figure_id(
         [
@@ -24,8 +24,8 @@ class Country:
 
     @classmethod
     def airport_country_map(cls, airport_code: List[str]) -> Dict[str, str]:
-        cursor = airport_repo.find({"airport_iata_code": {"$in": airport_code}})
-        return {item["airport_iata_code"]: item["country_code"] for item in cursor}
+        countries = airport_repo.index.countries
+        return {code: countries[code] for code in airport_code if code in countries}
 
 
 @dataclass
@@ -50,11 +50,5 @@ class City:
 
     @classmethod
     def get_city_airport_map(self, cities: List[str]) -> Dict[str, str]:
-        agg = [
-            {"$match": {"city_code": {"$in": cities}}},
-            {"$group": {"_id": {"airport_code": "$airport_iata_code", "city_code": "$city_code"}}},
-            {"$project": {"_id": 0, "airport_code": "$_id.airport_code", "city_code": "$_id.city_code"}},
-        ]
-
-        c = airport_repo.aggregate(agg)
-        return {obj["airport_code"]: obj["city_code"] for obj in c}
+        cities = set(cities)
+        return {code: city for code, city in airport_repo.index.cities.items() if city in cities}
@@ -0,0 +1,183 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypedDict
+
+import pandas as pd
+
+
+class CityAirports(TypedDict):
+    city_code: str
+    city_name: str
+    airports: List[Dict[str, str]]
+
+
+# fields of airport records returned by repository
+RECORD_FIELDS = (
+    "airport_iata_code",
+    "airport_name",
+    "airport_country",
+    "city_code",
+    "city_name",
+    "country_code",
+    "country_name",
+    "type",
+)
+AIRPORT_FIELDS = (
+    "airport_iata_code",
+    "airport_name",
+    "airport_country",
+    "city_code",
+    "city_name",
+    "country_code",
+    "country_name",
+    "type",
+    "disabled",
+    "latitude",
+    "longitude",
+)
+
+
+@dataclass(frozen=True)
+class AirportIndex:
+    """
+    reference data of airports collection kept in memory, all lookups are O(1)
+    (METROPOLITAN records are only used for codes that have no other record)
+    """
+
+    version: Tuple[Any, ...]
+    records: Dict[str, dict]
+    cities: Dict[str, str]
+    countries: Dict[str, str]
+    city_names: Dict[str, str]
+    city_airports: Dict[str, List[Tuple[str, str]]]
+    coordinates: Dict[str, Tuple[float, float]]
+    positions: Dict[str, int]
+    country_codes: Dict[str, str]
+    city_series: pd.Series
+    country_series: pd.Series
+
+    @classmethod
+    def build(cls, docs: Iterable[dict], version: Tuple[Any, ...] = ()) -> "AirportIndex":
+        records, cities, countries, city_names, city_airports, coordinates, country_codes = {}, {}, {}, {}, {}, {}, {}
+        positions = {}
+
+        for position, doc in enumerate(docs):
+            code = doc.get("airport_iata_code")
+            metropolitan = doc.get("type") == "METROPOLITAN"
+            if doc.get("country_name") and doc.get("country_code"):
+                country_codes.setdefault(doc["country_name"], doc["country_code"])
+            if not code:
+                continue
+
+            # first record having coordinates (METROPOLITAN ones too)
+            if doc.get("latitude") is not None and doc.get("longitude") is not None:
+                coordinates.setdefault(code, (float(doc["latitude"]), float(doc["longitude"])))
+            if metropolitan and code in records:
+                continue
+
+            replace = code in records and records[code].get("type") == "METROPOLITAN"
+            if code not in records or replace:
+                records[code] = {"_id": str(doc["_id"]), **{field: doc[field] for field in RECORD_FIELDS if field in doc}}
+                cities[code] = doc.get("city_code")
+                countries[code] = doc.get("country_code")
+
+            if metropolitan:
+                continue
+
+            positions.setdefault(code, position)
+            if doc.get("city_code") and not doc.get("disabled"):
+                city_names.setdefault(doc["city_code"], doc.get("city_name"))
+                city_airports.setdefault(doc["city_code"], []).append((code, doc.get("airport_name")))
+
+        return cls(
+            version=version,
+            records=records,
+            cities=cities,
+            countries=countries,
+            city_names=city_names,
+            city_airports=city_airports,
+            coordinates=coordinates,
+            positions=positions,
+            country_codes=country_codes,
+            city_series=pd.Series(cities, dtype=object),
+            country_series=pd.Series(countries, dtype=object),
+        )
+
+    def city_of(self, airport_code: str) -> Optional[str]:
+        return self.cities.get(airport_code)
+
+    def country_of(self, airport_code: str) -> Optional[str]:
+        return self.countries.get(airport_code)
+
+    def first_airport(self, airport_codes: Iterable[str]) -> Optional[dict]:
+        """(non METROPOLITAN) record of the airport stored first in the collection among given codes"""
+        codes = [code for code in airport_codes if code in self.positions]
+        if codes:
+            return dict(self.records[min(codes, key=self.positions.__getitem__)])
+
+    def map_cities(self, airport_codes: pd.Series) -> pd.Series:
+        """city code of each airport code (NaN for unknown codes)"""
+        return airport_codes.map(self.city_series)
+
+    def map_countries(self, airport_codes: pd.Series) -> pd.Series:
+        """country code of each airport code (NaN for unknown codes)"""
+        return airport_codes.map(self.country_series)
+
+    def group_by_city(
+        self,
+        airport_codes: Optional[Iterable[str]] = None,
+        city_codes: Optional[Iterable[str]] = None,
+    ) -> List[CityAirports]:
+        """enabled (non METROPOLITAN) airports grouped by city, either for given airports or for given cities"""
+        if airport_codes is not None:
+            airport_codes = list(airport_codes)
+            city_codes = dict.fromkeys(self.cities[code] for code in airport_codes if self.cities.get(code))
+            airport_codes = set(airport_codes)
+
+        groups = []
+        for city_code in city_codes if city_codes is not None else self.city_airports:
+            airports = [
+                {"airport_name": name, "airport_code": code}
+                for code, name in self.city_airports.get(city_code, [])
+                if airport_codes is None or code in airport_codes
+            ]
+            if airports:
+                groups.append({"city_code": city_code, "city_name": self.city_names.get(city_code), "airports": airports})
+        return groups
+
+
+class AirportIndexCache:
+    """
+    per process airport index, version of collection (number of documents and latest id) is checked
+    every `ttl` seconds and index is rebuilt when it changes (or when it gets older than `max_age` seconds)
+    """
+
+    def __init__(self, ttl: int, max_age: int):
+        self.ttl = ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._index: Optional[AirportIndex] = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+
+    def get(self, version: Callable[[], Tuple[Any, ...]], load: Callable[[Tuple[Any, ...]], AirportIndex]) -> AirportIndex:
+        index = self._index
+        if index and self._checked_at + self.ttl > time.monotonic():
+            return index
+
+        with self._lock:
+            if self._index is not None and self._index is not index:
+                # another thread refreshed it meanwhile
+                return self._index
+
+            current = version()
+            if not index or index.version != current or self._built_at + self.max_age <= time.monotonic():
+                self._index = load(current)
+                self._built_at = time.monotonic()
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
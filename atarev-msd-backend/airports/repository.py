@@ -1,5 +1,6 @@
-from typing import Dict, List, Optional, TypedDict, Union
+from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union
 
+from airports.index import AIRPORT_FIELDS, AirportIndex, AirportIndexCache
 from base.helpers.duration import Duration
 from base.repository import BaseRepository
 
@@ -20,51 +21,35 @@ class GroupedByOrderObj(TypedDict):
 
 class AirportRepository(BaseRepository):
     collection = "airports"
+    cache = AirportIndexCache(ttl=Duration.minutes(5), max_age=Duration.hours(6))
+
+    @property
+    def index(self) -> AirportIndex:
+        return self.cache.get(self.__version, self.__load_index)
+
+    def __version(self) -> Tuple[Any, ...]:
+        collection = self._db[self.collection]
+        latest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        return (collection.estimated_document_count(), latest and latest["_id"])
+
+    def __load_index(self, version: Tuple[Any, ...]) -> AirportIndex:
+        return AirportIndex.build(self.find({}, {field: 1 for field in AIRPORT_FIELDS}), version)
 
     def get_airports_coordinates_map(self, airport_codes: List[str]):
-        cursor = self.aggregate(
-            [
-                {"$match": {"airport_iata_code": {"$in": airport_codes}, "latitude": {"$ne": None}, "longitude": {"$ne": None}}},
-                {"$project": {"_id": 0, "airport_code": "$airport_iata_code", "latitude": 1, "longitude": 1}},
-            ]
-        )
-        return {airport["airport_code"]: (airport["latitude"], airport["longitude"]) for airport in cursor}
+        return self.get_coordinates_many(airport_codes)
 
     def get_coordinates(self, airport_code: str):
         """get lat,long based on airport-code EX : WDS"""
-        redis_key: str = f"airports_coordinates_{airport_code}"
-
-        if self.redis.get(redis_key):
-            coordinates = self.redis.get(redis_key)
-            return coordinates["latitude"], coordinates["longitude"]
-
-        key: str = self.get_column("airport_iata_code")
-        result = list(
-            self.aggregate(
-                [
-                    {"$match": {key: airport_code, "latitude": {"$ne": None}, "longitude": {"$ne": None}}},
-                    {"$project": {"_id": 0, "latitude": 1, "longitude": 1}},
-                ]
-            )
-        )
+        return self.index.coordinates.get(airport_code)
 
-        if len(result) > 0:
-            pt = result[0]
-            self.redis.set(redis_key, {"latitude": float(pt.get("latitude")), "longitude": float(pt.get("longitude"))})
-            return float(pt.get("latitude")), float(pt.get("longitude"))
-        return None
+    def get_coordinates_many(self, airport_codes: List[str]) -> Dict[str, Tuple[float, float]]:
+        """get lat,long for a group of airport-codes"""
+        coordinates = self.index.coordinates
+        return {code: coordinates[code] for code in airport_codes if code in coordinates}
 
-    def get_country(self, airport_code: str) -> str:
+    def get_country(self, airport_code: str) -> Optional[str]:
         """get country code based on airport-code EX : WDS"""
-        key: str = self.get_column("airport_iata_code")
-        redis_key: str = f"airport_country_{airport_code}"
-
-        if self.redis.get(redis_key):
-            return self.redis.get(redis_key)
-
-        airport = self.stringify(self.find_one({key: airport_code}))
-        self.redis.set(redis_key, airport.get("country_code"), Duration.days(1))
-        return airport.get("country_code")
+        return self.index.country_of(airport_code)
 
     def get_country_airport_map(self, codes: Optional[List[str]] = None) -> Dict[str, GroupedByOrderObj]:
         """
@@ -72,30 +57,9 @@ class AirportRepository(BaseRepository):
         representing each airport as key and data for that airport as value
         ex : {"AMS" : {...}}
         """
-        codes = codes or []
-        codes.sort()
-
-        pipeline = [
-            {
-                "$project": {
-                    "_id": {"$toString": "_id"},
-                    "airport_iata_code": 1,
-                    "airport_name": 1,
-                    "airport_country": 1,
-                    "city_code": 1,
-                    "city_name": 1,
-                    "country_code": 1,
-                    "country_name": 1,
-                    "type": 1,
-                }
-            }
-        ]
-        if codes:
-            pipeline.insert(0, {"$match": {"airport_iata_code": {"$in": codes}}})
-
-        cursor = self.aggregate(pipeline)
-        mp = {record["airport_iata_code"]: record for record in cursor}
-        return mp
+        records = self.index.records
+        codes = sorted(codes) if codes else records.keys()
+        return {code: dict(records[code]) for code in codes if code in records}
 
     def get_airport_coord_map(self, codes: List[str] = []):
         """
@@ -106,8 +70,9 @@ class AirportRepository(BaseRepository):
         codes = codes or []
         codes.sort()
         cache_key = "city_coord_map" + "_".join(codes)
-        if self.redis.get(cache_key):
-            return self.redis.get(cache_key)
+        cached = self.redis.get(cache_key)
+        if cached:
+            return cached
 
         pipeline = [
             {"$lookup": {"from": "cities", "localField": "country_code", "foreignField": "country_code", "as": "cities"}},
@@ -143,27 +108,8 @@ class AirportRepository(BaseRepository):
 
     def normalized_country_map(self, codes: List[str]):
         """takes list of country list and return dict of their codes"""
-        codes = codes or []
-        codes.sort()
-        cache_key = "normalized_country_map" + "_".join(codes)
-        if self.redis.get(cache_key):
-            return self.redis.get(cache_key)
-
-        pipeline = [
-            {"$match": {"country_name": {"$in": codes}}},
-            {
-                "$project": {
-                    "country_name": 1,
-                    "country_code": 1,
-                }
-            },
-        ]
-
-        cursor = self.aggregate(pipeline)
-        _map = {record["country_name"]: record["country_code"] for record in cursor}
-
-        self.redis.set(cache_key, _map, expiration_in_seconds=Duration.days(1))
-        return _map
+        country_codes = self.index.country_codes
+        return {name: country_codes[name] for name in codes or [] if name in country_codes}
 
     def get_airports_for_cities(self, cities_list: List[str]):
         """get airports based on city code"""
@@ -183,27 +129,12 @@ class AirportRepository(BaseRepository):
         )
 
     def get_city_code_for_airport(self, airport_code: Union[str, List[str]]):
-        if type(airport_code) == str:
-            redis_key: str = f"airports_city_{airport_code}"
-            if self.redis.get(redis_key):
-                return self.redis.get(redis_key)
-
-            result = self.find_one({"airport_iata_code": airport_code, "type": {"$ne": "METROPOLITAN"}})
-            if not result:
-                return
-        else:
-            redis_key: str = f"airports_city_{'_'.join(airport_code)}"
-            if self.redis.get(redis_key):
-                return self.redis.get(redis_key)
-
-            result = self.find_one({"airport_iata_code": {"$in": airport_code}, "type": {"$ne": "METROPOLITAN"}})
-
-        self.redis.set(redis_key, self.stringify(result), expiration_in_seconds=Duration.months(1))
-        return result
+        """get (non METROPOLITAN) airport record of an airport-code or of first stored airport of a list"""
+        return self.index.first_airport([airport_code] if type(airport_code) == str else airport_code)
 
     def get_countries_for_airports(self, airports: List[str] = []):
-        cursor = self.find({"airport_iata_code": {"$in": airports}} if airports else {})
-        return {item["airport_iata_code"]: item["country_code"] for item in cursor}
+        countries = self.index.countries
+        return {code: countries[code] for code in airports or countries.keys() if code in countries}
 
     def get_countries_for_cities(self, cities: List[str]):
         if cities:
@@ -216,29 +147,17 @@ class AirportRepository(BaseRepository):
         cursor = self.find({"city_code": {"$in": cities}, "country_code": country_code} if cities else {})
         return set([item["city_code"] for item in cursor])
 
-    def get_airports_grouped_by_city(self, match={}, as_map=True):
-        aggregation = [
-            {
-                "$match": {"type": {"$ne": "METROPOLITAN"}, "disabled": {"$ne": True}, **match},
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "city_code": "$city_code",
-                        "city_name": "$city_name",
-                    },
-                    "airports": {"$push": {"airport_name": "$airport_name", "airport_code": "$airport_iata_code"}},
-                }
-            },
-            {"$project": {"_id": 0, "city_code": "$_id.city_code", "city_name": "$_id.city_name", "airports": 1}},
-        ]
-
+    def get_airports_grouped_by_city(
+        self,
+        airport_codes: Optional[List[str]] = None,
+        city_codes: Optional[List[str]] = None,
+        as_map=True,
+    ):
+        """enabled airports grouped by city (of given airports or given cities), as {city_code: airports} by default"""
+        groups = self.index.group_by_city(airport_codes, city_codes)
         if not as_map:
-            return self.aggregate(aggregation)
-        res = {}
-        for obj in self.aggregate(aggregation):
-            res[obj["city_code"]] = obj["airports"]
-        return res
+            return groups
+        return {group["city_code"]: group["airports"] for group in groups}
 
     def get_all_countries(self) -> Dict[str, List]:
         # cache_key = 'all_countries'
@@ -299,16 +218,10 @@ class AirportRepository(BaseRepository):
         return doc.get("country_code")
 
     def get_country_code_by_airport_code(self, airport_code: str) -> Union[str, None]:
-        doc = self._db[self.collection].find_one({"airport_iata_code": airport_code})
-        if not doc:
-            return None
-        return doc.get("country_code")
+        return self.index.country_of(airport_code)
 
     def get_city_code_by_airport_code(self, airport_code: str) -> Union[str, None]:
-        doc = self._db[self.collection].find_one({"airport_iata_code": airport_code})
-        if not doc:
-            return None
-        return doc.get("city_code")
+        return self.index.city_of(airport_code)
 
     def is_valid_city_code(self, city_code: str) -> bool:
         doc = self._db[self.collection].find_one({"city_code": city_code})
@@ -319,8 +232,7 @@ class AirportRepository(BaseRepository):
         return bool(doc)
 
     def check_airport_code_valid(self, airport_code: str) -> bool:
-        doc = self._db[self.collection].find_one({"airport_iata_code": airport_code})
-        return bool(doc)
+        return airport_code in self.index.records
 
     def get_airports_grouped_by_country(self, codes: List[str] = []):
         codes = codes or []
@@ -1,10 +1,18 @@
+from typing import Iterable, Optional
+
 import pandas as pd
 
-from base.entities.exchange_rate import ExchangeRate
+from base.entities.exchange_rate import convert_amounts
+from base.loader import BATCH_SIZE, Schema, load_frame
 from utils.funcs import from_int_to_datetime, get_date_as_string
 
 
 class DataFrame(pd.DataFrame):
+    @classmethod
+    def from_cursor(cls, cursor: Iterable[dict], schema: Optional[Schema] = None, batch_size: int = BATCH_SIZE):
+        """build dataframe column by column from a mongo cursor (see `load_frame`)"""
+        return load_frame(cursor, schema, batch_size, frame_class=cls)
+
     def add_date(self, year_col, month_col, day_col=None):
         if not day_col:
             self["date"] = pd.to_datetime(self[year_col] * 10000 + self[month_col] * 100 + 1, format="%Y%m%d")
@@ -23,13 +31,24 @@ class DataFrame(pd.DataFrame):
     def date_from_int(self, target_col: str, col: str = "date"):
         self[col] = pd.to_datetime(self[target_col]).dt.date
 
-    def convert_currency(self, value_col: str, currency_col: str = None, convert_to: str = None, base_currency="USD"):
-        rate = ExchangeRate(base_currency, [convert_to or "USD"]).get_single_base_rates(base_currency)[convert_to or "USD"]
-        self[value_col] = self[value_col] * rate
-        if currency_col:
-            self[currency_col] = self.shape[0] * [convert_to or "USD"]
-        else:
-            self["currency"] = self.shape[0] * [convert_to or "USD"]
+    def convert_currency(
+        self,
+        value_col: str,
+        currency_col: str = None,
+        convert_to: str = None,
+        base_currency="USD",
+        source_currency_col: str = None,
+    ):
+        """
+        convert values from `base_currency` to `convert_to` currency and write the target currency into `currency_col`,
+        rows are converted from their own currency only when `source_currency_col` is given (`base_currency` if empty)
+        """
+        currencies = base_currency
+        if source_currency_col and source_currency_col in self:
+            currencies = self[source_currency_col].fillna(base_currency)
+
+        self[value_col] = convert_amounts(self[value_col], currencies, convert_to or "USD")
+        self[currency_col or "currency"] = convert_to or "USD"
 
     def unique_as_string(self, col_name: str, sep=","):
         return sep.join(self[col_name].unique().tolist())
@@ -8,20 +8,19 @@ class CurrencyRepository(BaseRepository):
     collection = "currencies"
 
     def get_symbol(self, currency_code: str) -> str:
-        cached = self.redis.get(f"currency_{currency_code}")
-
-        if cached:
-            return cached
-        obj = self.find_one({"currency_code": currency_code, "symbol": {"$exists": True}})
-        if not obj:
-            return currency_code
-        symbol = obj.get("symbol", currency_code)
-        self.redis.set(f"currency_{currency_code}", symbol)
-        return symbol
+        return self.get_symbols([currency_code])[currency_code]
 
     def get_symbols(self, codes: List[str]):
-        res = self.find({"currency_code": {"$in": codes}, "symbol": {"$exists": True}})
-        m = {obj["currency_code"]: obj.get("symbol", obj["currency_code"]) for obj in res}
+        cached = self.redis.get_many(f"currency_{code}" for code in codes)
+        m = {code: cached[f"currency_{code}"] for code in codes if f"currency_{code}" in cached}
+
+        missing = [code for code in codes if code not in m]
+        if missing:
+            res = self.find({"currency_code": {"$in": missing}, "symbol": {"$exists": True}})
+            found = {obj["currency_code"]: obj.get("symbol", obj["currency_code"]) for obj in res}
+            self.redis.set_many({f"currency_{code}": symbol for code, symbol in found.items()})
+            m.update(found)
+
         return {code: m.get(code, code) for code in codes}
 
 
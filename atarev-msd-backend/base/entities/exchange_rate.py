@@ -1,9 +1,14 @@
+import threading
+import time
 from dataclasses import dataclass
 from typing import Dict, Iterable, List, Optional, TypedDict, Union
 
+import numpy as np
+import pandas as pd
 import pymongo
 from dotenv import load_dotenv
 
+from base.helpers.duration import Duration
 from base.repository import BaseRepository
 
 load_dotenv()
@@ -21,50 +26,188 @@ class ExchangeRepo(BaseRepository):
 exchange_repo = ExchangeRepo()
 
 
+@dataclass(frozen=True)
+class RateTable:
+    """
+    conversion rates of latest exchange_rates record as a (currencies x currencies) matrix,
+    matrix[i, j] is the rate to convert an amount in currencies[i] to currencies[j]
+    """
+
+    date: int
+    currencies: pd.Index
+    matrix: np.ndarray
+
+    @classmethod
+    def from_record(cls, record: dict) -> "RateTable":
+        currencies = pd.Index(list(record["rates"].keys()))
+        rates = np.array(list(record["rates"].values()), dtype=float)
+        return cls(date=record["date"], currencies=currencies, matrix=rates[np.newaxis, :] / rates[:, np.newaxis])
+
+    def positions(self, currencies: Iterable[str]) -> np.ndarray:
+        """matrix positions of currencies, raises ValueError if any of them is unknown"""
+        currencies = pd.Index(currencies)
+        positions = self.currencies.get_indexer(currencies)
+        if (positions == -1).any():
+            raise ValueError(f"Invalid currency: {', '.join(map(str, currencies[positions == -1].unique()))}")
+        return positions
+
+    def rate(self, base_currency: str, target_currency: str) -> float:
+        base, target = self.positions([base_currency, target_currency])
+        return float(self.matrix[base, target])
+
+    def convert(
+        self,
+        amounts: Union[pd.Series, np.ndarray],
+        currencies: Union[pd.Series, np.ndarray, str],
+        target_currency: str,
+    ) -> np.ndarray:
+        """convert amounts (each in its own currency) to target currency at once"""
+        amounts = np.asarray(amounts, dtype=float)
+        if isinstance(currencies, str):
+            return amounts * self.rate(currencies, target_currency)
+
+        # lookup is done per distinct currency, rows only gather the resulting rates
+        codes, uniques = pd.factorize(np.asarray(currencies, dtype=object))
+        rates = self.matrix[self.positions(uniques), self.positions([target_currency])[0]]
+        return amounts * rates[codes]
+
+
+class RateTableCache:
+    """
+    per process rate table, built once and rebuilt only when a newer exchange_rates record appears
+    (date of latest record is checked at most once every `ttl` seconds)
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._table: Optional[RateTable] = None
+        self._checked_at = 0.0
+
+    def get(self) -> RateTable:
+        table = self._table
+        if table and self._checked_at + self.ttl > time.monotonic():
+            return table
+
+        with self._lock:
+            if self._table is not None and self._table is not table:
+                # another thread refreshed it meanwhile
+                return self._table
+
+            latest = exchange_repo.find_one(projection={"_id": 0, "date": 1}, sort=[("date", pymongo.DESCENDING)])
+            if latest is None:
+                raise ValueError("No exchange rates available")
+
+            if not table or latest["date"] != table.date:
+                record = exchange_repo.find_one({"date": latest["date"]}, projection={"_id": 0, "date": 1, "rates": 1})
+                self._table = RateTable.from_record(record)
+            self._checked_at = time.monotonic()
+            return self._table
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._table = None
+
+
+rate_table_cache = RateTableCache(ttl=Duration.minutes(5))
+
+
+def convert_amounts(
+    amounts: Union[pd.Series, np.ndarray],
+    currencies: Union[pd.Series, np.ndarray, str],
+    target_currency: str,
+) -> np.ndarray:
+    """convert a column of amounts given their currency column using latest rates"""
+    return rate_table_cache.get().convert(amounts, currencies, target_currency)
+
+
+@dataclass(frozen=True)
+class RateHistory:
+    """
+    exchange rates of a date range as dense arrays sorted by date (one record per day),
+    rates[i, j] is the rate of currencies[j] (against records base currency) at dates[i], NaN if not known
+    """
+
+    dates: np.ndarray
+    currencies: pd.Index
+    rates: np.ndarray
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "RateHistory":
+        frame = pd.DataFrame([{"date": int(f"{r['date']}"[0:8]), **r.get("rates", {})} for r in records])
+        if frame.empty:
+            return cls(dates=np.array([], dtype=int), currencies=pd.Index([]), rates=np.empty((0, 0)))
+
+        # latest record of a day wins
+        frame = frame.drop_duplicates("date", keep="last").sort_values("date")
+        currencies = frame.columns.drop("date")
+        return cls(
+            dates=frame["date"].to_numpy(dtype=int),
+            currencies=currencies,
+            rates=frame[currencies].to_numpy(dtype=float),
+        )
+
+    @classmethod
+    def as_days(cls, dates: Union[pd.Series, np.ndarray]) -> np.ndarray:
+        """yyyymmdd integers as number of days since epoch"""
+        dates = pd.to_datetime(pd.Series(dates).astype(str), format="%Y%m%d")
+        return dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    def closest(self, dates: Union[pd.Series, np.ndarray]) -> np.ndarray:
+        """
+        position of closest record of each date (as-of join in both directions),
+        previous record is preferred when both are as far
+        """
+        days = self.as_days(self.dates)
+        targets = self.as_days(dates)
+        nxt = np.clip(np.searchsorted(days, targets, side="left"), 0, len(days) - 1)
+        prev = np.clip(nxt - 1, 0, len(days) - 1)
+        use_prev = np.abs(targets - days[prev]) <= np.abs(days[nxt] - targets)
+        return np.where(use_prev, prev, nxt)
+
+    def convert(
+        self,
+        amounts: Union[pd.Series, np.ndarray],
+        currencies: Union[pd.Series, np.ndarray],
+        dates: Union[pd.Series, np.ndarray],
+        target_currency: str,
+    ) -> np.ndarray:
+        """
+        convert amounts (each in its own currency) to target currency using rates of closest date,
+        amounts are kept as they are when rate of a pair is not known
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        if not len(self.dates) or not len(amounts) or target_currency not in self.currencies:
+            return amounts
+
+        rows = self.closest(dates)
+        cols = self.currencies.get_indexer(pd.Index(np.asarray(currencies, dtype=object)))
+        target = self.rates[rows, self.currencies.get_loc(target_currency)]
+        base = np.where(cols == -1, np.nan, self.rates[rows, np.maximum(cols, 0)])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = target / base
+        ratios = np.where(np.isfinite(ratios) & (ratios != 0), ratios, 1)
+        return amounts * ratios
+
+
 @dataclass
 class HistoricalExchangeRate:
     base_currency: Union[str, List[str]]
     currencies: List[str]
 
-    def history(self, start_date: Optional[int] = None, end_date: Optional[int] = None) -> Iterable[ExchangeRate]:
+    def table(self, start_date: Optional[int] = None, end_date: Optional[int] = None) -> RateHistory:
+        """rates of base and target currencies only, in date order"""
         _and = []
-
         if start_date:
             _and.append({"date": {"$gte": int(f"{start_date}000000")}})
-        if start_date:
+        if end_date:
             _and.append({"date": {"$lte": int(f"{end_date}000000")}})
 
-        stages = [
-            {"$match": {"$and": _and} if _and else {}},
-            {"$addFields": {"dt": {"$toString": "$date"}}},
-            {"$project": {"_id": 0, "rates": 1, "dt": {"$toInt": {"$substr": ["$dt", 0, 8]}}}},
-            {"$sort": {"dt": -1}},
-            {"$project": {"date": "$dt", "dt": -1, "rates": 1}},
-        ]
-
-        c = exchange_repo.aggregate(stages)
-        return c
-
-    def rates(self, start_date: Optional[int] = None, end_date: Optional[int] = None) -> Dict[int, Dict[str, float]]:
-        res: Dict[int, Dict[str, float]] = {}
-        cursor = self.history(start_date, end_date)
-
-        if type(self.base_currency) is str:
-            for r in cursor:
-                res[r["date"]] = {}
-                for curr in self.currencies:
-                    conversion_rate = r["rates"][curr] / r["rates"][self.base_currency]
-                    res[r["date"]].update({f"{self.base_currency}-{curr}": conversion_rate})
-
-            return res
-
-        for r in cursor:
-            res[r["date"]] = {}
-            for base in self.base_currency:
-                for curr in self.currencies:
-                    conversion_rate = r["rates"][curr] / r["rates"][base]
-                    res[r["date"]].update({f"{base}-{curr}": conversion_rate})
-        return res
+        bases = [self.base_currency] if type(self.base_currency) is str else self.base_currency
+        projection = {"_id": 0, "date": 1, **{f"rates.{curr}": 1 for curr in {*bases, *self.currencies}}}
+        records = exchange_repo.find({"$and": _and} if _and else {}, projection).sort("date", pymongo.ASCENDING)
+        return RateHistory.from_records(records)
 
 
 @dataclass
@@ -74,8 +217,9 @@ class ExchangeRate:
 
     @property
     def latest_record(self) -> dict:
-        latest_record = exchange_repo.find_one(sort=[("date", pymongo.DESCENDING)])
-        return latest_record["rates"]
+        table = rate_table_cache.get()
+        # rates relative to first currency of the table, ratios between currencies are all that matter
+        return dict(zip(table.currencies, table.matrix[0]))
 
     def rates(self):
         if not self.currencies:
@@ -87,22 +231,11 @@ class ExchangeRate:
         return self.get_multi_base_rate()
 
     def get_single_base_rates(self, base_currency: str) -> Dict[str, float]:
-        results = {}
-        for currency in self.currencies:
-            results.update({currency: self.__convert_currency(base_currency, currency, self.latest_record)})
-        return results
+        table = rate_table_cache.get()
+        return {currency: table.rate(base_currency, currency) for currency in self.currencies}
 
     def get_multi_base_rate(self) -> Dict[str, str]:
         rates = {}
         for base in self.base_currency:
             rates = {**rates, **self.get_single_base_rates(base)}
         return rates
-
-    def __convert_currency(self, base_currency, target_currency, exchange_rates) -> float:
-        # Check input parameters
-        if base_currency not in exchange_rates or target_currency not in exchange_rates:
-            raise ValueError("Invalid currency")
-        # Calculate the conversion rate
-        conversion_rate = exchange_rates[target_currency] / exchange_rates[base_currency]
-        # Calculate and return
-        return conversion_rate
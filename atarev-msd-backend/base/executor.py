@@ -0,0 +1,67 @@
+import os
+import threading
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Sequence, TypeVar
+
+from pymongo.errors import ExecutionTimeout
+
+from base.helpers.errors import QueryTimeout
+
+T = TypeVar("T")
+
+# default time (in seconds) a query is allowed to run before it is aborted
+QUERY_TIMEOUT = 60
+
+
+class QueryExecutor:
+    """
+    bounded thread pool shared by all requests of a process, runs independent queries of one request concurrently
+    (pymongo client is thread safe, workers share its connection pool)
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+        self._local = threading.local()
+
+    def run(self, tasks: Sequence[Callable[[], T]], timeout: float = QUERY_TIMEOUT) -> List[T]:
+        """
+        run tasks concurrently and return their results in the same order once all of them finish,
+        if one of them fails (or time is over) tasks that did not start yet are cancelled and error is raised
+        """
+        # tasks submitted from a worker would wait for workers that may all be busy waiting as well
+        if len(tasks) < 2 or getattr(self._local, "is_worker", False):
+            return [self.__call(task, timeout) for task in tasks]
+
+        futures: List[Future] = [self._pool.submit(self.__worker, task, timeout) for task in tasks]
+        done, pending = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION)
+
+        if pending:
+            for future in pending:
+                future.cancel()
+
+        for future in done:
+            if future.exception():
+                raise future.exception()
+
+        if pending:
+            raise QueryTimeout(timeout)
+
+        return [future.result() for future in futures]
+
+    def __worker(self, task: Callable[[], T], timeout: float) -> T:
+        self._local.is_worker = True
+        try:
+            return self.__call(task, timeout)
+        finally:
+            self._local.is_worker = False
+
+    def __call(self, task: Callable[[], T], timeout: float) -> T:
+        try:
+            return task()
+        except ExecutionTimeout as e:
+            # query was aborted by the server (maxTimeMS)
+            raise QueryTimeout(timeout) from e
+
+
+query_executor = QueryExecutor(max_workers=int(os.getenv("QUERY_WORKERS") or 8))
@@ -0,0 +1,59 @@
+import csv
+import zlib
+from io import StringIO
+from typing import Iterable, Iterator, List, Sequence
+
+import pandas as pd
+from flask import Response, request, stream_with_context
+
+from base.loader import BATCH_SIZE, batches
+
+
+def csv_chunks(header: List[str], rows: Iterable[Sequence], batch_size: int = BATCH_SIZE) -> Iterator[str]:
+    """
+    csv text of header and rows, written one batch of rows at a time
+    (only the current batch and its text are held, rows can be consumed straight from a cursor)
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for batch in batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # there were no rows, only header is left
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def frame_rows(df: pd.DataFrame, batch_size: int = BATCH_SIZE) -> Iterator[list]:
+    """rows of a dataframe as lists, converted one batch at a time"""
+    for start in range(0, df.shape[0], batch_size):
+        yield from df.iloc[start : start + batch_size].values.tolist()
+
+
+def gzipped(chunks: Iterable[str]) -> Iterator[bytes]:
+    """gzip stream of text chunks, compressed as they come"""
+    # 16 + MAX_WBITS writes gzip header and trailer instead of zlib ones
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_response(chunks: Iterable[str], file_name: str) -> Response:
+    """csv attachment streamed while it is written, gzip encoded if client accepts it"""
+    encode = "gzip" in request.headers.get("Accept-Encoding", "")
+    body = gzipped(chunks) if encode else (chunk.encode() for chunk in chunks)
+
+    response = Response(stream_with_context(body), mimetype="text/csv")
+    response.headers["Content-Disposition"] = f"attachment; filename={file_name}"
+    response.headers["Vary"] = "Accept-Encoding"
+    if encode:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
@@ -29,3 +29,15 @@ class ExpiredToken(Exception):
     def __init__(self):
         message = f"EXPIRED_TOKEN"
         super().__init__(message)
+
+
+class QueryTimeout(Exception):
+    def __init__(self, timeout: float):
+        message = f"Query did not finish within {timeout} seconds"
+        super().__init__(message)
+
+
+class InvalidSortKey(Exception):
+    def __init__(self, key: str):
+        message = f"Table can't be sorted by `{key}`"
+        super().__init__(message)
@@ -4,15 +4,10 @@ from typing import Iterable, List, Union
 
 from flask import request
 
-from base.helpers.duration import Duration
-from base.redis import Redis
-
 from . import is_iterable_collection
 from .errors import UnAccessibleModulePage, Unauthorized
 from .user import User
 
-redis = Redis()
-
 
 class Role(ABC):
     @abstractmethod
@@ -46,42 +41,15 @@ class HasAccess:
 
     def to_module(self, module: str) -> bool:
         """check if user has access to a module"""
-        try:
-            key = f"user_modules_{self.user.username}_{self.user.carrier}"
-            cached = redis.get(key)
-            if cached:
-                return cached
-            targeted_module = filter(lambda m: m.name == module)
-            targeted_module = next(targeted_module)
-            res = targeted_module.enabled
-
-        except StopIteration:
-            res = False
-
-        redis.set(key, res, expiration_in_seconds=Duration.months(1))
-        return res
+        targeted_module = next(filter(lambda m: m.name == module, self.user_accessed_modules), None)
+        return bool(targeted_module and targeted_module.enabled)
 
     def to_pages(self, module: str, pages: Iterable[str]) -> bool:
         """check if user has access to a list of pages that belong to a module"""
-        try:
-            key = f"user_pages_{self.user.username}_{self.user.carrier}"
-            cached = redis.get(key)
-            if cached:
-                return cached
-
-            user_modules = self.user_accessed_modules
-            targeted_module = filter(lambda m: m.name == module, user_modules)
-            targeted_module = next(targeted_module)
-            if not targeted_module.enabled:
-                res = False
-            else:
-                res = all(page in targeted_module.pages for page in pages)
-
-        except StopIteration:
-            res = False
-
-        redis.set(key, res, expiration_in_seconds=Duration.months(1))
-        return res
+        targeted_module = next(filter(lambda m: m.name == module, self.user_accessed_modules), None)
+        if not targeted_module or not targeted_module.enabled:
+            return False
+        return all(page in targeted_module.pages for page in pages)
 
 
 @dataclass
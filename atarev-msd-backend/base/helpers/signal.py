@@ -1,6 +1,7 @@
 import traceback
 
 from base.redis import Redis
+from configurations.repository import ConfigurationRepository
 
 from .routes import Route
 
@@ -16,7 +17,10 @@ class PostRequestSignal:
     @classmethod
     def run(cls, response):
         """will be triggered after each request"""
-        ...
+        # expose configuration reads so hot paths doing more than one fetch per request can be spotted
+        stats = ConfigurationRepository.request_stats()
+        response.headers["X-Config-Lookups"] = str(stats["config_lookups"])
+        response.headers["X-Config-Fetches"] = str(stats["config_fetches"])
 
 
 class OnInitSignal:
@@ -24,8 +28,9 @@ class OnInitSignal:
     def run(cls):
         """will be triggered when the app first runs"""
         # logger.info(f'Starting Flask on port:{os.getenv("APP_PORT")}')
-        # clear redis cache on start (if redis is enabled by configuration)
-        Redis().clear()
+        # invalidate redis cache on start (if redis is enabled by configuration)
+        # keys of previous generations are not deleted here, they expire or get removed by `manage.py sweep_cache`
+        Redis().invalidate()
 
 
 class OnErrorSignal:
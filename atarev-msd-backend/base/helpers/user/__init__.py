@@ -1,13 +1,11 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 
-from base.redis import Redis
-from users.repository import UserRepository
+from flask import g, has_app_context
 
-from ..duration import Duration
+from users.repository import PROFILES_CONTEXT_KEY, UserRepository
 
 user_repository = UserRepository()
-redis = Redis()
 
 
 @dataclass(frozen=True)
@@ -17,6 +15,103 @@ class UserModule:
     enabled: bool
 
 
+DEFAULT_MODULES = (
+    UserModule(
+        name="MSD",
+        pages=[
+            "/product-overview",
+            "/market-share",
+            "/network-scheduling",
+            "/booking-trends",
+            "/fare-revenue",
+            "/fare-structure",
+            "/agency-analysis",
+            "/customer-segmentation",
+            "/comparative-analysis",
+            "/strategy-actions",
+            "/performance-trends-load-factor-curve",
+        ],
+        enabled=True,
+    ),
+    UserModule(
+        name="LFA",
+        pages=[
+            "/lowest-fare-calendar",
+            "/availability-trends",
+            "/price-evolution",
+            "/actions",
+            "/price-recommendation",
+            "/daily-flights-overview",
+        ],
+        enabled=True,
+    ),
+    UserModule(
+        name="FARE_ANALYZER",
+        pages=[
+            "/lowest-fare-calendar",
+            "/availability-trends",
+            "/price-evolution",
+            "/actions",
+            "/price-recommendation",
+            "/daily-flights-overview",
+        ],
+        enabled=True,
+    ),
+)
+
+
+@dataclass(frozen=True)
+class UserProfile:
+    """
+    immutable snapshot of a user profile document, it is loaded once per request
+    and every user property (role, modules, markets ...) is served from it
+    """
+
+    document: Mapping[str, Any] = field(default_factory=dict)
+    role: str = "analyst"
+    kpis: Optional[Tuple[str, ...]] = None
+    event_table_fields: Optional[Tuple[str, ...]] = None
+    markets: Tuple[Tuple[str, str], ...] = tuple()
+    modules: Tuple[UserModule, ...] = DEFAULT_MODULES
+    selected_filter_options: Mapping[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "UserProfile":
+        kpis = document.get("kpis")
+        fields = document.get("event_table_fields")
+        modules = document.get("enabledModules")
+
+        return cls(
+            document={key: value for key, value in document.items() if key != "id"},
+            role=document.get("role", "analyst"),
+            kpis=tuple(kpis) if kpis else None,
+            event_table_fields=tuple(fields) if fields else None,
+            markets=tuple((market["origin"], market["destination"]) for market in document.get("markets") or []),
+            modules=tuple(
+                UserModule(name=module, pages=modules[module]["pages"], enabled=modules[module]["enabled"]) for module in modules
+            )
+            if modules
+            else DEFAULT_MODULES,
+            selected_filter_options=document.get("selected_filter_options") or {},
+        )
+
+
+def load_profile(username: str) -> UserProfile:
+    """get user profile snapshot (only the first call within a request reads the profile from storage)"""
+    if not has_app_context():
+        return UserProfile.from_document(user_repository.get_user(username))
+
+    profiles: Dict[str, UserProfile] = g.setdefault(PROFILES_CONTEXT_KEY, {})
+    if username not in profiles:
+        profiles[username] = UserProfile.from_document(user_repository.get_user(username))
+    return profiles[username]
+
+
+def invalidate_profile(username: str) -> None:
+    """drop every cached copy of a user profile, should be called after each write to the profile"""
+    user_repository.invalidate_user(username)
+
+
 @dataclass(frozen=True)
 class User:
     username: Optional[str] = None
@@ -24,99 +119,41 @@ class User:
     is_authenticated: bool = False
 
     @property
-    def data(self):
-        return user_repository.get_user(self.username, drop_id=True)
+    def profile(self) -> UserProfile:
+        return load_profile(self.username)
 
-    @property
-    def role(self) -> str:
-        key = f"user_role_{self.username}_{self.carrier}"
-        cached_value = redis.get(key)
-        if cached_value:
-            return cached_value
+    def invalidate_profile(self) -> None:
+        invalidate_profile(self.username)
 
-        user = user_repository.get_user(self.username)
+    @property
+    def data(self) -> Dict[str, Any]:
+        return dict(self.profile.document)
 
-        role = user.get("role", "analyst")
-        redis.set(key, role, expiration_in_seconds=Duration.months(1))
-        return role
+    @property
+    def role(self) -> str:
+        return self.profile.role
 
     @property
     def kpis(self) -> Union[List[str], None]:
-        user = user_repository.get_user(self.username)
-        kpis = user.get("kpis")
-        return kpis
+        kpis = self.profile.kpis
+        return list(kpis) if kpis else kpis
 
     @property
     def event_table_selected_fields(self) -> Union[List[str], None]:
-        user = user_repository.get_user(self.username)
-        fields = user.get("event_table_fields")
-        return fields
+        fields = self.profile.event_table_fields
+        return list(fields) if fields else fields
 
     @property
-    def markets(self):
-        key = f"user_markets_{self.username}_{self.carrier}"
-        cached_value = redis.get(key)
-        if cached_value:
-            return cached_value
-        user = user_repository.get_user(self.username)
-        markets = user.get("markets", [])
-        res = [(market["origin"], market["destination"]) for market in markets]
-        redis.set(key, res, expiration_in_seconds=Duration.months(1))
-        return res
+    def selected_filter_options(self) -> Dict[str, Any]:
+        return dict(self.profile.selected_filter_options)
 
     @property
-    def modules(self) -> List[UserModule]:
-        user = user_repository.get_user(self.username)
-        modules = user.get("enabledModules")
+    def markets(self) -> List[Tuple[str, str]]:
+        return list(self.profile.markets)
 
-        if modules:
-            return [
-                UserModule(name=module, pages=modules[module]["pages"], enabled=modules[module]["enabled"]) for module in modules
-            ]
-
-        return [
-            UserModule(
-                name="MSD",
-                pages=[
-                    "/product-overview",
-                    "/market-share",
-                    "/network-scheduling",
-                    "/booking-trends",
-                    "/fare-revenue",
-                    "/fare-structure",
-                    "/agency-analysis",
-                    "/customer-segmentation",
-                    "/comparative-analysis",
-                    "/strategy-actions",
-                    "/performance-trends-load-factor-curve",
-                ],
-                enabled=True,
-            ),
-            UserModule(
-                name="LFA",
-                pages=[
-                    "/lowest-fare-calendar",
-                    "/availability-trends",
-                    "/price-evolution",
-                    "/actions",
-                    "/price-recommendation",
-                    "/daily-flights-overview",
-                ],
-                enabled=True,
-            ),
-            UserModule(
-                name="FARE_ANALYZER",
-                pages=[
-                    "/lowest-fare-calendar",
-                    "/availability-trends",
-                    "/price-evolution",
-                    "/actions",
-                    "/price-recommendation",
-                    "/daily-flights-overview",
-                ],
-                enabled=True,
-            ),
-        ]
+    @property
+    def modules(self) -> List[UserModule]:
+        return list(self.profile.modules)
 
 
 ANON_USER = User(username=None, carrier=None, is_authenticated=False)
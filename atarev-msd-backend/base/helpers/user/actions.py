@@ -1,13 +1,11 @@
 from dataclasses import asdict, dataclass
 from typing import Any
 
-from base.redis import Redis
 from users.repository import UserRepository
 
 from . import User
 
 repo = UserRepository()
-redis = Redis()
 
 
 @dataclass
@@ -29,13 +27,11 @@ class UserAction:
                 if module_name == m["name"]:
                     m["pages"].append(p_name)
 
-        redis.delete(f"user_modules_{self.user.username}_{self.user.carrier}")
-        redis.delete(f"user_pages_{self.user.username}_{self.user.carrier}")
-
         repo.update_one(
             {"username": self.user.username, "clientCode": self.user.carrier},
             {**self.user.data, "enabledModules": modules},
         )
+        self.user.invalidate_profile()
 
     def remove_page_from_module(self, module_name: str, page_name: str):
         p_name = f"/{page_name.replace('/','')}"
@@ -52,9 +48,6 @@ class UserAction:
             if m["name"] == module_name:
                 m["pages"] = updated_pages
 
-        redis.delete(f"user_modules_{self.user.username}_{self.user.carrier}")
-        redis.delete(f"user_pages_{self.user.username}_{self.user.carrier}")
-
         repo.update_one(
             {"username": self.user.username, "clientCode": self.user.carrier},
             {
@@ -62,6 +55,7 @@ class UserAction:
                 "enabledModules": modules,
             },
         )
+        self.user.invalidate_profile()
 
     def toggle_module(self, module_name: str, enabled: bool):
         modules = [asdict(m) for m in self.user.modules]
@@ -76,11 +70,11 @@ class UserAction:
                 "enabledModules": modules,
             },
         )
+        self.user.invalidate_profile()
 
     def get_value(self, key: str):
-        p = repo.find_one({"username": self.user.username,
-                           "clientCode": self.user.carrier})
-        return p[key]
+        return self.user.data[key]
 
     def add_value(self, key: str, value: Any) -> None:
         repo.update_one({"username": self.user.username, "clientCode": self.user.carrier}, {key: value})
+        self.user.invalidate_profile()
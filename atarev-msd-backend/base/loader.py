@@ -0,0 +1,96 @@
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# types a column can be declared with
+INT = "int64"
+FLOAT = "float64"
+BOOL = "bool"
+OBJECT = "object"
+CATEGORY = "category"
+DATETIME = "datetime64[ns]"
+
+Schema = Dict[str, str]
+
+# number of documents decoded before they are turned into columns
+BATCH_SIZE = 10_000
+
+
+def batches(cursor: Iterable[dict], batch_size: int) -> Iterator[List[dict]]:
+    cursor = iter(cursor)
+    while True:
+        batch = list(islice(cursor, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def cast(column: pd.Series, dtype: str) -> pd.Series:
+    """apply declared type of a column, values that do not fit it are left as they are"""
+    if dtype == FLOAT and pd.api.types.is_numeric_dtype(column):
+        return column.astype(np.float64)
+    if dtype == CATEGORY:
+        return column.astype("category")
+    if dtype == DATETIME:
+        return pd.to_datetime(column, errors="ignore")
+    return column
+
+
+def load_frame(
+    cursor: Iterable[dict],
+    schema: Optional[Schema] = None,
+    batch_size: int = BATCH_SIZE,
+    frame_class=pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    build a dataframe from a mongo cursor without holding all documents at once,
+    every batch of documents is turned into typed columns and dropped, columns are concatenated once at the end
+    (column types are the same pandas gives to a list of documents unless they are declared in `schema`)
+    """
+    if hasattr(cursor, "batch_size"):
+        cursor.batch_size(batch_size)
+
+    parts: Dict[str, List[Optional[pd.Series]]] = {name: [] for name in schema or {}}
+    sizes: List[int] = []
+
+    for batch in batches(cursor, batch_size):
+        frame = pd.DataFrame(batch)
+        del batch
+        for name in frame.columns:
+            # column seen for the first time, previous batches do not have it
+            parts.setdefault(name, [None] * len(sizes)).append(frame[name])
+        for columns in parts.values():
+            if len(columns) <= len(sizes):
+                columns.append(None)
+        sizes.append(len(frame))
+
+    if not sizes:
+        return frame_class(columns=list(schema)) if schema else frame_class()
+
+    data = {}
+    for name in list(parts):
+        column = concat(parts.pop(name), sizes)
+        data[name] = cast(column, schema[name]) if schema and name in schema else column
+
+    return frame_class(data)
+
+
+def concat(columns: List[Optional[pd.Series]], sizes: List[int]) -> pd.Series:
+    """
+    concatenate parts of a column, parts of batches that do not have the column (None) or have only nulls
+    are filled with missing values of the kind pandas would use for the whole column
+    """
+    template = next((column for column in columns if column is not None and column.notna().any()), None)
+    if template is None:
+        template = pd.Series(dtype=np.float64 if any(column is None for column in columns) else object)
+    typed = pd.api.types.is_numeric_dtype(template) or pd.api.types.is_datetime64_any_dtype(template)
+
+    def fill(column: Optional[pd.Series], size: int) -> pd.Series:
+        if column is None or (typed and column.dtype != template.dtype and column.isna().all()):
+            return template.iloc[:0].reindex(range(size))
+        return column.reset_index(drop=True)
+
+    parts = [fill(column, size) for column, size in zip(columns, sizes)]
+    return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
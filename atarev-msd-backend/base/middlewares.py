@@ -6,7 +6,9 @@ from flask import request
 from base.entities.carrier import Carrier
 from base.helpers.duration import Duration
 from base.helpers.theme import Theme
+from base.redis import CacheNamespace
 from base.repository import BaseRepository
+from base.response_cache import ResponseCache
 from base.service import BaseService
 from users.repository import UserRepository
 from utils.funcs import split_string
@@ -52,20 +54,35 @@ def attach_carriers_colors(
     return decorator
 
 
-def cache(expiration_in_seconds=Duration.hours(1)):
+def cache(
+    expiration_in_seconds=Duration.hours(1),
+    stale_in_seconds=Duration.minutes(10),
+    lock_in_seconds=Duration.minutes(2),
+    wait_in_seconds=20,
+    namespace: CacheNamespace = CacheNamespace.DEFAULT,
+):
     """
     if result for an operation is cached (based on request params) get cached version
     otherwise preform operation, cache result and return it
+
+    only one worker computes a missing key (short lock per key) while the others wait for its result.
+    after `expiration_in_seconds` (soft ttl) cached value is still served for `stale_in_seconds`
+    while one worker refreshes it, value is dropped after both passed (hard ttl)
+
+    `namespace` is the data domain the response is built from, invalidating it drops the cached response
     """
 
     def decorator(func):
         def wrapper(*args, **kwargs):
-            cached = service.check_cashed()
-            if cached:
-                return cached
-            result = func(*args, **kwargs)
-            service.cache(result, expiration_in_seconds=expiration_in_seconds)
-            return result
+            return ResponseCache.serve(
+                service.genereate_hased_key(),
+                namespace,
+                lambda: func(*args, **kwargs),
+                expiration_in_seconds,
+                stale_in_seconds,
+                lock_in_seconds,
+                wait_in_seconds,
+            )
 
         return wrapper
 
@@ -1,13 +1,43 @@
+import hashlib
+import hmac
 import json
 import os
+import re
+import zlib
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, Optional
 
 import redis
-from flask import request
+from flask import g, has_app_context, request
+from redis.exceptions import LockError
 
 # from utils.logger import Logger
 
 # logger = Logger(__name__)
 
+# values bigger than this (in bytes) are stored compressed
+COMPRESSION_THRESHOLD = 1024
+# compressed values start with this marker (json text never starts with a null byte)
+# values without marker are plain json (or plain strings written by other apps) and are read as is
+ZLIB_MARKER = b"\x00zl1"
+# field of generations hash bumped to invalidate every namespace of every host
+GLOBAL_GENERATION = "*"
+# values stored by `set_bytes` start with their signature
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+
+class CacheNamespace(Enum):
+    """
+    data domains cached keys belong to, each (host, namespace) pair has a generation counter
+    that is part of the key, bumping it makes all keys of that namespace unreachable at once
+    """
+
+    DEFAULT = "default"
+    FARES = "fares"
+    DDS = "dds"
+    CONFIG = "config"
+
 
 class Redis:
     redis_client = None
@@ -15,59 +45,260 @@ class Redis:
     def __init__(self):
         # logger.debug(f'Initialize redis client, is_redis_enabled={self.is_redis_enabled()}, REDIS_HOST={os.getenv("REDIS_HOST")}')
         if self.is_redis_enabled():
+            # responses are kept as bytes, compressed values can not be decoded as utf-8
             self.redis_client = redis.Redis(
                 host=os.getenv("REDIS_HOST"),
                 port=os.getenv("REDIS_PORT"),
                 password=os.getenv("REDIS_PASSWORD"),
-                charset="utf-8",
-                decode_responses=True,
+                decode_responses=False,
                 db=0,
             )
 
     def is_redis_enabled(self):
         return os.getenv("REDIS_ENABLED") and os.getenv("REDIS_ENABLED").lower() == "true"
 
-    def create_prefixed_key(self, key, skip_host=False):
-        prefix = os.getenv("REDIS_KEY_PREFIX") or "defaultprefix"
+    def get_host(self) -> str:
         try:
-            host = request.user.carrier
+            return request.user.carrier
         except RuntimeError:
-            host = "no_request_context"
+            return "no_request_context"
+
+    def create_prefixed_key(self, key, skip_host=False, namespace: Optional[CacheNamespace] = None):
+        prefix = os.getenv("REDIS_KEY_PREFIX") or "defaultprefix"
+        host = self.get_host()
 
         if skip_host == True:
             return f"{prefix}_{key}"
+        if namespace:
+            return f"{prefix}_{host}_{namespace.value}@{self.get_generation(host, namespace)}_{key}"
         return f"{prefix}_{host}_{key}"
 
-    def set(self, key: str, value, expiration_in_seconds=None, generate_prefix=True):
+    def get_generation(self, host: str, namespace: CacheNamespace) -> str:
+        """current generation of a namespace (global and namespace counters), generations are read once per request"""
+        if has_app_context() and "cache_generations" in g:
+            generations = g.cache_generations
+        else:
+            generations = self.__get_generations()
+            if has_app_context():
+                g.cache_generations = generations
+
+        return f"{generations.get(GLOBAL_GENERATION, 0)}.{generations.get(f'{host}:{namespace.value}', 0)}"
+
+    def __get_generations(self) -> Dict[str, int]:
+        generations = self.redis_client.hgetall(self.create_prefixed_key("cache_generations", True))
+        return {field.decode("utf-8"): int(value) for field, value in generations.items()}
+
+    def invalidate(self, namespace: Optional[CacheNamespace] = None, host: Optional[str] = None):
+        """
+        make cached keys unreachable by bumping their generation, O(1) no matter how many keys are cached
+        (all hosts and namespaces if namespace is not provided), old keys are removed by ttl or `sweep`
+        """
+        if not self.is_redis_enabled():
+            return None
+
+        field = f"{host or self.get_host()}:{namespace.value}" if namespace else GLOBAL_GENERATION
+        self.redis_client.hincrby(self.create_prefixed_key("cache_generations", True), field, 1)
+        if has_app_context():
+            g.pop("cache_generations", None)
+
+    @classmethod
+    def encode(cls, value) -> bytes:
+        """serialize value as json, compress it when it is big enough to be worth it"""
+        raw = json.dumps(value).encode("utf-8")
+        if len(raw) < COMPRESSION_THRESHOLD:
+            return raw
+        return ZLIB_MARKER + zlib.compress(raw)
+
+    @classmethod
+    def decode(cls, raw: Optional[bytes]):
+        if raw is None:
+            return None
+
+        if raw.startswith(ZLIB_MARKER):
+            raw = zlib.decompress(raw[len(ZLIB_MARKER) :])
+
+        text = raw.decode("utf-8")
+        try:
+            return json.loads(text)
+        except json.decoder.JSONDecodeError:
+            return text
+
+    def set(
+        self,
+        key: str,
+        value,
+        expiration_in_seconds=None,
+        generate_prefix=True,
+        namespace: CacheNamespace = CacheNamespace.DEFAULT,
+    ):
         if not self.is_redis_enabled():
             return None
 
-        val = json.dumps(value)
-        _key = self.create_prefixed_key(key) if generate_prefix else ""
-        self.redis_client.set(_key, val, expiration_in_seconds)
+        _key = self.create_prefixed_key(key, namespace=namespace) if generate_prefix else key
+        self.redis_client.set(_key, self.encode(value), expiration_in_seconds)
 
-    def get(self, key: str, generate_prefix=True):
+    def get(self, key: str, generate_prefix=True, namespace: CacheNamespace = CacheNamespace.DEFAULT):
         if not self.is_redis_enabled():
             return None
-        _key = self.create_prefixed_key(key) if generate_prefix else key
+        _key = self.create_prefixed_key(key, namespace=namespace) if generate_prefix else key
+
+        return self.decode(self.redis_client.get(_key))
+
+    def set_bytes(
+        self,
+        key: str,
+        value: bytes,
+        expiration_in_seconds=None,
+        namespace: CacheNamespace = CacheNamespace.DEFAULT,
+    ):
+        """
+        store a value that is already serialized (not json), it is read back with `get_bytes`
+        (value is signed with the app secret, redis is shared with other apps, nothing is stored without a secret)
+        """
+        signature = self.sign(value)
+        if not self.is_redis_enabled() or signature is None:
+            return None
+        self.redis_client.set(self.create_prefixed_key(key, namespace=namespace), signature + value, expiration_in_seconds)
 
-        if not self.redis_client.get(_key):
+    def get_bytes(self, key: str, namespace: CacheNamespace = CacheNamespace.DEFAULT) -> Optional[bytes]:
+        """value stored by `set_bytes`, None if it is missing, its signature does not match or there is no app secret"""
+        if not self.is_redis_enabled() or not os.getenv("SECRET_KEY"):
+            return None
+        raw = self.redis_client.get(self.create_prefixed_key(key, namespace=namespace))
+        if raw is None:
+            return None
+
+        signature, value = raw[:SIGNATURE_SIZE], raw[SIGNATURE_SIZE:]
+        expected = self.sign(value)
+        if expected is None or not hmac.compare_digest(signature, expected):
+            return None
+        return value
+
+    @classmethod
+    def sign(cls, value: bytes) -> Optional[bytes]:
+        """HMAC of a value with the app secret (`SECRET_KEY`), None when it is not set (never signed with an empty key)"""
+        secret = os.getenv("SECRET_KEY")
+        if not secret:
+            return None
+        return hmac.new(secret.encode("utf-8"), value, hashlib.sha256).digest()
+
+    def get_many(
+        self,
+        keys: Iterable[str],
+        generate_prefix=True,
+        namespace: CacheNamespace = CacheNamespace.DEFAULT,
+    ) -> Dict[str, Any]:
+        """get a group of keys in one round trip, missing keys are not part of the result"""
+        keys = list(keys)
+        if not self.is_redis_enabled() or not keys:
+            return {}
+
+        _keys = [self.create_prefixed_key(key, namespace=namespace) if generate_prefix else key for key in keys]
+        values = [self.decode(raw) for raw in self.redis_client.mget(_keys)]
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def set_many(
+        self,
+        mapping: Dict[str, Any],
+        expiration_in_seconds=None,
+        generate_prefix=True,
+        namespace: CacheNamespace = CacheNamespace.DEFAULT,
+    ):
+        """set a group of keys in one round trip"""
+        if not self.is_redis_enabled() or not mapping:
+            return None
+
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            _key = self.create_prefixed_key(key, namespace=namespace) if generate_prefix else key
+            pipeline.set(_key, self.encode(value), expiration_in_seconds)
+        pipeline.execute()
+
+    @contextmanager
+    def lock(self, key: str, expiration_in_seconds: int) -> Iterator[bool]:
+        """
+        non blocking lock shared by all workers, yields whether current worker holds it
+        (lock is released on exit or once it expires)
+        """
+        if not self.is_redis_enabled():
+            yield True
             return
+
+        lock = self.redis_client.lock(self.create_prefixed_key(f"lock_{key}"), timeout=expiration_in_seconds)
+        acquired = lock.acquire(blocking=False)
         try:
-            return json.loads(self.redis_client.get(_key))
-        except json.decoder.JSONDecodeError:
-            return self.redis_client.get(_key)
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except LockError:
+                    # lock expired (and may be owned by another worker by now)
+                    pass
 
-    def clear(self):
+    def increment(self, key: str, field: str, amount: int = 1):
+        """increment a counter stored in a hash"""
         if not self.is_redis_enabled():
             return None
+        self.redis_client.hincrby(self.create_prefixed_key(key), field, amount)
 
-        all_keys = self.redis_client.keys(self.create_prefixed_key("*", True))
-        # logger.info(f"Cache clear was requested, found {len(all_keys)} keys to be deleted")
-        if all_keys:
-            self.redis_client.delete(*all_keys)
-        all_keys = self.redis_client.keys(self.create_prefixed_key("*", True))
-        # logger.info(f"Cache clear completed")
+    def get_counters(self, key: str) -> Dict[str, int]:
+        if not self.is_redis_enabled():
+            return {}
+        counters = self.redis_client.hgetall(self.create_prefixed_key(key))
+        return {field.decode("utf-8"): int(value) for field, value in counters.items()}
+
+    def sweep(self, batch_size: int = 500) -> int:
+        """
+        incrementally (SCAN based) delete keys of outdated generations, returns number of deleted keys
+        keys written before namespaces were introduced are deleted as well if they have no expiry
+        """
+        if not self.is_redis_enabled():
+            return 0
+
+        prefix = os.getenv("REDIS_KEY_PREFIX") or "defaultprefix"
+        pattern = re.compile(rf"^{re.escape(prefix)}_(?P<host>.+?)_(?P<namespace>[a-z]+)@(?P<generation>\d+\.\d+)_")
+        namespaces = {namespace.value: namespace for namespace in CacheNamespace}
+        generations = self.__get_generations()
+        deleted = 0
+        batch = []
+
+        def flush():
+            # unstamped keys are checked in one round trip before being deleted
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key, _ in batch:
+                pipeline.ttl(key)
+                pipeline.type(key)
+            results = pipeline.execute()
+            ttls, types = results[::2], results[1::2]
+            outdated = [
+                key for (key, stamped), ttl, typ in zip(batch, ttls, types) if stamped or (ttl == -1 and typ == b"string")
+            ]
+            if outdated:
+                self.redis_client.delete(*outdated)
+            batch.clear()
+            return len(outdated)
+
+        for raw_key in self.redis_client.scan_iter(match=f"{prefix}_*", count=batch_size):
+            key = raw_key.decode("utf-8")
+            match = pattern.match(key)
+
+            if match and match["namespace"] in namespaces:
+                host, namespace = match["host"], match["namespace"]
+                current = f"{generations.get(GLOBAL_GENERATION, 0)}.{generations.get(f'{host}:{namespace}', 0)}"
+                if match["generation"] != current:
+                    batch.append((raw_key, True))
+            elif not key.startswith(self.create_prefixed_key("cache_generations", True)):
+                batch.append((raw_key, False))
+
+            if len(batch) >= batch_size:
+                deleted += flush()
+
+        if batch:
+            deleted += flush()
+        return deleted
 
     def delete(self, key: str):
+        if not self.is_redis_enabled():
+            return None
         self.redis_client.delete(key)
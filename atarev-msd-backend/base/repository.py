@@ -23,25 +23,25 @@ class BaseRepository:
         return self.collection
 
     # @measure_time(message="BaseRepository::find_one()")
-    def find_one(self, filter={}, sort=[]):
+    def find_one(self, filter={}, sort=[], projection=None):
         # logger.debug(f"mongo find_one, collection:{self.collection}", {"query": filter})
-        result = self._db[self.collection].find_one(filter, sort=sort)
+        result = self._db[self.collection].find_one(filter, projection, sort=sort)
         return result
 
-    def find(self, filter={}):
+    def find(self, filter={}, projection=None):
         # logger.debug(f"mongo find, collection:{self.collection}", {"query": filter})
-        result = self._db[self.collection].find(filter)
+        result = self._db[self.collection].find(filter, projection)
         return result
 
     # @measure_time(message="BaseRepository::aggregate()")
-    def aggregate(self, pipline):
+    def aggregate(self, pipline, **kwargs):
         # logger.debug(f"mongo aggregate, collection:{self.collection}", {"query": pipline})
-        result = self._db[self.collection].aggregate(pipline)
+        result = self._db[self.collection].aggregate(pipline, **kwargs)
         return result
 
     def get_column(self, key: str) -> str:
         """get a column by key (will return the same key if value not found)"""
-        return self.columns.get("key") or key
+        return self._columns.get(key) or key
 
     @property
     def redis(self):
@@ -0,0 +1,105 @@
+"""
+responses cached by @cache decorator (`base.middlewares`), entries are stored as {"value": ..., "soft_expiry": <timestamp>}.
+only one worker computes a missing or stale key (short lock per key), the others serve the stale value
+or wait for the new one
+"""
+import time
+from typing import Any, Callable, Dict
+
+from flask import request
+
+from base.redis import CacheNamespace, Redis
+
+
+class ResponseCache:
+    STATS_KEY = "response_cache_stats"
+    POLL_INTERVAL_IN_SECONDS = 0.2
+    redis = Redis()
+
+    @classmethod
+    def serve(
+        cls,
+        key: str,
+        namespace: CacheNamespace,
+        func: Callable[[], Any],
+        expiration_in_seconds: int,
+        stale_in_seconds: int,
+        lock_in_seconds: int,
+        wait_in_seconds: int,
+    ):
+        """cached response of `key`, `func` computes it when it is missing or stale"""
+        cached = cls.redis.get(key, namespace=namespace)
+
+        if cached and not cls.is_entry(cached):
+            # value cached before soft ttl was introduced
+            cls.count("hit")
+            return cached
+
+        if cached and not cls.is_stale(cached):
+            cls.count("hit")
+            return cached["value"]
+
+        with cls.redis.lock(key, lock_in_seconds) as acquired:
+            if acquired:
+                cls.count("miss")
+                return cls.compute(func, key, namespace, expiration_in_seconds, stale_in_seconds)
+
+        if cached:
+            cls.count("stale")
+            return cached["value"]
+
+        cls.count("wait")
+        cached = cls.wait(key, namespace, wait_in_seconds)
+        if cached:
+            return cached["value"]
+
+        # worker holding the lock is too slow (or failed), compute without lock
+        cls.count("miss")
+        return cls.compute(func, key, namespace, expiration_in_seconds, stale_in_seconds)
+
+    @classmethod
+    def is_entry(cls, cached) -> bool:
+        return type(cached) is dict and "soft_expiry" in cached and "value" in cached
+
+    @classmethod
+    def is_stale(cls, cached) -> bool:
+        return cached["soft_expiry"] <= time.time()
+
+    @classmethod
+    def compute(
+        cls,
+        func: Callable[[], Any],
+        key: str,
+        namespace: CacheNamespace,
+        expiration_in_seconds: int,
+        stale_in_seconds: int,
+    ):
+        result = func()
+        # empty results are not cached (same as before)
+        if result:
+            entry = {"value": result, "soft_expiry": time.time() + expiration_in_seconds}
+            cls.redis.set(key, entry, expiration_in_seconds + stale_in_seconds, namespace=namespace)
+        return result
+
+    @classmethod
+    def wait(cls, key: str, namespace: CacheNamespace, wait_in_seconds: int):
+        """wait for another worker to cache the result"""
+        deadline = time.time() + wait_in_seconds
+        while time.time() < deadline:
+            time.sleep(cls.POLL_INTERVAL_IN_SECONDS)
+            cached = cls.redis.get(key, namespace=namespace)
+            if cached and cls.is_entry(cached):
+                return cached
+
+    @classmethod
+    def count(cls, event: str):
+        cls.redis.increment(cls.STATS_KEY, f"{request.path}|{event}")
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, int]]:
+        """hit/miss/wait/stale counters grouped by endpoint"""
+        res = {}
+        for field, value in cls.redis.get_counters(cls.STATS_KEY).items():
+            path, event = field.rsplit("|", 1)
+            res.setdefault(path, {"hit": 0, "miss": 0, "wait": 0, "stale": 0})[event] = value
+        return res
@@ -1,9 +1,12 @@
 import hashlib
-from typing import Union
+from typing import List, Optional, Union
 
 from flask import request
 
 from base.dataframe import DataFrame
+from base.executor import QUERY_TIMEOUT, query_executor
+from base.redis import CacheNamespace
+from base.repository import BaseRepository
 from utils.funcs import from_int_to_datetime, get_market_carrier_map, split_string
 
 
@@ -14,8 +17,8 @@ class BaseService:
     handler_class = None
 
     def lambda_df(self, data) -> DataFrame:
-        """convert mongodb cursor into python dataframe by lambda function"""
-        return DataFrame(list(map(lambda x: x, data)))
+        """convert mongodb cursor into python dataframe"""
+        return DataFrame.from_cursor(data)
 
     def get_repository_class(self):
         if not self.repository_class:
@@ -36,6 +39,23 @@ class BaseService:
     def _aggregte(self, pipeline) -> DataFrame:
         return self.lambda_df(self.repository.aggregate(pipeline))
 
+    def aggregate_many(
+        self,
+        pipelines: List[list],
+        repository: Optional[BaseRepository] = None,
+        timeout: int = QUERY_TIMEOUT,
+    ) -> List[DataFrame]:
+        """
+        run independent pipelines concurrently (on service repository by default) and return their results as dataframes
+        (in the same order), every query is aborted by the server once it runs for more than `timeout` seconds
+        """
+        repository = repository or self.repository
+
+        def task(pipeline):
+            return lambda: self.lambda_df(repository.aggregate(pipeline, maxTimeMS=timeout * 1000))
+
+        return query_executor.run([task(pipeline) for pipeline in pipelines], timeout)
+
     def stringify(self, data):
         return self.repository.stringify(data)
 
@@ -83,13 +103,19 @@ class BaseService:
         string = "_".join([f"{k}={v}" for k, v in params.items() if v])
         return hashlib.sha256(string.encode("utf8")).hexdigest()
 
-    def cache(self, value, key: Union[str, None] = None, expiration_in_seconds=3600):
+    def cache(
+        self,
+        value,
+        key: Union[str, None] = None,
+        expiration_in_seconds=3600,
+        namespace: CacheNamespace = CacheNamespace.DEFAULT,
+    ):
         hashed = key if key else self.genereate_hased_key()
-        self.repository.redis.set(hashed, value, expiration_in_seconds)
+        self.repository.redis.set(hashed, value, expiration_in_seconds, namespace=namespace)
 
-    def check_cashed(self, key: Union[str, None] = None):
+    def check_cashed(self, key: Union[str, None] = None, namespace: CacheNamespace = CacheNamespace.DEFAULT):
         cache_key = key if key else self.genereate_hased_key()
-        cached = self.repository.redis.get(cache_key)
+        cached = self.repository.redis.get(cache_key, namespace=namespace)
         if cached:
             return cached
         return
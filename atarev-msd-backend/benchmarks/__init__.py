@@ -0,0 +1,6 @@
+"""
+standalone scripts measuring hot paths of the api
+
+scripts are executed as modules from the project root (eg: `python -m benchmarks.user_profile_reads`)
+and use the same `.env` configuration as the app
+"""
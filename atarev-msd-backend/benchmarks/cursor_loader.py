@@ -0,0 +1,85 @@
+"""
+peak memory and wall time of building a dataframe from a cursor, list of documents (before) vs column buffers (after),
+on synthetic documents shaped like `dds_pgs` aggregation results (no database needed)
+
+every path runs in its own process so that peak RSS is not shared between them
+usage : python -m benchmarks.cursor_loader [rows]
+"""
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import deque
+from typing import Iterator
+
+import pandas as pd
+
+from base.loader import CATEGORY, FLOAT, INT, load_frame
+
+CARRIERS = ["PY", "LH", "TK", "BA", "AF", "KL", "QR", "EK"]
+AIRPORTS = ["LHR", "IST", "CDG", "AMS", "DOH", "DXB", "FRA", "ATH", "LCA", "JFK"]
+SCHEMA = {
+    "dom_op_al_code": CATEGORY,
+    "orig_code": CATEGORY,
+    "dest_code": CATEGORY,
+    "travel_year": INT,
+    "travel_month": INT,
+    "travel_day_of_week": INT,
+    "seg_class": CATEGORY,
+    "rbkd": CATEGORY,
+    "pax": INT,
+    "blended_rev": FLOAT,
+    "blended_fare": FLOAT,
+}
+
+
+def documents(rows: int) -> Iterator[dict]:
+    """decoded documents are yielded one by one like a cursor does"""
+    rnd = random.Random(0)
+    for _ in range(rows):
+        yield {
+            "dom_op_al_code": rnd.choice(CARRIERS),
+            "orig_code": rnd.choice(AIRPORTS),
+            "dest_code": rnd.choice(AIRPORTS),
+            "travel_year": rnd.choice([2022, 2023, 2024]),
+            "travel_month": rnd.randint(1, 12),
+            "travel_day_of_week": rnd.randint(1, 7),
+            "seg_class": rnd.choice(["ECO", "BUS"]),
+            "rbkd": rnd.choice("YBMHQKLTVX"),
+            "pax": rnd.randint(1, 300),
+            "blended_rev": rnd.uniform(100, 100000),
+            "blended_fare": rnd.uniform(50, 2000),
+        }
+
+
+PATHS = {
+    # cost of producing the documents, shared by all paths
+    "documents only": lambda rows: pd.DataFrame(deque(documents(rows), maxlen=0)),
+    "before": lambda rows: pd.DataFrame(list(map(lambda x: x, documents(rows)))),
+    "after (inferred)": lambda rows: load_frame(documents(rows)),
+    "after (schema)": lambda rows: load_frame(documents(rows), SCHEMA),
+}
+
+
+def run(path: str, rows: int):
+    start = time.perf_counter()
+    df = PATHS[path](rows)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    frame = df.memory_usage(deep=True).sum() / 1024 / 1024
+    print(f"{path}: {elapsed * 1000:.0f} ms, peak rss {peak:.0f} MB, frame {frame:.0f} MB")
+
+
+def main(rows: int):
+    for path in PATHS:
+        subprocess.run([sys.executable, "-m", "benchmarks.cursor_loader", str(rows), path], check=True)
+
+
+if __name__ == "__main__":
+    _rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    if len(sys.argv) > 2:
+        run(sys.argv[2], _rows)
+    else:
+        main(_rows)
@@ -0,0 +1,47 @@
+"""
+number of mongo round trips made to load data of an event alert evaluation (rules, events and inventory of every
+start date of events), inventory used to be fetched by one query for each start date, now it is one query for all of them
+
+usage : python -m benchmarks.event_rule_reads <host_code>
+"""
+import os
+import sys
+
+from benchmarks.utils import register_command_counter, timer
+
+# count raw mongo round trips (redis would hide them after the first request)
+os.environ["REDIS_ENABLED"] = "false"
+counter = register_command_counter()
+
+import pandas as pd  # noqa: E402
+
+from rules.events.evaluation.data import EventData, InventoryData, RuleData  # noqa: E402
+
+
+def before(host_code: str) -> dict:
+    list(RuleData(host_code).get())
+    events = EventData(host_code).get()
+    return {date: InventoryData(host_code, [date]).get()[date] for date in events.start_date.unique().tolist()}
+
+
+def after(host_code: str) -> dict:
+    list(RuleData(host_code).get())
+    events = EventData(host_code).get()
+    return InventoryData(host_code, events.start_date.unique().tolist()).get()
+
+
+def main(host_code: str):
+    results = []
+    for label, func in (("before", before), ("after", after)):
+        counter.reset()
+        with timer(label):
+            results.append(func(host_code))
+        print(f"{label}: {len(results[-1])} start dates -> {sum(counter.commands.values())} mongo round trips")
+
+    for date, inv in results[0].items():
+        pd.testing.assert_frame_equal(inv, results[1][date])
+    print("inventory of every start date is identical")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
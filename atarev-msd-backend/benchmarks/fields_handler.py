@@ -0,0 +1,89 @@
+"""
+wall time of shaping a table with per cell handlers (before) vs column handlers (after),
+on a synthetic table shaped like network and fare structure tables (no database needed)
+
+usage : python -m benchmarks.fields_handler [rows]
+"""
+import random
+import sys
+
+import pandas as pd
+
+from base.handler import FieldsHandler
+from benchmarks.utils import timer
+
+CARRIERS = ["PY", "LH", "TK", "BA", "AF", "KL", "QR", "EK"]
+COLORS = {"PY": "#ff0000", "LH": "#00ff00", "TK": "#0000ff"}
+
+
+class CellHandler(FieldsHandler):
+    def dom_op_al_code_handler(self, row, col):
+        return {"color": COLORS[row[col]] if row[col] in COLORS else "#ffffff", "value": row[col]}
+
+    def pax_handler(self, row, col):
+        return self.seprate_thousands(row[col])
+
+    def blended_rev_handler(self, row, col):
+        return "$" + self.seprate_thousands(row[col])
+
+    def pax_ratio_handler(self, row, col):
+        return {"ratio": row[col], "text": str(row["pax"])}
+
+    def path_handler(self, row, col):
+        if row["bound"] == "Inbound":
+            val = row[col].split("-")
+            return f"{val[1]}-{val[0]}"
+        return row[col]
+
+
+class ColumnHandler(FieldsHandler):
+    def dom_op_al_code_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return df[col].map(lambda code: {"color": COLORS[code] if code in COLORS else "#ffffff", "value": code})
+
+    def pax_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return df[col].astype(object).map(self.seprate_thousands)
+
+    def blended_rev_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return "$" + df[col].astype(object).map(self.seprate_thousands)
+
+    def pax_ratio_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return pd.Series(
+            [{"ratio": ratio, "text": str(pax)} for ratio, pax in zip(df[col].astype(object), df["pax"].astype(object))],
+            index=df.index,
+            dtype=object,
+        )
+
+    def path_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        legs = df[col].str.split("-")
+        return df[col].where(df["bound"] != "Inbound", legs.str[1] + "-" + legs.str[0])
+
+
+def table(rows: int) -> pd.DataFrame:
+    rnd = random.Random(0)
+    return pd.DataFrame(
+        {
+            "dom_op_al_code": [rnd.choice(CARRIERS) for _ in range(rows)],
+            "bound": [rnd.choice(["Inbound", "Outbound"]) for _ in range(rows)],
+            "path": [f"{rnd.choice(CARRIERS)}X-{rnd.choice(CARRIERS)}Y" for _ in range(rows)],
+            "pax": [rnd.randint(1, 300000) for _ in range(rows)],
+            "blended_rev": [rnd.randint(1, 10000000) for _ in range(rows)],
+            "pax_ratio": [rnd.random() for _ in range(rows)],
+            "travel_month": [rnd.randint(1, 12) for _ in range(rows)],
+        }
+    )
+
+
+def main(rows: int):
+    df = table(rows)
+
+    with timer(f"cell handlers ({rows} rows)"):
+        before = CellHandler().handle_rows(df)
+    with timer(f"column handlers ({rows} rows)"):
+        after = ColumnHandler().handle_rows(df)
+
+    assert before == after, "column handlers do not return what cell handlers return"
+    print("outputs are identical")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,117 @@
+"""
+wall time of building flight rule facts with `Fact` (all fares filtered and sorted again for every flight and rule)
+vs `FareIndex` / `FlightFacts` (fares indexed once, facts computed once per flight and competitor criteria),
+`Fact` is timed on a sample of flights and scaled to all of them, facts of the sample are checked to be identical
+(no database needed)
+
+usage : python -m benchmarks.flight_rules [flights] [rules] [sample]
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.utils import timer
+from rules.flights.evaluation.fact import Fact, FareIndex, FlightFacts
+
+CARRIERS = ["CY", "A3", "OA", "W6", "GQ"]
+CLASSES = ["Y", "B", "M", "H", "K"]
+
+
+def flights(count: int) -> list:
+    rnd = random.Random(1)
+    items = []
+    for i in range(count):
+        departure_date, departure_time = 20240301 + i % 28, rnd.randint(0, 23) * 100 + rnd.choice([0, 15, 30, 45])
+        items.append(
+            {
+                "carrier_code": "CY",
+                "flt_num": 1000 + i,
+                "origin": "LCA",
+                "destination": "ATH",
+                "departure_date": departure_date,
+                "departure_time": departure_time,
+                "arrival_date": departure_date,
+                "arrival_time": departure_time,
+                "departure_day": departure_date % 100,
+                "departure_month": 3,
+                "departure_year": 2024,
+                "arrival_day": departure_date % 100,
+                "arrival_month": 3,
+                "arrival_year": 2024,
+                "dtd": departure_date % 100,
+                "dow": departure_date % 7,
+            }
+        )
+    return items
+
+
+def fares(items: list, competitors_per_flight: int) -> pd.DataFrame:
+    """a fare per class of every host flight and some competitor fares around each of them"""
+    rnd = random.Random(2)
+    rows = []
+    for flt in items:
+        departures = [("CY", flt["flt_num"], flt["departure_time"])]
+        for _ in range(competitors_per_flight):
+            departures.append((rnd.choice(CARRIERS[1:]), 6000 + rnd.randint(0, 999), rnd.randint(0, 23) * 100))
+        for carrier, flt_num, departure_time in departures:
+            for cls in rnd.sample(CLASSES, 2):
+                rows.append(
+                    {
+                        "carrier_code": carrier,
+                        "origin": "LCA",
+                        "destination": "ATH",
+                        "cabin": "ECONOMY",
+                        "class": cls,
+                        "departure_date": flt["departure_date"],
+                        "departure_time": departure_time,
+                        "arrival_date": flt["departure_date"],
+                        "arrival_time": departure_time if carrier != "CY" else flt["arrival_time"],
+                        "flt_num": flt_num,
+                        "fare": float(rnd.randint(50, 300)),
+                        "currency": "EUR",
+                        "is_connecting": False,
+                        "op_code": carrier,
+                        "mk_code": carrier,
+                        "lf": rnd.randint(0, 100),
+                    }
+                )
+    return pd.DataFrame(rows)
+
+
+def criterias(count: int) -> list:
+    rnd = random.Random(3)
+    return [{"code": rnd.choice(CARRIERS[1:]), "range": rnd.choice([(0, 2), (0, 4), (1, 6), (0, 12)])} for _ in range(count)]
+
+
+def main(flight_count: int, rule_count: int, sample_count: int):
+    items = flights(flight_count)
+    df, rules = fares(items, competitors_per_flight=3), criterias(rule_count)
+    sample = random.Random(0).sample(items, min(sample_count, len(items)))
+    print(f"{flight_count} flights, {rule_count} rules, {df.shape[0]} fares")
+
+    start = time.perf_counter()
+    with timer(f"Fact ({len(sample)} flights x {rule_count} rules)"):
+        before = [
+            Fact(fares=df, flight=flt, cabin="ECONOMY", competitor_criteria=criteria).get() for flt in sample for criteria in rules
+        ]
+    print(f"Fact scaled to {flight_count} flights : {(time.perf_counter() - start) * flight_count / len(sample):.1f}s")
+
+    with timer(f"FareIndex / FlightFacts ({flight_count} flights x {rule_count} rules)"):
+        index = FareIndex(df)
+        after = {}
+        for flt in items:
+            flight_facts = FlightFacts(index=index, flight=flt, cabin="ECONOMY")
+            after[flt["flt_num"]] = [flight_facts.get(criteria) for criteria in rules]
+
+    assert before == [facts for flt in sample for facts in after[flt["flt_num"]]], "facts do not match"
+    print(f"facts of {len(sample)} sampled flights are identical")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 2,
+    )
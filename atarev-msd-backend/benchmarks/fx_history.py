@@ -0,0 +1,93 @@
+"""
+historical currency conversion of price evolution fares, per row closest date lookup in nested dicts (before)
+vs as-of join over date sorted rate arrays (after), on synthetic rates and fares (no database needed)
+
+usage : python -m benchmarks.fx_history [rows]
+"""
+import sys
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from base.entities.exchange_rate import RateHistory
+from benchmarks.utils import timer
+
+CURRENCIES = ["USD", "EUR", "GBP", "TRY", "AED", "SAR"]
+TARGET = "EUR"
+DAYS = 180
+
+
+def records(start: date):
+    rng = np.random.default_rng(0)
+    for day in range(DAYS):
+        dt = start + timedelta(days=day)
+        # rates are not published on weekends
+        if dt.weekday() >= 5:
+            continue
+        rates = {curr: float(value) for curr, value in zip(CURRENCIES, rng.uniform(0.5, 30, len(CURRENCIES)))}
+        rates["USD"] = 1.0
+        yield {"date": int(dt.strftime("%Y%m%d")), "rates": rates}
+
+
+def fares(start: date, rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    dates = pd.to_datetime(start) + pd.to_timedelta(rng.integers(0, DAYS, rows), unit="D")
+    return pd.DataFrame(
+        {
+            "fareAmount": rng.uniform(50, 2000, rows),
+            "fareCurrency": rng.choice(CURRENCIES, rows),
+            "norm_date": dates.strftime("%Y%m%d").astype(int),
+        }
+    )
+
+
+def before(recs, df: pd.DataFrame) -> pd.Series:
+    """nested per date dicts of every pair and closest date search for each row"""
+    rates: Dict[int, Dict[str, float]] = {}
+    for r in recs:
+        rates[r["date"]] = {f"{base}-{TARGET}": r["rates"][TARGET] / r["rates"][base] for base in CURRENCIES}
+
+    def as_int(dt: date) -> int:
+        return int(dt.strftime("%Y%m%d"))
+
+    def closest(value: int) -> Dict[str, float]:
+        if rates.get(value):
+            return rates[value]
+        current = pd.to_datetime(str(value)).date()
+        dates = deque([as_int(current - timedelta(days=1)), as_int(current + timedelta(days=1))])
+        while dates:
+            prev, nxt = dates.popleft(), dates.popleft()
+            if rates.get(prev):
+                return rates[prev]
+            if rates.get(nxt):
+                return rates[nxt]
+            dates.appendleft(as_int(pd.to_datetime(str(nxt)).date() + timedelta(days=1)))
+            dates.appendleft(as_int(pd.to_datetime(str(prev)).date() - timedelta(days=1)))
+        return {}
+
+    return df.apply(lambda row: round(row.fareAmount * (closest(row.norm_date).get(f"{row.fareCurrency}-{TARGET}") or 1)), axis=1)
+
+
+def after(recs, df: pd.DataFrame) -> np.ndarray:
+    history = RateHistory.from_records(recs)
+    return np.round(history.convert(df.fareAmount, df.fareCurrency, df.norm_date, TARGET)).astype(int)
+
+
+def main(rows: int):
+    start = date(2023, 1, 1)
+    recs = list(records(start))
+    df = fares(start, rows)
+
+    with timer(f"before ({rows} rows)"):
+        expected = before(recs, df)
+    with timer(f"after ({rows} rows)"):
+        result = after(recs, df)
+
+    print(f"mismatching rows: {int((expected.to_numpy() != result).sum())}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,59 @@
+"""
+size and (de)serialization latency of cached figure payloads, plain json vs compressed encoding
+
+figures are fetched through the api (auth token is read from BENCHMARK_TOKEN env variable)
+usage : python -m benchmarks.redis_payloads "orig_city_airport=LCA&dest_city_airport=ATH&..."
+"""
+import json
+import os
+import sys
+import timeit
+
+from base.redis import Redis
+from index import start_app
+
+FIGURE_ENDPOINTS = [
+    "product-overview/cos-breakdown",
+    "product-overview/product-map",
+    "market-share/trends",
+    "market-share/share-vs-fare",
+    "fare-revenue/class-mix",
+    "fare-revenue/revenue-trends",
+    "agency-analysis/agency-graphs",
+    "booking-trends/booking-curve",
+    "network-scheduling/beyond-points",
+]
+REPEAT = 50
+
+
+def measure(payload):
+    plain = json.dumps(payload).encode("utf-8")
+    encoded = Redis.encode(payload)
+    return {
+        "json_bytes": len(plain),
+        "encoded_bytes": len(encoded),
+        "json_ms": timeit.timeit(lambda: json.loads(json.dumps(payload)), number=REPEAT) / REPEAT * 1000,
+        "encoded_ms": timeit.timeit(lambda: Redis.decode(Redis.encode(payload)), number=REPEAT) / REPEAT * 1000,
+    }
+
+
+def main(query: str):
+    client = start_app().test_client()
+    headers = {"Authorization": f"Bearer {os.getenv('BENCHMARK_TOKEN')}"}
+
+    print(f"{'endpoint':40} {'json':>10} {'encoded':>10} {'ratio':>6} {'json ms':>8} {'enc ms':>8}")
+    for endpoint in FIGURE_ENDPOINTS:
+        response = client.get(f"/api/msdv2/{endpoint}?{query}", headers=headers)
+        if response.status_code != 200 or not response.is_json:
+            print(f"{endpoint:40} failed ({response.status_code})")
+            continue
+
+        res = measure(response.get_json())
+        print(
+            f"{endpoint:40} {res['json_bytes']:>10} {res['encoded_bytes']:>10} "
+            f"{res['json_bytes'] / res['encoded_bytes']:>6.1f} {res['json_ms']:>8.2f} {res['encoded_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "")
@@ -0,0 +1,128 @@
+"""
+wall time of checking flight rules against facts with `Evaluate` (conditions read again for every fact,
+fail reasons generated right away as before) vs compiled conditions (fail reasons generated only when read)
+vs batch evaluation (facts as one table, conditions as masks), rules are shaped like the ones `GenerateFlightRule` stores,
+most of them target other markets (no database needed)
+
+usage : python -m benchmarks.rule_evaluation [facts] [rules]
+"""
+import random
+import sys
+
+from benchmarks.utils import timer
+from rules.core.batch import FactTable, evaluate_batch
+from rules.core.compiled import RuleCache
+from rules.core.eval import Evaluate
+from rules.flights.evaluation.incremental import required
+
+CITIES = ["LCA", "ATH", "PFO", "HER", "SKG", "TLV", "BEY", "AMM", "CAI", "DXB", "LHR", "CDG"]
+COMPETITORS = ["A3", "OA", "W6", "GQ"]
+
+
+def rules(count: int) -> list:
+    rnd = random.Random(1)
+    items = []
+    for i in range(count):
+        start = rnd.randint(0, 3)
+        items.append(
+            {
+                "_id": f"rule-{i}",
+                "updated_at": 1,
+                "conditions": {
+                    "all": [
+                        {"value": rnd.sample(CITIES, 2), "operator": "in", "path": "market.originCityCode", "fact": "market"},
+                        {"value": rnd.sample(CITIES, 3), "operator": "in", "path": "market.destCityCode", "fact": "market"},
+                        {"value": "ECONOMY", "operator": "equal", "path": "cabin.cabinCode", "fact": "cabin"},
+                        {
+                            "field": "competitor_range",
+                            "all": [
+                                {
+                                    "value": -start,
+                                    "operator": "greaterThanInclusive",
+                                    "path": "competitor.departureTimeDifferenceInHoursMin",
+                                    "fact": "competitor",
+                                },
+                                {
+                                    "value": start + 2,
+                                    "operator": "lessThanInclusive",
+                                    "path": "competitor.departureTimeDifferenceInHoursMax",
+                                    "fact": "competitor",
+                                },
+                            ],
+                        },
+                        {
+                            "value": rnd.choice(COMPETITORS),
+                            "operator": "equal",
+                            "path": "competitor.competitorCode",
+                            "fact": "competitor",
+                        },
+                        {
+                            "field": "dtd",
+                            "all": [
+                                {"value": 0, "operator": "greaterThanInclusive", "path": "leg.daysToDeparture", "fact": "leg"},
+                                {
+                                    "value": rnd.randint(7, 60),
+                                    "operator": "lessThanInclusive",
+                                    "path": "leg.daysToDeparture",
+                                    "fact": "leg",
+                                },
+                            ],
+                        },
+                    ]
+                },
+            }
+        )
+    return items
+
+
+def facts(count: int) -> list:
+    rnd = random.Random(2)
+    return [
+        {
+            "market": {"originCityCode": rnd.choice(CITIES), "destCityCode": rnd.choice(CITIES)},
+            "cabin": {"cabinCode": rnd.choice(["ECONOMY", "BUSINESS"])},
+            "leg": {"deptDate": 20240301 + rnd.randint(0, 27), "daysToDeparture": rnd.randint(0, 90)},
+            "competitor": {
+                "competitorCode": rnd.choice(COMPETITORS),
+                "departureTimeDifferenceInHoursMin": rnd.randint(-4, 4),
+                "departureTimeDifferenceInHoursMax": rnd.randint(-4, 4),
+            },
+            "fares": {"maf": rnd.randint(50, 400)},
+        }
+        for _ in range(count)
+    ]
+
+
+def main(fact_count: int, rule_count: int):
+    items, objs = rules(rule_count), facts(fact_count)
+
+    with timer(f"interpreted conditions ({fact_count} facts x {rule_count} rules)"):
+        before = []
+        for obj in objs:
+            for rule in items:
+                res = Evaluate(rule["conditions"]["all"], obj, required=required)()
+                # reasons used to be generated for every failure
+                before.append((res.result, res.reason))
+
+    cache = RuleCache(size=1024)
+    with timer(f"compiled conditions ({fact_count} facts x {rule_count} rules)"):
+        conditions = [cache.get(rule, required) for rule in items]
+        after = [evaluate(obj) for obj in objs for evaluate in conditions]
+
+    with timer(f"batch evaluation ({fact_count} facts x {rule_count} rules)"):
+        table = FactTable(objs)
+        batches = [evaluate_batch(table, rule["conditions"]["all"], required) for rule in items]
+
+    assert [result for result, _ in before] == [res.result for res in after], "compiled conditions do not match"
+    batch = [bool(res.matched[idx]) for idx in range(fact_count) for res in batches]
+    assert batch == [res.result for res in after], "batch evaluation does not match"
+    sample = random.Random(0).sample(range(len(after)), min(len(after), 1000))
+    assert all(before[i][1] == after[i].reason for i in sample), "fail reasons do not match"
+    print(f"results are identical ({sum(res.result for res in after)} matches)")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+    )
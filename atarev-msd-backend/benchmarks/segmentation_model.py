@@ -0,0 +1,57 @@
+"""
+wall time of customer segmentation per request : fitting KMeans and PED regressions on every request (before)
+vs assigning sales to a stored model (after), with the cost of the background job (full fit and update with new sales)
+moved out of requests, on synthetic sales (no database needed)
+
+usage : python -m benchmarks.segmentation_model [rows]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+
+from benchmarks.utils import timer
+from customer_segmentation.model import SEED, peds, train
+
+
+def sales(rand: np.random.Generator, count: int, start_id: int = 0) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "_id": np.arange(start_id, start_id + count),
+            "pax": rand.integers(1, 6, count),
+            "is_group": rand.integers(0, 2, count),
+            "days_sold_prior_to_travel": rand.integers(0, 365, count),
+            "cos_norm": rand.choice(["PK", "AE", "GB", "SA", "US", "CA"], count),
+            "blended_fare": rand.uniform(100, 900, count).round(2),
+            "travel_day_of_week": rand.integers(1, 8, count),
+            "travel_date": rand.integers(20240101, 20240129, count),
+            "op_flt_num": rand.choice([203, 211, 233, 245], count),
+            "rbkd": rand.choice(list("FJCYBMHKLQVT"), count),
+            "norm_ticket_type": rand.choice(["Round Trip", "One Way", "Other"], count),
+        }
+    )
+
+
+def main(rows: int):
+    rand = np.random.default_rng(1)
+    seg_df = sales(rand, rows)
+
+    with timer("job : full fit"):
+        model = train("PK", "*", 2024, seg_df)
+    more = pd.concat([seg_df, sales(rand, rows // 10, start_id=rows)], ignore_index=True)
+    with timer("job : update with 10% new sales"):
+        train("PK", "*", 2024, more, previous=model)
+
+    with timer("before : request fits the model"):
+        # n_init is the default of the pinned scikit-learn (10 runs of k-means)
+        clust = KMeans(n_clusters=15, init="k-means++", n_init=10, max_iter=400, random_state=SEED).fit(model.matrix(seg_df))
+        peds(seg_df, clust.labels_, 15)
+    with timer("after : request assigns sales"):
+        labels = model.assign(seg_df)
+
+    print(f"{rows} sales, {len(model.features)} features, {len(np.unique(labels))} clusters")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
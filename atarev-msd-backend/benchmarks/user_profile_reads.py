@@ -0,0 +1,100 @@
+"""
+number of mongo reads on `profiles` collection made by user properties during a typical dashboard request
+(permission check, kpis, market filters and event options), the same request runs with user properties
+as they were before profile snapshots (`LegacyUser`, copied from the previous version) and as they are now
+
+usage : python -m benchmarks.user_profile_reads <username>
+"""
+import os
+import sys
+from typing import Iterable, List, Union
+
+from benchmarks.utils import register_command_counter
+
+# count raw mongo round trips (redis would hide them after the first request)
+os.environ["REDIS_ENABLED"] = "false"
+counter = register_command_counter()
+
+from flask import request  # noqa: E402
+
+from base.helpers.permissions import Admin, HasAccess, HasRole  # noqa: E402
+from base.helpers.user import DEFAULT_MODULES, User, UserModule, user_repository  # noqa: E402
+from index import app  # noqa: E402
+
+
+class LegacyUser(User):
+    """user properties before profile snapshots : every property fetched the user document again"""
+
+    def _document(self) -> dict:
+        # previous `UserRepository.get_user` (redis is disabled, the document was read by find_one every time)
+        return user_repository.stringify(user_repository.find_one({"username": self.username}))
+
+    @property
+    def role(self) -> str:
+        return self._document().get("role", "analyst")
+
+    @property
+    def kpis(self) -> Union[List[str], None]:
+        return self._document().get("kpis")
+
+    @property
+    def event_table_selected_fields(self) -> Union[List[str], None]:
+        return self._document().get("event_table_fields")
+
+    @property
+    def markets(self):
+        return [(market["origin"], market["destination"]) for market in self._document().get("markets", [])]
+
+    @property
+    def modules(self) -> List[UserModule]:
+        modules = self._document().get("enabledModules")
+        if modules:
+            return [
+                UserModule(name=module, pages=modules[module]["pages"], enabled=modules[module]["enabled"]) for module in modules
+            ]
+        return list(DEFAULT_MODULES)
+
+    @property
+    def selected_filter_options(self) -> dict:
+        return self._document().get("selected_filter_options", {})
+
+
+def legacy_to_pages(user: User, module: str, pages: Iterable[str]) -> bool:
+    """previous `HasAccess.to_pages` (modules were read once by `HasAccess.__post_init__`)"""
+    targeted_module = next(filter(lambda m: m.name == module, user.modules), None)
+    return bool(targeted_module and targeted_module.enabled and all(page in targeted_module.pages for page in pages))
+
+
+def before(user: User):
+    legacy_to_pages(user, "MSD", ["/product-overview"])
+    HasRole(user, [Admin]).check()
+    user.kpis
+    for _ in range(3):
+        user.markets
+    user.selected_filter_options
+    user.event_table_selected_fields
+
+
+def after(user: User):
+    HasAccess(user).to_pages("MSD", ["/product-overview"])
+    HasRole(user, [Admin]).check()
+    user.kpis
+    for _ in range(3):
+        user.markets
+    user.selected_filter_options
+    user.event_table_selected_fields
+
+
+def main(username: str):
+    carrier = user_repository.get_user(username)["clientCode"]
+
+    for label, func, user_class in (("before", before, LegacyUser), ("after", after, User)):
+        with app.test_request_context("/api/msdv2/kpi"):
+            request.user = user_class(username, carrier, True)
+            counter.reset()
+            func(request.user)
+            print(f"{label}: {counter.count('find', 'profiles')} mongo reads on profiles")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
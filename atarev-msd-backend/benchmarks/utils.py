@@ -0,0 +1,49 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
+
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    """
+    counts mongo commands per (command, collection), it has to be registered
+    before the mongo client is created (before importing any repository)
+    """
+
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        collection = event.command.get(event.command_name)
+        self.commands[(event.command_name, collection if isinstance(collection, str) else None)] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        ...
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        ...
+
+    def count(self, command: str = None, collection: str = None) -> int:
+        return sum(
+            value
+            for (cmd, coll), value in self.commands.items()
+            if (command is None or cmd == command) and (collection is None or coll == collection)
+        )
+
+    def reset(self):
+        self.commands.clear()
+
+
+def register_command_counter() -> CommandCounter:
+    counter = CommandCounter()
+    monitoring.register(counter)
+    return counter
+
+
+@contextmanager
+def timer(label: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    print(f"{label}: {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -5,6 +5,7 @@ from flask import request
 
 from airports.repository import AirportRepository
 from base.middlewares import attach_figure_id, cache
+from base.redis import CacheNamespace
 from base.service import BaseService
 from base.utils import add_missing_dates
 from booking_trends.forms import BookingCountryOptions, BookingCurve, BookingTrends
@@ -169,7 +170,7 @@ class BookingTrendsService(BaseService):
 
         return pd.DataFrame(result)
 
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     def get_booking_country_holiday_options(self, form: BookingCountryOptions):
         country_map = airport_repository.get_country_airport_map(
             [*form.get_orig_city_airports_list(), *form.get_dest_city_airports_list()]
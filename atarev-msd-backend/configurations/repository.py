@@ -1,30 +1,84 @@
+import threading
+import time
 from collections import OrderedDict
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from copy import deepcopy
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import g, has_app_context
 
 from base.helpers.duration import Duration
+from base.redis import CacheNamespace
 from base.repository import BaseRepository
 
 
+class ConfigCache:
+    """
+    per process cache of configuration entries, entries of a host (merged with DEFAULT entries)
+    are fetched at once and kept for `ttl` seconds.
+    writes made by this process invalidate the cache immediately, other processes pick them up once ttl expires
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def get(self, host: str, load: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        cached = self._entries.get(host)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        entries = load(host)
+        with self._lock:
+            self._entries[host] = (time.monotonic() + self.ttl, entries)
+        return entries
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        with self._lock:
+            if host is None or host == "DEFAULT":
+                self._entries.clear()
+            else:
+                self._entries.pop(host, None)
+
+
 class ConfigurationRepository(BaseRepository):
     collection = "configuration"
+    cache = ConfigCache(ttl=Duration.minutes(1))
 
     def get_by_key(self, key: str, host: str) -> Any:
-        """get config value by key and host"""
-        pipline = [
-            {"$match": {"customer": {"$in": [host, "DEFAULT"]}}},
-            {"$unwind": {"path": "$configurationEntries"}},
-            {"$match": {"configurationEntries.key": {"$eq": f"{key}"}}},
-            {"$project": {"_id": 0, "customer": "$customer", "value": "$configurationEntries.value"}},
-        ]
-
-        result = list(self.aggregate(pipline))
-        filtered = list(filter(lambda obj: obj["customer"] != "DEFAULT", result))
-
-        if filtered:
-            return filtered[0]["value"]
-        if result:
-            return result[0]["value"]
-        return
+        """get config value by key and host (host value has priority over DEFAULT one)"""
+        self.__count("config_lookups")
+        value = self.cache.get(host, self.__load_entries).get(key)
+        # callers are free to mutate returned value, cached one should stay untouched
+        return deepcopy(value)
+
+    def __load_entries(self, host: str) -> Dict[str, Any]:
+        """get all configuration entries of a host in one round trip"""
+        self.__count("config_fetches")
+        docs = {doc["customer"]: doc for doc in self.find({"customer": {"$in": [host, "DEFAULT"]}})}
+        entries = {}
+
+        for customer in (host, "DEFAULT"):
+            for entry in (docs.get(customer) or {}).get("configurationEntries") or []:
+                entries.setdefault(entry["key"], entry.get("value"))
+
+        return entries
+
+    def __count(self, name: str) -> None:
+        if has_app_context():
+            setattr(g, name, g.get(name, 0) + 1)
+
+    def invalidate(self, host: str) -> None:
+        """drop cached configuration of a host (in-process entries and values cached in redis)"""
+        self.cache.invalidate(host)
+        self.redis.invalidate(CacheNamespace.CONFIG, host)
+
+    @classmethod
+    def request_stats(cls) -> Dict[str, int]:
+        """number of config lookups and mongo fetches made during current request"""
+        if not has_app_context():
+            return {"config_lookups": 0, "config_fetches": 0}
+        return {"config_lookups": g.get("config_lookups", 0), "config_fetches": g.get("config_fetches", 0)}
 
     def get_hosts(self):
         """get a list of all posiable unique hosts"""
@@ -77,7 +131,7 @@ class ConfigurationRepository(BaseRepository):
 
     def update_market_cometitors(self, market: str, competitors: List[str], host: str):
         origin, destination = market.split("-")
-        _competitors = self.get_by_key("COMPETITORS", host).get("value")
+        _competitors = self.get_by_key("COMPETITORS", host)
 
         for competitor in _competitors:
             if competitor["origin"] == origin and competitor["destination"] == destination:
@@ -89,10 +143,11 @@ class ConfigurationRepository(BaseRepository):
                 config["value"] = _competitors
 
         self.update_one({"customer": host}, {"configurationEntries": configs})
+        self.invalidate(host)
 
     def update_market_currencies(self, market: str, currency: str, host: str):
         origin, destination = market.split("-")
-        markets = self.get_by_key("MARKETS", host).get("value")
+        markets = self.get_by_key("MARKETS", host)
 
         for market in markets:
             if market["orig"] == origin and market["dest"] == destination:
@@ -104,6 +159,7 @@ class ConfigurationRepository(BaseRepository):
                 config["value"] = markets
 
         self.update_one({"customer": host}, {"configurationEntries": configs})
+        self.invalidate(host)
 
     def get_configs_by_host(self, host: str):
         configs = self.find_one({"customer": host}).get("configurationEntries")
@@ -115,21 +171,23 @@ class ConfigurationRepository(BaseRepository):
             if config["key"] in data:
                 config["value"] = data[config["key"]]
         self.update_one({"customer": host}, {"configurationEntries": configs})
+        self.invalidate(host)
 
     def get_market_currency(self, host: str, market: str, default: str = None):
         """get default currency for a market (based on origin currency)"""
-        configs = self.get_configs_by_host(host)
         cache_key = f"market_currency_{market}"
-        if self.redis.get(cache_key):
-            return self.redis.get(cache_key)
+        cached = self.redis.get(cache_key, namespace=CacheNamespace.CONFIG)
+        if cached:
+            return cached
 
+        configs = self.get_configs_by_host(host)
         market_currencies = list(filter(lambda rec: rec["key"] == "MARKETS", configs))[0]
         origin, destination = market.split("-")
         currencies = list(filter(lambda rec: rec["orig"] == origin and rec["dest"] == destination, market_currencies["value"]))
 
         if len(currencies):
             curr = currencies[0]["currency"]
-            self.redis.set(cache_key, curr, expiration_in_seconds=Duration.months(1))
+            self.redis.set(cache_key, curr, expiration_in_seconds=Duration.months(1), namespace=CacheNamespace.CONFIG)
             return curr
         return default if default else None
 
@@ -233,6 +291,7 @@ class ConfigurationRepository(BaseRepository):
         coll.update_one(
             {"customer": customer, "configurationEntries.key": "MARKETS"}, {"$push": {"configurationEntries.$.value": market}}
         )
+        self.invalidate(customer)
 
     def delete_market_from_customer(self, customer: str, orig: str, dest: str):
         coll = self._db[self.collection]
@@ -240,6 +299,7 @@ class ConfigurationRepository(BaseRepository):
             {"customer": customer, "configurationEntries.key": "MARKETS"},
             {"$pull": {"configurationEntries.$.value": {"orig": orig, "dest": dest}}},
         )
+        self.invalidate(customer)
 
     def update_market(self, customer: str, orig: str, dest: str, market: OrderedDict) -> None:
         coll = self._db[self.collection]
@@ -248,6 +308,7 @@ class ConfigurationRepository(BaseRepository):
             {"$set": {"configurationEntries.$.value.$[market]": market}},
             array_filters=[{"market.orig": orig, "market.dest": dest}],
         )
+        self.invalidate(customer)
 
     def get_supported_markets(self, customers: Optional[List[str]] = None, markets: Optional[Iterable[Tuple[str, str]]] = None):
         market_match = []
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import List, Tuple
 
 from flask import request
 
@@ -14,11 +15,14 @@ from customer_segmentation.forms import (
 
 class CustomerSegmentationBuilder:
 
-    def segmentation_table_pipeline(self,form: CustomerSegmentationTable):
+    def segmentation_year(self) -> int:
+        """travel year sales are segmented for (the previous one until april)"""
         if date.today().month <= 3:
-            seg_year = date.today().year - 1
-        else:
-            seg_year = date.today().year
+            return date.today().year - 1
+        return date.today().year
+
+    def segmentation_table_pipeline(self,form: CustomerSegmentationTable):
+        seg_year = self.segmentation_year()
 
         match = merge_criterions(
             [
@@ -46,8 +50,29 @@ class CustomerSegmentationBuilder:
             ]
         )
 
+        return [{"$match": match}, *self.segmentation_stages()]
+
+    def segmentation_training_pipeline(self, markets: List[Tuple[str, str]], seg_year: int):
+        """sales of markets (orig_code, dest_code) of all carriers models are trained with, in insertion order"""
+        match = {
+            '$or': [{'orig_code': orig_code, 'dest_code': dest_code} for orig_code, dest_code in markets],
+            'travel_year': seg_year,
+            'days_sold_prior_to_travel': {'$gte': 0}
+        }
+
+        return [{"$match": match}, *self.segmentation_stages(), {"$sort": {"_id": 1}}]
+
+    def segmentation_markets_pipeline(self, carrier: str, seg_year: int):
+        """markets a carrier has sales on"""
+        return [
+            {"$match": {'dom_op_al_code': carrier, 'travel_year': seg_year, 'days_sold_prior_to_travel': {'$gte': 0}}},
+            {"$group": {"_id": {'orig_code': '$orig_code', 'dest_code': '$dest_code'}}},
+            {"$sort": {"_id.orig_code": 1, "_id.dest_code": 1}},
+        ]
+
+    def segmentation_stages(self):
+        """fields of sales segmentation models read"""
         return [
-            {"$match": match},
             {
                 "$addFields": {
                     'norm_ticket_type': {"$cond": [
@@ -57,6 +82,8 @@ class CustomerSegmentationBuilder:
             {
                 "$project": {
                     "dom_op_al_code": 1,
+                    "orig_code": 1,
+                    "dest_code": 1,
                     "pax": 1,
                     "is_group": 1,
                     "days_sold_prior_to_travel": 1,
@@ -1,11 +1,12 @@
+import pandas as pd
+
 from base.constants import Constants
 from base.handler import FieldsHandler
 
 
 class CustomerSegmentationGraphsHandler(FieldsHandler):
-    def cat_name_handler(self, row, col):
-        if row["cat_type"] == "dow_bd":
-            return Constants.IDX2DAY[row[col]]
-        if row["cat_type"] == "class_bd":
-            return {"Y": "ECO", "C": "BUS"}.get(row[col], "UNK")
-        return row[col]
+    def cat_name_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        values = df[col].astype(object)
+        days = values.map(Constants.IDX2DAY)
+        classes = values.map({"Y": "ECO", "C": "BUS"}).fillna("UNK")
+        return values.where(df["cat_type"] != "dow_bd", days).where(df["cat_type"] != "class_bd", classes)
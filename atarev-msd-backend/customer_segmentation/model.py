@@ -0,0 +1,196 @@
+"""
+customer segmentation models : sales of a market of a carrier (or of all its markets) are clustered by a background job
+(`python manage.py train_segmentation`), which stores the centroids, the feature space they live in and the price
+elasticity (PED, OLS slope of pax over fare) of every cluster. Requests only assign their sales to the stored centroids.
+Every run of the job updates the stored centroids with sales loaded since the previous run (`MiniBatchKMeans.partial_fit`,
+sales with an `_id` above the last one trained on), a full fit (`--full`) also picks up categories that did not exist
+when the model was created and sales DDS loaders changed in place (upserts keep their `_id`), so it has to run periodically
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import pairwise_distances_argmin
+
+N_CLUSTERS = 15
+SEED = 42
+# mini batches of sales the centroids are updated with
+BATCH_SIZE = 1024
+# model of all markets of a carrier (requests spanning more than one market use it)
+ALL_MARKETS = "*"
+# days sold prior to travel bins, the last one goes up to the largest value of training sales (365 at least)
+DAYS_EDGES = [-1, 0.99, 2.99, 4.99, 6.99, 8.99, 14.99, 29.99, 43.99, 71.99]
+# clusters with fewer passengers have no PED
+MIN_PED_PAX = 50
+
+
+def market(orig_code: str, dest_code: str) -> str:
+    return f"{orig_code}-{dest_code}"
+
+
+def bucket(pct_rank: float) -> str:
+    if 0.75 < pct_rank <= 1:
+        return "top"
+
+    if 0.5 < pct_rank <= 0.75:
+        return "second"
+
+    if 0.25 < pct_rank <= 0.5:
+        return "third"
+
+    return "fourth"
+
+
+def rbd_groups(seg_df: pd.DataFrame) -> Dict[str, str]:
+    """
+    categorize rbkd into four categories (top, second, third and fourth)
+    by the rank of their average fare on flights they are sold on
+    """
+    flt_rbds = seg_df.groupby(["travel_date", "op_flt_num", "rbkd"], as_index=False).agg({"blended_fare": "mean"})
+    rbd_order = flt_rbds.groupby(["rbkd"], as_index=False).agg({"blended_fare": "mean"})
+    rbd_order["pct_rank"] = rbd_order.blended_fare.rank(pct=True)
+    return dict(zip(rbd_order["rbkd"], rbd_order["pct_rank"].map(bucket)))
+
+
+def days_edges(seg_df: pd.DataFrame) -> List[float]:
+    return [*DAYS_EDGES, max(float(seg_df["days_sold_prior_to_travel"].max()), 365.0)]
+
+
+def dummies(seg_df: pd.DataFrame, groups: Dict[str, str], edges: List[float]) -> pd.DataFrame:
+    """features of sales : weekend and group flags, one column for each days bin, country of sale, rbd group and ticket type"""
+    days = seg_df["days_sold_prior_to_travel"].clip(upper=edges[-1])
+    return pd.concat(
+        [
+            seg_df["travel_day_of_week"].isin([5, 6, 7]).astype(int).rename("is_weekend"),
+            seg_df["is_group"],
+            pd.get_dummies(pd.cut(days, bins=edges).astype(str), prefix="num_days"),
+            pd.get_dummies(seg_df["cos_norm"], prefix="cos"),
+            pd.get_dummies(seg_df["rbkd"].map(groups), prefix="rbkd"),
+            pd.get_dummies(seg_df["norm_ticket_type"], prefix="ttype"),
+        ],
+        axis=1,
+    )
+
+
+def peds(seg_df: pd.DataFrame, labels: np.ndarray, n_clusters: int) -> List[Optional[float]]:
+    """slope of passengers over fare (binned) of every cluster"""
+    items: List[Optional[float]] = [None] * n_clusters
+    for group, plot_df in seg_df[["blended_fare", "pax"]].groupby(labels):
+        if plot_df["pax"].sum() >= MIN_PED_PAX:
+            price_bins = pd.cut(plot_df["blended_fare"].round(decimals=0), bins=20)
+            price_upper = price_bins.apply(lambda x: x.right).astype(int)
+
+            curr_plot = plot_df.assign(price_upper=price_upper).groupby(["price_upper"], as_index=False).agg({"pax": "sum"})
+            curr_res = sm.OLS(curr_plot["pax"], sm.add_constant(curr_plot["price_upper"])).fit()
+            items[group] = float(curr_res.params["price_upper"])
+    return items
+
+
+@dataclass
+class SegmentationModel:
+    carrier: str
+    market: str
+    travel_year: int
+    seed: int
+    # feature space (columns of `dummies`) and how categories of sales map into it
+    features: List[str]
+    rbd_groups: Dict[str, str]
+    days_edges: List[float]
+    centroids: List[List[float]]
+    # number of sales every centroid stands for (weight of a centroid when it is updated)
+    counts: List[float]
+    peds: List[Optional[float]]
+    # `_id` of the last sale centroids were updated with
+    last_id: Any = None
+    trained_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    def group(self, prefix: str) -> List[str]:
+        """features of a dummy group (e.g: "cos" -> ["cos_FR", "cos_GR"])"""
+        return [name for name in self.features if name.startswith(f"{prefix}_")]
+
+    def matrix(self, seg_df: pd.DataFrame) -> np.ndarray:
+        """
+        features of sales in the feature space of the model
+        (categories the model was not trained with have no feature, sales having them are zeros for their group)
+        """
+        return dummies(seg_df, self.rbd_groups, self.days_edges).reindex(columns=self.features, fill_value=0).to_numpy(np.float64)
+
+    def assign(self, seg_df: pd.DataFrame) -> np.ndarray:
+        """label of the nearest centroid of every sale"""
+        if seg_df.empty:
+            return np.empty(0, dtype=int)
+        return pairwise_distances_argmin(self.matrix(seg_df), np.asarray(self.centroids, dtype=np.float64))
+
+    def to_document(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any]) -> "SegmentationModel":
+        return cls(**{name: doc[name] for name in cls.__dataclass_fields__ if name in doc})
+
+
+def train(
+    carrier: str,
+    market: str,
+    travel_year: int,
+    seg_df: pd.DataFrame,
+    seed: int = SEED,
+    previous: Optional[SegmentationModel] = None,
+) -> SegmentationModel:
+    """
+    model of sales (in `_id` order, the same sales and seed always give the same model),
+    centroids of `previous` model are updated with its sales loaded after its last one instead when it is given
+    """
+    last_id = seg_df["_id"].max() if "_id" in seg_df and not seg_df.empty else None
+
+    if previous is None or previous.seed != seed or previous.travel_year != travel_year:
+        groups, edges = rbd_groups(seg_df), days_edges(seg_df)
+        features = dummies(seg_df, groups, edges).columns.tolist()
+        model = SegmentationModel(carrier, market, travel_year, seed, features, groups, edges, [], [], [], last_id)
+        X = model.matrix(seg_df)
+
+        kmeans = MiniBatchKMeans(
+            n_clusters=N_CLUSTERS, init="k-means++", n_init=3, max_iter=400, batch_size=BATCH_SIZE, random_state=seed
+        )
+        kmeans.fit(X)
+        model.centroids = kmeans.cluster_centers_.tolist()
+        model.counts = np.bincount(model.assign(seg_df), minlength=N_CLUSTERS).astype(float).tolist()
+    else:
+        new_df = seg_df[seg_df["_id"] > previous.last_id] if previous.last_id is not None else seg_df
+        model = SegmentationModel(**{**previous.__dict__, "trained_at": datetime.utcnow()})
+        if not new_df.empty:
+            model.centroids = update(previous, model.matrix(new_df)).tolist()
+            model.counts = (np.asarray(previous.counts) + np.bincount(model.assign(new_df), minlength=model.n_clusters)).tolist()
+            model.last_id = last_id
+
+    model.peds = peds(seg_df, model.assign(seg_df), model.n_clusters)
+    return model
+
+
+def update(model: SegmentationModel, X: np.ndarray) -> np.ndarray:
+    """
+    centroids of a model updated with new sales, stored centroids are the first samples of the first mini batch
+    weighted by the number of sales they stand for (each one is the mean of itself and new sales nearest to it)
+    """
+    centroids = np.asarray(model.centroids, dtype=np.float64)
+    kmeans = MiniBatchKMeans(
+        n_clusters=model.n_clusters, init=centroids, n_init=1, batch_size=BATCH_SIZE, random_state=model.seed
+    )
+
+    for start in range(0, len(X), BATCH_SIZE):
+        batch = X[start : start + BATCH_SIZE]
+        if start == 0:
+            kmeans.partial_fit(
+                np.vstack([centroids, batch]), sample_weight=np.concatenate([np.asarray(model.counts), np.ones(len(batch))])
+            )
+        else:
+            kmeans.partial_fit(batch)
+    return kmeans.cluster_centers_
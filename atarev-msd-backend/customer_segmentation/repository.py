@@ -0,0 +1,32 @@
+from typing import Dict, Optional, Tuple
+
+from base.helpers.duration import Duration
+from base.repository import BaseRepository
+from configurations.repository import ConfigCache
+from customer_segmentation.model import SegmentationModel
+
+MODEL_COLLECTION = "customer_segmentation_models"
+KEY = ["carrier", "market", "travel_year"]
+
+
+class SegmentationModelRepository(BaseRepository):
+    """
+    models trained by `python manage.py train_segmentation` (one for each carrier, market and travel year),
+    models of a carrier are fetched at once and kept for a minute
+    """
+
+    collection = MODEL_COLLECTION
+    cache = ConfigCache(ttl=Duration.minutes(1))
+
+    def get(self, carrier: str, market: str, travel_year: int) -> Optional[SegmentationModel]:
+        return self.cache.get(carrier, self.__load_models).get((market, travel_year))
+
+    def __load_models(self, carrier: str) -> Dict[Tuple[str, int], SegmentationModel]:
+        return {
+            (doc["market"], doc["travel_year"]): SegmentationModel.from_document(doc) for doc in self.find({"carrier": carrier})
+        }
+
+    def save(self, model: SegmentationModel) -> None:
+        doc = model.to_document()
+        self._db[self.collection].replace_one({name: doc[name] for name in KEY}, doc, upsert=True)
+        self.cache.invalidate(model.carrier)
@@ -1,21 +1,22 @@
-from typing import List
-
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
 from flask import request
 from plotly.colors import n_colors
-from sklearn.cluster import KMeans
 
 from base.helpers.permissions import has_access
 from base.middlewares import attach_figure_id, attach_story_text, cache
+from base.redis import CacheNamespace
 from base.service import BaseService
 from customer_segmentation.builder import CustomerSegmentationBuilder
 from customer_segmentation.figure import CustomerSegmentationFigure
 from customer_segmentation.forms import CustomerSegmentationGraphs, CustomerSegmentationTable
 from customer_segmentation.handler import CustomerSegmentationGraphsHandler
+from customer_segmentation.model import ALL_MARKETS, SegmentationModel, market, train
+from customer_segmentation.repository import SegmentationModelRepository
 from dds.repository import DdsRepository
 
+model_repo = SegmentationModelRepository()
+
 
 class CustomerSegmentationService(BaseService):
     repository_class = DdsRepository
@@ -28,13 +29,13 @@ class CustomerSegmentationService(BaseService):
     }
 
     @has_access("MSD", ["/customer-segmentation"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     def get_segmention_table(self, form: CustomerSegmentationTable):
         pipeline = self.builder.segmentation_table_pipeline(form)
         seg_df = self._aggregte(pipeline)
-        seg_df = self.categorize_rbkd(seg_df)
-        clust_df, clust = self.get_clusts(seg_df)
-        summary_df = self.get_summary_df(clust_df, clust)
+        model = self.get_model(seg_df)
+        clust_df = self.get_clusts(seg_df, model)
+        summary_df = self.get_summary_df(clust_df, model)
         summary_df = self.label_summery_df(summary_df)
         ret_data = self.label_data(summary_df)
 
@@ -65,112 +66,34 @@ class CustomerSegmentationService(BaseService):
 
         return response
 
-    def categorize_rbkd(self, seg_df: pd.DataFrame) -> pd.DataFrame:
+    def get_model(self, seg_df: pd.DataFrame) -> SegmentationModel:
         """
-        categorize rbkd into four categories :
-        top, second, third and fourth
+        stored model of the market of sales (of all markets of the carrier when there are more of them),
+        it is trained on sales of the request until the background job stored one
         """
-        flt_rbds = seg_df.groupby(["travel_date", "op_flt_num", "rbkd"], as_index=False).agg({"blended_fare": "mean"})
-        rbd_order = (
-            flt_rbds.groupby(["rbkd"], as_index=False).agg({"blended_fare": "mean"}).sort_values("blended_fare", ascending=False)
-        )
-        rbd_order["pct_rank"] = rbd_order.blended_fare.rank(pct=True)
-        rbd_order["rbd_group"] = rbd_order["pct_rank"].map(self.assign_bucket)
-        _map = dict(zip(rbd_order["rbkd"], rbd_order["rbd_group"]))
-        seg_df["rbkd_group"] = seg_df["rbkd"].map(_map)
-        return seg_df
-
-    def prepare_model_dfs(self, seg_df: pd.DataFrame) -> pd.DataFrame:
-        """add necessary columns and prepare dfs to be fed to KMeans model"""
-        self.cos_dummies = pd.get_dummies(seg_df["cos_norm"], prefix="cos")
-        self.ttype_dummies = pd.get_dummies(seg_df["norm_ticket_type"], prefix="ttype")
-        self.rbd_dummies = pd.get_dummies(seg_df["rbkd_group"], prefix="rbkd")
-
-        seg_df["num_days_bins"] = (
-            pd.cut(
-                seg_df["days_sold_prior_to_travel"],
-                bins=[
-                    -1,
-                    0.99,
-                    2.99,
-                    4.99,
-                    6.99,
-                    8.99,
-                    14.99,
-                    29.99,
-                    43.99,
-                    71.99,
-                    seg_df["days_sold_prior_to_travel"].max(),
-                ],
-            )
-        ).astype(str)
-
-        self.num_days_dummies = pd.get_dummies(seg_df["num_days_bins"], prefix="num_days")
-        seg_df["is_weekend"] = seg_df["travel_day_of_week"].apply(lambda x: int(x in [5, 6, 7]))
-
-        return seg_df
-
-    def __group_into_clusters(self, seg_df: pd.DataFrame) -> List[str]:
-        seg_df = self.prepare_model_dfs(seg_df)
-        self.cos_dummies = pd.get_dummies(seg_df["cos_norm"], prefix="cos")
-        self.ttype_dummies = pd.get_dummies(seg_df["norm_ticket_type"], prefix="ttype")
-        self.rbd_dummies = pd.get_dummies(seg_df["rbkd_group"], prefix="rbkd")
-
-        customer_feats = (
-            ["is_weekend", "is_group"]
-            + self.num_days_dummies.columns.values.tolist()
-            + self.cos_dummies.columns.values.tolist()
-            + self.rbd_dummies.columns.values.tolist()
-            + self.ttype_dummies.columns.values.tolist()
-        )
-
-        conc_df = pd.concat(
-            [
-                seg_df,
-                self.num_days_dummies,
-                self.cos_dummies,
-                self.rbd_dummies,
-                self.ttype_dummies,
-            ],
-            axis=1,
-        )
-
-        X = conc_df[customer_feats]
-
-        clust = KMeans(n_clusters=15, init="k-means++", max_iter=400, random_state=42)
-        clust.fit(X.values)
-
-        return conc_df, clust, customer_feats
-
-    def get_clusts(self, seg_df: pd.DataFrame):
-        conc_df, clust, features = self.__group_into_clusters(seg_df)
-        conc_df["label"] = clust.labels_
-        peds = []
-
-        for group, plot_df in conc_df.groupby("label"):
-            if plot_df["pax"].sum() >= 50:
-                plot_df["price_bins"] = pd.cut(plot_df["blended_fare"].round(decimals=0), bins=20)
-
-                plot_df["price_upper"] = plot_df["price_bins"].apply(lambda x: x.right).astype(int)
-
-                curr_plot = plot_df[["price_upper", "pax"]].groupby(["price_upper"], as_index=False).agg({"pax": "sum"})
-
-                curr_x = sm.add_constant(curr_plot["price_upper"])
-                model = sm.OLS(curr_plot["pax"], curr_x)
-                curr_res = model.fit()
-                peds.append((group, curr_res.params["price_upper"]))
-
-        peds = dict(peds)
-        conc_df["ped"] = conc_df["label"].map(peds)
+        carrier, seg_year = request.user.carrier, self.builder.segmentation_year()
+        markets = seg_df[["orig_code", "dest_code"]].drop_duplicates() if not seg_df.empty else pd.DataFrame()
+        names = [market(*markets.iloc[0])] if len(markets) == 1 else []
+
+        for name in [*names, ALL_MARKETS]:
+            model = model_repo.get(carrier, name, seg_year)
+            if model is not None:
+                return model
+        return train(carrier, ALL_MARKETS, seg_year, seg_df)
+
+    def get_clusts(self, seg_df: pd.DataFrame, model: SegmentationModel) -> pd.DataFrame:
+        conc_df = seg_df.copy()
+        conc_df["label"] = model.assign(seg_df)
+        conc_df["ped"] = conc_df["label"].map({label: ped for label, ped in enumerate(model.peds) if ped is not None})
         self.label_df = conc_df
-        clust_df = pd.DataFrame(clust.cluster_centers_, columns=features)
+        clust_df = pd.DataFrame(model.centroids, columns=model.features)
         clust_avgs = clust_df.mean(axis=0)
         clust_stds = clust_df.std(axis=0)
         self.clust_avgs = clust_avgs
         self.clust_stds = clust_stds
-        return clust_df, clust
+        return clust_df
 
-    def get_summary_df(self, clust_df: pd.DataFrame, clust):
+    def get_summary_df(self, clust_df: pd.DataFrame, model: SegmentationModel):
         summary_info = {
             i: {
                 "Country of Sale": None,
@@ -179,7 +102,7 @@ class CustomerSegmentationService(BaseService):
                 "RBD Group": None,
                 "Ticket Type": None,
             }
-            for i in range(clust.n_clusters)
+            for i in range(model.n_clusters)
         }
 
         days_bkg_conv_dict = {
@@ -207,28 +130,28 @@ class CustomerSegmentationService(BaseService):
             summary_info[index]["Travel Day of Week"] = ", ".join(curr_picked)
 
             curr_picked = []
-            for col in self.ttype_dummies.columns.values.tolist():
+            for col in model.group("ttype"):
                 curr_bounds = self.get_bounds(col)
                 if row[col] >= 0.5:
                     curr_picked.append(col.split("_")[1])
             summary_info[index]["Ticket Type"] = ", ".join(curr_picked)
 
             curr_picked = []
-            for col in self.cos_dummies.columns.values.tolist():
+            for col in model.group("cos"):
                 curr_bounds = self.get_bounds(col)
                 if row[col] >= 0.5:
                     curr_picked.append(col.split("_")[1])
             summary_info[index]["Country of Sale"] = ", ".join(curr_picked)
 
             curr_picked = []
-            for col in self.num_days_dummies.columns.values.tolist():
+            for col in model.group("num_days"):
                 curr_bounds = self.get_bounds(col)
                 if row[col] >= curr_bounds[1]:
                     curr_picked.append(days_bkg_conv_dict[col.split("_")[-1]])
             summary_info[index]["Days Booked Prior to Travel"] = ", ".join(curr_picked)
 
             curr_picked = []
-            for col in self.rbd_dummies.columns.values.tolist():
+            for col in model.group("rbkd"):
                 curr_bounds = self.get_bounds(col)
                 if row[col] >= 0.5:
                     curr_picked.append(col.replace("_", " ").title())
@@ -500,18 +423,6 @@ class CustomerSegmentationService(BaseService):
         upper = self.clust_avgs[col_name] + 3 * self.clust_stds[col_name]
         return lower, upper
 
-    def assign_bucket(self, pct_rank):
-        if 0.75 < pct_rank <= 1:
-            return "top"
-
-        if 0.5 < pct_rank <= 0.75:
-            return "second"
-
-        if 0.25 < pct_rank <= 0.5:
-            return "third"
-
-        return "fourth"
-
     @has_access("MSD", ["/customer-segmentation"])
     @attach_story_text(STORY_TEXTS["get_segmention_graphs"])
     @attach_figure_id(["fig"])
@@ -0,0 +1,45 @@
+"""
+background training of customer segmentation models (`python manage.py train_segmentation`, run on a schedule
+after DDS loaders), a model is trained for every market of a carrier and one for all of them.
+Incremental runs (every few hours) only add new sales, weekly `--full` runs (`scheduler/scripts/crontab.txt`)
+train again from scratch to apply sales DDS loaders changed in place
+"""
+from typing import Iterator, List, Optional, Tuple
+
+from base.loader import load_frame
+from customer_segmentation.builder import CustomerSegmentationBuilder
+from customer_segmentation.model import ALL_MARKETS, N_CLUSTERS, SegmentationModel, market, train
+from customer_segmentation.repository import SegmentationModelRepository
+from dds.repository import DdsRepository
+
+dds_repo = DdsRepository()
+model_repo = SegmentationModelRepository()
+builder = CustomerSegmentationBuilder()
+
+
+def carrier_markets(carrier: str, seg_year: int) -> List[Tuple[str, str]]:
+    cursor = dds_repo.aggregate(builder.segmentation_markets_pipeline(carrier, seg_year))
+    return [(doc["_id"]["orig_code"], doc["_id"]["dest_code"]) for doc in cursor]
+
+
+def train_models(carrier: str, full: bool = False) -> Iterator[Tuple[str, Optional[SegmentationModel]]]:
+    """
+    update stored models of a carrier with sales loaded since they were trained (train them from scratch when `full`),
+    markets with fewer sales than clusters get no model (None)
+    """
+    seg_year = builder.segmentation_year()
+    markets = carrier_markets(carrier, seg_year)
+    if not markets:
+        return
+
+    for name, items in [*((market(*item), [item]) for item in markets), (ALL_MARKETS, markets)]:
+        pipeline = builder.segmentation_training_pipeline(items, seg_year)
+        seg_df = load_frame(dds_repo.aggregate(pipeline, allowDiskUse=True))
+        if len(seg_df) < N_CLUSTERS:
+            yield name, None
+            continue
+
+        previous = None if full else model_repo.get(carrier, name, seg_year)
+        model = train(carrier, name, seg_year, seg_df, previous=previous)
+        model_repo.save(model)
+        yield name, model
@@ -0,0 +1,307 @@
+"""
+pre-aggregated cubes of `dds_pgs` : measures summed per combination of a few dimensions (grain),
+aggregations of market analytics that only group by (and filter on) dimensions of a cube run on it instead of raw sales.
+`CubePlanner` rewrites a raw pipeline for the coarsest cube able to answer it, pipelines it can not prove
+a cube answers the same way (row level results, `$push`, `$first`, measures used as dimensions ...) stay on raw data
+"""
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+DDS_COLLECTION = "dds_pgs"
+REGISTRY_COLLECTION = "dds_cubes"
+
+# values summed in cubes, numeric values of a measure are counted too (its average is sum / count)
+MEASURES = ["pax", "blended_rev", "blended_fare"]
+# number of raw documents of a cube document (`$sum: 1` of raw documents)
+DOC_COUNT = "doc_count"
+# filters every market analytics page has
+FILTERS = [
+    "dom_op_al_code",
+    "orig_code",
+    "dest_code",
+    "seg_class",
+    "country_of_sale",
+    "distribution_channel",
+    "is_group",
+    "travel_year",
+    "travel_month",
+]
+INDEX = ["dom_op_al_code", "travel_year", "travel_month"]
+# accumulators computed from values of dimensions only (same result on raw documents and cube ones)
+DIMENSION_ACCUMULATORS = ["$addToSet", "$min", "$max"]
+
+
+def count_field(measure: str) -> str:
+    return f"{measure}_count"
+
+
+@dataclass(frozen=True)
+class Cube:
+    name: str
+    dimensions: Tuple[str, ...]
+
+    @property
+    def collection(self) -> str:
+        return f"dds_cube_{self.name}"
+
+    def stages(self) -> List[Dict[str, Any]]:
+        """stages grouping `dds_pgs` documents into cube documents"""
+        totals = {}
+        for measure in MEASURES:
+            totals[measure] = {"$sum": f"${measure}"}
+            totals[count_field(measure)] = {"$sum": {"$cond": [{"$isNumber": f"${measure}"}, 1, 0]}}
+
+        return [
+            {"$group": {"_id": {name: f"${name}" for name in self.dimensions}, **totals, DOC_COUNT: {"$sum": 1}}},
+            {"$set": {name: f"$_id.{name}" for name in self.dimensions}},
+        ]
+
+
+def is_usable(registry_doc: Dict[str, Any]) -> bool:
+    """cube of a `dds_cubes` document is built and `dds_pgs` did not change since its build started"""
+    changed_at = registry_doc.get("data_changed_at")
+    return registry_doc.get("built_at") is not None and (changed_at is None or changed_at < registry_doc["built_at"])
+
+
+# from the coarsest grain to the finest one (order is used when cubes have the same size)
+CUBES = [
+    # monthly trends, revenue per day of week
+    Cube("monthly", (*FILTERS, "travel_day_of_week")),
+    # daily trends (day of week depends on travel date, it does not add documents)
+    Cube("daily", (*FILTERS, "travel_date", "travel_day_of_week")),
+    # class mix
+    Cube("class_mix", (*FILTERS, "rbkd")),
+    # booking curves
+    Cube("booking_curve", (*FILTERS, "travel_day_of_week", "local_dep_time", "days_sold_prior_to_travel")),
+    # agency tables
+    Cube("agency", (*FILTERS, "agency_id", "agency_name", "agency_country")),
+]
+
+
+class Unroutable(Exception):
+    """pipeline needs raw documents"""
+
+
+@dataclass
+class Plan:
+    cube: Cube
+    pipeline: List[Dict[str, Any]]
+
+
+@dataclass
+class Scope:
+    """fields a pipeline computed so far (with dimensions they are computed from) and dimensions it reads"""
+
+    derived: Dict[str, Set[str]] = field(default_factory=dict)
+    needed: Set[str] = field(default_factory=set)
+
+    def copy(self) -> "Scope":
+        return Scope(dict(self.derived), set(self.needed))
+
+    def read(self, expression: Any) -> Set[str]:
+        """dimensions an expression reads (it must not read measures)"""
+        dimensions = set()
+        for name in field_paths(expression):
+            if name in self.derived:
+                dimensions |= self.derived[name]
+            elif name in MEASURES or name in (DOC_COUNT, "_id"):
+                raise Unroutable(f"{name} is read as a dimension")
+            else:
+                dimensions.add(name)
+        self.needed |= dimensions
+        return dimensions
+
+    def derive(self, name: str, expression: Any) -> None:
+        if is_measure(name):
+            raise Unroutable(f"{name} is overwritten")
+        self.derived[name] = self.read(expression)
+
+    def is_measure(self, expression: Any) -> bool:
+        """expression is a measure of raw documents (`"$pax"`)"""
+        return isinstance(expression, str) and expression[1:] in MEASURES and expression[1:] not in self.derived
+
+
+def is_measure(name: str) -> bool:
+    root = name.split(".")[0]
+    return root in MEASURES or root == DOC_COUNT or any(root == count_field(measure) for measure in MEASURES)
+
+
+def field_paths(expression: Any) -> Set[str]:
+    """top level fields an aggregation expression reads (`"$a.b"` reads `a`)"""
+    if isinstance(expression, str):
+        if expression.startswith("$$"):
+            # variables ($$ROOT, $$CURRENT, $let ones) could read anything
+            raise Unroutable(f"{expression} variable")
+        return {expression[1:].split(".")[0]} if expression.startswith("$") else set()
+    if isinstance(expression, dict):
+        if "$literal" in expression:
+            return set()
+        return set().union(*(field_paths(value) for value in expression.values()))
+    if isinstance(expression, (list, tuple)):
+        return set().union(*(field_paths(value) for value in expression))
+    return set()
+
+
+def is_inclusion(value: Any) -> bool:
+    return value is True or (type(value) in (int, float) and value != 0)
+
+
+def is_exclusion(value: Any) -> bool:
+    return value is False or (type(value) in (int, float) and value == 0)
+
+
+class CubePlanner:
+    def __init__(self, cubes: List[Cube] = CUBES):
+        self.cubes = cubes
+
+    def plan(self, pipeline: List[Dict[str, Any]], sizes: Dict[str, int]) -> Optional[Plan]:
+        """
+        smallest cube (of the ones in `sizes`, cube name -> number of documents) having all dimensions `pipeline` reads,
+        with the pipeline to run on it (None when pipeline has to run on raw documents)
+        """
+        scope = Scope()
+        try:
+            rewritten = self.rewrite(pipeline, scope)
+        except Unroutable:
+            return None
+
+        candidates = [cube for cube in self.cubes if cube.name in sizes and scope.needed <= set(cube.dimensions)]
+        if not candidates:
+            return None
+        return Plan(min(candidates, key=lambda cube: sizes[cube.name]), rewritten)
+
+    def rewrite(self, pipeline: List[Dict[str, Any]], scope: Scope) -> List[Dict[str, Any]]:
+        """
+        pipeline computing the same results from cube documents, stages before the first `$group` (or `$facet`)
+        are the only ones reading raw documents, the ones after it are kept as they are
+        """
+        result = []
+        for i, stage in enumerate(pipeline):
+            if len(stage) != 1:
+                raise Unroutable("stage with more than one operator")
+            (operator, spec), following = next(iter(stage.items())), pipeline[i + 1 :]
+
+            if operator == "$match":
+                result.append({"$match": self.match(spec, scope)})
+            elif operator == "$project":
+                result.append({"$project": self.project(spec, scope)})
+            elif operator in ("$addFields", "$set"):
+                for name, expression in spec.items():
+                    scope.derive(name, expression)
+                result.append(copy.deepcopy(stage))
+            elif operator == "$unset":
+                names = [spec] if isinstance(spec, str) else spec
+                for name in names:
+                    if is_measure(name):
+                        raise Unroutable(f"{name} is removed")
+                    scope.derived.pop(name, None)
+                result.append(copy.deepcopy(stage))
+            elif operator == "$sort":
+                # order of documents does not change sums, averages and sets (accumulators depending on it are not routed)
+                continue
+            elif operator == "$group":
+                return [*result, *self.group(spec, scope, following[0] if following else None), *copy.deepcopy(following)]
+            elif operator == "$facet":
+                facets = {}
+                for name, sub_pipeline in spec.items():
+                    sub_scope = scope.copy()
+                    facets[name] = self.rewrite(sub_pipeline, sub_scope)
+                    scope.needed |= sub_scope.needed
+                return [*result, {"$facet": facets}, *copy.deepcopy(following)]
+            else:
+                raise Unroutable(f"{operator} stage")
+
+        # documents themselves are returned
+        raise Unroutable("pipeline does not group documents")
+
+    def match(self, query: Dict[str, Any], scope: Scope) -> Dict[str, Any]:
+        for name, value in query.items():
+            if name in ("$and", "$or", "$nor"):
+                for sub_query in value:
+                    self.match(sub_query, scope)
+            elif name.startswith("$"):
+                raise Unroutable(f"{name} query")
+            else:
+                scope.read(f"${name}")
+        return copy.deepcopy(query)
+
+    def project(self, spec: Dict[str, Any], scope: Scope) -> Dict[str, Any]:
+        values = [value for name, value in spec.items() if name != "_id"]
+        result = copy.deepcopy(spec)
+
+        if values and all(is_exclusion(value) for value in values):
+            for name in spec:
+                if name.split(".")[0] in MEASURES:
+                    result[count_field(name.split(".")[0])] = 0
+                scope.derived.pop(name, None)
+            return result
+
+        derived = {}
+        for name, value in spec.items():
+            if name == "_id" or is_exclusion(value):
+                continue
+            if is_inclusion(value):
+                if name in MEASURES:
+                    result[count_field(name)] = 1
+                elif name in scope.derived:
+                    derived[name] = scope.derived[name]
+            else:
+                scope.derive(name, value)
+                derived[name] = scope.derived[name]
+        # fields not included are gone, the ones included keep what they are computed from
+        scope.derived = derived
+        result[DOC_COUNT] = 1
+        return result
+
+    def group(self, spec: Dict[str, Any], scope: Scope, following: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """group stage summing cube documents and the stages finishing averages (sum / count) off"""
+        scope.read(spec.get("_id"))
+        group, averages = {"_id": copy.deepcopy(spec.get("_id"))}, {}
+
+        for name, accumulator in spec.items():
+            if name == "_id":
+                continue
+            if not isinstance(accumulator, dict) or len(accumulator) != 1:
+                raise Unroutable(f"{name} accumulator")
+            (operator, argument), = accumulator.items()
+
+            if operator == "$sum" and type(argument) in (int, float):
+                group[name] = {"$sum": f"${DOC_COUNT}"} if argument == 1 else {"$sum": {"$multiply": [argument, f"${DOC_COUNT}"]}}
+            elif operator == "$sum" and scope.is_measure(argument):
+                group[name] = {"$sum": argument}
+            elif operator == "$avg" and scope.is_measure(argument):
+                averages[name] = f"__{name}_count"
+                group[name] = {"$sum": argument}
+                group[averages[name]] = {"$sum": f"${count_field(argument[1:])}"}
+            elif operator in DIMENSION_ACCUMULATORS or (operator == "$avg" and not field_paths(argument)):
+                # averages of dimensions would have to be weighted by number of raw documents, constant ones are not
+                scope.read(argument)
+                group[name] = copy.deepcopy(accumulator)
+            elif self.is_unused(name, following):
+                continue
+            else:
+                raise Unroutable(f"{operator} accumulator")
+
+        stages: List[Dict[str, Any]] = [{"$group": group}]
+        if averages:
+            stages.append(
+                {
+                    "$set": {
+                        name: {"$cond": [{"$gt": [f"${count}", 0]}, {"$divide": [f"${name}", f"${count}"]}, None]}
+                        for name, count in averages.items()
+                    }
+                }
+            )
+            stages.append({"$unset": list(averages.values())})
+        return stages
+
+    @staticmethod
+    def is_unused(name: str, following: Optional[Dict[str, Any]]) -> bool:
+        """accumulator is dropped by the inclusion `$project` following its `$group` (it does not need to be computed)"""
+        if not following or "$project" not in following:
+            return False
+        spec = following["$project"]
+        if all(is_exclusion(value) for key, value in spec.items() if key != "_id"):
+            return False
+        return not is_inclusion(spec.get(name)) and name not in field_paths(list(spec.values()))
@@ -1,14 +1,68 @@
 import os
 from datetime import datetime
+from typing import Dict, List
 
 from flask import request
 
-from base.repository import BaseRepository;
+from base.helpers.duration import Duration
+from base.repository import BaseRepository
+from configurations.repository import ConfigCache
+from dds.cubes import CUBES, DDS_COLLECTION, INDEX, REGISTRY_COLLECTION, Cube, CubePlanner, is_usable
+
+
+class DdsCubeRepository(BaseRepository):
+    """
+    registry of built cubes (`dds_cubes`), a cube is usable once it is built and until DDS loaders of the scheduler
+    change `dds_pgs` again (they set `data_changed_at`, times are the ones of the database server)
+    """
+
+    collection = REGISTRY_COLLECTION
+    cache = ConfigCache(ttl=Duration.minutes(1))
+
+    def sizes(self) -> Dict[str, int]:
+        """number of documents of usable cubes by name"""
+        return self.cache.get(REGISTRY_COLLECTION, self.__load_sizes)
+
+    def __load_sizes(self, _: str) -> Dict[str, int]:
+        return {doc["_id"]: doc["doc_count"] for doc in self.find({"built_at": {"$ne": None}}) if is_usable(doc)}
+
+    def unusable(self) -> List[Cube]:
+        """cubes never built or built before DDS loaders changed `dds_pgs` (the ones to build again)"""
+        usable = {doc["_id"] for doc in self.find({}) if is_usable(doc)}
+        return [cube for cube in CUBES if cube.name not in usable]
+
+    def build(self, cube: Cube) -> int:
+        """
+        build a cube from `dds_pgs` (it replaces the current one at once when it is ready),
+        data changed while it is built leaves it stale
+        """
+        registry = self._db[REGISTRY_COLLECTION]
+        registry.update_one({"_id": cube.name}, [{"$set": {"build_started_at": "$$NOW"}}], upsert=True)
+
+        staging = f"{cube.collection}_build"
+        self._db[DDS_COLLECTION].aggregate([*cube.stages(), {"$out": staging}], allowDiskUse=True)
+        self._db[staging].create_index([(name, 1) for name in INDEX])
+        self._db[staging].rename(cube.collection, dropTarget=True)
+
+        count = self._db[cube.collection].estimated_document_count()
+        registry.update_one({"_id": cube.name}, [{"$set": {"built_at": "$build_started_at", "doc_count": count}}])
+        self.cache.invalidate()
+        return count
+
+
+cube_repo = DdsCubeRepository()
+planner = CubePlanner(CUBES)
 
 
 class DdsRepository(BaseRepository):
-    collection = 'dds_pgs'
+    collection = DDS_COLLECTION
 
+    def aggregate(self, pipline, **kwargs):
+        """aggregations a built cube can answer run on the smallest one of them, other ones run on raw sales"""
+        plan = planner.plan(pipline, cube_repo.sizes()) if self.collection == DDS_COLLECTION else None
+        if plan is None:
+            return super().aggregate(pipline, **kwargs)
+        return self._db[plan.cube.collection].aggregate(plan.pipeline, **kwargs)
  
     def get_msd_carriers(self):
         return {
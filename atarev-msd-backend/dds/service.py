@@ -103,8 +103,9 @@ class DdsService(BaseService):
         dest_city_airport = form.dest_city_airport.data
 
         # get lat and long for both origion and destination codes
-        pt1 = self.airport_repository.get_coordinates(orig_city_airport)
-        pt2 = self.airport_repository.get_coordinates(dest_city_airport)
+        coordinates = self.airport_repository.get_coordinates_many([orig_city_airport, dest_city_airport])
+        pt1 = coordinates.get(orig_city_airport)
+        pt2 = coordinates.get(dest_city_airport)
 
         if not pt1 or not pt2:
             return
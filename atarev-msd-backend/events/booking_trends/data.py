@@ -3,6 +3,7 @@ from datetime import date, datetime
 
 import pandas as pd
 
+from base.loader import load_frame
 from dds.repository import DdsRepository
 from events.booking_trends.form import AggType, BookingTrendsForm
 from events.booking_trends.query import BookingTrendsQuery, EventQuery
@@ -60,7 +61,7 @@ class PaxData:
 
     def get(self) -> pd.DataFrame:
         query = BookingTrendsQuery(self.form, self.host_code).query
-        data = pd.DataFrame(repo.aggregate(query))
+        data = load_frame(repo.aggregate(query))
         events_data = EventData(self.form, self.host_code).get()
 
         if data.empty:
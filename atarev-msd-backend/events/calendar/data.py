@@ -8,6 +8,7 @@ from base.entities.carrier import CityBasedMarket
 from base.helpers.cabin import CabinMapper
 from base.helpers.datetime import Date
 from base.helpers.user import User
+from base.loader import load_frame
 from events.calendar.fields import hover_group
 from events.calendar.query import CalendarFareQuery, EventCalendarQuery
 from events.common import EventSetup
@@ -206,7 +207,7 @@ class AttachMinFare:
         destination = self.form.get_destination()
         host, comp = CityBasedMarket(self.host_code, origin[0], destination[0]).competitors()[0:2]
         query = CalendarFareQuery(self.form, host, comp, (start_date, end_date)).query
-        fares_df = pd.DataFrame(fare_repo.aggregate(query))
+        fares_df = load_frame(fare_repo.aggregate(query))
 
         if fares_df.empty:
             fares_df = pd.DataFrame(columns=["str_departure_date", "carrier_code", "currency"])
@@ -8,12 +8,9 @@ from base.helpers.user import User
 from base.mongo_utils import convert_list_param_to_criteria, merge_criterions
 from events.common.query import EventQuery
 from fares.repository import FareRepository
-from users.repository import UserRepository
 
 from .form import EventCalendarForm
 
-user_repository = UserRepository()
-
 
 @dataclass
 class EventCalendarQuery:
@@ -23,9 +20,7 @@ class EventCalendarQuery:
 
     @property
     def query(self) -> Dict[str, Any]:
-
-        user = user_repository.get_user(self.user.username)
-        event_ids = user.get("selected_filter_options", {}).get("selected_event_ids", [])
+        event_ids = self.user.selected_filter_options.get("selected_event_ids", [])
 
         match = EventQuery(
             host_code=self.host_code,
@@ -6,6 +6,7 @@ import pandas as pd
 
 from base.helpers.cabin import CabinMapper
 from base.helpers.datetime import Date
+from base.loader import load_frame
 from events.common import EventSetup
 from events.common.query import LoadFactorQuery
 from events.repository import EventRepository
@@ -192,7 +193,7 @@ class FareData:
             comp_code=self.comp_code,
         ).query
 
-        data = pd.DataFrame(fare_repo.aggregate(query))
+        data = load_frame(fare_repo.aggregate(query))
 
         if data.empty:
             return pd.DataFrame(columns=cols)
@@ -9,6 +9,7 @@ from base.constants import Constants
 from base.entities.currency import Currency
 from base.helpers.permissions import has_access
 from base.middlewares import attach_figure_id, attach_story_text, cache
+from base.redis import CacheNamespace
 from base.service import BaseService
 from base.utils import add_missing_dates
 from dds.forms import MsdBaseProductOverviewForm
@@ -77,7 +78,7 @@ class FareRevenueService(BaseService):
         return df
 
     @has_access("MSD", ["/fare-revenue"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_figure_id(["fig_host", "fig_comp"])
     def get_fare_booking_histograms(self, form: MSDBookingVsAverageFares):
         pipeline = self.builder.get_fare_booking_histograms_pipeline(form)
@@ -120,7 +121,7 @@ class FareRevenueService(BaseService):
         return resp
 
     @has_access("MSD", ["/fare-revenue"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_figure_id(["fig"])
     def get_fare_dow_revenue(self, form: MSDFareRevenueDowRevenue):
         pipeline = self.builder.get_fare_dow_revenue_pipeline(form)
@@ -147,7 +148,7 @@ class FareRevenueService(BaseService):
         }
 
     @has_access("MSD", ["/fare-revenue"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_figure_id(["host", "comp"])
     def get_msd_rbd_elastic(self, form: MSDRbdElastic):
         pipeline = self.builder.get_msd_rbd_ealstic_pipeline(form)
@@ -236,7 +237,7 @@ class FareRevenueService(BaseService):
         return model.fit().params
 
     @has_access("MSD", ["/fare-revenue"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_story_text(STORY_TEXTS["get_fare_revenue_class_mix"])
     @attach_figure_id(["fig_host", "fig_comp"])
     def get_fare_revenue_class_mix(self, form: FareRevenueClassMix):
@@ -245,9 +246,7 @@ class FareRevenueService(BaseService):
         pipelineـmix = self.builder.get_fare_revenue_class_mix_pipeline(form, "mix")
         pipelineـavg = self.builder.get_fare_revenue_class_mix_pipeline(form, "avg")
 
-        df_sums = self.lambda_df(self.repository.aggregate(pipelineـsums))
-        df_mix = self.lambda_df(self.repository.aggregate(pipelineـmix))
-        df_avg = self.lambda_df(self.repository.aggregate(pipelineـavg))
+        df_sums, df_mix, df_avg = self.aggregate_many([pipelineـsums, pipelineـmix, pipelineـavg])
 
         if df_sums.empty or df_mix.empty or df_avg.empty:
             return {
@@ -284,7 +283,7 @@ class FareRevenueService(BaseService):
         return resp
 
     @has_access("MSD", ["/fare-revenue"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_figure_id(["fig"])
     def get_fare_revenue_trends(self, form: FareRevenueTrends):
         s_year, s_month, _ = form.get_date_parts(request.args.get("date_range_start"))
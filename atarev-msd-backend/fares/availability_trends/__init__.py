@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
 
 import pandas as pd
 
@@ -9,9 +9,10 @@ from fares.availability_trends.data import AVAttachFields, FareData
 from fares.availability_trends.figure import Figure
 from fares.availability_trends.forms import GetMinFareTrends
 from fares.availability_trends.labels import AV_TRENDS_TABLE_LABELS
+from fares.common.dataset import FareDataset
 from fares.common.form import CHUNK_SIZE, FareForm
 from fares.common.labels import get_host_stats_labels, get_stats_labels, get_table_labels
-from fares.common.pagination import generate_meta
+from fares.common.pagination import Paginator, SortKeys, generate_meta, sort_frame, sort_spec, sorted_in_memory
 from fares.common.report import Report
 from fares.common.statistics import AvailibilityTrendsStatistics, host_stats
 from fares.common.table import Table
@@ -35,28 +36,88 @@ cols = [
     "classCode",
 ]
 
+# table columns that can be sorted by, fields of `AvTrendsMatchQuery` results (or attached afterwards)
+SORT_KEYS: SortKeys = {
+    "carrierCode": "carrierCode",
+    "maf": "fareAmount",
+    "departure_date": "outboundDate",
+    "weekday": "weekday",
+    "type": "type",
+    "market": "market",
+    "fltNum": "fltNum",
+    "inFltNum": "inFltNum",
+    "deptTime": "time",
+    "lf": "lf",
+    "duration": "duration",
+    "is_connecting": "is_connecting",
+    "cabinName": "cabinName",
+    "classCode": "classCode",
+}
+# fares are grouped by these fields, ordering by them keeps pages stable
+DEFAULT_SORT = {"outboundDate": 1, "carrierCode": 1, "market": 1, "fltNum": 1}
+
 
 @dataclass
 class AvTrends:
     form: Union[GetMinFareTrends, FareForm]
     user: User
 
-    def table(self) -> TableResp:
-        origin = self.form.get_origin(user=self.user)
-        destination = self.form.get_destination(user=self.user)
+    @property
+    def dataset(self) -> FareDataset:
+        return FareDataset("av-trends", self.form, self.user)
 
+    def _load(self) -> pd.DataFrame:
+        """fares with fields used by figure, table and report"""
         df = FareData(form=self.form, user=self.user).get()
-        df = AVAttachFields(
+        return self._attach_fields(df)
+
+    def _attach_fields(self, df: pd.DataFrame) -> pd.DataFrame:
+        """load factors of the form date range (the same for a page and for the whole dataset)"""
+        return AVAttachFields(
             data=df,
             host_code=self.user.carrier,
-            origin=origin,
-            destination=destination,
+            origin=self.form.get_origin(user=self.user),
+            destination=self.form.get_destination(user=self.user),
             cabin=self.form.get_cabin(normalize=True),
-            date_range=None,
+            date_range=self.form.get_date_range(),
             consider_flight_number=len(self.form.get_flight_keys()) > 0,
         ).get()
 
-        df = df.sort_values("outboundDate", ascending=True)
+    def _memory_sort_fields(self) -> List[str]:
+        """fields only known after the query (load factors are attached, fares converted to requested currency)"""
+        return ["lf", "fareAmount"] if self.form.should_convert_currency() else ["lf"]
+
+    def _page(self, sort: Dict[str, int]) -> Tuple[pd.DataFrame, int]:
+        """
+        requested page and number of all fares, taken from cached dataset when another endpoint has loaded it
+        (or when fares are sorted by fields the database does not have), otherwise only the page is loaded
+        (paginated by the database)
+        """
+        dataset = self.dataset.cached()
+        if dataset is None and sorted_in_memory(sort, self._memory_sort_fields()):
+            dataset = self.dataset.get(self._load)
+        if dataset is not None:
+            page = Paginator(page=self.form.get_page(), chunk_size=CHUNK_SIZE, data=sort_frame(dataset, sort)).get()
+            return page["data"], dataset.shape[0]
+
+        df, total = FareData(form=self.form, user=self.user).page(self.form.get_page(), CHUNK_SIZE, sort)
+        if df.empty:
+            return df, total
+
+        df = self._attach_fields(df)
+        # order given by the database
+        return df.sort_values("position", kind="stable"), total
+
+    def table(self) -> TableResp:
+        origin = self.form.get_origin(user=self.user)
+        destination = self.form.get_destination(user=self.user)
+
+        sort = sort_spec(self.form.columns_order(), SORT_KEYS, DEFAULT_SORT)
+        df, total = self._page(sort)
+
+        if df.empty:
+            return {"meta": generate_meta(), "data": [], "labels": AV_TRENDS_TABLE_LABELS}
+
         table_data = Table(
             user=self.user,
             data=df,
@@ -66,15 +127,12 @@ class AvTrends:
             page=self.form.get_page(),
             chunck_size=CHUNK_SIZE,
             columns=cols,
-            columns_order=self.form.columns_order(),
+            total=total,
         ).get()
 
-        if df.empty:
-            return {"meta": generate_meta(), "data": [], "labels": AV_TRENDS_TABLE_LABELS}
-
         return {
             "data": self._json(table_data["data"]),
-            "meta": generate_meta(table_data["current"], CHUNK_SIZE, df.shape[0], table_data["total_count"]),
+            "meta": generate_meta(table_data["current"], CHUNK_SIZE, total, table_data["total_count"]),
             "labels": get_table_labels(AV_TRENDS_TABLE_LABELS),
         }
 
@@ -90,21 +148,11 @@ class AvTrends:
 
     def figure(self):
         empty_figure = {"data": [], "layout": {}}
-        df = FareData(form=self.form, user=self.user).get()
+        df = self.dataset.get(self._load)
 
         if df.empty:
             return {"fig": empty_figure, "stats": {"data": [], "layout": {}}}
 
-        df = AVAttachFields(
-            data=df,
-            host_code=self.user.carrier,
-            origin=self.form.get_origin(),
-            destination=self.form.get_destination(),
-            cabin=self.form.get_cabin(normalize=True),
-            date_range=self.form.get_date_range(),
-            consider_flight_number=len(self.form.get_flight_keys()) > 0,
-        ).get()
-
         stats = AvailibilityTrendsStatistics(
             data=df,
             origin=self.form.get_origin(),
@@ -131,17 +179,7 @@ class AvTrends:
         }
 
     def report(self):
-        df = FareData(form=self.form, user=self.user).get()
-
-        df = AVAttachFields(
-            data=df,
-            host_code=self.user.carrier,
-            origin=self.form.get_origin(),
-            destination=self.form.get_destination(),
-            cabin=self.form.get_cabin(normalize=True),
-            date_range=None,
-            consider_flight_number=len(self.form.get_flight_keys()) > 0,
-        ).get()
+        df = self.dataset.get(self._load)
 
         if df.empty:
             return []
@@ -1,26 +1,20 @@
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
 from base.entities.currency import Currency
+from base.entities.exchange_rate import convert_amounts
 from base.helpers.user import User
+from base.loader import load_frame
 from fares.availability_trends.forms import GetMinFareTrends
 from fares.availability_trends.query import AvTrendsMatchQuery
-from fares.common import (
-    AttachFields,
-    currency_symbol,
-    dt,
-    dtd,
-    formatted_conn_keys,
-    formatted_duration,
-    formatted_time,
-    get_fares_mergeby,
-    get_lf_mergeby,
-)
+from fares.common import get_fares_mergeby, get_lf_mergeby
 from fares.common.data import AttachLF
 from fares.common.form import FareForm
+from fares.common.pagination import facet_page, page_result
+from fares.enrichment import av_trends_fields
 from fares.repository import FareRepository
 
 repo = FareRepository()
@@ -34,8 +28,18 @@ class FareData:
     def get(self) -> pd.DataFrame:
 
         query = AvTrendsMatchQuery(form=self.form, user=self.user).query
-        data = pd.DataFrame(repo.aggregate(query))
+        return self.__prepare(load_frame(repo.aggregate(query)))
 
+    def page(self, page: int, chunk_size: int, sort: Dict[str, int]) -> Tuple[pd.DataFrame, int]:
+        """fares of requested page (sorted, skipped and limited by the database) and number of all fares"""
+        query = AvTrendsMatchQuery(form=self.form, user=self.user).query
+        documents, total = page_result(repo.aggregate([*query, facet_page(page, chunk_size, sort)]))
+        data = load_frame(documents)
+        # fields attached afterwards reorder fares, position keeps the order given by the database
+        data["position"] = range(data.shape[0])
+        return self.__prepare(data), total
+
+    def __prepare(self, data: pd.DataFrame) -> pd.DataFrame:
         if data.empty:
             return pd.DataFrame(
                 columns=[
@@ -64,9 +68,8 @@ class FareData:
 
         if self.form.should_convert_currency():
             currency = self.form.get_currency()
-            rate = self.form.currency_conversion_rates(data.fareCurrency.unique().tolist()).get(currency, 1)
-
-            data["fareAmount"] = round((data.fareAmount * rate), 2)
+            # fares may be in different currencies, each one is converted with its own rate
+            data["fareAmount"] = np.round(convert_amounts(data.fareAmount, data.fareCurrency, currency), 2)
             data["fareCurrency"] = [currency] * data.shape[0]
 
         currency_map = Currency(data.fareCurrency.unique().tolist()).symbol
@@ -88,20 +91,11 @@ class AVAttachFields:
         """
         process DataFrame before attaching fields.
         """
-        scrape_time = lambda val: val.date()
-        df = self.data.copy()
-        df["outboundDate"] = df["outboundDate"].apply(dt)
-        df["scrapeTime"] = df["scrapeTime"].apply(scrape_time)
-        df = AttachFields(df).attach(self.consider_flight_number)
-        df["maf"] = df.apply(currency_symbol, axis=1)
-        df["deptTime"] = df["time"].apply(formatted_time)
-        df["duration"] = df["duration"].apply(formatted_duration)
-        df = df.replace({np.nan: None})
-        df["connecting_flight_keys"] = df["connecting_flight_keys"].apply(formatted_conn_keys)
-        df["inFltNum"] = df["inFltNum"].apply(formatted_conn_keys)
-        df["dtd"] = df.apply(dtd, axis=1)
-
-        return df
+        symbols = Currency(self.data.fareCurrency.unique().tolist()).symbol
+        data = self.data.copy()
+        # tables are sorted by durations as the database has them
+        data["raw_duration"] = data["duration"]
+        return av_trends_fields(data, symbols, self.consider_flight_number)
 
     def __attach_lf(self, df: pd.DataFrame) -> pd.DataFrame:
         """
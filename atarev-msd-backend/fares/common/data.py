@@ -6,6 +6,7 @@ import pandas as pd
 from base.helpers.cabin import CabinMapper
 from base.helpers.datetime import Date
 from fares.common.query import LoadFactorQuery
+from fares.enrichment import days_between
 from flight_inventory.repository import FlightInventoryRepository
 
 repo = FlightInventoryRepository()
@@ -87,10 +88,9 @@ class AttachLF:
     date: Optional[int] = None
 
     def get(self) -> pd.DataFrame:
-        dtd = lambda row: (Date(row.dept_date).date() - Date(row.date).date()).days
-        cabin = lambda val: CabinMapper.normalize(val)
         df = self.data.copy()
-        df["cabin_normalized"] = df.cabinName.apply(cabin)
+        # few distinct cabin names, each one is normalized once
+        df["cabin_normalized"] = df.cabinName.map({name: CabinMapper.normalize(name) for name in df.cabinName.unique()})
 
         load_factor_df = LFData(
             origin=self.origin,
@@ -103,7 +103,8 @@ class AttachLF:
         ).get()
 
         if "dtd" in self.fares_mergeby and "dtd" in self.lf_mergeby:
-            load_factor_df["dtd"] = load_factor_df.apply(dtd, axis=1)
+            # placeholder row of missing load factors has no dates
+            load_factor_df["dtd"] = days_between(load_factor_df.dept_date, load_factor_df.date, errors="coerce")
 
         merged = df.merge(load_factor_df, how="left", left_on=self.fares_mergeby, right_on=self.lf_mergeby)
         merged["lf"] = merged["lf"].fillna("-")
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import pickle
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import pandas as pd
+
+from base.helpers.duration import Duration
+from base.helpers.user import User
+from base.redis import CacheNamespace, Redis
+from fares.common.form import FareForm
+
+redis = Redis()
+
+# fields changing how a dataset is presented, not which fares it has
+PRESENTATION_FIELDS = {"page_", "sort_", "overview", "dark_theme", "csrf_token"}
+# bigger datasets are not worth a redis round trip, they are computed again
+MAX_SIZE = 64 * 1024 * 1024
+POLL_INTERVAL_IN_SECONDS = 0.2
+
+
+@dataclass
+class FareDataset:
+    """
+    enriched fares of a filter form, computed once and shared by figure, table and report endpoints of a module
+    (cached in redis for a short time per module, host, user markets and form fields that select fares)
+    """
+
+    name: str
+    form: FareForm
+    user: User
+    expiration_in_seconds: int = Duration.minutes(5)
+    lock_in_seconds: int = Duration.minutes(2)
+    wait_in_seconds: int = 30
+
+    @property
+    def key(self) -> str:
+        fields = {
+            name: value for name, value in self.form.data.items() if name not in PRESENTATION_FIELDS and value not in (None, "")
+        }
+        params = json.dumps([self.name, fields, sorted(self.user.markets)], sort_keys=True, default=str)
+        return f"fare_dataset_{hashlib.sha256(params.encode('utf8')).hexdigest()}"
+
+    def get(self, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        cached dataset or the one returned by `load`, only one worker loads a missing dataset
+        while the others wait for it (same as `cache` decorator)
+        """
+        df = self.cached()
+        if df is not None:
+            return df
+
+        with redis.lock(self.key, self.lock_in_seconds) as acquired:
+            if acquired:
+                return self.__store(load())
+
+        deadline = time.time() + self.wait_in_seconds
+        while time.time() < deadline:
+            time.sleep(POLL_INTERVAL_IN_SECONDS)
+            df = self.cached()
+            if df is not None:
+                return df
+
+        # worker holding the lock is too slow (or failed)
+        return self.__store(load())
+
+    def cached(self) -> Optional[pd.DataFrame]:
+        # only values signed by this app are returned (`Redis.get_bytes`)
+        raw = redis.get_bytes(self.key, namespace=CacheNamespace.FARES)
+        if raw is None:
+            return None
+        try:
+            return pickle.loads(zlib.decompress(raw))
+        except (zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError):
+            # written by another version of pandas (or truncated), computed again
+            return None
+
+    def __store(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not redis.is_redis_enabled():
+            return df
+
+        # pickled frames keep column blocks and dtypes as they are (no conversion to rows)
+        raw = zlib.compress(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+        if len(raw) <= MAX_SIZE:
+            redis.set_bytes(self.key, raw, self.expiration_in_seconds, namespace=CacheNamespace.FARES)
+        return df
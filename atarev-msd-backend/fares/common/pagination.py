@@ -1,9 +1,17 @@
 import math
 from dataclasses import dataclass
-from typing import Optional, TypedDict, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypedDict, Union
 
 import pandas as pd
 
+from base.helpers.errors import InvalidSortKey
+from fares.common.form import ColumnOrder
+
+# table column -> field of aggregation results it is sorted by
+SortKeys = Dict[str, str]
+# prefix of columns keeping database values of fields that are formatted for display
+RAW_PREFIX = "raw_"
+
 
 class Page(TypedDict):
     data: pd.DataFrame
@@ -39,6 +47,56 @@ class Paginator:
         }
 
 
+def sort_spec(columns_order: List[ColumnOrder], sort_keys: SortKeys, default: Dict[str, int]) -> Dict[str, int]:
+    """
+    `$sort` spec of requested columns (in requested order), only whitelisted columns can be sorted by,
+    fields of `default` are appended so rows are ordered the same way on every page
+    """
+    spec = {}
+    for item in columns_order:
+        if item["sortKey"] not in sort_keys:
+            raise InvalidSortKey(item["sortKey"])
+        spec.setdefault(sort_keys[item["sortKey"]], 1 if item["sortOrder"] == "asc" else -1)
+
+    for field, direction in default.items():
+        spec.setdefault(field, direction)
+    return spec
+
+
+def sorted_in_memory(sort: Dict[str, int], fields: Iterable[str]) -> bool:
+    """whether `sort` orders rows by a field the database can not sort by (attached or converted after the query)"""
+    return any(field in sort for field in fields)
+
+
+def sort_frame(df: pd.DataFrame, sort: Dict[str, int]) -> pd.DataFrame:
+    """
+    rows of a frame in the order `$sort` with the same spec gives (fields the frame does not have are skipped),
+    fields formatted for display are sorted by the copy of their database values (`raw_<field>` column)
+    """
+    columns = {f"{RAW_PREFIX}{field}" if f"{RAW_PREFIX}{field}" in df.columns else field: field for field in sort}
+    columns = {column: field for column, field in columns.items() if column in df.columns}
+    if not columns:
+        return df
+    return df.sort_values(list(columns), ascending=[sort[field] == 1 for field in columns.values()], kind="stable")
+
+
+def facet_page(page: int, chunk_size: int, sort: Dict[str, int]) -> Dict[str, Any]:
+    """stage returning the number of all documents and sorted documents of requested page in one result"""
+    return {
+        "$facet": {
+            "total": [{"$count": "count"}],
+            "page": [{"$sort": sort}, {"$skip": (page - 1) * chunk_size}, {"$limit": chunk_size}],
+        }
+    }
+
+
+def page_result(cursor: Iterable[dict]) -> Tuple[List[dict], int]:
+    """documents of the page and total count from result of a pipeline ending with `facet_page`"""
+    result = next(iter(cursor), None) or {}
+    total = result.get("total") or [{"count": 0}]
+    return result.get("page", []), total[0]["count"]
+
+
 def generate_meta(
     current_page: Optional[int] = 1,
     per_page: Optional[int] = None,
@@ -1,10 +1,9 @@
-import csv
 from dataclasses import dataclass
-from io import StringIO
 from typing import List, Optional
 
 import pandas as pd
-from flask import make_response
+
+from base.export import csv_chunks, csv_response, frame_rows
 
 
 @dataclass
@@ -15,18 +14,8 @@ class Report:
     columns: Optional[List[str]] = None
 
     def get(self):
-        si = StringIO()
-        cw = csv.writer(si)
-
         if self.data.empty:
             return None
 
-        df = self.data.copy()
-        if self.columns:
-            df = df[self.columns]
-
-        cw.writerows([self.header] + [list(dict(item).values()) for _, item in df.iterrows()])
-        output = make_response(si.getvalue())
-        output.headers["Content-Disposition"] = f"attachment; filename={self.file_name}"
-        output.headers["Content-type"] = "text/csv"
-        return output
+        df = self.data[self.columns] if self.columns else self.data
+        return csv_response(csv_chunks(self.header, frame_rows(df)), self.file_name)
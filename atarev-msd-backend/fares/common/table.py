@@ -1,5 +1,5 @@
+import math
 from dataclasses import dataclass
-from itertools import groupby
 from typing import Dict, List, Optional, TypedDict
 
 import pandas as pd
@@ -29,20 +29,25 @@ class Table:
     chunck_size: Optional[int] = 20
     columns: Optional[List[str]] = None
     columns_order: Optional[List[ColumnOrder]] = None
+    # number of all rows when `data` is already the requested page (paginated and sorted by the database)
+    total: Optional[int] = None
 
     def get(self) -> TableData:
         if self.data.empty:
             return {"data": pd.DataFrame({"carrier_color": [None]}), "current": None, "total_count": None}
 
-        page_data = Paginator(page=self.page, chunk_size=self.chunck_size, data=self.data).get()
-        data, current, _, _, page_count = page_data.values()
+        if self.total is None:
+            page_data = Paginator(page=self.page, chunk_size=self.chunck_size, data=self.__sort_columns(self.data)).get()
+            data, current, _, _, page_count = page_data.values()
+        else:
+            data, current, page_count = self.data, self.page, math.ceil(self.total / self.chunck_size)
+
         colors = self._carrier_colors()
 
         if self.columns:
             data = data[self.columns]
 
         data["carrier_color"] = data["carrierCode"].map(colors)
-        data = self.__sort_columns(data)
         return {"data": data, "current": current, "total_count": page_count}
 
     def _carrier_colors(self) -> Dict[str, str]:
@@ -54,6 +59,7 @@ class Table:
         if not self.columns_order:
             return data
 
-        for order, vals in groupby(self.columns_order, lambda obj: obj["sortOrder"]):
-            data = data.sort_values([item["sortKey"] for item in vals], ascending=order == "asc")
-        return data
+        return data.sort_values(
+            [item["sortKey"] for item in self.columns_order],
+            ascending=[item["sortOrder"] == "asc" for item in self.columns_order],
+        )
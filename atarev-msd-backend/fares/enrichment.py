@@ -0,0 +1,150 @@
+"""
+vectorized counterparts of the per value helpers fares are enriched with (`fares.common`),
+each function returns exactly what applying its helper on every value returns
+(nothing here reads the database, currency symbols are passed in as a dict)
+"""
+import calendar
+from functools import wraps
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+def distinct(func):
+    """
+    run a vectorized helper on distinct values only and spread its results (dates, times and codes repeat a lot),
+    values with missing or mixed types (1 and 1.0 are the same value for hashing) go through the helper as they are
+    """
+
+    @wraps(func)
+    def wrapper(values: pd.Series, *args, **kwargs) -> pd.Series:
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=False) not in ("string", "date", "integer"):
+            return func(values, *args, **kwargs)
+
+        codes, uniques = pd.factorize(values)
+        if (codes < 0).any():
+            return func(values, *args, **kwargs)
+
+        result = func(pd.Series(uniques), *args, **kwargs)
+        return pd.Series(result.to_numpy()[codes], index=values.index, name=values.name)
+
+    return wrapper
+
+
+@distinct
+def to_datetimes(values: pd.Series, errors: str = "raise") -> pd.Series:
+    """yyyymmdd integers (or yyyy-mm-dd strings, dates) as datetime64 values, `Date(val).date()`"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.normalize()
+    text = values.astype(str).str.replace("-", "", regex=False).str[:8]
+    return pd.to_datetime(text, format="%Y%m%d", errors=errors)
+
+
+def to_dates(values: pd.Series) -> pd.Series:
+    """yyyymmdd integers as `datetime.date` objects, `dt(val)`"""
+    return to_datetimes(values).dt.date
+
+
+def scrape_dates(values: pd.Series) -> pd.Series:
+    """datetimes as `datetime.date` objects, `val.date()`"""
+    return pd.to_datetime(values).dt.date
+
+
+def prefix_dates(values: pd.Series) -> pd.Series:
+    """values starting with yyyymmdd (yyyymmddHHMM ...) as `datetime.date` objects"""
+    return pd.to_datetime(values.astype(str).str[0:8], format="%Y%m%d").dt.date
+
+
+def days_between(end: pd.Series, start: pd.Series, errors: str = "raise") -> pd.Series:
+    """days from `start` to `end` (dates or yyyymmdd integers)"""
+    return (to_datetimes(end, errors) - to_datetimes(start, errors)).dt.days
+
+
+@distinct
+def format_dates(dates: pd.Series, fmt: str) -> pd.Series:
+    return pd.to_datetime(dates).dt.strftime(fmt)
+
+
+@distinct
+def weekday_abbrs(dates: pd.Series) -> pd.Series:
+    """weekday of dates as string : Sun, Fri"""
+    return pd.to_datetime(dates).dt.dayofweek.map(dict(enumerate(calendar.day_abbr)))
+
+
+@distinct
+def format_times(values: pd.Series) -> pd.Series:
+    """hhmm values as hh:mm, `Time(val).humanize()` (one digit is taken as hours, two digits as minutes)"""
+    text = values.astype(str)
+    size = text.str.len()
+    text = text.where(size != 2, "00" + text)
+    text = text.where(size != 1, "0" + text + "00")
+    text = text.str.zfill(4)
+    return text.str[0:2] + ":" + text.str[2:4]
+
+
+def format_durations(values: pd.Series) -> pd.Series:
+    """hhmm durations as hh.mmh, `formatted_duration(val)`"""
+    return format_times(values).str.replace(":", ".", regex=False) + "h"
+
+
+@distinct
+def format_clock(values: pd.Series) -> pd.Series:
+    """numeric hhmm values as hh:mm (anything else as it is), `Duration.format(val)`"""
+    text = values.astype(str)
+    padded = text.str.zfill(4)
+    return (padded.str[0:2] + ":" + padded.str[2:]).where(text.str.isnumeric(), text)
+
+
+def trim_conn_keys(values: pd.Series) -> pd.Series:
+    """connecting flight keys without trailing separator, values that are not strings become None"""
+    if values.dtype != object:
+        return pd.Series(None, index=values.index, dtype=object)
+    trimmed = values.str[:-1].astype(object)
+    return trimmed.where(trimmed.notna(), None)
+
+
+def join(df: pd.DataFrame, columns, sep: str) -> pd.Series:
+    """values of columns as strings joined by `sep`"""
+    first, *rest = columns
+    if not rest:
+        return df[first].astype(str)
+    return df[first].astype(str).str.cat([df[column].astype(str) for column in rest], sep=sep)
+
+
+def attach_currency(amounts: pd.Series, symbols: pd.Series) -> pd.Series:
+    """amounts prefixed by their currency symbol, `Currency.attach_currency(amount, symbol)`"""
+    return symbols.astype(str).str.cat(amounts.astype(str), sep=" ")
+
+
+def attach_fields(df: pd.DataFrame, symbols: Dict[str, str], consider_flight_number: bool) -> pd.DataFrame:
+    """
+    formatted date, weekday, line id, currency symbol and formatted time columns (`AttachFields`)
+    line id corresponds to flights to be plotted for a single airline, there is one line per flight
+    when flights are requested
+    """
+    df["formatted_date"] = format_dates(df.outboundDate, "%b %d %Y")
+    df["weekday"] = weekday_abbrs(df.outboundDate)
+    df["lineId"] = join(
+        df,
+        ["carrierCode", "marketOrigin", "marketDestination", "fltNum"] if consider_flight_number else ["carrierCode"],
+        "-",
+    )
+    df["currency_symbol"] = df.fareCurrency.map(symbols)
+    df["formatted_time"] = format_clock(df.time)
+    return df
+
+
+def av_trends_fields(df: pd.DataFrame, symbols: Dict[str, str], consider_flight_number: bool) -> pd.DataFrame:
+    """fields availability trends fares get before load factors are attached (`AVAttachFields`)"""
+    df["outboundDate"] = to_dates(df["outboundDate"])
+    df["scrapeTime"] = scrape_dates(df["scrapeTime"])
+    df = attach_fields(df, symbols, consider_flight_number)
+    df["maf"] = attach_currency(df["fareAmount"], df["currency_symbol"])
+    df["deptTime"] = format_times(df["time"])
+    df["duration"] = format_durations(df["duration"])
+    df = df.replace({np.nan: None})
+    df["connecting_flight_keys"] = trim_conn_keys(df["connecting_flight_keys"])
+    df["inFltNum"] = trim_conn_keys(df["inFltNum"])
+    df["dtd"] = days_between(df["outboundDate"], df["scrapeTime"])
+    return df
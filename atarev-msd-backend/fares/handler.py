@@ -0,0 +1,20 @@
+import pandas as pd
+
+from base.handler import FieldsHandler
+
+
+class FsHandler(FieldsHandler):
+    def pax_ratio_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        """return pax ratio as dict"""
+        return self.__ratios(df[col], df["pax"])
+
+    def buyup_ratio_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        """return buyup as dict"""
+        return self.__ratios(df[col], df["buyup"])
+
+    def __ratios(self, ratios: pd.Series, values: pd.Series) -> pd.Series:
+        return pd.Series(
+            [{"ratio": ratio, "text": str(value)} for ratio, value in zip(ratios.astype(object), values.astype(object))],
+            index=ratios.index,
+            dtype=object,
+        )
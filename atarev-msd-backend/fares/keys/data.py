@@ -4,6 +4,7 @@ from typing import List
 import pandas as pd
 
 from base.helpers.user import User
+from base.loader import load_frame
 from fares.keys.forms import GetFlightKeys
 from fares.keys.query import GroupedKeys
 from fares.repository import FareRepository
@@ -18,7 +19,7 @@ class FlightKeys:
 
     def get(self) -> List[str]:
         pipelines = GroupedKeys(form=self.form, user=self.user).query
-        df = pd.DataFrame(fare_repo.aggregate(pipelines))
+        df = load_frame(fare_repo.aggregate(pipelines))
         if df.empty:
             return []
         df = df.drop_duplicates(["carrierCode", "fltNum"])
@@ -1,13 +1,14 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
 
 import pandas as pd
 
 from base.helpers.user import User
+from fares.common.dataset import FareDataset
 from fares.common.form import CHUNK_SIZE
 from fares.common.labels import get_host_stats_labels, get_stats_labels, get_table_labels
-from fares.common.pagination import generate_meta
+from fares.common.pagination import Paginator, SortKeys, generate_meta, sort_frame, sort_spec, sorted_in_memory
 from fares.common.report import Report
 from fares.common.statistics import AvailibilityTrendsStatistics, host_stats
 from fares.common.table import Table
@@ -37,14 +38,64 @@ cols = [
     "classCode",
 ]
 
+# table columns that can be sorted by, fields of `PriceEvoluationQuery` results (or attached afterwards)
+SORT_KEYS: SortKeys = {
+    "carrierCode": "carrierCode",
+    "fare": "fareAmount",
+    "dtd": "dtd",
+    "cabinName": "cabinName",
+    "fltNum": "fltNum",
+    "weekday": "weekday",
+    "lf": "lf",
+    "time": "time",
+    "duration": "duration",
+    "is_connecting": "is_connecting",
+    "inFltNum": "inFltNum",
+    "market": "market",
+    "type": "type",
+    "classCode": "classCode",
+}
+# fares are grouped by these fields, ordering by them keeps pages stable
+DEFAULT_SORT = {"dtd": -1, "carrierCode": 1, "flightKey": 1}
+# fields only known after the query (attached afterwards, fares converted with rates of their dates)
+MEMORY_SORT_FIELDS = ["weekday", "lf", "fareAmount"]
+
 
 @dataclass
 class PE:
     form: GetPriceEvolution
     user: User
 
+    @property
+    def dataset(self) -> FareDataset:
+        return FareDataset("price-ev", self.form, self.user)
+
+    def _load(self) -> pd.DataFrame:
+        """fares with fields used by figure, table and report"""
+        return FareData(user=self.user, form=self.form).get()
+
+    def _page(self, sort: Dict[str, int]) -> Tuple[pd.DataFrame, int]:
+        """
+        requested page and number of all fares, taken from cached dataset when another endpoint has loaded it
+        (or when fares are sorted by fields the database does not have), otherwise only the page is loaded
+        (paginated by the database)
+        """
+        dataset = self.dataset.cached()
+        if dataset is None and sorted_in_memory(sort, MEMORY_SORT_FIELDS):
+            dataset = self.dataset.get(self._load)
+        if dataset is not None:
+            page = Paginator(page=self.form.get_page(), chunk_size=CHUNK_SIZE, data=sort_frame(dataset, sort)).get()
+            return page["data"], dataset.shape[0]
+
+        df, total = FareData(user=self.user, form=self.form).page(self.form.get_page(), CHUNK_SIZE, sort)
+        if df.empty:
+            return df, total
+
+        # order given by the database
+        return df.sort_values("position", kind="stable"), total
+
     def figure(self):
-        df = FareData(user=self.user, form=self.form).get()
+        df = self.dataset.get(self._load)
 
         if df.empty:
             return {"fig": {"data": [], "layout": {}}, "stats": {"data": [], "labels": {}}}
@@ -75,8 +126,8 @@ class PE:
     def table(self) -> TableResp:
         origin = self.form.get_origin(user=self.user)
         destination = self.form.get_destination(user=self.user)
-        df = FareData(user=self.user, form=self.form).get()
-        df = df.sort_values("dtd", ascending=False)
+        sort = sort_spec(self.form.columns_order(), SORT_KEYS, DEFAULT_SORT)
+        df, total = self._page(sort)
 
         if df.empty:
             return {"meta": generate_meta(), "data": [], "labels": PE_TABLE_LABELS}
@@ -90,14 +141,12 @@ class PE:
             page=self.form.get_page(),
             chunck_size=CHUNK_SIZE,
             columns=cols,
+            total=total,
         ).get()
 
-        if df.empty:
-            return {"meta": generate_meta(), "data": [], "labels": PE_TABLE_LABELS}
-
         return {
             "data": self._json(table_data["data"]),
-            "meta": generate_meta(table_data["current"], CHUNK_SIZE, df.shape[0], table_data["total_count"]),
+            "meta": generate_meta(table_data["current"], CHUNK_SIZE, total, table_data["total_count"]),
             "labels": get_table_labels(PE_TABLE_LABELS),
         }
 
@@ -112,7 +161,7 @@ class PE:
         ]
 
     def report(self):
-        df = FareData(user=self.user, form=self.form).get()
+        df = self.dataset.get(self._load)
         df = df.sort_values("dtd", ascending=False)
 
         if df.empty:
@@ -1,67 +1,31 @@
-from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from base.entities.exchange_rate import HistoricalExchangeRate
 from base.helpers.datetime import Date
 from base.helpers.user import User
+from base.loader import load_frame
 from fares.availability_trends.forms import GetMinFareTrends
-from fares.common import (
-    AttachFields,
-    currency_symbol,
-    dt,
-    formatted_conn_keys,
-    formatted_duration,
-    formatted_time,
-    get_fares_mergeby,
-    get_lf_mergeby,
-)
+from fares.common import AttachFields, get_fares_mergeby, get_lf_mergeby
 from fares.common.data import AttachLF
 from fares.common.form import FareForm
+from fares.common.pagination import facet_page, page_result
+from fares.enrichment import attach_currency, format_durations, format_times, prefix_dates, to_dates, trim_conn_keys
 from fares.price_evoluation.forms import GetPriceEvolution
 from fares.price_evoluation.query import PriceEvoluationQuery
 from fares.repository import FareRepository
 
 repo = FareRepository()
-norm_date = lambda row: int((Date(row.outboundDate).date() + timedelta(days=row.dtd)).strftime("%Y%m%d"))
 
 
-def find_closest_exchange_rate(rates: Dict[int, Dict[str, float]], date: int) -> Dict[str, float]:
-    if not rates:
-        return {}
-
-    if len(rates) == 1:
-        return rates.get(next(iter(rates.keys())))
-
-    if rates.get(date):
-        return rates[date]
-
-    exchange_rates = None
-    dates = deque(
-        [
-            int((Date(date).date() - timedelta(days=1)).strftime("%Y%m%d")),
-            int((Date(date).date() + timedelta(days=1)).strftime("%Y%m%d")),
-        ]
-    )
-
-    while not exchange_rates and bool(dates):
-        prev, nxt = dates.popleft(), dates.popleft()
-
-        if rates.get(prev):
-            exchange_rates = rates[prev]
-            break
-
-        if rates.get(nxt):
-            exchange_rates = rates[nxt]
-            break
-
-        dates.appendleft(int((Date(nxt).date() + timedelta(days=1)).strftime("%Y%m%d")))
-        dates.appendleft(int((Date(prev).date() - timedelta(days=1)).strftime("%Y%m%d")))
-
-    return exchange_rates or {}
+def norm_dates(data: pd.DataFrame) -> pd.Series:
+    """outbound date shifted by days to departure (as yyyymmdd integers)"""
+    outbound = pd.to_datetime(data.outboundDate.astype(str).str.replace("-", ""), format="%Y%m%d")
+    return (outbound + pd.to_timedelta(data.dtd, unit="D")).dt.strftime("%Y%m%d").astype(int)
 
 
 @dataclass
@@ -91,9 +55,8 @@ class PEAttachFields:
         return df
 
     def __setup(self, data: pd.DataFrame) -> pd.DataFrame:
-        scrape_time = lambda val: datetime.strptime(Date(int(f"{val}"[0:8])).humanize(), "%Y-%m-%d").date()
-        data.outboundDate = data.outboundDate.apply(dt)
-        data.scrapeTime = data.scrapeTime.apply(scrape_time)
+        data.outboundDate = to_dates(data.outboundDate)
+        data.scrapeTime = prefix_dates(data.scrapeTime)
         return data
 
 
@@ -103,8 +66,20 @@ class FareData:
     user: User
 
     def get(self) -> pd.DataFrame:
+        df = load_frame(repo.aggregate(PriceEvoluationQuery(form=self.form, user=self.user).query))
+        return self.__prepare(df)
+
+    def page(self, page: int, chunk_size: int, sort: Dict[str, int]) -> Tuple[pd.DataFrame, int]:
+        """fares of requested page (sorted, skipped and limited by the database) and number of all fares"""
+        query = PriceEvoluationQuery(form=self.form, user=self.user).query
+        documents, total = page_result(repo.aggregate([*query, facet_page(page, chunk_size, sort)]))
+        data = load_frame(documents)
+        # fields attached afterwards reorder fares, position keeps the order given by the database
+        data["position"] = range(data.shape[0])
+        return self.__prepare(data), total
+
+    def __prepare(self, df: pd.DataFrame) -> pd.DataFrame:
         currency = self.form.get_ctype(self.user.carrier)
-        df = pd.DataFrame(repo.aggregate(PriceEvoluationQuery(form=self.form, user=self.user).query))
         df = self.__handle_currency_exchang(df, to_currencies=currency)
 
         if df.empty:
@@ -115,28 +90,30 @@ class FareData:
         return df
 
     def __setup(self, data: pd.DataFrame) -> pd.DataFrame:
-        data["deptTime"] = data["time"].apply(formatted_time)
-        data["fare"] = data.apply(currency_symbol, axis=1)
-        data["time"] = data["time"].apply(formatted_time)
-        data["duration"] = data["duration"].apply(formatted_duration)
-        data["connecting_flight_keys"] = data["connecting_flight_keys"].apply(formatted_conn_keys)
+        data["deptTime"] = format_times(data["time"])
+        data["fare"] = attach_currency(data["fareAmount"], data["currency_symbol"])
+        # tables are sorted by times and durations as the database has them
+        data["raw_time"] = data["time"]
+        data["raw_duration"] = data["duration"]
+        data["time"] = format_times(data["time"])
+        data["duration"] = format_durations(data["duration"])
+        data["connecting_flight_keys"] = trim_conn_keys(data["connecting_flight_keys"])
         return data
 
     def __handle_currency_exchang(self, data: pd.DataFrame, to_currencies: str) -> pd.DataFrame:
-        data["norm_date"] = data.apply(norm_date, axis=1)
+        if data.empty:
+            return data
+
+        data["norm_date"] = norm_dates(data)
         start_date, end_date = self.__get_date_range(data)
         base_currency = data.fareCurrency.unique().tolist()
-        rates = HistoricalExchangeRate(base_currency=base_currency, currencies=[to_currencies]).rates(start_date, end_date)
-        data["fareAmount"] = data.apply(lambda row: self.__exchange(row, to_currencies, rates), axis=1)
-        data["fareCurrency"] = [to_currencies] * data.shape[0]
+        history = HistoricalExchangeRate(base_currency=base_currency, currencies=[to_currencies]).table(start_date, end_date)
+        # every fare is converted with rates of closest known date in one pass
+        amounts = history.convert(data.fareAmount, data.fareCurrency, data.norm_date, to_currencies)
+        data["fareAmount"] = np.round(amounts).astype(int)
+        data["fareCurrency"] = to_currencies
         return data
 
-    def __exchange(self, row: pd.Series, currency: str, exchange_rates: Dict[int, Dict[str, float]]) -> int:
-        _dt = row.norm_date
-        rates = find_closest_exchange_rate(exchange_rates, _dt)
-        ratio = rates.get(f"{row.fareCurrency}-{currency}") or 1
-        return round(row.fareAmount * ratio)
-
     def __get_date_range(self, data: pd.DataFrame) -> Tuple[int, int]:
         s, e = int(data.norm_date.min()), int(data.norm_date.max())
         if s >= Date(datetime.now().date()).noramlize():
@@ -7,6 +7,7 @@ from airports.repository import AirportRepository
 from base.entities.currency import Currency
 from base.entities.exchange_rate import ExchangeRate
 from base.helpers.permissions import SuperUser, has_access, has_role
+from base.loader import load_frame
 from base.middlewares import attach_carriers_colors, attach_figure_id
 from base.service import BaseService
 from configurations.repository import ConfigurationRepository
@@ -16,6 +17,7 @@ from fares.availability_trends.forms import GetMinFareTrends
 from fares.builder import FareBuilder
 from fares.common.form import FareForm
 from fares.forms import GetFareStructureTable
+from fares.handler import FsHandler
 from fares.health import Tracker
 from fares.health.forms import TrackFares
 from fares.health.query import FareCountQuery
@@ -23,7 +25,7 @@ from fares.keys.data import FlightKeys
 from fares.keys.forms import GetFlightKeys
 from fares.price_evoluation import PE
 from fares.price_evoluation.forms import GetPriceEvolution
-from fares.repository import FSRepository
+from fares.repository import FareRepository, FSRepository
 from fares.structure import FsTable
 from fares.structure.form import GetFareStructure
 
@@ -32,6 +34,7 @@ dds_repo = DdsRepository()
 airport_repository = AirportRepository()
 builder = FareBuilder()
 fs_repo = FSRepository()
+fare_repo = FareRepository()
 
 
 class FlightKeysResp(TypedDict):
@@ -39,11 +42,14 @@ class FlightKeysResp(TypedDict):
 
 
 class FareService(BaseService):
+    handler_class = FsHandler
 
     @has_role([SuperUser])
     def get_scraper_health(self, form: TrackFares):
-        valid_fare_count = self._aggregte(FareCountQuery(form, True).query)
-        all_fare_couunt = self._aggregte(FareCountQuery(form, False).query)
+        valid_fare_count, all_fare_couunt = self.aggregate_many(
+            [FareCountQuery(form, True).query, FareCountQuery(form, False).query],
+            fare_repo,
+        )
         return Tracker(all_fare_couunt, valid_fare_count, form, request.user.carrier).track()
 
     @has_access("LFA", ["/availability-trends"])
@@ -56,12 +62,6 @@ class FareService(BaseService):
         return AvTrends(form, request.user).table()
 
     def get_price_evolution_table(self, form: GetPriceEvolution):
-
-        sort_params = {}
-        for key, value in request.args.items():
-            if key.startswith("sort_"):
-                column = key[len("sort_") :]
-                sort_params[column] = int(value)
         return PE(form, request.user).table()
 
     def get_price_evolution_report(self, form: GetPriceEvolution):
@@ -80,7 +80,7 @@ class FareService(BaseService):
     @attach_carriers_colors()
     def get_fare_structure_table(self, form: GetFareStructureTable):
         fs_pipeline = builder.fare_structure_table_pipeline(form)
-        fs_df = pd.DataFrame(fs_repo.aggregate(fs_pipeline))
+        fs_df = load_frame(fs_repo.aggregate(fs_pipeline))
         if fs_df.empty:
             return self.empty_figure
 
@@ -104,7 +104,7 @@ class FareService(BaseService):
         rbdk_pipline = self.builder.get_pax_rbkd_match(form)
 
         # get pax based on rbkd
-        rbkd_pax_pax = self.lambda_df(list(self.dds_repository.get_pax_by_field("rbkd", rbdk_pipline)))
+        rbkd_pax_pax = self.lambda_df(self.dds_repository.get_pax_by_field("rbkd", rbdk_pipline))
 
         df = (
             df.merge(rbkd_pax_pax, on="rbkd", how="left").sort_values(by="total_fare_conv", ascending=True).reset_index(drop=True)
@@ -132,7 +132,7 @@ class FareService(BaseService):
         host_fs_df = self.handle_fs_host_df(host_fs_df, form)
         host_fs_df.buyup = host_fs_df.buyup.astype(int)
         host_fs_df.total_fare_conv = host_fs_df.total_fare_conv.astype(int)
-        host_table = self.handle_rows(host_fs_df)
+        host_table = self.handler.handle_rows(host_fs_df)
         base_currency = df.currency.unique().tolist()[0]
         self.handle_fare_structure_table_currency_conversion(host_table, base_currency, form.get_currency())
 
@@ -142,7 +142,7 @@ class FareService(BaseService):
             # - calculate buyup ratio (step 1)
             # - handle some columns (change their form in response) (step 2)
             comp_curr_df = self.handle_fs_comp_df(comp_curr_df)  # step 1
-            table = self.handle_rows(comp_curr_df)  # step 2
+            table = self.handler.handle_rows(comp_curr_df)  # step 2
             self.handle_fare_structure_table_currency_conversion(
                 table,
                 base_currency,
@@ -177,28 +177,6 @@ class FareService(BaseService):
             item["buyup_ratio"]["text"] = item["buyup"]
             item["currency"] = currency_symbol
 
-    def handle_rows(self, df):
-        cols = df.columns.to_list()
-        table = []
-        for _, row in df.iterrows():
-            record = self.handle_row(row, cols)
-            table.append(record)
-        return table
-
-    def handle_row(self, row, cols):
-        """control format for some columns in response based on existing handlers"""
-        obj = {}
-        # for every column :
-        # if handler exists (<column_name>_handler) -> run that handler
-        # otherwise get value as is
-        for col in cols:
-            if hasattr(self, f"{col}_handler"):
-                method = getattr(self, f"{col}_handler")
-                obj[col] = method(row, col)
-            else:
-                obj[col] = row[col]
-        return obj
-
     def label_data(self):
         """rename data columns to be more human friendly"""
 
@@ -229,14 +207,6 @@ class FareService(BaseService):
         ]
         return [{col: FS_COL_CONV[col]} for col in cols]
 
-    def pax_ratio_handler(self, row, col):
-        """return pax ratio as dict"""
-        return {"ratio": row[col], "text": str(row["pax"])}
-
-    def buyup_ratio_handler(self, row, col):
-        """return buyup as dict"""
-        return {"ratio": row[col], "text": str(row["buyup"])}
-
     def get_flights(self, form: GetFlightKeys) -> FlightKeysResp:
         return {"flights": FlightKeys(user=request.user, form=form).get()}
 
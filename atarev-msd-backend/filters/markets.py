@@ -0,0 +1,171 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, TypedDict
+
+
+class AirportOption(TypedDict):
+    airport_name: str
+    airport_code: str
+    city_code: str
+
+
+class CityOption(TypedDict):
+    code: str
+    name: str
+    airports: List[AirportOption]
+
+
+class TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        self.ids = set()
+
+
+class PrefixTrie:
+    """
+    maps every prefix of indexed keys to ids of entries having a key that starts with it,
+    matching ids are stored on each node so a search costs as much as the length of the prefix
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+
+    def insert(self, key: str, entry_id: int):
+        node = self.root
+        for char in key.lower():
+            node = node.children.setdefault(char, TrieNode())
+            node.ids.add(entry_id)
+
+    def freeze(self, rank: Callable[[int], int]):
+        """store ids of each node as a tuple ordered by `rank`"""
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            node.ids = tuple(sorted(node.ids, key=rank))
+            nodes.extend(node.children.values())
+
+    def search(self, prefix: str) -> Tuple[int, ...]:
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return ()
+        return node.ids
+
+
+@dataclass
+class MarketOptionIndex:
+    """
+    city/airport options of a customer markets, searchable by prefix of city code, airport code or names
+    (`rows` keep the order of region records, search results are ordered by city code and airport code)
+    """
+
+    rows: List[AirportOption]
+    city_names: Dict[str, str]
+    trie: PrefixTrie
+    airport_ids: Dict[str, List[int]]
+    regions: List[str]
+    countries: List[str]
+
+    @classmethod
+    def build(cls, records: Iterable[dict], cities: Iterable[str]) -> "MarketOptionIndex":
+        rows, city_names, seen, regions, countries = [], {}, set(), {}, {}
+        cities = set(cities)
+        for record in records:
+            # places collection's data has been uploaded with type = 'METROPOLITAN"
+            # (same city/airport can be found many times)
+            if record.get("city_code") not in cities or (record["city_code"], record.get("airport_code")) in seen:
+                continue
+            seen.add((record["city_code"], record.get("airport_code")))
+            regions.setdefault(record.get("region_code"), None)
+            countries.setdefault(record.get("country_code"), None)
+            city_names.setdefault(record["city_code"], record.get("city_name"))
+            rows.append(
+                {
+                    "airport_name": record.get("airport_name"),
+                    "airport_code": record.get("airport_code"),
+                    "city_code": record["city_code"],
+                }
+            )
+
+        trie, airport_ids = PrefixTrie(), {}
+        for i, row in enumerate(rows):
+            airport_ids.setdefault(row["airport_code"], []).append(i)
+            for key in (row["city_code"], row["airport_code"], city_names[row["city_code"]], row["airport_name"]):
+                if key:
+                    trie.insert(key, i)
+
+        order = sorted(range(len(rows)), key=lambda i: (rows[i]["city_code"], rows[i]["airport_code"]))
+        rank = {i: position for position, i in enumerate(order)}
+        trie.freeze(rank.__getitem__)
+
+        return cls(rows, city_names, trie, airport_ids, list(regions), list(countries))
+
+    def options(
+        self,
+        city_codes: Iterable[str],
+        lookup: str = "",
+        selected: Iterable[str] = (),
+        allowed_airports: Optional[Iterable[str]] = None,
+    ) -> List[CityOption]:
+        """
+        options grouped by city, looked for airports come first followed by selected ones
+        (all airports of given cities if there is no lookup)
+        """
+        if lookup:
+            selected_ids = sorted((i for code in selected for i in self.airport_ids.get(code, [])), key=self.__airport_code)
+            ids = dict.fromkeys([*self.trie.search(lookup), *selected_ids])
+        else:
+            ids = range(len(self.rows))
+
+        city_codes = set(city_codes)
+        allowed_airports = set(allowed_airports) if allowed_airports is not None else None
+        groups: Dict[str, List[AirportOption]] = {}
+
+        for i in ids:
+            row = self.rows[i]
+            if row["city_code"] not in city_codes:
+                continue
+            airports = groups.setdefault(row["city_code"], [])
+            if allowed_airports is None or row["airport_code"] in allowed_airports:
+                airports.append(dict(row))
+
+        return [
+            {"code": city_code, "name": self.city_names[city_code], "airports": airports}
+            for city_code, airports in groups.items()
+            if airports
+        ]
+
+    def __airport_code(self, i: int) -> str:
+        return self.rows[i]["airport_code"]
+
+
+class MarketOptionCache:
+    """
+    per process market option index of each customer,
+    an index is rebuilt only when cities of customer markets (filters document) change
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Tuple[FrozenSet[str], MarketOptionIndex]] = {}
+
+    def get(self, customer: str, cities: Iterable[str], load: Callable[[List[str]], Iterable[dict]]) -> MarketOptionIndex:
+        version = frozenset(cities)
+        cached = self._indexes.get(customer)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        index = MarketOptionIndex.build(load(sorted(version)), version)
+        with self._lock:
+            self._indexes[customer] = (version, index)
+        return index
+
+    def invalidate(self, customer: Optional[str] = None):
+        with self._lock:
+            if customer is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(customer, None)
@@ -67,9 +67,7 @@ class CategoryOption:
 
     def get(self) -> List[Category]:
         res = []
-        user = user_repository.get_user(self.user.username)
-
-        event_ids = user["selected_filter_options"].get("selected_event_ids", [])
+        event_ids = self.user.selected_filter_options.get("selected_event_ids", [])
         location_match = self.__get_location_match()
         pipeline = CategoryOptionsQuery(
             host_code=self.user.carrier, event_ids=event_ids, location_match=location_match, lookup=self.form.lookup.data
@@ -12,6 +12,7 @@ from configurations.repository import ConfigurationRepository
 from fares.repository import FareRepository
 from filters.forms import FilterOptionsForm, GetCustomerMarketsForm
 from filters.options import CategoryOption
+from filters.markets import MarketOptionCache, MarketOptionIndex
 from filters.options.types import Category, SimpleOnD
 from filters.repository import FilterRepository
 from regions.repository import RegionRepository
@@ -23,6 +24,7 @@ region_repo = RegionRepository()
 config_repo = ConfigurationRepository()
 user_repo = UserRepository()
 fare_repo = FareRepository()
+market_options = MarketOptionCache()
 
 
 class EVENT_ANALYZER_FILTER_OPTIONS(SimpleOnD):
@@ -107,8 +109,8 @@ class MarketService(BaseService):
         """check if any of selected values is not valid"""
         origin = self.split_string(request.args.get("orig_city_airport", ""), allow_empty=False)
         destination = self.split_string(request.args.get("dest_city_airport", ""), allow_empty=False)
-        origin_city_map = airport_repo.get_airports_grouped_by_city({"airport_iata_code": {"$in": origin}})
-        destination_city_map = airport_repo.get_airports_grouped_by_city({"airport_iata_code": {"$in": destination}})
+        origin_city_map = airport_repo.get_airports_grouped_by_city(airport_codes=origin)
+        destination_city_map = airport_repo.get_airports_grouped_by_city(airport_codes=destination)
 
         # if user selected airports that belong to many cities -> don't store
         if len(origin_city_map.keys()) != 1 or len(destination_city_map.keys()) != 1:
@@ -190,57 +192,15 @@ class MarketService(BaseService):
 
     def __get_market_options(
         self,
-        regions_df: pd.DataFrame,
+        index: MarketOptionIndex,
         codes: List[str],
         loockup_key: str,
         lookup_group: Iterable[str],
-        user: User,
     ):
-        """get both orig_city_code and dest_city_code to be sent to ui"""
-        options = []
-        filtered = regions_df[regions_df["city_code"].isin(codes)]
-        filtered = self.__filter_by_lookup(filtered, loockup_key)
-        user_assigned_markets = user.markets
-
-        # below operations could've been accomplished using groupby
-        # the problem with groupby is it does not preserve the order of cities
-        # i need to get options in certain order (looked for options then selected options)
-        unique_cities_df = filtered.drop_duplicates("city_code")[["city_code", "city_name"]]
-        for _, row in unique_cities_df.iterrows():
-            city_code, city_name = row
-            airports_df = filtered[filtered.city_code == city_code][["airport_name", "airport_code", "city_code"]]
-
-            if lookup_group:
-                airports_df = airports_df[airports_df.airport_code.isin(lookup_group)]
-
-            if user_assigned_markets and loockup_key.startswith("orig"):
-                airports_df = airports_df[airports_df.airport_code.isin([m[0] for m in user_assigned_markets])]
-
-            if user_assigned_markets and loockup_key.startswith("dest"):
-                airports_df = airports_df[airports_df.airport_code.isin([m[1] for m in user_assigned_markets])]
-
-            if airports_df.empty:
-                continue
-
-            options.append({"code": city_code, "name": city_name, "airports": airports_df.to_dict("records")})
-
-        return options
-
-    def __filter_by_lookup(self, df: pd.DataFrame, loockup_key):
-        """if user is searching by keyword"""
+        """get both orig_city_code and dest_city_code to be sent to ui (looked for options then selected options)"""
         lookup = request.args.get(loockup_key, "").strip()
-        if not lookup:
-            return df
-
         selected = request.args.get(loockup_key.replace("_lookup", ""), "").strip().split(",")
-        lookup = lookup.lower()
-
-        lookup_df = df[
-            (df.city_code.str.lower().str.match(f"^{lookup}.*")) | (df.airport_code.str.lower().str.match(f"^{lookup}.*"))
-        ].sort_values(["city_code", "airport_code"])
-
-        selected_df = df[df.airport_code.isin(selected)].sort_values("airport_code")
-        return pd.concat([lookup_df, selected_df]).drop_duplicates(["city_code", "airport_code"])
+        return index.options(codes, lookup, selected if lookup else (), lookup_group or None)
 
     def __get_targeted_market(self, market_df: pd.DataFrame, origins: List[str], destinations: List[str]) -> pd.DataFrame:
         """get targeted market (both origin and destination shoulde be provided"""
@@ -262,13 +222,9 @@ class MarketService(BaseService):
         all_cities = list(set(market_origins + market_destinations))
         selected_origins = self.split_string(request.args.get("orig_city_airport", ""), allow_empty=False)
         selected_destinations = self.split_string(request.args.get("dest_city_airport", ""), allow_empty=False)
-        df = self.lambda_df(list(region_repo.get_region_by_cities(all_cities)))
-        df = df[df.city_code.isin(all_cities)]
-        # places collection's data has been uploaded with type = 'METROPOLITAN"
-        # and i need to remove all records with that type (to avoid duplication) in airports
-        df.drop_duplicates(["city_code", "airport_code"], inplace=True)
-        regions = df.region_code.unique().tolist()
-        countries = df.country_code.unique().tolist()
+        index = market_options.get(request.user.carrier, all_cities, region_repo.get_region_by_cities)
+        regions = index.regions
+        countries = index.countries
         selected_market = self.__get_targeted_market(markets_df, selected_origins, selected_destinations)
         competitors = self.__get_competitors(selected_market)
         user_market = request.user.markets
@@ -281,18 +237,16 @@ class MarketService(BaseService):
             "dest_country": countries,
             "orig_country": countries,
             "orig_city_airport": self.__get_market_options(
-                df,
+                index,
                 market_origins,
                 "orig_city_airport_lookup",
                 tuple(market[0] for market in user_market),
-                user,
             ),
             "dest_city_airport": self.__get_market_options(
-                df,
+                index,
                 market_destinations,
                 "dest_city_airport_lookup",
                 tuple(market[1] for market in user_market),
-                user,
             ),
             "main_competitor": competitors if competitors else [],
             "selected_competitors": ["All"] + competitors[1:] if competitors and len(competitors) > 1 else ["All"],
@@ -316,7 +270,7 @@ class MarketService(BaseService):
         - one city
         - multiple airports (belong to same city)
         """
-        _map = airport_repo.get_airports_grouped_by_city({"airport_iata_code": {"$in": code_list}})
+        _map = airport_repo.get_airports_grouped_by_city(airport_codes=code_list)
         cities = list(_map.keys())
         assert len(cities) != 0, "Invalid airport code"
         assert len(cities) == 1, "User can select only 1 city or multiple airports belong to same city"
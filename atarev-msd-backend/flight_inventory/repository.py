@@ -12,6 +12,7 @@ class FlightInventoryRepository(BaseRepository):
         cabin: Optional[List[str]] = None,
         extended: bool = False,
         only_latest: bool = False,
+        fields: Optional[Dict[str, Any]] = None,
     ):
 
         project = {
@@ -57,6 +58,9 @@ class FlightInventoryRepository(BaseRepository):
                 },
             }
 
+        # other fields callers need (e.g: {"departure_date": 1})
+        project = {**project, **(fields or {})}
+
         pipeline = [
             {
                 "$match": match,
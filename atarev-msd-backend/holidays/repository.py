@@ -18,8 +18,9 @@ class HolidayRepository(BaseRepository):
         codes.sort()
         cache_key = "holidays_" + "_".join(codes)
 
-        if self.redis.get(cache_key):
-            self.redis.get(cache_key)
+        cached = self.redis.get(cache_key)
+        if cached:
+            return cached
 
         data = self.stringify(list(self.find({"country_name": {"$in": codes}})))  # [None]
         self.stringify(self.redis.set(cache_key, data, expiration_in_seconds=Duration.months(1)))
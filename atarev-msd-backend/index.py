@@ -7,9 +7,11 @@ from flask_restful import Api
 # from admin.controller import AdminController
 from agency_analysis.controller import AgencyController
 from airports.controller import AirportController
-from base.helpers.errors import ExpiredToken
+from base.helpers.errors import ExpiredToken, InvalidSortKey, QueryTimeout
+from base.helpers.permissions import Admin, SuperUser, has_role
 from base.helpers.signal import OnErrorSignal, OnInitSignal, PostRequestSignal, PreRequestSignal
 from base.helpers.user import ANON_USER
+from base.response_cache import ResponseCache
 from booking_trends.controller import BookingTrendsController
 
 # from configurations.controller import ConfigController
@@ -63,6 +65,12 @@ def start_app():
         if type(e) is ExpiredToken:
             return {"error": str(e)}, 401
 
+        if type(e) is QueryTimeout:
+            return {"error": str(e)}, 504
+
+        if type(e) is InvalidSortKey:
+            return {"error": str(e)}, 400
+
         return OnErrorSignal.run(e) or {"error": str(e)}
 
     @app.before_request
@@ -79,6 +87,11 @@ def start_app():
     def health_check():
         return "OK"
 
+    @app.route("/api/msdv2/cache-stats", methods=["GET"], endpoint="cache_stats")
+    @has_role([SuperUser, Admin])
+    def cache_stats():
+        return ResponseCache.stats()
+
     OnInitSignal.run()
     return app
 
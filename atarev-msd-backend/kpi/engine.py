@@ -0,0 +1,138 @@
+"""
+monthly budgets and actuals as (field x month) arrays, KPI windows (current month, YTD, last year ...)
+are looked up or summed as slices of them instead of scanning record lists for every metric
+"""
+import copy
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+# (start, end) months of a window, both included
+Window = Tuple[date, date]
+
+
+def month_index(year: int, month: int) -> int:
+    return year * 12 + month - 1
+
+
+def month_start(index: int) -> date:
+    return date(index // 12, index % 12 + 1, 1)
+
+
+@dataclass
+class MonthlyTotals:
+    """
+    records with monthly totals (`SalesTotalsRecord`, `BudgetRecord`) indexed by month,
+    months from `start` to `end` without a record get a copy of `default` one (zeros)
+    """
+
+    records: list
+    default: object
+    fields: List[str]
+    start: date
+    end: date
+    # fields averaged over a window instead of summed
+    averaged: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        months = [month_index(rec.sell_year, rec.sell_month) for rec in self.records]
+        self.first = min(months + [month_index(self.start.year, self.start.month)])
+        last = max(months + [month_index(self.end.year, self.end.month)])
+
+        self.by_month = [None] * (last - self.first + 1)
+        for month, rec in zip(months, self.records):
+            # first record of a month wins (same as looking it up in the list)
+            if self.by_month[month - self.first] is None:
+                self.by_month[month - self.first] = rec
+        for i in range(month_index(self.start.year, self.start.month), month_index(self.end.year, self.end.month) + 1):
+            if self.by_month[i - self.first] is None:
+                self.by_month[i - self.first] = self.__default(month_start(i))
+
+        self.present = np.array([rec is not None for rec in self.by_month])
+        values = [[getattr(rec, name) if rec is not None else 0 for rec in self.by_month] for name in self.fields]
+        self.values = np.array(values, dtype=float)
+        # sums of integer values are kept integers (as `np.sum` of them is)
+        self.integer = np.array([[isinstance(value, int) for value in row] for row in values])
+
+    def month(self, day: date):
+        """record of the month of `day`"""
+        i = month_index(day.year, day.month) - self.first
+        if 0 <= i < len(self.by_month) and self.by_month[i] is not None:
+            return self.by_month[i]
+        return self.default
+
+    def between(self, start: date, end: date) -> list:
+        """records of months from `start` to `end`"""
+        first, last = self.__bounds((start, end))
+        return [rec for rec in self.by_month[first:last] if rec is not None]
+
+    def totals(self, windows: List[Window]) -> list:
+        """one record per window with fields summed (or averaged) over its months, all fields of a window at once"""
+        result = []
+        for window in windows:
+            first, last = self.__bounds(window)
+            months = np.flatnonzero(self.present[first:last]) + first
+            integer = self.integer[:, months].all(axis=1)
+
+            fields = {}
+            for j, name in enumerate(self.fields):
+                # one dimensional sums add values in the same order `np.sum` of a record list does
+                values = self.values[j, months]
+                if name in self.averaged:
+                    fields[name] = values.mean() if months.size else np.float64("nan")
+                else:
+                    fields[name] = np.int64(values.sum()) if integer[j] else values.sum()
+            result.append(type(self.default)(**fields))
+        return result
+
+    def __bounds(self, window: Window) -> Tuple[int, int]:
+        start, end = window
+        first = max(month_index(start.year, start.month) - self.first, 0)
+        last = max(month_index(end.year, end.month) - self.first + 1, 0)
+        return first, last
+
+    def __default(self, day: date):
+        rec = copy.copy(self.default)
+        rec.sell_year = day.year
+        rec.sell_month = day.month
+        return rec
+
+
+@dataclass
+class KpiWindows:
+    """months KPIs of a day compare to each other"""
+
+    current_date: date
+
+    @property
+    def months(self) -> Dict[str, date]:
+        return {
+            "current_month": self.current_date,
+            "last_month": self.current_date - relativedelta(months=1),
+            "last_year_same_month": self.current_date - relativedelta(years=1),
+        }
+
+    @property
+    def ranges(self) -> Dict[str, Window]:
+        year = self.current_date.year
+        return {
+            # this year (starting from 1 Jan)
+            "current_year_ytd": (date(year, 1, 1), self.current_date),
+            "last_year_ytd": (date(year - 1, 1, 1), date(year - 1, self.current_date.month, 1)),
+            "entire_last_year": (date(year - 1, 1, 1), date(year - 1, 12, 1)),
+        }
+
+    @property
+    def graph(self) -> Window:
+        """previous 12 months (and the one before, the month of last year is included)"""
+        end = date(self.current_date.year, self.current_date.month, 1) - relativedelta(days=1)
+        return date(end.year, end.month, 1) - relativedelta(months=12), end
+
+    def resolve(self, totals: MonthlyTotals) -> dict:
+        """record of every window"""
+        result = {name: totals.month(day) for name, day in self.months.items()}
+        result.update(zip(self.ranges.keys(), totals.totals(list(self.ranges.values()))))
+        return result
@@ -3,10 +3,15 @@ from datetime import date
 from typing import List
 
 from dataclasses_json import dataclass_json
+from dateutil.relativedelta import relativedelta
 from flask import request
 
 from base.constants import is_demo_mode
 from dds.repository import DdsRepository
+from kpi.rollup import missing_months, sell_period
+from kpi.rollup_repository import DdsMonthlyRollupRepository
+
+rollup_repo = DdsMonthlyRollupRepository()
 
 
 @dataclass_json
@@ -25,6 +30,60 @@ class SalesTotalsRecord:
 class KpiRepository(DdsRepository):
 
     def get_sales_actuals(self, start_date: date, end_date: date, orig_codes, dest_codes) -> List[SalesTotalsRecord]:
+        """
+        sales totals per sell month, months before the one of `end_date` come from `dds_monthly_rollup`
+        and only the month of `end_date` (sold until `end_date`) is aggregated from raw sales
+        (past months the rollup has no document for are aggregated from raw sales too : months DDS loaders did not refresh
+        before `rebuild_rollup` ran, months without sales)
+        """
+        host_carrier_code = request.user.carrier
+        end_month = date(end_date.year, end_date.month, 1)
+        past = rollup_repo.get_monthly_totals(
+            host_carrier_code,
+            sell_period(start_date.year, start_date.month),
+            sell_period(end_month.year, end_month.month),
+            orig_codes,
+            dest_codes,
+        )
+        missing = missing_months(start_date, end_month, ((rec["sell_year"], rec["sell_month"]) for rec in past))
+        if missing:
+            # one aggregation from the first missing month to the last one, months the rollup has are dropped
+            raw = self.get_raw_sales_actuals(
+                max(start_date, missing[0]), missing[-1] + relativedelta(months=1, days=-1), orig_codes, dest_codes
+            )
+            past += [rec for rec in raw if date(rec["sell_year"], rec["sell_month"], 1) in missing]
+        current = self.get_raw_sales_actuals(max(start_date, end_month), end_date, orig_codes, dest_codes)
+
+        results = []
+        for rec in sorted(past, key=lambda item: (item["sell_year"], item["sell_month"])) + current:
+            # same constants the raw aggregation has
+            results.append(
+                self.convert_mongo_document_to_dto({**rec, "cargo_total": 0, "avg_load_factor": 0.70, "capacity_total": 0})
+            )
+
+        if is_demo_mode():
+            dummy_cargo_totals = [
+                12000000,
+                11000000,
+                13000000,
+                14500000,
+                14000000,
+                14000000,
+                15000000,
+                13000000,
+                14000000,
+                14000000,
+                12000000,
+                12000000,
+            ]
+            for rec in results:
+                rec.cargo_total = dummy_cargo_totals[rec.sell_month - 1]
+                rec.capacity_total = rec.passengers_total / (rec.avg_load_factor if rec.avg_load_factor > 0 else 0.5)
+
+        return results
+
+    def get_raw_sales_actuals(self, start_date: date, end_date: date, orig_codes, dest_codes) -> List[dict]:
+        """sales totals per sell month aggregated from `dds_pgs`"""
         start = date(start_date.year, start_date.month, 1)
         start_str = start.strftime("%Y%m%d")
         end_str = end_date.strftime("%Y%m%d")
@@ -48,9 +107,6 @@ class KpiRepository(DdsRepository):
                     "revenue_total": {"$sum": "$blended_rev"},
                     "passengers_total": {"$sum": "$pax"},
                     "bookings_total": {"$sum": 1},
-                    "cargo_total": {"$sum": 0},
-                    "avg_load_factor": {"$avg": 0.70},
-                    "capacity_total": {"$sum": 0},
                 }
             },
             {
@@ -61,39 +117,11 @@ class KpiRepository(DdsRepository):
                     "revenue_total": "$revenue_total",
                     "passengers_total": "$passengers_total",
                     "bookings_total": "$bookings_total",
-                    "cargo_total": "$cargo_total",
-                    "avg_load_factor": "$avg_load_factor",
-                    "capacity_total": "$capacity_total",
                 }
             },
             {"$sort": {"sell_year": 1, "sell_month": 1}},
         ]
-        cursor = self.aggregate(get_sales_actuals_query)
-
-        results = []
-        for rec in list(cursor):
-            results.append(self.convert_mongo_document_to_dto(rec))
-
-        if is_demo_mode():
-            dummy_cargo_totals = [
-                12000000,
-                11000000,
-                13000000,
-                14500000,
-                14000000,
-                14000000,
-                15000000,
-                13000000,
-                14000000,
-                14000000,
-                12000000,
-                12000000,
-            ]
-            for rec in results:
-                rec.cargo_total = dummy_cargo_totals[rec.sell_month - 1]
-                rec.capacity_total = rec.passengers_total / (rec.avg_load_factor if rec.avg_load_factor > 0 else 0.5)
-
-        return results
+        return list(self.aggregate(get_sales_actuals_query))
 
     def convert_mongo_document_to_dto(self, rec) -> SalesTotalsRecord:
         dto = SalesTotalsRecord()
@@ -0,0 +1,112 @@
+"""
+`dds_monthly_rollup` : sales of `dds_pgs` summed per carrier, market and sell month,
+months already sold never change, KPIs read them from here instead of grouping raw sales on every request
+(DDS loaders of the scheduler refresh months they upload with the same stages, `scheduler/share/core/rollup.py`)
+"""
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+ROLLUP_COLLECTION = "dds_monthly_rollup"
+DDS_COLLECTION = "dds_pgs"
+KEY = ["dom_op_al_code", "orig_code", "dest_code", "sell_year", "sell_month"]
+# totals of raw sales (same as KPI actuals)
+RAW_TOTALS = {
+    "revenue_total": {"$sum": "$blended_rev"},
+    "passengers_total": {"$sum": "$pax"},
+    "bookings_total": {"$sum": 1},
+}
+TOTALS = list(RAW_TOTALS)
+# rollup is checked per carrier and sell month
+CHECK_KEY = ["dom_op_al_code", "sell_year", "sell_month"]
+
+
+def sell_period(year: int, month: int) -> int:
+    """sell month as yyyymm"""
+    return year * 100 + month
+
+
+def missing_months(start: date, end: date, months: Iterable[Tuple[int, int]]) -> List[date]:
+    """first days of sell months from the one of `start` to the one of `end` (excluded) that are not in `months`"""
+    found = set(months)
+    day, result = date(start.year, start.month, 1), []
+    while day < date(end.year, end.month, 1):
+        if (day.year, day.month) not in found:
+            result.append(day)
+        day += relativedelta(months=1)
+    return result
+
+
+def rollup_stages(refreshed_at: datetime) -> List[Dict[str, Any]]:
+    """stages grouping `dds_pgs` documents into rollup documents"""
+    return [
+        {"$group": {"_id": {field: f"${field}" for field in KEY}, **RAW_TOTALS}},
+        {
+            "$set": {
+                **{field: f"$_id.{field}" for field in KEY},
+                "sell_period": {"$add": [{"$multiply": ["$_id.sell_year", 100]}, "$_id.sell_month"]},
+                "refreshed_at": refreshed_at,
+            }
+        },
+    ]
+
+
+def monthly_totals_stages(
+    carrier: str, start_period: int, end_period: int, orig_codes: List[str], dest_codes: List[str]
+) -> List[Dict[str, Any]]:
+    """stages summing rollup documents of markets of a carrier per sell month (from `start_period` to `end_period` excluded)"""
+    return [
+        {
+            "$match": {
+                "dom_op_al_code": carrier,
+                "sell_period": {"$gte": start_period, "$lt": end_period},
+                "orig_code": {"$in": orig_codes},
+                "dest_code": {"$in": dest_codes},
+            }
+        },
+        {
+            "$group": {
+                "_id": {"sell_year": "$sell_year", "sell_month": "$sell_month"},
+                **{field: {"$sum": f"${field}"} for field in TOTALS},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "sell_year": "$_id.sell_year",
+                "sell_month": "$_id.sell_month",
+                **{field: 1 for field in TOTALS},
+            }
+        },
+    ]
+
+
+def raw_check_stages(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """stages summing `dds_pgs` documents per carrier and sell month"""
+    return [{"$match": match}, {"$group": {"_id": {field: f"${field}" for field in CHECK_KEY}, **RAW_TOTALS}}]
+
+
+def rollup_check_stages(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """stages summing rollup documents per carrier and sell month"""
+    key = {field: f"${field}" for field in CHECK_KEY}
+    return [{"$match": match}, {"$group": {"_id": key, **{field: {"$sum": f"${field}"} for field in TOTALS}}}]
+
+
+def mismatches(raw: Iterable[Dict[str, Any]], rollup: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """carriers and sell months `raw_check_stages` and `rollup_check_stages` documents do not have the same totals for"""
+    expected = {tuple(doc["_id"].get(field) for field in CHECK_KEY): doc for doc in raw}
+    actual = {tuple(doc["_id"].get(field) for field in CHECK_KEY): doc for doc in rollup}
+    result = []
+    for group in sorted(expected.keys() | actual.keys(), key=str):
+        raw_doc, rollup_doc = expected.get(group, {}), actual.get(group, {})
+        if not all(math.isclose(raw_doc.get(field) or 0, rollup_doc.get(field) or 0, rel_tol=1e-9) for field in TOTALS):
+            result.append(
+                {
+                    "key": dict(zip(CHECK_KEY, group)),
+                    "raw": {field: raw_doc.get(field) for field in TOTALS},
+                    "rollup": {field: rollup_doc.get(field) for field in TOTALS},
+                }
+            )
+    return result
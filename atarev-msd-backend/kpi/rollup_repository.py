@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from base.repository import BaseRepository
+from kpi.rollup import (
+    DDS_COLLECTION,
+    ROLLUP_COLLECTION,
+    mismatches,
+    monthly_totals_stages,
+    raw_check_stages,
+    rollup_check_stages,
+    rollup_stages,
+)
+
+
+class DdsMonthlyRollupRepository(BaseRepository):
+    collection = ROLLUP_COLLECTION
+
+    def get_monthly_totals(
+        self, carrier: str, start_period: int, end_period: int, orig_codes: List[str], dest_codes: List[str]
+    ) -> List[Dict[str, Any]]:
+        """totals per sell month (from `start_period` to `end_period` excluded) of markets of a carrier"""
+        return list(self.aggregate(monthly_totals_stages(carrier, start_period, end_period, orig_codes, dest_codes)))
+
+    def rebuild(self) -> int:
+        """
+        build the whole rollup from `dds_pgs` again (it replaces the current one at once when it is ready,
+        KPIs keep reading the old one meanwhile)
+        """
+        staging = f"{ROLLUP_COLLECTION}_rebuild"
+        self._db[DDS_COLLECTION].aggregate([*rollup_stages(datetime.now()), {"$out": staging}], allowDiskUse=True)
+        self._db[staging].create_index([("dom_op_al_code", 1), ("sell_period", 1)])
+        self._db[staging].rename(ROLLUP_COLLECTION, dropTarget=True)
+        return self._db[ROLLUP_COLLECTION].estimated_document_count()
+
+    def check(self, carrier: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        carriers and sell months the rollup does not have the same totals as the raw aggregation for
+        (empty when the rollup is consistent)
+        """
+        match = {"dom_op_al_code": carrier} if carrier else {}
+        raw = self._db[DDS_COLLECTION].aggregate(raw_check_stages(match), allowDiskUse=True)
+        return mismatches(raw, self.aggregate(rollup_check_stages(match)))
@@ -1,17 +1,15 @@
-import copy
 import json
 import math
 from dataclasses import dataclass, field
 from datetime import date, timedelta
 from typing import List
 
-import numpy as np
 from dataclasses_json import dataclass_json
-from dateutil.relativedelta import relativedelta
 from flask import request
 
 from base.constants import is_demo_mode
 from budgets.budget_repository import BudgetRecord, BudgetRepository
+from kpi.engine import KpiWindows, MonthlyTotals
 from kpi.forms import MsdKpiForm
 from kpi.kpi_repository import KpiRepository, SalesTotalsRecord
 from kpi.query_builder import DdsBuilder
@@ -21,6 +19,16 @@ from kpi.utils import format_kpi_amount, format_kpi_percentage
 # that should help spot the problem with data/calculation
 INVALID_VALUE_PLACEHOLDER = 0.01
 
+ACTUAL_FIELDS = ["revenue_total", "passengers_total", "bookings_total", "cargo_total", "avg_load_factor", "capacity_total"]
+BUDGET_FIELDS = [
+    "revenue_budget",
+    "passengers_budget",
+    "bookings_budget",
+    "cargo_budget",
+    "load_factor_budget",
+    "capacity_budget",
+]
+
 
 @dataclass_json
 @dataclass
@@ -72,6 +80,8 @@ class KpiContext:
     last_year_same_month: ActualsAndBudget
     last_year_ytd: ActualsAndBudget
     entire_last_year: ActualsAndBudget
+    # previous 12 months (graphs)
+    graph_months: List[ActualsAndBudget] = field(default_factory=list)
 
 
 class KPIService:
@@ -108,26 +118,38 @@ class KPIService:
 
         last_year_jan_1 = date(current_date.year - 1, 1, 1)
 
-        # retrieve actual sales(revenue, passengers, etc) data for the given date range, fill in missing months (in case there are some gaps)
-        actuals = self.kpi_repo.get_sales_actuals(last_year_jan_1, current_date, orig_codes, dest_codes)
-        actuals = self.sort_and_add_missing_months(actuals, last_year_jan_1, current_date, SalesTotalsRecord())
+        # retrieve actual sales(revenue, passengers, etc) data for the given date range, missing months are zeros
+        actuals = MonthlyTotals(
+            self.kpi_repo.get_sales_actuals(last_year_jan_1, current_date, orig_codes, dest_codes),
+            SalesTotalsRecord(),
+            ACTUAL_FIELDS,
+            last_year_jan_1,
+            current_date,
+            averaged=["avg_load_factor"],
+        )
 
-        # retrieve budgeted data for the given date range, fill in missing months (in case there are some gaps)
-        budgets = self.budget_repo.get_budget_for_criteria(last_year_jan_1, current_date, orig_codes, dest_codes)
-        budgets = self.sort_and_add_missing_months(budgets, last_year_jan_1, current_date, BudgetRecord())
+        # retrieve budgeted data for the given date range, missing months are zeros
+        budgets = MonthlyTotals(
+            self.budget_repo.get_budget_for_criteria(last_year_jan_1, current_date, orig_codes, dest_codes),
+            BudgetRecord(),
+            BUDGET_FIELDS,
+            last_year_jan_1,
+            current_date,
+            averaged=["load_factor_budget"],
+        )
         fields = request.user.kpis or list(kpi_method_map.keys())
-       
+
         # now we have sales targets(budget data) and actual sales data - we can generate KPIs for various categories (revenue, passengers, cargo, etc)
-        return [kpi_method_map[field](current_date, actuals, budgets) for field in fields]
+        # amounts of every month/period KPIs use are computed once and shared by all of them
+        context = self.get_context(current_date, actuals, budgets)
+        return [kpi_method_map[field](context) for field in fields]
 
-    def get_revenue_kpi(self, current_date: date, actuals: List[SalesTotalsRecord], budgets: List[BudgetRecord]) -> KpiRecord:
+    def get_revenue_kpi(self, context: KpiContext) -> KpiRecord:
         """Calculate 'Revenue' KPIs"""
         result = KpiRecord(kpiName="Revenue", kpiType="revenue")
         result.metrics = [
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.actual.revenue_total,
                 lambda ctx: (ctx.current_month.actual.revenue_total - ctx.current_month.budget.revenue_budget)
                 / ctx.current_month.budget.revenue_budget,
@@ -136,9 +158,7 @@ class KPIService:
                 "Gap vs Budget",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.budget.revenue_budget,
                 lambda ctx: (ctx.current_month.budget.revenue_budget - ctx.last_year_same_month.budget.revenue_budget)
                 / ctx.last_year_same_month.budget.revenue_budget,
@@ -147,9 +167,7 @@ class KPIService:
                 "Gap vs Bud Ly Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_month.actual.revenue_total,
                 lambda ctx: (ctx.current_month.actual.revenue_total - ctx.last_month.actual.revenue_total)
                 / ctx.last_month.actual.revenue_total,
@@ -158,9 +176,7 @@ class KPIService:
                 "Gap vs Cur Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_same_month.actual.revenue_total,
                 lambda ctx: (ctx.current_month.actual.revenue_total - ctx.last_year_same_month.actual.revenue_total)
                 / ctx.last_year_same_month.actual.revenue_total,
@@ -169,9 +185,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.actual.revenue_total,
                 lambda ctx: (ctx.current_year_ytd.actual.revenue_total - ctx.last_year_ytd.actual.revenue_total)
                 / ctx.last_year_ytd.actual.revenue_total,
@@ -180,9 +194,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.budget.revenue_budget,
                 lambda ctx: (ctx.current_year_ytd.budget.revenue_budget - ctx.last_year_ytd.budget.revenue_budget)
                 / ctx.last_year_ytd.budget.revenue_budget,
@@ -191,9 +203,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_ytd.actual.revenue_total,
                 lambda ctx: (ctx.last_year_ytd.actual.revenue_total - ctx.last_year_ytd.budget.revenue_budget)
                 / ctx.last_year_ytd.budget.revenue_budget,
@@ -203,17 +213,15 @@ class KPIService:
             ),
         ]
         # generate graph data (last 12 months of passenger totals)
-        result.graphData = self.generate_graph_data(current_date, actuals, budgets, lambda actual, budget: actual.revenue_total)
+        result.graphData = self.generate_graph_data(context, lambda actual, budget: actual.revenue_total)
         return result
 
-    def get_passenger_kpi(self, current_date: date, actuals: List[SalesTotalsRecord], budgets: List[BudgetRecord]) -> KpiRecord:
+    def get_passenger_kpi(self, context: KpiContext) -> KpiRecord:
         """Calculate 'Passenger' KPIs"""
         result = KpiRecord(kpiName="Passenger", kpiType="passenger")
         result.metrics = [
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.actual.passengers_total,
                 lambda ctx: (ctx.current_month.actual.passengers_total - ctx.current_month.budget.passengers_budget)
                 / ctx.current_month.budget.passengers_budget,
@@ -222,9 +230,7 @@ class KPIService:
                 "Gap vs Budget",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.budget.passengers_budget,
                 lambda ctx: (ctx.current_month.budget.passengers_budget - ctx.last_year_same_month.budget.passengers_budget)
                 / ctx.last_year_same_month.budget.passengers_budget,
@@ -233,9 +239,7 @@ class KPIService:
                 "Gap vs Bud Ly Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_month.actual.passengers_total,
                 lambda ctx: (ctx.current_month.actual.passengers_total - ctx.last_month.actual.passengers_total)
                 / ctx.last_month.actual.passengers_total,
@@ -244,9 +248,7 @@ class KPIService:
                 "Gap vs Cur Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_same_month.actual.passengers_total,
                 lambda ctx: (ctx.current_month.actual.passengers_total - ctx.last_year_same_month.actual.passengers_total)
                 / ctx.last_year_same_month.actual.passengers_total,
@@ -255,9 +257,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.actual.passengers_total,
                 lambda ctx: (ctx.current_year_ytd.actual.passengers_total - ctx.last_year_ytd.actual.passengers_total)
                 / ctx.last_year_ytd.actual.passengers_total,
@@ -266,9 +266,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.budget.passengers_budget,
                 lambda ctx: (ctx.current_year_ytd.budget.passengers_budget - ctx.last_year_ytd.budget.passengers_budget)
                 / ctx.last_year_ytd.budget.passengers_budget,
@@ -277,9 +275,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_ytd.actual.passengers_total,
                 lambda ctx: (ctx.last_year_ytd.actual.passengers_total - ctx.last_year_ytd.budget.passengers_budget)
                 / ctx.last_year_ytd.budget.passengers_budget,
@@ -289,19 +285,15 @@ class KPIService:
             ),
         ]
         # generate graph data (last 12 months of passenger totals)
-        result.graphData = self.generate_graph_data(
-            current_date, actuals, budgets, lambda actual, budget: actual.passengers_total
-        )
+        result.graphData = self.generate_graph_data(context, lambda actual, budget: actual.passengers_total)
         return result
 
-    def get_avg_fare_kpi(self, current_date: date, actuals: List[SalesTotalsRecord], budgets: List[BudgetRecord]) -> KpiRecord:
+    def get_avg_fare_kpi(self, context: KpiContext) -> KpiRecord:
         """Calculate 'Average fare' KPIs"""
         result = KpiRecord(kpiName="Average Fare", kpiType="average_fare")
         result.metrics = [
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.actual.revenue_total / ctx.current_month.actual.passengers_total,
                 lambda ctx: (
                     (
@@ -315,9 +307,7 @@ class KPIService:
                 "Gap vs Budget",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: (ctx.current_month.budget.revenue_budget / ctx.current_month.budget.passengers_budget),
                 lambda ctx: (
                     (ctx.current_month.budget.revenue_budget / ctx.current_month.budget.passengers_budget)
@@ -329,9 +319,7 @@ class KPIService:
                 "Gap vs Bud Ly Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: (ctx.last_month.actual.revenue_total / ctx.last_month.actual.passengers_total),
                 lambda ctx: (
                     (ctx.last_month.actual.revenue_total / ctx.last_month.actual.passengers_total)
@@ -343,9 +331,7 @@ class KPIService:
                 "Gap vs LM Budget",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_same_month.actual.revenue_total / ctx.last_year_same_month.actual.passengers_total,
                 lambda ctx: (
                     (ctx.last_year_same_month.actual.revenue_total / ctx.last_year_same_month.actual.passengers_total)
@@ -357,9 +343,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),  # probably this is wrong!
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.entire_last_year.actual.revenue_total / ctx.entire_last_year.actual.passengers_total,
                 lambda ctx: (
                     (ctx.entire_last_year.actual.revenue_total / ctx.entire_last_year.actual.passengers_total)
@@ -380,19 +364,15 @@ class KPIService:
             #                                  'Ly YTD', '', 'Gap vs Cur Mon')
         ]
         # generate graph data (last 12 months of passenger totals)
-        result.graphData = self.generate_graph_data(
-            current_date, actuals, budgets, lambda actual, budget: (actual.revenue_total / actual.passengers_total)
-        )
+        result.graphData = self.generate_graph_data(context, lambda actual, budget: (actual.revenue_total / actual.passengers_total))
         return result
 
-    def get_capacity_kpi(self, current_date: date, actuals: List[SalesTotalsRecord], budgets: List[BudgetRecord]) -> KpiRecord:
+    def get_capacity_kpi(self, context: KpiContext) -> KpiRecord:
         """Calculate 'Capacity' KPIs"""
         result = KpiRecord(kpiName="Capacity", kpiType="capacity")
         result.metrics = [
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.actual.capacity_total,
                 lambda ctx: (ctx.current_month.actual.capacity_total - ctx.current_month.budget.capacity_budget)
                 / ctx.current_month.budget.capacity_budget,
@@ -401,9 +381,7 @@ class KPIService:
                 "Gap vs Bud",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_month.actual.capacity_total,
                 lambda ctx: (ctx.last_month.actual.capacity_total - ctx.last_month.budget.capacity_budget)
                 / ctx.last_month.budget.capacity_budget,
@@ -412,9 +390,7 @@ class KPIService:
                 "Gap vs Bud",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_same_month.actual.capacity_total,
                 lambda ctx: (ctx.current_month.actual.capacity_total - ctx.last_year_same_month.budget.capacity_budget)
                 / ctx.last_year_same_month.budget.capacity_budget,
@@ -423,9 +399,7 @@ class KPIService:
                 "Gap vs Bud",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.actual.capacity_total - ctx.last_year_same_month.actual.capacity_total,
                 lambda ctx: (
                     (ctx.current_month.actual.capacity_total - ctx.last_year_same_month.actual.capacity_total)
@@ -445,17 +419,15 @@ class KPIService:
             #                                  'Ly YTD', '', 'Gap vs Cur Mon')
         ]
         # generate graph data (last 12 months of passenger totals)
-        result.graphData = self.generate_graph_data(current_date, actuals, budgets, lambda actual, budget: actual.capacity_total)
+        result.graphData = self.generate_graph_data(context, lambda actual, budget: actual.capacity_total)
         return result
 
-    def get_rask_kpi_dummy(self, current_date: date, actuals: List[SalesTotalsRecord], budgets: List[BudgetRecord]) -> KpiRecord:
+    def get_rask_kpi_dummy(self, context: KpiContext) -> KpiRecord:
         """Calculate 'Rask' KPIs"""
         result = KpiRecord(kpiName="Rask", kpiType="rask")
         result.metrics = [
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.actual.bookings_total,
                 lambda ctx: (ctx.current_month.actual.bookings_total - ctx.current_month.budget.passengers_budget)
                 / ctx.current_month.budget.passengers_budget,
@@ -464,9 +436,7 @@ class KPIService:
                 "Gap vs Budget",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.budget.passengers_budget,
                 lambda ctx: (ctx.current_month.budget.passengers_budget - ctx.last_year_same_month.budget.passengers_budget)
                 / ctx.last_year_same_month.budget.passengers_budget,
@@ -475,9 +445,7 @@ class KPIService:
                 "Gap vs Bud Ly Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_month.actual.bookings_total,
                 lambda ctx: (ctx.current_month.actual.bookings_total - ctx.last_month.actual.passengers_total)
                 / ctx.last_month.actual.passengers_total,
@@ -486,9 +454,7 @@ class KPIService:
                 "Gap vs Cur Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_same_month.actual.bookings_total,
                 lambda ctx: (ctx.current_month.actual.bookings_total - ctx.last_year_same_month.actual.passengers_total)
                 / ctx.last_year_same_month.actual.passengers_total,
@@ -497,9 +463,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.actual.bookings_total,
                 lambda ctx: (ctx.current_year_ytd.actual.bookings_total - ctx.last_year_ytd.actual.passengers_total)
                 / ctx.last_year_ytd.actual.passengers_total,
@@ -508,9 +472,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.budget.passengers_budget,
                 lambda ctx: (ctx.current_year_ytd.budget.passengers_budget - ctx.last_year_ytd.budget.passengers_budget)
                 / ctx.last_year_ytd.budget.passengers_budget,
@@ -519,9 +481,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_ytd.actual.passengers_total,
                 lambda ctx: (ctx.last_year_ytd.actual.passengers_total - ctx.last_year_ytd.budget.passengers_budget)
                 / ctx.last_year_ytd.budget.passengers_budget,
@@ -531,19 +491,15 @@ class KPIService:
             ),
         ]
         # generate graph data (last 12 months of passenger totals)
-        result.graphData = self.generate_graph_data(
-            current_date, actuals, budgets, lambda actual, budget: actual.passengers_total
-        )
+        result.graphData = self.generate_graph_data(context, lambda actual, budget: actual.passengers_total)
         return result
 
-    def get_cargo_kpi_dummy(self, current_date: date, actuals: List[SalesTotalsRecord], budgets: List[BudgetRecord]) -> KpiRecord:
+    def get_cargo_kpi_dummy(self, context: KpiContext) -> KpiRecord:
         """Calculate 'cargo' KPIs"""
         result = KpiRecord(kpiName="Cargo", kpiType="cargo")
         result.metrics = [
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.actual.cargo_total,
                 lambda ctx: (ctx.current_month.actual.cargo_total - ctx.current_month.budget.cargo_budget)
                 / ctx.current_month.budget.cargo_budget,
@@ -552,9 +508,7 @@ class KPIService:
                 "Gap vs Budget",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_month.budget.cargo_budget,
                 lambda ctx: (ctx.current_month.budget.cargo_budget - ctx.last_year_same_month.budget.cargo_budget)
                 / ctx.last_year_same_month.budget.cargo_budget,
@@ -563,9 +517,7 @@ class KPIService:
                 "Gap vs Bud Ly Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_month.actual.cargo_total,
                 lambda ctx: (ctx.current_month.actual.cargo_total - ctx.last_month.actual.cargo_total)
                 / ctx.last_month.actual.cargo_total,
@@ -574,9 +526,7 @@ class KPIService:
                 "Gap vs Cur Mon",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_same_month.actual.cargo_total,
                 lambda ctx: (ctx.current_month.actual.cargo_total - ctx.last_year_same_month.actual.cargo_total)
                 / ctx.last_year_same_month.actual.cargo_total,
@@ -585,9 +535,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.actual.cargo_total,
                 lambda ctx: (ctx.current_year_ytd.actual.cargo_total - ctx.last_year_ytd.actual.cargo_total)
                 / ctx.last_year_ytd.actual.cargo_total,
@@ -596,9 +544,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.current_year_ytd.budget.cargo_budget,
                 lambda ctx: (ctx.current_year_ytd.budget.cargo_budget - ctx.last_year_ytd.budget.cargo_budget)
                 / ctx.last_year_ytd.budget.cargo_budget,
@@ -607,9 +553,7 @@ class KPIService:
                 "Gap vs Ly YTD",
             ),
             self.calculate_single_kpi_metric(
-                current_date,
-                actuals,
-                budgets,
+                context,
                 lambda ctx: ctx.last_year_ytd.actual.cargo_total,
                 lambda ctx: (ctx.last_year_ytd.actual.cargo_total - ctx.last_year_ytd.budget.cargo_budget)
                 / ctx.last_year_ytd.budget.cargo_budget,
@@ -619,72 +563,29 @@ class KPIService:
             ),
         ]
         # generate graph data (last 12 months of passenger totals)
-        result.graphData = self.generate_graph_data(current_date, actuals, budgets, lambda actual, budget: actual.bookings_total)
+        result.graphData = self.generate_graph_data(context, lambda actual, budget: actual.bookings_total)
         return result
 
-    def find_budget_and_actuals_for_date(self, all_actuals, all_budgets, date) -> ActualsAndBudget:
-        """from actuals and budgeted amounts provided as parameter, find those that are for a requested date (year and month)"""
-        actuals = next(
-            filter(lambda rec: rec.sell_year == date.year and rec.sell_month == date.month, all_actuals), SalesTotalsRecord()
-        )
-        budgets = next(
-            filter(lambda rec: rec.sell_year == date.year and rec.sell_month == date.month, all_budgets), BudgetRecord()
-        )
-        return ActualsAndBudget(actual=actuals, budget=budgets)
-
-    def find_budget_and_actuals_for_date_range(self, all_actuals, all_budgets, start_date, end_date) -> ActualsAndBudget:
-        """Same as above but returns a list of actuals/budgeted amounts for a requested date range"""
-        # all_actuals and all_budgets are grouped monthly and do not have DAY component
-        # hence we compare here only entire months
-        start = date(start_date.year, start_date.month, 1)
-        end = date(end_date.year, end_date.month, 1)
-        budgets = list(
-            filter(
-                lambda rec: (start <= date(rec.sell_year, rec.sell_month, 1) and date(rec.sell_year, rec.sell_month, 1) <= end),
-                all_budgets,
-            )
-        )
-
-        actuals = list(
-            filter(
-                lambda rec: (start <= date(rec.sell_year, rec.sell_month, 1) and date(rec.sell_year, rec.sell_month, 1) <= end),
-                all_actuals,
-            )
-        )
-
-        return (budgets, actuals)
-
-    def find_budget_and_actuals_for_date_range_aggregated(
-        self, all_actuals, all_budgets, start_date, end_date
-    ) -> ActualsAndBudget:
-        """Same as above but this aggregates amounts for a given date range and returns single aggregeted values (totals or averages)"""
-        (budgets, actuals) = self.find_budget_and_actuals_for_date_range(all_actuals, all_budgets, start_date, end_date)
-
-        # aggregate amounts (mostly totals, load factor is averaged)
-        actuals_aggregated = SalesTotalsRecord(
-            revenue_total=np.sum(list(map(lambda x: x.revenue_total, actuals))),
-            passengers_total=np.sum(list(map(lambda x: x.passengers_total, actuals))),
-            bookings_total=np.sum(list(map(lambda x: x.bookings_total, actuals))),
-            cargo_total=np.sum(list(map(lambda x: x.cargo_total, actuals))),
-            avg_load_factor=np.mean(list(map(lambda x: x.avg_load_factor, actuals))),
-            capacity_total=np.sum(list(map(lambda x: x.capacity_total, actuals))),
-        )
-        budgets_aggregated = BudgetRecord(
-            revenue_budget=np.sum(list(map(lambda x: x.revenue_budget, budgets))),
-            passengers_budget=np.sum(list(map(lambda x: x.passengers_budget, budgets))),
-            bookings_budget=np.sum(list(map(lambda x: x.bookings_budget, budgets))),
-            cargo_budget=np.sum(list(map(lambda x: x.cargo_budget, budgets))),
-            load_factor_budget=np.mean(list(map(lambda x: x.load_factor_budget, budgets))),
-            capacity_budget=np.sum(list(map(lambda x: x.capacity_budget, budgets))),
+    def get_context(self, current_date: date, actuals: MonthlyTotals, budgets: MonthlyTotals) -> KpiContext:
+        """actuals and budgeted amounts of every month/period KPIs of a date use (this month, last month, YTD ...)"""
+        windows = KpiWindows(current_date)
+        actual = windows.resolve(actuals)
+        budget = windows.resolve(budgets)
+        graph_start, graph_end = windows.graph
+
+        return KpiContext(
+            **{name: ActualsAndBudget(actual=actual[name], budget=budget[name]) for name in actual},
+            graph_months=[
+                ActualsAndBudget(actual=month_actual, budget=month_budget)
+                for month_actual, month_budget in zip(
+                    actuals.between(graph_start, graph_end), budgets.between(graph_start, graph_end)
+                )
+            ],
         )
 
-        return ActualsAndBudget(actual=actuals_aggregated, budget=budgets_aggregated)
-
     def calculate_single_kpi_metric(
         self,
-        current_date: date,
-        actuals: List[SalesTotalsRecord],
-        budgets: List[BudgetRecord],
+        context: KpiContext,
         metric_formula_lambda,
         percentage_lambda,
         def_type="Current Month",
@@ -692,35 +593,6 @@ class KPIService:
         def_detail="Gap vs Budget",
     ) -> KpiMetric:
         """Calculate metric based on actuals and budget values and using custom lambda function to calculate metric value"""
-        # collect metrics for current month, prev, last year same month, ...
-        current_month = self.find_budget_and_actuals_for_date(actuals, budgets, current_date)  # this month
-        last_month = self.find_budget_and_actuals_for_date(actuals, budgets, current_date - relativedelta(months=1))  # last month
-        current_year_ytd = self.find_budget_and_actuals_for_date_range_aggregated(
-            actuals,
-            budgets,
-            date(current_date.year, 1, 1),
-            # this year s(starting from 1Jan)
-            current_date,
-        )
-
-        last_year_same_month = self.find_budget_and_actuals_for_date(actuals, budgets, current_date - relativedelta(years=1))
-        last_year_ytd = self.find_budget_and_actuals_for_date_range_aggregated(
-            actuals, budgets, date(current_date.year - 1, 1, 1), date(current_date.year - 1, current_date.month, current_date.day)
-        )
-
-        entire_last_year = self.find_budget_and_actuals_for_date_range_aggregated(
-            actuals, budgets, date(current_date.year - 1, 1, 1), date(current_date.year, 1, 1) - relativedelta(days=1)
-        )
-
-        # create KpiContext object which holds all above calculated actuals and budgets, it will be used as parameter for lambdas
-        context = KpiContext(
-            current_month=current_month,
-            last_month=last_month,
-            current_year_ytd=current_year_ytd,
-            last_year_same_month=last_year_same_month,
-            last_year_ytd=last_year_ytd,
-            entire_last_year=entire_last_year,
-        )
         # calculate metric values using custom lambda which use context from previous step to calculate required value
         try:
             metric_value = round(metric_formula_lambda(context), 2)
@@ -747,43 +619,15 @@ class KPIService:
         )
         return result
 
-    def generate_graph_data(
-        self, current_date: date, actuals: List[SalesTotalsRecord], budgets: List[BudgetRecord], y_axis_lambda
-    ) -> KpiGraph:
+    def generate_graph_data(self, context: KpiContext, y_axis_lambda) -> KpiGraph:
         """generate graph (array with X and Y values) for the previous 12 months of a custom metric (calculated with 'y_axis_lambda')"""
-        end = date(current_date.year, current_date.month, 1) - relativedelta(days=1)  # end date is last day of prev month
-        start = date(end.year, end.month, 1) - relativedelta(months=12)  # start = end - 12 months
-        (budgets, actuals) = self.find_budget_and_actuals_for_date_range(
-            actuals, budgets, start, end
-        )  # get actuals and budget values for last 12 months
-
         graph = KpiGraph()
-        minlen = min(len(actuals), len(budgets))
-        for i in range(min(len(actuals), len(budgets))):
+        for i, month in enumerate(context.graph_months):
             graph.x.append(i)
             y_value = 0
             try:
-                y_value = round(y_axis_lambda(actuals[i], budgets[i]), 2)
+                y_value = round(y_axis_lambda(month.actual, month.budget), 2)
             except ZeroDivisionError:
                 y_value = INVALID_VALUE_PLACEHOLDER  # this is just to indicate something is wrong
             graph.y.append(y_value)  # extract value for Y axis
         return graph
-
-    def sort_and_add_missing_months(self, data, start_date, end_date, default_item):
-        add_days = timedelta(days=31)
-        start = date(start_date.year, start_date.month, 1)
-        end = date(end_date.year, end_date.month, 28)
-        while start <= end:
-            first = next(filter(lambda rec: rec.sell_year == start.year and rec.sell_month == start.month, data), None)
-            if first is None:
-                missing_item = copy.copy(default_item)
-                missing_item.sell_year = start.year
-                missing_item.sell_month = start.month
-                data.append(missing_item)
-            # add a month
-            start += add_days
-
-        return self.sort_by_date(data)
-
-    def sort_by_date(self, data: list):
-        return sorted(data, key=lambda x: (x.sell_year, x.sell_month))
@@ -3,6 +3,7 @@ import sys
 
 from dotenv import load_dotenv
 
+from base.redis import Redis
 from scripts.create_migration import CreateMigration
 from scripts.migrate import Migrate
 
@@ -13,11 +14,27 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("action", help="action to be taken", type=str)
     parser.add_argument(
-        "--name", help="name of migration (create_migration commend)", type=str
+        "--name",
+        help="name of migration (create_migration commend) or cube (build_cubes command, stale cubes if missing)",
+        type=str,
     )
 
     parser.add_argument(
-        "--force", help="force all migrations if set to true", type=bool
+        "--force",
+        help="force all migrations (migrate command) or the build of all cubes (build_cubes command) if set to true",
+        type=bool,
+    )
+
+    parser.add_argument(
+        "--carrier",
+        help="carrier to be checked (check_rollup command) or trained (train_segmentation command), all carriers if missing",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--full",
+        help="train segmentation models from scratch, sales changed in place are applied too (train_segmentation command)",
+        action="store_true",
     )
 
     args = parser.parse_args(sys.argv[1:])
@@ -27,6 +44,45 @@ def main():
     elif args.action == "create_migration":
         assert bool(args.name), "migration name is mandatory"
         CreateMigration(args.name).run()
+    elif args.action == "sweep_cache":
+        # remove cached keys of outdated generations (safe to run while the app is serving requests)
+        print(f"{Redis().sweep()} keys deleted")
+    elif args.action == "rebuild_rollup":
+        # build dds_monthly_rollup from dds_pgs again (once on deploy, then after raw sales changed outside DDS loaders)
+        from kpi.rollup_repository import DdsMonthlyRollupRepository
+
+        print(f"{DdsMonthlyRollupRepository().rebuild()} rollup documents built")
+    elif args.action == "check_rollup":
+        # compare dds_monthly_rollup with the raw aggregation of dds_pgs, exit code is 1 when they differ
+        from kpi.rollup_repository import DdsMonthlyRollupRepository
+
+        mismatches = DdsMonthlyRollupRepository().check(args.carrier)
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f"{len(mismatches)} carrier sell months differ")
+        sys.exit(1 if mismatches else 0)
+    elif args.action == "build_cubes":
+        # build dds_pgs cubes (market analytics aggregations use them until DDS loaders change dds_pgs again),
+        # scheduled after DDS loaders (scheduler/scripts/build_cubes.sh), only cubes loaders made stale are built
+        from dds.cubes import CUBES
+        from dds.repository import DdsCubeRepository
+
+        repository = DdsCubeRepository()
+        cubes = CUBES if args.force or args.name else repository.unusable()
+        for cube in cubes:
+            if args.name in (None, cube.name):
+                print(f"{cube.name} : {repository.build(cube)} documents built")
+        if not cubes:
+            print("all cubes are up to date")
+    elif args.action == "train_segmentation":
+        # train customer segmentation models (requests only assign their sales to stored models)
+        from configurations.repository import ConfigurationRepository
+        from customer_segmentation.training import train_models
+
+        carriers = [args.carrier] if args.carrier else ConfigurationRepository().get_customers()["customers"]
+        for carrier in carriers:
+            for name, model in train_models(carrier, full=args.full):
+                print(f"{carrier} {name} : {'too few sales' if model is None else f'{int(sum(model.counts))} sales'}")
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ from flask import request
 from base.constants import Constants
 from base.helpers.permissions import has_access
 from base.middlewares import attach_figure_id, attach_story_text, cache
+from base.redis import CacheNamespace
 from base.service import BaseService
 from base.utils import add_missing_dates, return_date_parts_as_int
 from dds.repository import DdsRepository
@@ -40,7 +41,7 @@ class MarketShareService(BaseService):
 
     @has_access("MSD", ["/market-share"])
     @attach_figure_id(["fig"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     def get_market_share(self, form, typ: str):
         pipeline = self.builder.market_share_pipeline(form, typ)
         df = self._aggregte(pipeline)
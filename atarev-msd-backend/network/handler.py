@@ -1,3 +1,4 @@
+import pandas as pd
 from flask import request
 
 from base.entities.currency import Currency
@@ -14,43 +15,39 @@ class NetworkHandler(FieldsHandler):
         host = request.user.carrier
         self.CARRIER_COLOR_MAP = get_market_carrier_map(origin_codes, dest_codes, host)
 
-    def dom_op_al_code_handler(self, row, col):
-        return {"color": self.CARRIER_COLOR_MAP[row[col]] if row[col] in self.CARRIER_COLOR_MAP else "#ffffff", "value": row[col]}
+    def dom_op_al_code_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        colors = self.CARRIER_COLOR_MAP
+        return df[col].map(lambda code: {"color": colors[code] if code in colors else "#ffffff", "value": code})
 
-    def blended_rev_handler(self, row, col):
-        if row.get("currency"):
-            return {
-                "displayVal": Currency.attach_currency(f"{int(row[col]):,}", row["currency"]),
-                "value": int(row[col]),
-            }
-        return {
-            "displayVal": Currency.attach_currency(f"{int(row[col]):,}", "USD"),
-            "value": int(row[col]),
-        }
+    def blended_rev_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        # rows without currency are in USD
+        currencies = df["currency"].where(df["currency"].astype(bool), "USD") if "currency" in df else ["USD"] * df.shape[0]
+        return pd.Series(
+            [
+                {"displayVal": Currency.attach_currency(f"{value:,}", currency), "value": value}
+                for value, currency in zip(df[col].astype(int).tolist(), currencies)
+            ],
+            index=df.index,
+            dtype=object,
+        )
 
-    def pax_sum_handler(self, row, col):
-        return {"displayVal": f"{row[col]}", "value": row[col]}
+    def pax_sum_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return df[col].astype(object).map(lambda val: {"displayVal": f"{val}", "value": val})
 
-    def pax_handler(self, row, col):
-        return {"displayVal": f"{row[col]}", "value": row[col]}
+    def pax_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return self.pax_sum_column(df, col)
 
-    def path_handler(self, row, col):
-        if row["bound"] == "Inbound":
-            val = row[col]
-            val = val.split("-")
-            return f"{val[1]}-{val[0]}"
-        return row[col]
+    def path_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        legs = df[col].str.split("-")
+        return df[col].where(df["bound"] != "Inbound", legs.str[1] + "-" + legs.str[0])
 
 
 class NetworkBeyondPointsHandler(FieldsHandler):
-    def pax_handler(self, row, col):
-        return self.seprate_thousands(row[col])
+    def pax_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return df[col].astype(object).map(self.seprate_thousands)
 
-    def blended_rev_handler(self, row, col):
-        return "$" + self.seprate_thousands(row[col])
+    def blended_rev_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return "$" + self.pax_column(df, col)
 
-    def blended_fare_handler(self, row, col):
-        return "$" + self.seprate_thousands(row[col])
-
-    def is_direct_handler(self, row, col):
-        return row[col]
+    def blended_fare_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return "$" + self.pax_column(df, col)
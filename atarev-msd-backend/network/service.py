@@ -8,6 +8,7 @@ from base.constants import Constants
 from base.helpers.permissions import has_access
 from base.helpers.routes import ProtectedRoutes
 from base.middlewares import attach_carriers_colors, attach_figure_id, attach_story_text, cache
+from base.redis import CacheNamespace
 from base.service import BaseService
 from dds.repository import DdsRepository
 from network.builder import NetworkBuilder
@@ -53,7 +54,7 @@ class NetworkService(BaseService):
         return handler_class
 
     @has_access("MSD", ["/network-scheduling"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_story_text(STORY_TEXTS["network_beyond_points"])
     @attach_figure_id(["fig_inbound", "fig_outbound"])
     def network_beyond_points(self, form: NetworkByondPoints):
@@ -61,10 +62,11 @@ class NetworkService(BaseService):
         summery_inbound_pipeline = builder.beyond_points_inbound_summery_pipeline(form)
         summery_outbound_pipeline = builder.beyond_points_outbound_summery_pipeline(form)
 
-        # get results for previouse 3 queries
-        summary_df = pd.DataFrame(dds_repo.aggregate(summery_pipeline))
-        summary_inbound_df = pd.DataFrame(dds_repo.aggregate(summery_inbound_pipeline))
-        summary_outbound_df = pd.DataFrame(dds_repo.aggregate(summery_outbound_pipeline))
+        # get results for previouse 3 queries (concurrently)
+        summary_df, summary_inbound_df, summary_outbound_df = self.aggregate_many(
+            [summery_pipeline, summery_inbound_pipeline, summery_outbound_pipeline],
+            dds_repo,
+        )
 
         fig_in, fig_out = figure.indirect_bdown_viz(summary_inbound_df, summary_outbound_df)
         summary_df = pd.DataFrame(self.handler.handle_rows(summary_df))
@@ -116,7 +118,7 @@ class NetworkService(BaseService):
         ]
 
     @has_access("MSD", ["/network-scheduling"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_story_text(STORY_TEXTS["network_comparison_details"])
     @attach_figure_id(["fig"])
     def network_comparison_details(self, form: NetworkSchedulingComparisonDetails):
@@ -188,13 +190,18 @@ class NetworkService(BaseService):
 
     def get_countries_for_airports(self, codes: List[str]) -> List[str]:
         """takse list of airport codes  and returns list of corresponding country codes"""
-        return {item["country_code"]: item["airports"] for item in airport_repository.get_airports_grouped_by_country(codes)}
+        countries = airport_repository.index.countries
+        res = {}
+        for code in codes or countries.keys():
+            if code in countries:
+                res.setdefault(countries[code], []).append(code)
+        return res
         # mp = airport_repository.get_country_airport_map()
         # self.AIRPORT_COUNTRY_MAP = mp
         # return [self.AIRPORT_COUNTRY_MAP[code] for code in codes]
 
     @has_access("MSD", ["/network-scheduling"])
-    @cache()
+    @cache(namespace=CacheNamespace.DDS)
     @attach_carriers_colors()
     @attach_story_text(STORY_TEXTS["network_conictivity_map"])
     @attach_figure_id(["fig"])
@@ -5,7 +5,7 @@ from reports.inventory.form import ReportForm
 from reports.service import ReportService
 from utils.funcs import create_error_response
 
-service = ReportService
+service = ReportService()
 
 
 class ReportController(BaseController):
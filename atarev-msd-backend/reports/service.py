@@ -1,15 +1,45 @@
-import csv
 from datetime import datetime
-from io import StringIO
 
-from flask import make_response, request
+from flask import request
 
+from base.export import csv_chunks, csv_response
 from base.service import BaseService
 from reports.inventory.form import ReportForm
 from reports.inventory.query import ReportQuery
 
 from .repository import AuthResultRepository
 
+HEADER = [
+    "origin",
+    "destination",
+    "airline_code",
+    "cabin",
+    "flight_number",
+    "outbound_date",
+    "old_class",
+    "old_rank",
+    "old_authorization",
+    "class",
+    "rank",
+    "authorization",
+]
+
+# fields of `AuthResultRepository.get` results in header order
+FIELDS = [
+    "origin",
+    "destination",
+    "airline_code",
+    "cabin_code",
+    "flight_number",
+    "departure_date",
+    "old_class_code",
+    "old_rank",
+    "old_authorization",
+    "class_code",
+    "rank",
+    "authorization",
+]
+
 
 class ReportService(BaseService):
     repository_class = AuthResultRepository
@@ -17,28 +47,9 @@ class ReportService(BaseService):
     def report(self, form: ReportForm):
         match = ReportQuery(form, request.user.carrier).query
         cursor = self.repository.get(match)
-        si = StringIO()
-        cw = csv.writer(si)
-
-        data = [
-            "origin",
-            "destination",
-            "airline_code",
-            "cabin",
-            "flight_number",
-            "outbound_date",
-            "old_class",
-            "old_rank",
-            "old_authorization",
-            "class",
-            "rank",
-            "authorization",
-        ]
-
-        cw.writerows([data] + [list(item.values()) for item in cursor])
-        output = make_response(si.getvalue())
-        output.headers[
-            "Content-Disposition"
-        ] = f"attachment; filename={request.user.carrier}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        output.headers["Content-type"] = "text/csv"
-        return output
+        # rows are written while the cursor is consumed, missing fields are left empty
+        rows = ([item.get(field) for field in FIELDS] for item in cursor)
+        return csv_response(
+            csv_chunks(HEADER, rows),
+            f"{request.user.carrier}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        )
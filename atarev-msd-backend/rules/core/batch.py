@@ -0,0 +1,143 @@
+"""
+rule conditions evaluated for a batch of facts at once : facts are turned into a DataFrame (a column per condition path)
+and conditions into boolean masks (`all` / `any` groups are `And` / `Or` of their masks), results are exactly the ones
+`Evaluate` gives for every fact (it stays the reference implementation)
+"""
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from rules.core.compiled import OPERATORS
+from rules.core.eval import Evaluation
+from rules.types import Rule, SubRule
+
+NUMBERS = (int, float)
+COMPARISONS = {"greaterThanInclusive", "lessThanInclusive", "lessThan", "greaterThan"}
+
+
+def read(obj: Dict[str, Any], keys: List[str]) -> Any:
+    # same walk as `parse` (falsy values are missing ones)
+    for key in keys:
+        obj = obj.get(key)
+        if not obj:
+            return None
+    return obj
+
+
+@dataclass
+class Column:
+    """values of a path, which of them are present and their type when all of them have the same one"""
+
+    values: np.ndarray
+    present: np.ndarray
+    kind: Optional[type]
+
+    @cached_property
+    def numbers(self) -> np.ndarray:
+        return self.values[self.present].astype(self.kind)
+
+
+@dataclass
+class FactTable:
+    """facts of a batch as a DataFrame, columns are added once for every path conditions read"""
+
+    facts: List[Dict[str, Any]]
+    frame: pd.DataFrame = field(init=False, repr=False)
+    _columns: Dict[str, Column] = field(default_factory=dict, init=False, repr=False)
+    _masks: Dict[Hashable, np.ndarray] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.frame = pd.DataFrame(index=pd.RangeIndex(len(self.facts)))
+
+    def __len__(self) -> int:
+        return len(self.facts)
+
+    def column(self, path: str) -> Column:
+        if path not in self._columns:
+            keys = path.split(".")
+            self.frame[path] = pd.Series([read(obj, keys) for obj in self.facts], index=self.frame.index, dtype=object)
+            values = self.frame[path].to_numpy()
+            present = np.array([value is not None for value in values], dtype=bool)
+            kinds = {type(value) for value in values[present]}
+            self._columns[path] = Column(values, present, kinds.pop() if len(kinds) == 1 else None)
+        return self._columns[path]
+
+    def mask(self, rule: Rule, required: Sequence[str]) -> np.ndarray:
+        """facts the condition is true for, masks of the same condition are computed once"""
+        key = (rule["path"], rule["operator"], repr(rule["value"]), rule["path"] in required)
+        if key not in self._masks:
+            column = self.column(rule["path"])
+            # facts missing a required path fail, other missing ones are not checked
+            mask = np.full(len(self), rule["path"] not in required, dtype=bool)
+            mask[column.present] = self.compare(column, rule["operator"], rule["value"])
+            self._masks[key] = mask
+        return self._masks[key]
+
+    def compare(self, column: Column, operator: str, accept: Any) -> np.ndarray:
+        kind, size = column.kind, int(column.present.sum())
+        if not size:
+            return np.zeros(0, dtype=bool)
+
+        if operator == "in" and kind is str and isinstance(accept, (list, tuple, set)):
+            return np.isin(column.values[column.present], np.array(list(accept), dtype=object))
+
+        if operator == "equal" and kind is not None:
+            if kind is not type(accept):
+                return np.zeros(size, dtype=bool)
+            if kind in NUMBERS or kind is str:
+                return column.values[column.present] == accept
+
+        if operator in COMPARISONS and kind in NUMBERS and type(accept) in NUMBERS:
+            return OPERATORS[operator](column.numbers, accept)
+
+        # values of other types are compared one by one as `Evaluate` does
+        compare = OPERATORS[operator]
+        return np.fromiter((compare(value, accept) for value in column.values[column.present]), dtype=bool, count=size)
+
+    def node(self, rule: Union[Rule, SubRule], required: Sequence[str]) -> np.ndarray:
+        if rule.get("field") and rule.get("all"):
+            return np.logical_and.reduce([self.mask(sub_rule, required) for sub_rule in rule["all"]])
+
+        if rule.get("field") and rule.get("any"):
+            return np.logical_or.reduce([self.mask(sub_rule, required) for sub_rule in rule["any"]])
+
+        return self.mask(rule, required)
+
+
+@dataclass
+class BatchEvaluation:
+    """
+    evaluation of `all` conditions of a rule for every fact of a table,
+    `failures` has a row per fact and a column per condition (by position) that is true where the condition fails
+    """
+
+    conditions: List[Union[Rule, SubRule]]
+    table: FactTable
+    failures: pd.DataFrame
+
+    @cached_property
+    def matched(self) -> np.ndarray:
+        return ~self.failures.to_numpy().any(axis=1)
+
+    @property
+    def matched_facts(self) -> List[Dict[str, Any]]:
+        return [self.table.facts[idx] for idx in np.flatnonzero(self.matched)]
+
+    def __getitem__(self, idx: int) -> Evaluation:
+        """evaluation of a fact (the first condition that fails for it, as `Evaluate` stops at it)"""
+        if self.matched[idx]:
+            return Evaluation(True)
+        failed = int(np.argmax(self.failures.iloc[idx].to_numpy()))
+        return Evaluation(False, (self.conditions[failed], self.table.facts[idx]))
+
+
+def evaluate_batch(table: FactTable, conditions: List[Union[Rule, SubRule]], required: Sequence[str] = ()) -> BatchEvaluation:
+    failures = pd.DataFrame(
+        {position: ~table.node(condition, required) for position, condition in enumerate(conditions)},
+        index=table.frame.index,
+        dtype=bool,
+    )
+    return BatchEvaluation(conditions, table, failures)
@@ -0,0 +1,111 @@
+"""
+rule conditions compiled once into checks (paths split and operators bound beforehand) instead of being read again
+for every fact, checks return exactly what `Evaluate` does (it stays the reference implementation)
+"""
+import hashlib
+import json
+import operator
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple, Union
+
+from rules.core.eval import Evaluation
+from rules.types import Rule, SubRule
+
+Check = Callable[[Dict[str, Any]], bool]
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "in": lambda value, accept: value in accept,
+    "equal": lambda value, accept: type(value) is type(accept) and value == accept,
+    "greaterThanInclusive": operator.ge,
+    "lessThanInclusive": operator.le,
+    "lessThan": operator.lt,
+    "greaterThan": operator.gt,
+}
+
+
+def compile_condition(rule: Rule, required: Sequence[str]) -> Check:
+    keys, compare, accept = rule["path"].split("."), OPERATORS[rule["operator"]], rule["value"]
+    # facts missing a required path fail, other missing ones are not checked
+    when_missing = rule["path"] not in required
+
+    def check(obj: Dict[str, Any]) -> bool:
+        # same walk as `parse` (falsy values are missing ones)
+        for key in keys:
+            obj = obj.get(key)
+            if not obj:
+                return when_missing
+        return compare(obj, accept)
+
+    return check
+
+
+def compile_node(rule: Union[Rule, SubRule], required: Sequence[str]) -> Check:
+    if rule.get("field") and rule.get("all"):
+        checks = [compile_condition(sub_rule, required) for sub_rule in rule["all"]]
+        return lambda obj: all(check(obj) for check in checks)
+
+    if rule.get("field") and rule.get("any"):
+        checks = [compile_condition(sub_rule, required) for sub_rule in rule["any"]]
+        return lambda obj: any(check(obj) for check in checks)
+
+    return compile_condition(rule, required)
+
+
+@dataclass
+class CompiledConditions:
+    """checks of `all` conditions of a rule, facts are checked until one of them fails"""
+
+    conditions: List[Union[Rule, SubRule]]
+    checks: List[Check]
+
+    def __post_init__(self):
+        self.pairs = list(zip(self.conditions, self.checks))
+
+    def __call__(self, obj: Dict[str, Any]) -> Evaluation:
+        for condition, check in self.pairs:
+            if not check(obj):
+                return Evaluation(False, (condition, obj))
+        return Evaluation(True)
+
+
+def compile_conditions(conditions: List[Union[Rule, SubRule]], required: Sequence[str] = ()) -> CompiledConditions:
+    return CompiledConditions(conditions, [compile_node(rule, required) for rule in conditions])
+
+
+def conditions_digest(conditions: Dict[str, Any]) -> str:
+    """digest of rule conditions (rules saved without a new `updated_at` are compiled again when they change)"""
+    return hashlib.sha1(json.dumps(conditions, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class RuleCache:
+    """
+    compiled conditions of rules by rule id and conditions, shared by evaluations of a process
+    (least recently used rules are dropped once there are `size` of them)
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CompiledConditions]" = OrderedDict()
+
+    def get(self, rule: Dict[str, Any], required: Sequence[str] = ()) -> CompiledConditions:
+        if rule.get("_id") is None:
+            return compile_conditions(rule["conditions"]["all"], required)
+
+        key: Tuple[Hashable, ...] = (str(rule["_id"]), conditions_digest(rule["conditions"]), tuple(required))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        compiled = compile_conditions(rule["conditions"]["all"], required)
+        with self._lock:
+            self._entries[key] = compiled
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return compiled
+
+
+rule_cache = RuleCache(size=1024)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, Iterable, List, Optional, Union, cast
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, cast
 
 import pandas as pd
 
@@ -44,7 +45,14 @@ class FailReason:
 @dataclass
 class Evaluation:
     result: bool
-    reason: Union[Dict[str, Any], None]
+    # failed condition and the fact it failed for, reason is generated from them only when it is read
+    failure: Optional[Tuple[Union[Rule, SubRule], Dict[str, Any]]] = None
+
+    @cached_property
+    def reason(self) -> Union[Dict[str, Any], None]:
+        if self.failure is None:
+            return None
+        return FailReason(*self.failure).generate()
 
 
 @dataclass
@@ -58,7 +66,7 @@ class Evaluate:
         idx = 0
         rule = None
         res = None
-        reason = None
+        failure = None
 
         while valid and idx < len(self.rules):
             rule = self.rules[idx]
@@ -72,12 +80,12 @@ class Evaluate:
                 valid = self.condition(cast(Rule, rule), self.obj)()
 
             if not valid:
-                reason = FailReason(rule=rule, obj=self.obj).generate()
+                failure = (rule, self.obj)
                 valid = False
 
             idx += 1
 
-        res = Evaluation(valid, reason)
+        res = Evaluation(valid, failure)
         return res
 
     def condition(self, rule: Rule, obj: Dict[str, Any]) -> Callable:
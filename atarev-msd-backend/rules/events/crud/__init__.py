@@ -19,8 +19,10 @@ class EventRule:
 
     def create(self):
         item = GenerateEventRule(self.form, self.request.user).generate()
+        item["created_at"] = datetime.utcnow()
+        item["updated_at"] = datetime.utcnow()
         rule_repo.insert([item])
-        del item["_id"]
+        del item["_id"], item["created_at"], item["updated_at"]
         return item
 
     def _check_rule_owner(self, rule_id, username):
@@ -40,7 +42,10 @@ class EventRule:
 
         if not self.form.id:
             raise ValueError("ID must be provided")
+        item["updated_at"] = datetime.utcnow()
         rule_repo.update_one({"_id": ObjectId(self.form.id)}, item)
+
+        del item["updated_at"]
         return item
 
     def delete(self, _id):
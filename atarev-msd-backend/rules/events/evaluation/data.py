@@ -1,21 +1,21 @@
 from dataclasses import dataclass
+from typing import Dict, List
 
 import pandas as pd
 
-from airports.entities import Country
-from base.helpers.datetime import Date
+from airports.repository import AirportRepository
 from events.common import EventSetup
 from events.repository import EventRepository
 from flight_inventory.repository import FlightInventoryRepository
+from rules.events.evaluation.inventory import COLUMNS, by_departure_date
 from rules.events.evaluation.query import EventQuery, InventoryQuery
 from rules.repository import RuleRepository
 
+airport_repo = AirportRepository()
 event_repo = EventRepository()
 inventory_repo = FlightInventoryRepository()
 rule_repo = RuleRepository()
 
-bins = (365, 270, 180, 90, 30, 15, 7, 6, 5, 4, 3, 2, 1)
-
 
 @dataclass
 class RuleData:
@@ -29,37 +29,24 @@ class RuleData:
 @dataclass
 class InventoryData:
     host_code: str
-    departure_date: int
+    departure_dates: List[int]
 
-    def get(self) -> pd.DataFrame:
-        match = InventoryQuery(self.host_code, self.departure_date).query
-        inv = pd.DataFrame(inventory_repo.get_load_factor(extended=True, match=match))
+    def get(self) -> Dict[int, pd.DataFrame]:
+        """inventory of every departure date, fetched by one query for all of them"""
+        if not self.departure_dates:
+            return {}
+
+        match = InventoryQuery(self.host_code, self.departure_dates).query
+        inv = pd.DataFrame(inventory_repo.get_load_factor(extended=True, match=match, fields={"departure_date": 1}))
 
         if inv.empty:
-            return pd.DataFrame(columns=("country_code", "cabin", "date", "dept_date", "lf", "dte"))
+            return {date: pd.DataFrame(columns=COLUMNS) for date in self.departure_dates}
 
         inv = self.__attach_country_code(inv)
-        inv = self.__aggregate(inv)
-        inv = self.__attach_dte(inv)
-        return inv.sort_values("dte", ascending=False)
+        return by_departure_date(inv, self.departure_dates)
 
     def __attach_country_code(self, inv_df: pd.DataFrame) -> pd.DataFrame:
-        m = Country.airport_country_map(inv_df.origin.unique().tolist())
-        inv_df["country_code"] = inv_df.origin.map(m)
-        return inv_df
-
-    def __aggregate(self, inv_df: pd.DataFrame) -> pd.DataFrame:
-        grouped_df = (
-            inv_df.groupby(["country_code", "cabin", "date", "dept_date"])
-            .apply(lambda grouped: round((grouped.total_booking.sum() / grouped.cap.sum()) * 100))
-            .reset_index()
-            .rename(columns={0: "lf"})
-        )
-
-        return grouped_df
-
-    def __attach_dte(self, inv_df: pd.DataFrame) -> pd.DataFrame:
-        inv_df["dte"] = inv_df.apply(lambda row: (Date(row.dept_date).date() - Date(row.date).date()).days, axis=1)
+        inv_df["country_code"] = airport_repo.index.map_countries(inv_df.origin)
         return inv_df
 
 
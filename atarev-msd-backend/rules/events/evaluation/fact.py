@@ -3,8 +3,8 @@ from typing import Dict
 
 import pandas as pd
 
-from rules.events.evaluation.data import bins
-from rules.events.evaluation.types import EventFact, Fct, Pickup
+from rules.events.evaluation.inventory import bins
+from rules.events.evaluation.types import EventFact, Fct, FlightFact, Pickup
 
 
 def pickup(data: pd.Series) -> Dict[str, Pickup]:
@@ -56,6 +56,14 @@ def flight_fact(data: pd.Series) -> Dict[str, Pickup]:
     return pickup(data)
 
 
+def cabin_fact(inventory: pd.DataFrame, cabin: str) -> FlightFact:
+    """flight part of facts, the same for every event of the inventory's country"""
+    df = pd.DataFrame({"dte": bins})
+    m = df.merge(inventory, on="dte", how="outer")
+    m.lf = m.lf.fillna(0)
+    return {"cabin": cabin, "pickup": {"lf": flight_fact(m)}}
+
+
 @dataclass
 class Fact:
     event: pd.Series
@@ -63,11 +71,4 @@ class Fact:
     cabin: str
 
     def get(self) -> Fct:
-        df = self.__fill()
-        return {"event": event_fact(self.event), "flight": {"cabin": self.cabin, "pickup": {"lf": flight_fact(df)}}}
-
-    def __fill(self):
-        df = pd.DataFrame({"dte": bins})
-        m = df.merge(self.inventory, on="dte", how="outer")
-        m.lf = m.lf.fillna(0)
-        return m
+        return {"event": event_fact(self.event), "flight": cabin_fact(self.inventory, self.cabin)}
@@ -0,0 +1,46 @@
+"""
+load factors of event alert evaluation : inventory of every start date of events is fetched by one query,
+load factors and days to event are computed for all of it at once and it is sliced by start date
+"""
+from datetime import timedelta
+from typing import Dict, List
+
+import pandas as pd
+
+from base.helpers.datetime import Date
+
+bins = (365, 270, 180, 90, 30, 15, 7, 6, 5, 4, 3, 2, 1)
+COLUMNS = ("country_code", "cabin", "date", "dept_date", "lf", "dte")
+
+
+def snapshot_dates(departure_date: int) -> List[int]:
+    """dates of inventory snapshots used for a departure date (one for each bin)"""
+    dept_dt = Date(departure_date).date()
+    return [Date(dept_dt - timedelta(days=bin)).noramlize() for bin in bins]
+
+
+def load_factors(inv_df: pd.DataFrame) -> pd.DataFrame:
+    """load factor of every (departure date, country, cabin, snapshot date, leg departure date)"""
+    grouped_df = inv_df.groupby(["departure_date", "country_code", "cabin", "date", "dept_date"])[["total_booking", "cap"]].sum()
+    # rounded one by one as python does (it fails for groups without capacity as it always did)
+    grouped_df["lf"] = [round(value) for value in (grouped_df.total_booking / grouped_df.cap * 100).tolist()]
+    return grouped_df.drop(columns=["total_booking", "cap"]).reset_index()
+
+
+def days_to_event(inv_df: pd.DataFrame) -> pd.Series:
+    dept_dates = pd.to_datetime(inv_df.dept_date, format="%Y-%m-%d")
+    dates = pd.to_datetime(inv_df.date.astype(str), format="%Y%m%d")
+    return (dept_dates - dates).dt.days
+
+
+def by_departure_date(inv_df: pd.DataFrame, departure_dates: List[int]) -> Dict[int, pd.DataFrame]:
+    """inventory of every departure date (an empty frame for dates without inventory)"""
+    inv_df = load_factors(inv_df)
+    inv_df["dte"] = days_to_event(inv_df)
+
+    slices = {}
+    for departure_date, df in inv_df.groupby("departure_date", sort=False):
+        df = df.drop(columns="departure_date").reset_index(drop=True)
+        slices[departure_date] = df.sort_values("dte", ascending=False)
+
+    return {date: slices[date] if date in slices else pd.DataFrame(columns=COLUMNS) for date in departure_dates}
@@ -1,11 +1,13 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import List, TypedDict
+from typing import Dict, List, Tuple, TypedDict
 
-from rules.core.eval import Evaluate
+from rules.core.compiled import rule_cache
 from rules.events.evaluation.data import EventData, InventoryData, RuleData
-from rules.events.evaluation.fact import Fact
+from rules.events.evaluation.fact import cabin_fact, event_fact
 from rules.events.evaluation.form import AlertEvaluationForm
 from rules.events.evaluation.query import RemoveOldAlertsQuery
+from rules.events.evaluation.types import EventFact
 from rules.events.evaluation.utils import SuccessT, success
 from rules.repository import RuleResultRepository
 
@@ -27,25 +29,36 @@ class Proccess:
         # i'm converting the rules to list because i will use the value many times (one for each combination),
         # cursors are exhausted after one round
         rules = list(RuleData(self.form.host_code).get())
+        conditions = [rule_cache.get(rule) for rule in rules]
         events = EventData(self.form.host_code).get()
         s_dates: List[int] = events.start_date.unique().tolist()
 
+        # inventory of all start dates is fetched at once and sliced by start date
+        inventories = InventoryData(self.form.host_code, s_dates).get()
+
+        # facts of each event (its first row) by start_date, country_code
+        event_facts: Dict[Tuple[int, str], List[EventFact]] = defaultdict(list)
+        for (start_date, c_code, _), event_g_df in events.groupby(["start_date", "country_code", "event_name"]):
+            event_facts[(start_date, c_code)].append(event_fact(event_g_df.iloc[0]))
+
         # handle each start_date group separately (e.g: all events starting on 2024-04-01 will be handled together)
         for start_date in s_dates:
-            inv = InventoryData(self.form.host_code, start_date).get()
+            inv = inventories[start_date]
 
             # handle each country_code,cabin combination separately (e.g: FR-ECO)
             for (c_code, cabin), g_df in inv.groupby(["country_code", "cabin"]):
-                targeted_event = events[(events.start_date == start_date) & (events.country_code == c_code)]
+                targeted_events = event_facts.get((start_date, c_code))
+                if not targeted_events:
+                    continue
+                flight = cabin_fact(g_df, cabin)
 
                 # handle each event separately
-                for _, event_g_df in targeted_event.groupby("event_name"):
-                    event_data = event_g_df.iloc[0]
-                    fact = Fact(event_data, g_df, cabin).get()
+                for event in targeted_events:
+                    fact = {"event": event, "flight": flight}
 
                     # compare the rule against all possible combinations
-                    for rule in rules:
-                        res = Evaluate(rule["conditions"]["all"], fact)()
+                    for rule, evaluate in zip(rules, conditions):
+                        res = evaluate(fact)
                         if res.result:
                             self.success.append(success(self.form.host_code, fact, rule))
 
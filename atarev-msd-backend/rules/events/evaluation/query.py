@@ -9,6 +9,7 @@ from base.entities.carrier import Carrier
 from base.helpers.datetime import Date
 from base.mongo_utils import convert_list_param_to_criteria, merge_criterions
 from rules.events.evaluation.form import AlertEvaluationForm
+from rules.events.evaluation.inventory import snapshot_dates
 
 airport_repo = AirportRepository()
 
@@ -44,22 +45,16 @@ class EventQuery:
 @dataclass
 class InventoryQuery:
     host_code: str
-    departure_date: int
+    departure_dates: List[int]
 
     @property
     def query(self):
-
+        # snapshots of each departure date are the ones of its own bins
         return {
             "airline_code": self.host_code,
-            "departure_date": self.departure_date,
-            "date": {"$in": self.__dates_from_bins()},
+            "$or": [{"departure_date": date, "date": {"$in": snapshot_dates(date)}} for date in self.departure_dates],
         }
 
-    def __dates_from_bins(self) -> List[int]:
-        bins = (365, 270, 180, 90, 30, 15, 7, 6, 5, 4, 3, 2, 1)
-        dept_dt = Date(self.departure_date).date()
-        return [Date(dept_dt - timedelta(days=bin)).noramlize() for bin in bins]
-
 
 @dataclass
 class RemoveOldAlertsQuery:
@@ -199,9 +199,7 @@ class GenerateFlightRuleOption:
         return market_df.market_destination_city_code.unique().tolist()
 
     def __set_group(self, city_list):
-        cities = list(
-            airport_repo.get_airports_grouped_by_city({"city_code": {"$in": city_list}},
-                                                      as_map=False))
+        cities = airport_repo.get_airports_grouped_by_city(city_codes=city_list, as_map=False)
         for city in cities:
             for airport in city["airports"]:
                 airport["city_code"] = city["city_code"]
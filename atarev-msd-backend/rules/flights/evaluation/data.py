@@ -6,6 +6,7 @@ import pandas as pd
 
 from base.helpers.cabin import CabinMapper
 from base.helpers.datetime import Date
+from base.loader import load_frame
 from fares.common.query import LoadFactorQuery
 from fares.repository import FareRepository
 from flight_inventory.repository import FlightInventoryRepository
@@ -27,7 +28,7 @@ class FareData:
 
     def get(self) -> pd.DataFrame:
         pipeline = FaresQuery(self.form).query
-        df = pd.DataFrame(fare_repo.aggregate(pipeline))
+        df = load_frame(fare_repo.aggregate(pipeline))
 
         if df.empty:
             return pd.DataFrame(
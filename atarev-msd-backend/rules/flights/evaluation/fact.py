@@ -1,7 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Tuple, Union
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from base.helpers.cabin import CabinMapper
@@ -30,7 +31,10 @@ def fare_fact(fares_df: pd.DataFrame, consider_load_factor: bool) -> Union[FFact
     if fares_df.empty:
         return None
 
-    data = fares_df.iloc[0].to_dict()
+    return fare_record(fares_df.iloc[0].to_dict(), consider_load_factor)
+
+
+def fare_record(data: Dict[str, Any], consider_load_factor: bool) -> FFact:
     return {
         "carrierCode": data["carrier_code"],
         "fareAmount": data["fare"],
@@ -206,3 +210,104 @@ class Fact:
         }
 
         return facts
+
+
+# fields host fares of a flight have the same values of (`HostBestFare`)
+FLIGHT_KEY = [
+    "carrier_code",
+    "origin",
+    "flt_num",
+    "destination",
+    "departure_time",
+    "arrival_date",
+    "arrival_time",
+    "departure_date",
+]
+EPOCH = datetime(1970, 1, 1)
+
+
+def departure_datetime(departure_date: int, departure_time: int) -> datetime:
+    return datetime.strptime(f"{Date(departure_date).humanize()} {Time(departure_time).humanize()}", "%Y-%m-%d %H:%M")
+
+
+class FareIndex:
+    """
+    fares of an evaluation indexed once (host fares by flight, fares by carrier with their departure times),
+    facts of flights are looked up in it instead of filtering all fares again for every flight and rule
+    """
+
+    def __init__(self, fares: pd.DataFrame):
+        # lowest fare is the one of all fares (`BestFare`), it is the same for every flight
+        self.lowest = fare_fact(BestFare(None, fares).get(), False)
+        self.flights = fares.groupby(FLIGHT_KEY, sort=False).indices
+        self.carriers = fares.groupby("carrier_code", sort=False).indices
+        # rows as `iloc` gives them (python scalars)
+        self.records = fares.to_dict("records")
+        self.seconds = np.array(
+            [(departure_datetime(row["departure_date"], row["departure_time"]) - EPOCH).total_seconds() for row in self.records],
+            dtype=float,
+        )
+        self.amounts = fares.fare.to_numpy(dtype=float)
+
+    def host_fare(self, flight: Flight) -> Union[FFact, None]:
+        """`HostBestFare` of a flight"""
+        positions = self.flights.get(tuple(flight[name] for name in FLIGHT_KEY))
+        if positions is None:
+            return None
+
+        # first row `sort_values("fare")` gives (same sort of fares, missing ones last)
+        amounts = self.amounts[positions]
+        present = positions[~np.isnan(amounts)]
+        best = present[amounts[~np.isnan(amounts)].argsort(kind="quicksort")[0]] if present.size else positions[0]
+        return fare_record(self.records[best], True)
+
+    def competitor_fare(
+        self, host_fare: FFact, carrier_code: Optional[str], time_difference: Tuple[int, int]
+    ) -> Union[FFact, None]:
+        """`MainCompetitorBestFare` : cheapest fare of a carrier departing within a number of hours of the host fare"""
+        low, high = time_difference[0], time_difference[1]
+        positions = self.carriers.get(carrier_code)
+        if positions is None:
+            return None
+
+        host = (departure_datetime(host_fare["deptDate"], host_fare["deptTime"]) - EPOCH).total_seconds()
+        diff_hrs = np.abs((host - self.seconds[positions]) / 3600)
+        in_range = (diff_hrs >= low) & (diff_hrs <= high)
+        positions, diff_hrs = positions[in_range], diff_hrs[in_range]
+        if not positions.size:
+            return None
+
+        # cheapest then closest one, first one of ties (stable sort as `sort_values` of several columns is)
+        best = positions[np.lexsort((diff_hrs, self.amounts[positions]))[0]]
+        return fare_record(self.records[best], False)
+
+
+@dataclass
+class FlightFacts:
+    """facts of a flight (same as `Fact`) computed once and shared by rules having the same competitor criteria"""
+
+    index: FareIndex
+    flight: Flight
+    cabin: str
+    _facts: Dict[Hashable, Fct] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.host_fare = self.index.host_fare(self.flight)
+
+    def get(self, competitor_criteria: CompetitorCritera) -> Fct:
+        if not self.host_fare:
+            return {"hostFare": None, "mainCompetitorFare": None, "lowestFare": None}
+
+        key = (competitor_criteria["code"], competitor_criteria["range"])
+        if key not in self._facts:
+            competitor_fare = self.index.competitor_fare(self.host_fare, *key)
+            self._facts[key] = {
+                "hostFare": self.host_fare,
+                "mainCompetitorFare": competitor_fare,
+                "lowestFare": self.index.lowest,
+                "leg": leg(self.flight),
+                "market": market(self.flight),
+                "cabin": {"cabinCode": self.cabin, "cabinCodeHumanized": CabinMapper.humanize(self.cabin)},
+                "fares": {"maf": maf(self.host_fare, competitor_fare)},
+            }
+        return self._facts[key]
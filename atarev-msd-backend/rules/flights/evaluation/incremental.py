@@ -0,0 +1,199 @@
+"""
+incremental flight rule evaluation : every flight has a fingerprint of what its results are built from (its schedule,
+the fares its facts read with their load factor, versions of rules), only flights whose fingerprint changed since
+the last evaluation are evaluated again and only their results are written,
+flights are partitioned by market and partitions are evaluated in parallel by a process pool
+(nothing here reads or writes the database, workers only compute)
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from multiprocessing import get_context
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+import numpy as np
+import pandas as pd
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+from rules.core.batch import FactTable, evaluate_batch
+from rules.flights.evaluation.fact import FareIndex, FlightFacts
+from rules.flights.evaluation.types import CompetitorCritera, Flight
+from rules.flights.evaluation.utils import SuccessT, competitor_criterica, identifier, success
+from rules.types import Fct, RuleEntity
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# paths flight rule evaluation requires (facts missing them fail)
+required = [
+    "competitor.competitorCode",
+    "market.originCityCode",
+    "market.destCityCode",
+    "cabin.cabinCode",
+    "leg.deptDate",
+    "competitor.competitorCode",
+    "fares.maf",
+]
+
+
+@dataclass
+class Scope:
+    """what all flights of an evaluation share"""
+
+    fares: pd.DataFrame
+    rules: List[RuleEntity]
+    host_code: str
+    cabin: str
+
+
+@dataclass
+class Partition:
+    """flights of one or more markets and their fingerprints of the last evaluation (by identifier)"""
+
+    markets: List[str]
+    flights: List[Flight] = field(default_factory=list)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class PartitionResult:
+    """new fingerprints of flights evaluated again (by identifier) and their results"""
+
+    fingerprints: Dict[str, str]
+    success: List[SuccessT]
+
+
+def rule_versions(rules: List[RuleEntity]) -> List[Tuple[str, str]]:
+    return sorted((str(rule["_id"]), str(rule.get("updated_at"))) for rule in rules)
+
+
+def fingerprint(flight: Flight, facts: List[Fct], versions: List[Tuple[str, str]]) -> str:
+    # facts hold the schedule of the flight and every fare (with load factor) rules can read
+    payload = json.dumps([flight.get("flt_key"), facts, versions], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def partitions(flights: List[Flight], fingerprints: Dict[str, str], identifiers: List[str], count: int) -> List[Partition]:
+    """flights by market, markets are spread over `count` partitions (largest ones first, to the smallest partition)"""
+    markets: Dict[str, List[int]] = defaultdict(list)
+    for position, flt in enumerate(flights):
+        markets[flt["market"]].append(position)
+
+    items = [Partition(markets=[]) for _ in range(min(count, len(markets)) or 1)]
+    for market, positions in sorted(markets.items(), key=lambda item: (-len(item[1]), item[0])):
+        item = min(items, key=lambda item: len(item.flights))
+        item.markets.append(market)
+        for position in positions:
+            item.flights.append(flights[position])
+            if identifiers[position] in fingerprints:
+                item.fingerprints[identifiers[position]] = fingerprints[identifiers[position]]
+    return [item for item in items if item.flights]
+
+
+def evaluate_flights(scope: Scope, flights: List[Flight], flight_facts: List[FlightFacts]) -> List[SuccessT]:
+    """results of rules for flights, facts of every flight for rules having the same competitor criteria are one table"""
+    criterias = [competitor_criterica(rule) for rule in scope.rules]
+    tables: Dict[Hashable, FactTable] = {}
+    matches: List[Tuple[int, int]] = []
+
+    for position, (rule, criteria) in enumerate(zip(scope.rules, criterias)):
+        key = (criteria["code"], criteria["range"])
+        if key not in tables:
+            tables[key] = FactTable([facts.get(criteria) for facts in flight_facts])
+        res = evaluate_batch(tables[key], rule["conditions"]["all"], required)
+        matches.extend((flt_idx, position) for flt_idx in np.flatnonzero(res.matched).tolist())
+
+    items = []
+    for flt_idx, position in sorted(matches):
+        criteria = criterias[position]
+        facts = tables[(criteria["code"], criteria["range"])].facts[flt_idx]
+        items.append(success(scope.host_code, scope.cabin, facts, flights[flt_idx], scope.rules[position]))
+    return items
+
+
+def evaluate_partition(scope: Scope, partition: Partition) -> PartitionResult:
+    index = FareIndex(scope.fares)
+    versions = rule_versions(scope.rules)
+    criterias: List[CompetitorCritera] = list(
+        {(item["code"], item["range"]): item for item in map(competitor_criterica, scope.rules)}.values()
+    )
+
+    fingerprints: Dict[str, str] = {}
+    flights: List[Flight] = []
+    flight_facts: List[FlightFacts] = []
+    for flt in partition.flights:
+        facts = FlightFacts(index=index, flight=flt, cabin=scope.cabin.upper())
+        key = identifier(scope.host_code, scope.cabin, flt)
+        value = fingerprint(flt, [facts.get(item) for item in criterias], versions)
+        if partition.fingerprints.get(key) != value:
+            fingerprints[key] = value
+            flights.append(flt)
+            flight_facts.append(facts)
+
+    return PartitionResult(fingerprints, evaluate_flights(scope, flights, flight_facts) if flights else [])
+
+
+def writes(results: List[PartitionResult]) -> Tuple[List[Union[DeleteMany, ReplaceOne]], List[UpdateOne]]:
+    """
+    writes of results (results of rules a flight matches are upserted, its other results removed)
+    and fingerprints of flights evaluated again, there are none when no flight changed
+    """
+    result_ops: List[Union[DeleteMany, ReplaceOne]] = []
+    fingerprint_ops: List[UpdateOne] = []
+    now = datetime.utcnow()
+
+    for res in results:
+        matched: Dict[str, List[SuccessT]] = defaultdict(list)
+        for item in res.success:
+            matched[item["identifier"]].append(item)
+
+        for key, value in res.fingerprints.items():
+            rule_ids = [item["ruleId"] for item in matched[key]]
+            result_ops.append(DeleteMany({"identifier": key, "ruleId": {"$nin": rule_ids}, "type": {"$ne": "E"}}))
+            result_ops.extend(
+                ReplaceOne({"identifier": key, "ruleId": item["ruleId"], "type": {"$ne": "E"}}, item, upsert=True)
+                for item in matched[key]
+            )
+            fingerprint_ops.append(
+                UpdateOne({"identifier": key}, {"$set": {"fingerprint": value, "updated_at": now}}, upsert=True)
+            )
+
+    return result_ops, fingerprint_ops
+
+
+class PartitionPool:
+    """
+    process pool shared by evaluations of a process, created on first use (spawned workers, they do not inherit
+    database clients or threads), partitions are evaluated in the calling process when there is only one of them
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def map(self, func: Callable[[T], R], items: Sequence[T]) -> List[R]:
+        if self.max_workers < 2 or len(items) < 2:
+            return [func(item) for item in items]
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+        return list(self._pool.map(func, items))
+
+
+partition_pool = PartitionPool(max_workers=int(os.getenv("RULE_WORKERS") or os.cpu_count() or 1))
+
+
+def evaluate(
+    scope: Scope, flights: List[Flight], fingerprints: Dict[str, str], pool: PartitionPool = partition_pool
+) -> List[PartitionResult]:
+    """results of flights that changed since their `fingerprints` (by identifier) were stored"""
+    identifiers = [identifier(scope.host_code, scope.cabin, flt) for flt in flights]
+    return pool.map(partial(evaluate_partition, scope), partitions(flights, fingerprints, identifiers, pool.max_workers))
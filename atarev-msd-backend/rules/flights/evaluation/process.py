@@ -1,26 +1,15 @@
 from dataclasses import dataclass, field
 from typing import List, TypedDict
 
-from rules.core.eval import Evaluate
+from rules.flights.evaluation import incremental
 from rules.flights.evaluation.data import FareData, RuleData, ScheduleData
-from rules.flights.evaluation.fact import Fact
 from rules.flights.evaluation.form import RuleEvaluationForm
-from rules.flights.evaluation.query import RemoveOldRecommendationsQuery
-from rules.flights.evaluation.utils import SuccessT, competitor_criterica, fail, success
-from rules.repository import RuleFailResultRepository, RuleResultRepository
+from rules.flights.evaluation.utils import SuccessT, fail, identifier
+from rules.repository import RuleFailResultRepository, RuleFingerprintRepository, RuleResultRepository
 
 rule_result_repo = RuleResultRepository()
 rule_fail_repo = RuleFailResultRepository()
-
-required = [
-    "competitor.competitorCode",
-    "market.originCityCode",
-    "market.destCityCode",
-    "cabin.cabinCode",
-    "leg.deptDate",
-    "competitor.competitorCode",
-    "fares.maf",
-]
+rule_fingerprint_repo = RuleFingerprintRepository()
 
 
 class Resp(TypedDict):
@@ -28,6 +17,7 @@ class Resp(TypedDict):
     fail_count: int
     fares_count: int
     flights_count: int
+    evaluated_count: int
 
 
 @dataclass
@@ -46,49 +36,35 @@ class Proccess:
                 # "fail_count": 0,
                 "fares_count": 0,
                 "flights_count": 0,
+                "evaluated_count": 0,
                 "rules_count": 0,
             }
 
         host_flights = ScheduleData(self.form, int(fares.departure_date.min()), int(fares.departure_date.max())).get()
         rules = list(RuleData(self.form).get())
+        # only flights whose facts or rules changed since the last evaluation are evaluated (and written) again
+        scope = incremental.Scope(fares, rules, self.form.host_code, self.form.cabin)
+        fingerprints = rule_fingerprint_repo.get([identifier(self.form.host_code, self.form.cabin, flt) for flt in host_flights])
+        results = incremental.evaluate(scope, host_flights, fingerprints)
 
-        for flt in host_flights:
-            for rule in rules:
-                criteria = competitor_criterica(rule)
-                facts = Fact(flight=flt, fares=fares, cabin=self.form.cabin.upper(), competitor_criteria=criteria).get()
-                res = Evaluate(rule["conditions"]["all"], facts, required=required)()
-
-                if res.result is True:
-                    succ_obj = success(self.form.host_code, self.form.cabin, facts, flt, rule)
-                    self.success.append(succ_obj)
-                    self.identifiers.append(succ_obj["identifier"])
-                    continue
+        for res in results:
+            self.success.extend(res.success)
+            self.identifiers.extend(res.fingerprints)
 
-                # self.fail.append(
-                #     fail(
-                #         rule,
-                #         flight=flt,
-                #         reason=res.reason,
-                #         criteria={
-                #             "host_code": self.form.host_code,
-                #             "cabin": self.form.cabin,
-                #             "departure_date": Date(self.form.departure_date).noramlize(),
-                #         },
-                #     )
-                # )
-
-        rule_result_repo.delete(RemoveOldRecommendationsQuery(self.identifiers).query)
+        result_ops, fingerprint_ops = incremental.writes(results)
+        if result_ops:
+            rule_result_repo.bulk_write(result_ops)
+        if fingerprint_ops:
+            rule_fingerprint_repo.bulk_write(fingerprint_ops)
 
         # if self.fail:
         #     rule_fail_repo.insert(self.fail)
 
-        if self.success:
-            rule_result_repo.insert(self.success)
-
         return {
             "success_count": len(self.success),
             # "fail_count": len(self.fail),
             "fares_count": fares.shape[0],
             "flights_count": len(host_flights),
+            "evaluated_count": len(self.identifiers),
             "rules_count": len(rules),
         }
@@ -1,6 +1,5 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List
 
 from airports.entities import City
 from base.helpers.cabin import CabinMapper
@@ -115,17 +114,3 @@ class SchedQuery:
                 },
             ]
         )
-
-
-@dataclass
-class RemoveOldRecommendationsQuery:
-    identifiers: List[str]
-
-    @property
-    def query(self):
-        return merge_criterions(
-            [
-                convert_list_param_to_criteria("identifier", {"$in": self.identifiers}),
-                {"type": {"$ne": "E"}},
-            ]
-        )
@@ -48,8 +48,12 @@ class FailT(TypedDict):
     created_at: int
 
 
+def identifier(carrier_code: str, cabin: str, flight: Flight) -> str:
+    return f"{flight['origin']}-{flight['destination']}-{flight['departure_date']}-{cabin}-{carrier_code}-{flight['flt_num']}"
+
+
 def success(carrier_code: str, cabin: str, fact: Fct, flight: Flight, rule: RuleEntity) -> SuccessT:
-    _id = f"{flight['origin']}-{flight['destination']}-{flight['departure_date']}-{cabin}-{carrier_code}-{flight['flt_num']}"
+    _id = identifier(carrier_code, cabin, flight)
     return {
         "facts": fact,
         "action": {
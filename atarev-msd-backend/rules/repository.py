@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from base.helpers.fields import Field
 from base.repository import BaseRepository
@@ -73,3 +73,18 @@ class RuleResultRepository(BaseRepository):
 
 class RuleFailResultRepository(BaseRepository):
     collection = "bre_rules_fail"
+
+
+class RuleFingerprintRepository(BaseRepository):
+    """fingerprints of flights as of their last rule evaluation (`rules.flights.evaluation.incremental`)"""
+
+    collection = "bre_rules_fingerprints"
+    _indexed = False
+
+    def get(self, identifiers: List[str]) -> Dict[str, str]:
+        if not RuleFingerprintRepository._indexed:
+            self._db[self.collection].create_index("identifier", unique=True)
+            RuleFingerprintRepository._indexed = True
+
+        cursor = self.find({"identifier": {"$in": identifiers}}, {"_id": 0, "identifier": 1, "fingerprint": 1})
+        return {item["identifier"]: item["fingerprint"] for item in cursor}
@@ -1,6 +1,8 @@
+import pandas as pd
+
 from base.handler import FieldsHandler
 
 
 class FAHandler(FieldsHandler):
-    def orig_fare_amount_handler(self, row, col):
-        return row[col].lstrip("0")
+    def orig_fare_amount_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return df[col].str.lstrip("0")
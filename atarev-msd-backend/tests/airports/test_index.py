@@ -0,0 +1,140 @@
+"""
+airport index lookups compared with the repository queries they replaced (evaluated in memory on the same records)
+"""
+from airports.index import AirportIndex
+from tests.dds.pipeline import aggregate
+
+
+def airport(_id, code, city, city_name, country, country_name, kind="AIRPORT", coordinates=None, **extra) -> dict:
+    doc = {
+        "_id": _id,
+        "airport_iata_code": code,
+        "airport_name": f"{code} airport",
+        "airport_country": country_name,
+        "city_code": city,
+        "city_name": city_name,
+        "country_code": country,
+        "country_name": country_name,
+        "type": kind,
+        **extra,
+    }
+    if coordinates:
+        doc["latitude"], doc["longitude"] = coordinates
+    return doc
+
+
+DOCS = [
+    airport(1, "LHR", "LON", "London", "GB", "United Kingdom", coordinates=(51.47, -0.45)),
+    airport(2, "LGW", "LON", "London", "GB", "United Kingdom", coordinates=("51.15", "-0.18")),
+    airport(3, "LON", "LON", "London", "GB", "United Kingdom", kind="METROPOLITAN", coordinates=(51.5, -0.12)),
+    airport(4, "IST", "IST", "Istanbul", "TR", "Turkey", kind="METROPOLITAN"),
+    airport(5, "IST", "IST", "Istanbul", "TR", "Turkey", coordinates=(41.26, 28.74)),
+    airport(6, "SAW", "IST", "Istanbul", "TR", "Turkey", coordinates=(40.9, 29.3)),
+    airport(7, "ISL", "IST", "Istanbul", "TR", "Turkey", coordinates=(40.97, 28.81), disabled=True),
+    airport(8, "KHI", "KHI", "Karachi", "PK", "Pakistan", latitude=None, longitude=None),
+    airport(9, "ISB", "ISB", "Islamabad", "PK", "Pakistan", coordinates=(33.55, 72.83), disabled=False),
+]
+CODES = ["LHR", "LGW", "LON", "IST", "SAW", "ISL", "KHI", "ISB", "XXX"]
+INDEX = AirportIndex.build(DOCS)
+
+
+def find(query: dict) -> list:
+    return aggregate(DOCS, [{"$match": query}])
+
+
+def old_grouped_by_city(match: dict) -> list:
+    return aggregate(
+        DOCS,
+        [
+            {"$match": {"type": {"$ne": "METROPOLITAN"}, "disabled": {"$ne": True}, **match}},
+            {
+                "$group": {
+                    "_id": {"city_code": "$city_code", "city_name": "$city_name"},
+                    "airports": {"$push": {"airport_name": "$airport_name", "airport_code": "$airport_iata_code"}},
+                }
+            },
+            {"$project": {"_id": 0, "city_code": "$_id.city_code", "city_name": "$_id.city_name", "airports": 1}},
+        ],
+    )
+
+
+def by_city(groups: list) -> dict:
+    # order of $group results is not defined
+    return {group["city_code"]: group for group in groups}
+
+
+def test_group_by_city_matches_grouped_by_city_query():
+    for codes in (["LHR", "SAW", "ISL", "LON"], ["IST"], ["XXX"], CODES):
+        expected = by_city(old_grouped_by_city({"airport_iata_code": {"$in": codes}}))
+        assert by_city(INDEX.group_by_city(airport_codes=codes)) == expected
+
+    for cities in (["LON", "IST"], ["KHI", "ISB", "XXX"], []):
+        groups = INDEX.group_by_city(city_codes=cities)
+        assert by_city(groups) == by_city(old_grouped_by_city({"city_code": {"$in": cities}}))
+        # groups come in the order of given cities
+        assert [group["city_code"] for group in groups] == [city for city in cities if city in by_city(groups)]
+
+
+def test_coordinates_match_coordinates_query():
+    cursor = aggregate(
+        DOCS,
+        [
+            {"$match": {"airport_iata_code": {"$in": CODES}, "latitude": {"$ne": None}, "longitude": {"$ne": None}}},
+            {"$project": {"_id": 0, "airport_code": "$airport_iata_code", "latitude": 1, "longitude": 1}},
+        ],
+    )
+    expected = {}
+    for pt in cursor:
+        expected.setdefault(pt["airport_code"], (float(pt["latitude"]), float(pt["longitude"])))
+
+    assert {code: INDEX.coordinates[code] for code in CODES if code in INDEX.coordinates} == expected
+
+
+def test_country_and_city_of_airport_match_find_one():
+    for code in CODES:
+        docs = find({"airport_iata_code": code})
+        assert INDEX.country_of(code) == (docs[0]["country_code"] if docs else None)
+        assert INDEX.city_of(code) == (docs[0]["city_code"] if docs else None)
+
+
+def test_country_maps_match_find_queries():
+    assert {code: INDEX.countries[code] for code in CODES if code in INDEX.countries} == {
+        doc["airport_iata_code"]: doc["country_code"] for doc in find({"airport_iata_code": {"$in": CODES}})
+    }
+
+    names = ["Turkey", "Pakistan", "France"]
+    assert {name: INDEX.country_codes[name] for name in names if name in INDEX.country_codes} == {
+        doc["country_name"]: doc["country_code"] for doc in find({"country_name": {"$in": names}})
+    }
+
+    cities = ["LON", "KHI"]
+    cursor = aggregate(
+        DOCS,
+        [
+            {"$match": {"city_code": {"$in": cities}}},
+            {"$group": {"_id": {"airport_code": "$airport_iata_code", "city_code": "$city_code"}}},
+            {"$project": {"_id": 0, "airport_code": "$_id.airport_code", "city_code": "$_id.city_code"}},
+        ],
+    )
+    assert {code: city for code, city in INDEX.cities.items() if city in cities} == {
+        doc["airport_code"]: doc["city_code"] for doc in cursor
+    }
+
+
+def test_first_airport_matches_find_one_of_non_metropolitan_airports():
+    for codes in (["IST"], ["LON"], ["SAW", "LHR"], ["KHI", "ISL"], ["XXX"]):
+        docs = find({"airport_iata_code": {"$in": codes}, "type": {"$ne": "METROPOLITAN"}})
+        record = INDEX.first_airport(codes)
+        assert (record["_id"] if record else None) == (str(docs[0]["_id"]) if docs else None)
+
+
+def test_records_keep_airport_over_metropolitan_record():
+    # the previous map kept whichever record came last, the index keeps the airport whatever the order
+    for docs in (DOCS, DOCS[::-1]):
+        records = AirportIndex.build(docs).records
+        assert records["IST"]["_id"] == "5"
+        assert records["LON"]["type"] == "METROPOLITAN"
+
+    expected = {doc["airport_iata_code"]: doc for doc in find({"airport_iata_code": {"$in": ["LHR", "SAW", "KHI"]}})}
+    for code, doc in expected.items():
+        assert INDEX.records[code] == {**{k: v for k, v in doc.items() if k in INDEX.records[code]}, "_id": str(doc["_id"])}
@@ -0,0 +1,101 @@
+"""in-memory redis client with the commands `base.redis.Redis` uses (expiry is kept, never applied)"""
+import fnmatch
+import threading
+from typing import Dict, Optional
+
+from redis.exceptions import LockError
+
+
+class MemoryLock:
+    def __init__(self, client: "MemoryRedis", name: str):
+        self.client = client
+        self.name = name
+
+    def acquire(self, blocking: bool = True) -> bool:
+        with self.client.mutex:
+            if self.name in self.client.locks:
+                return False
+            self.client.locks.add(self.name)
+            return True
+
+    def release(self) -> None:
+        with self.client.mutex:
+            if self.name not in self.client.locks:
+                raise LockError("lock is not owned")
+            self.client.locks.remove(self.name)
+
+
+class MemoryPipeline:
+    def __init__(self, client: "MemoryRedis"):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name: str):
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return command
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class MemoryRedis:
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.values: Dict[bytes, object] = {}
+        self.expiries: Dict[bytes, Optional[int]] = {}
+        self.locks = set()
+
+    @staticmethod
+    def key(name) -> bytes:
+        return name.encode("utf-8") if isinstance(name, str) else name
+
+    def get(self, name):
+        value = self.values.get(self.key(name))
+        return value if isinstance(value, bytes) else None
+
+    def set(self, name, value, ex=None):
+        value = value.encode("utf-8") if isinstance(value, str) else value
+        self.values[self.key(name)] = value
+        self.expiries[self.key(name)] = ex
+
+    def mget(self, names):
+        return [self.get(name) for name in names]
+
+    def delete(self, *names):
+        for name in names:
+            self.values.pop(self.key(name), None)
+            self.expiries.pop(self.key(name), None)
+
+    def hincrby(self, name, field, amount=1):
+        fields = self.values.setdefault(self.key(name), {})
+        fields[self.key(field)] = fields.get(self.key(field), 0) + amount
+        self.expiries.setdefault(self.key(name), None)
+
+    def hgetall(self, name):
+        return {field: str(value).encode("utf-8") for field, value in self.values.get(self.key(name), {}).items()}
+
+    def scan_iter(self, match="*", count=None):
+        return [name for name in list(self.values) if fnmatch.fnmatchcase(name.decode("utf-8"), match)]
+
+    def ttl(self, name):
+        if self.key(name) not in self.values:
+            return -2
+        expiry = self.expiries.get(self.key(name))
+        return -1 if expiry is None else expiry
+
+    def type(self, name):
+        value = self.values.get(self.key(name))
+        if value is None:
+            return b"none"
+        return b"hash" if isinstance(value, dict) else b"string"
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+
+    def lock(self, name, timeout=None):
+        return MemoryLock(self, name)
@@ -0,0 +1,36 @@
+"""previous row by row `FieldsHandler.handle_rows` (iterrows), reference of the column based one"""
+from typing import Any, Dict, List
+
+import pandas as pd
+
+
+def handle_rows_by_row(handler: Any, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """records `handler` cell handlers (`<field>_handler(row, col)`) gave before column handlers existed"""
+    result = []
+    for _, row in df.iterrows():
+        obj = {}
+        for col in df.columns:
+            if hasattr(handler, f"{col}_handler"):
+                obj[col] = getattr(handler, f"{col}_handler")(row, col)
+            else:
+                obj[col] = row[col]
+        result.append(obj)
+    return result
+
+
+def same(a: Any, b: Any) -> bool:
+    """equal values (missing values are equal to each other, numpy and python scalars are compared by value)"""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if pd.api.types.is_scalar(a) and pd.api.types.is_scalar(b) and pd.isna(a) and pd.isna(b):
+        return True
+    return bool(a == b)
+
+
+def assert_same_records(result: List[Dict[str, Any]], expected: List[Dict[str, Any]]) -> None:
+    assert len(result) == len(expected)
+    for record, expected_record in zip(result, expected):
+        assert list(record) == list(expected_record)
+        assert same(record, expected_record), f"{record} != {expected_record}"
@@ -0,0 +1,54 @@
+import csv
+import tracemalloc
+import zlib
+from io import StringIO
+
+import pandas as pd
+
+from base.export import csv_chunks, frame_rows, gzipped
+
+ROWS = 1_000_000
+HEADER = ["origin", "destination", "airline_code", "flight_number", "class", "authorization"]
+
+
+def documents(count: int):
+    """synthetic documents yielded one by one like a cursor does"""
+    for i in range(count):
+        yield ["LHR", "IST", "PY", 1000 + i % 500, "Y", i % 300]
+
+
+def test_csv_chunks():
+    text = "".join(csv_chunks(HEADER, documents(5), batch_size=2))
+    rows = list(csv.reader(StringIO(text)))
+
+    assert rows[0] == HEADER
+    assert rows[1:] == [[str(value) for value in row] for row in documents(5)]
+
+
+def test_csv_chunks_without_rows():
+    assert list(csv_chunks(HEADER, [])) == [",".join(HEADER) + "\r\n"]
+
+
+def test_frame_rows():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    assert list(frame_rows(df, batch_size=2)) == [[1, "x"], [2, "y"], [3, "z"]]
+
+
+def test_export_memory_is_bounded():
+    decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    size, lines = 0, 0
+
+    tracemalloc.start()
+    try:
+        for chunk in gzipped(csv_chunks(HEADER, documents(ROWS))):
+            text = decompressor.decompress(chunk)
+            size += len(text)
+            lines += text.count(b"\n")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert lines == ROWS + 1
+    # whole file is tens of megabytes, only one batch of it is held at a time
+    assert size > 20 * 1024 * 1024
+    assert peak < 10 * 1024 * 1024
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from base.handler import FieldsHandler
+from benchmarks.fields_handler import CellHandler, ColumnHandler, table
+from tests.base.row_handler import assert_same_records, handle_rows_by_row
+
+FRAMES = {
+    "mixed": pd.DataFrame(
+        {
+            "code": ["PK", "EK", None],
+            "pax": [1, 2, 3],
+            "fare": [10.5, np.nan, 3.0],
+            "is_direct": [True, False, True],
+            "travel_date": pd.to_datetime(["2024-01-01", "2024-02-01", None]),
+            "legs": [["KHI", "DXB"], [], None],
+        }
+    ),
+    "numbers": pd.DataFrame({"pax": [1, 2], "fare": [1.5, 2.0]}),
+    "integers": pd.DataFrame({"pax": [1, 2], "bookings": [3, 4]}),
+    "datetimes": pd.DataFrame(
+        {"dept": pd.to_datetime(["2024-01-01 10:00", "2024-01-02"]), "arr": pd.to_datetime(["2024-01-01 12:00", None])}
+    ),
+    "timedeltas": pd.DataFrame({"duration": pd.to_timedelta(["1h", "90m"])}),
+    "categories": pd.DataFrame({"cabin": pd.Categorical(["Y", "J", "Y"]), "pax": [1, 2, 3]}),
+    "empty": pd.DataFrame({"pax": pd.Series([], dtype=int), "code": pd.Series([], dtype=object)}),
+}
+
+
+@pytest.mark.parametrize("name", FRAMES)
+def test_untouched_values_are_the_ones_of_row_by_row_handling(name):
+    df = FRAMES[name]
+    assert_same_records(FieldsHandler().handle_rows(df), handle_rows_by_row(FieldsHandler(), df))
+
+
+def test_datetimes_stay_timestamps():
+    records = FieldsHandler().handle_rows(FRAMES["datetimes"])
+    assert records[0]["dept"] == pd.Timestamp("2024-01-01 10:00")
+    assert isinstance(records[0]["arr"], pd.Timestamp) and pd.isna(records[1]["arr"])
+
+
+class LegacyHandler(FieldsHandler):
+    def pax_handler(self, row, col):
+        return {"value": row[col], "ratio": row[col] / row["bookings"]}
+
+
+class MixedHandler(LegacyHandler):
+    def bookings_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        return df[col] * 10
+
+
+def test_cell_handlers_still_run_row_by_row():
+    df = FRAMES["integers"]
+    assert_same_records(LegacyHandler().handle_rows(df), handle_rows_by_row(LegacyHandler(), df))
+
+    # cell handlers get rows of the original frame, not values of column handlers
+    records = MixedHandler().handle_rows(df)
+    assert records == [{"pax": {"value": 1, "ratio": 1 / 3}, "bookings": 30}, {"pax": {"value": 2, "ratio": 0.5}, "bookings": 40}]
+
+
+def test_column_handlers_match_cell_handlers():
+    df = table(500)
+    assert_same_records(ColumnHandler().handle_rows(df), handle_rows_by_row(CellHandler(), df))
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from pymongo.mongo_client import MongoClient
+from pymongo.command_cursor import CommandCursor
+from pymongo.errors import ConfigurationError
+
+from base.loader import BATCH_SIZE, load_frame
+
+try:
+    from base.dataframe import DataFrame
+except ConfigurationError:
+    # dataframe helpers import exchange rate repositories (database settings of .env are needed)
+    DataFrame = None
+
+DOCS = [{"_id": index, "pax": index % 3, "code": "PK" if index % 2 else None} for index in range(25)]
+
+
+class AggregateCursor(CommandCursor):
+    """aggregate cursor of pymongo (it validates its batch size) holding all documents in its first batch"""
+
+    def __init__(self, docs):
+        collection = MongoClient("mongodb://localhost", connect=False)["test"]["dds_pgs"]
+        self.batch_sizes = []
+        super().__init__(collection, {"id": 0, "firstBatch": list(docs)}, None)
+        # batch size pymongo starts with
+        self.batch_sizes.clear()
+
+    def batch_size(self, batch_size):
+        self.batch_sizes.append(batch_size)
+        return super().batch_size(batch_size)
+
+
+def test_cursor_gets_the_batch_size_documents_are_loaded_with():
+    cursor = AggregateCursor(DOCS)
+    pd.testing.assert_frame_equal(load_frame(cursor, batch_size=10), pd.DataFrame(DOCS))
+    assert cursor.batch_sizes == [10]
+
+    with pytest.raises(TypeError):
+        AggregateCursor(DOCS).batch_size(None)
+
+
+@pytest.mark.skipif(DataFrame is None, reason="database settings are missing")
+def test_from_cursor_loads_aggregate_cursors():
+    cursor = AggregateCursor(DOCS)
+    df = DataFrame.from_cursor(cursor)
+    assert isinstance(df, DataFrame)
+    pd.testing.assert_frame_equal(pd.DataFrame(df), pd.DataFrame(DOCS))
+    assert cursor.batch_sizes == [BATCH_SIZE]
@@ -0,0 +1,96 @@
+import hashlib
+import hmac
+
+import pytest
+
+from base.redis import CacheNamespace, Redis
+from tests.base.memory_redis import MemoryRedis
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    monkeypatch.setenv("REDIS_ENABLED", "true")
+    monkeypatch.setenv("REDIS_KEY_PREFIX", "msd")
+    instance = Redis()
+    instance.redis_client = MemoryRedis()
+    monkeypatch.setattr(instance, "get_host", lambda: "PK")
+    return instance
+
+
+def keys(redis: Redis) -> set:
+    return {key.decode("utf-8") for key in redis.redis_client.values}
+
+
+def test_invalidate_changes_generation_of_namespace_only(redis):
+    redis.set("market", [1], 60, namespace=CacheNamespace.DDS)
+    redis.set("fares", [2], 60, namespace=CacheNamespace.FARES)
+
+    redis.invalidate(CacheNamespace.DDS, host="PK")
+    assert redis.get("market", namespace=CacheNamespace.DDS) is None
+    assert redis.get("fares", namespace=CacheNamespace.FARES) == [2]
+
+    redis.invalidate()
+    assert redis.get("fares", namespace=CacheNamespace.FARES) is None
+
+
+def test_sweep_deletes_outdated_generations_and_legacy_keys_without_expiry(redis):
+    redis.set("old", [1], 60, namespace=CacheNamespace.DDS)
+    redis.invalidate(CacheNamespace.DDS, host="PK")
+    redis.set("new", [2], 60, namespace=CacheNamespace.DDS)
+    redis.set("fares", [3], 60, namespace=CacheNamespace.FARES)
+    redis.redis_client.set("msd_PK_legacy", b"[4]")
+    redis.redis_client.set("msd_PK_legacy_with_ttl", b"[5]", ex=60)
+    redis.increment("response_cache_stats", "/api|hit")
+    redis.redis_client.set("other_app_key", b"[6]")
+
+    assert redis.sweep(batch_size=2) == 2
+    assert keys(redis) == {
+        "msd_cache_generations",
+        "msd_PK_dds@0.1_new",
+        "msd_PK_fares@0.0_fares",
+        "msd_PK_legacy_with_ttl",
+        "msd_PK_response_cache_stats",
+        "other_app_key",
+    }
+    assert redis.get("new", namespace=CacheNamespace.DDS) == [2]
+
+    # nothing left to delete
+    assert redis.sweep() == 0
+
+
+def test_sweep_after_global_invalidation(redis):
+    redis.set("market", [1], 60, namespace=CacheNamespace.DDS)
+    redis.set("config", [2], 60, namespace=CacheNamespace.CONFIG)
+    redis.invalidate()
+
+    assert redis.sweep() == 2
+    assert keys(redis) == {"msd_cache_generations"}
+
+
+def test_bytes_are_returned_only_with_a_valid_signature(redis, monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "secret")
+    redis.set_bytes("dataset", b"\x80frame", 60, namespace=CacheNamespace.FARES)
+    assert redis.get_bytes("dataset", namespace=CacheNamespace.FARES) == b"\x80frame"
+    assert redis.get_bytes("missing", namespace=CacheNamespace.FARES) is None
+
+    # written by someone else sharing the redis
+    key = redis.create_prefixed_key("dataset", namespace=CacheNamespace.FARES)
+    redis.redis_client.set(key, b"\x80payload")
+    assert redis.get_bytes("dataset", namespace=CacheNamespace.FARES) is None
+    redis.redis_client.set(key, Redis.sign(b"\x80payload") + b"\x80payload")
+    monkeypatch.setenv("SECRET_KEY", "another secret")
+    assert redis.get_bytes("dataset", namespace=CacheNamespace.FARES) is None
+
+
+def test_bytes_are_not_cached_without_a_secret(redis, monkeypatch):
+    monkeypatch.delenv("SECRET_KEY", raising=False)
+    assert Redis.sign(b"\x80frame") is None
+    redis.set_bytes("dataset", b"\x80frame", 60, namespace=CacheNamespace.FARES)
+    assert keys(redis) == set()
+
+    # signed with an empty key
+    key = redis.create_prefixed_key("dataset", namespace=CacheNamespace.FARES)
+    redis.redis_client.set(key, hmac.new(b"", b"\x80payload", hashlib.sha256).digest() + b"\x80payload")
+    assert redis.get_bytes("dataset", namespace=CacheNamespace.FARES) is None
+    monkeypatch.setenv("SECRET_KEY", "")
+    assert redis.get_bytes("dataset", namespace=CacheNamespace.FARES) is None
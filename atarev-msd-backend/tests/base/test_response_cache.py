@@ -0,0 +1,131 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, request
+
+from base.redis import CacheNamespace, Redis
+from base.response_cache import ResponseCache
+from tests.base.memory_redis import MemoryRedis
+
+KEY = "response"
+NAMESPACE = CacheNamespace.DDS
+TTLS = dict(expiration_in_seconds=60, stale_in_seconds=30, lock_in_seconds=5, wait_in_seconds=1)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    monkeypatch.setenv("REDIS_ENABLED", "true")
+    monkeypatch.setattr(ResponseCache, "POLL_INTERVAL_IN_SECONDS", 0.01)
+    instance = Redis()
+    instance.redis_client = MemoryRedis()
+    monkeypatch.setattr(ResponseCache, "redis", instance)
+
+    with Flask(__name__).test_request_context("/api/msdv2/market-share"):
+        request.user = SimpleNamespace(carrier="PK")
+        yield instance
+
+
+class Compute:
+    def __init__(self, value="fresh", error: Exception = None):
+        self.value, self.error, self.calls = value, error, 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.value
+
+
+def serve(func) -> object:
+    return ResponseCache.serve(KEY, NAMESPACE, func, **TTLS)
+
+
+def store(redis: Redis, value, soft_expiry: float) -> None:
+    redis.set(KEY, {"value": value, "soft_expiry": soft_expiry}, 90, namespace=NAMESPACE)
+
+
+def hold_lock(redis: Redis):
+    lock = redis.redis_client.lock(redis.create_prefixed_key(f"lock_{KEY}"))
+    assert lock.acquire(blocking=False)
+    return lock
+
+
+def stats() -> dict:
+    return ResponseCache.stats()["/api/msdv2/market-share"]
+
+
+def test_miss_is_computed_once_then_served(redis):
+    compute = Compute()
+    assert serve(compute) == "fresh" and serve(compute) == "fresh"
+    assert compute.calls == 1
+    assert stats() == {"hit": 1, "miss": 1, "wait": 0, "stale": 0}
+    # lock is released once the response is cached
+    assert not redis.redis_client.locks
+
+
+def test_missing_key_locked_by_another_caller_waits_for_its_result(redis):
+    lock = hold_lock(redis)
+    prefixed = redis.create_prefixed_key(KEY, namespace=NAMESPACE)
+
+    def other_caller():
+        time.sleep(0.05)
+        redis.redis_client.set(prefixed, Redis.encode({"value": "theirs", "soft_expiry": time.time() + 60}))
+        lock.release()
+
+    thread = threading.Thread(target=other_caller)
+    thread.start()
+    compute = Compute()
+    assert serve(compute) == "theirs"
+    thread.join()
+    assert compute.calls == 0
+    assert stats()["wait"] == 1
+
+
+def test_missing_key_is_computed_when_lock_holder_is_too_slow(redis):
+    hold_lock(redis)
+    compute = Compute()
+    assert serve(compute) == "fresh"
+    assert compute.calls == 1
+    assert stats()["wait"] == 1 and stats()["miss"] == 1
+
+
+def test_stale_value_is_served_while_another_caller_refreshes_it(redis):
+    store(redis, "old", soft_expiry=time.time() - 1)
+    hold_lock(redis)
+    compute = Compute()
+    assert serve(compute) == "old"
+    assert compute.calls == 0
+    assert stats()["stale"] == 1
+
+
+def test_stale_value_is_refreshed_by_the_caller_holding_the_lock(redis):
+    store(redis, "old", soft_expiry=time.time() - 1)
+    compute = Compute()
+    assert serve(compute) == "fresh" and serve(compute) == "fresh"
+    assert compute.calls == 1
+
+
+def test_failed_refresh_keeps_the_stale_value_and_releases_the_lock(redis):
+    store(redis, "old", soft_expiry=time.time() - 1)
+
+    with pytest.raises(ValueError):
+        serve(Compute(error=ValueError("aggregation failed")))
+    assert not redis.redis_client.locks
+
+    # others still get the stale value while the lock is held, the next caller refreshes it
+    lock = hold_lock(redis)
+    assert serve(Compute()) == "old"
+    lock.release()
+    assert serve(Compute("retried")) == "retried"
+
+
+def test_empty_results_and_legacy_values(redis):
+    compute = Compute(value={})
+    assert serve(compute) == {} and serve(compute) == {}
+    assert compute.calls == 2
+
+    # values cached before soft expiry existed are served as they are
+    redis.set(KEY, ["legacy"], namespace=NAMESPACE)
+    assert serve(Compute()) == ["legacy"]
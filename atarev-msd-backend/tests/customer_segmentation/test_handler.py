@@ -0,0 +1,30 @@
+import pandas as pd
+
+from base.constants import Constants
+from customer_segmentation.handler import CustomerSegmentationGraphsHandler
+from tests.base.row_handler import assert_same_records, handle_rows_by_row
+
+
+class CellHandler:
+    """previous cell handler of `CustomerSegmentationGraphsHandler`"""
+
+    def cat_name_handler(self, row, col):
+        if row["cat_type"] == "dow_bd":
+            return Constants.IDX2DAY[row[col]]
+        if row["cat_type"] == "class_bd":
+            return {"Y": "ECO", "C": "BUS"}.get(row[col], "UNK")
+        return row[col]
+
+
+def test_category_names_match_cell_handler():
+    df = pd.DataFrame(
+        {
+            "cat_type": ["dow_bd", "dow_bd", "class_bd", "class_bd", "class_bd", "dtd_bd", "num_pax_bd"],
+            "cat_name": [1, 7, "Y", "C", "F", "0-7", 2],
+            "pax": [10, 20, 30, 40, 50, 60, 70],
+            "revenue": [1.5, 2.5, 3.5, 4.5, 5.5, 6.5, 7.5],
+        }
+    )
+    records = CustomerSegmentationGraphsHandler().handle_rows(df)
+    assert_same_records(records, handle_rows_by_row(CellHandler(), df))
+    assert [record["cat_name"] for record in records] == ["Monday", "Sunday", "ECO", "BUS", "UNK", "0-7", 2]
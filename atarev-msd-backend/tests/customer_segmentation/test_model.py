@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from customer_segmentation.model import N_CLUSTERS, SegmentationModel, bucket, market, train, update
+
+
+def make_sales(rand: np.random.Generator, count: int, start_id: int = 0) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "_id": np.arange(start_id, start_id + count),
+            "orig_code": "LHE",
+            "dest_code": "DXB",
+            "dom_op_al_code": rand.choice(["PK", "EK"], count),
+            "pax": rand.integers(1, 6, count),
+            "is_group": rand.integers(0, 2, count),
+            "days_sold_prior_to_travel": rand.integers(0, 300, count),
+            "cos_norm": rand.choice(["PK", "AE", "GB"], count),
+            "blended_fare": rand.uniform(100, 900, count).round(2),
+            "travel_day_of_week": rand.integers(1, 8, count),
+            "travel_date": rand.choice([20240105, 20240112, 20240119], count),
+            "op_flt_num": rand.choice([203, 211], count),
+            "rbkd": rand.choice(list("YBMHKLQ"), count),
+            "norm_ticket_type": rand.choice(["Round Trip", "One Way", "Other"], count),
+        }
+    )
+
+
+@pytest.fixture
+def sales():
+    return make_sales(np.random.default_rng(3), 2000)
+
+
+def test_same_sales_and_seed_give_the_same_labels(sales):
+    model = train("PK", market("LHE", "DXB"), 2024, sales, seed=7)
+    again = train("PK", market("LHE", "DXB"), 2024, sales, seed=7)
+
+    assert model.centroids == again.centroids
+    assert model.peds == again.peds
+    assert np.array_equal(model.assign(sales), again.assign(sales))
+    assert model.n_clusters == N_CLUSTERS and sum(model.counts) == len(sales)
+    assert model.last_id == len(sales) - 1
+
+    # a stored model assigns the same labels
+    stored = SegmentationModel.from_document({**model.to_document(), "_id": "x"})
+    assert np.array_equal(stored.assign(sales), model.assign(sales))
+
+
+def test_features_of_unknown_categories_are_zeros(sales):
+    model = train("PK", market("LHE", "DXB"), 2024, sales)
+    assert model.features[:2] == ["is_weekend", "is_group"]
+    assert model.group("cos") == ["cos_AE", "cos_GB", "cos_PK"]
+    assert set(model.rbd_groups.values()) <= {"top", "second", "third", "fourth"}
+
+    unknown = sales.head(3).assign(cos_norm="FR", rbkd="Z", days_sold_prior_to_travel=400)
+    X = pd.DataFrame(model.matrix(unknown), columns=model.features)
+    assert (X[model.group("cos") + model.group("rbkd")] == 0).all().all()
+    # days beyond the last bin are in the last bin
+    assert "num_days_(71.99, 365.0]" in model.group("num_days") and (X["num_days_(71.99, 365.0]"] == 1).all()
+    assert model.assign(sales.iloc[:0]).size == 0
+
+
+def test_centroids_are_updated_with_new_sales_only(sales):
+    model = train("PK", market("LHE", "DXB"), 2024, sales)
+
+    # nothing new since the model was trained
+    same = train("PK", market("LHE", "DXB"), 2024, sales, previous=model)
+    assert same.centroids == model.centroids and same.counts == model.counts and same.last_id == model.last_id
+
+    more = pd.concat([sales, make_sales(np.random.default_rng(4), 500, start_id=len(sales))], ignore_index=True)
+    updated = train("PK", market("LHE", "DXB"), 2024, more, previous=model)
+    assert updated.features == model.features
+    assert updated.centroids != model.centroids
+    assert sum(updated.counts) == len(more) and updated.last_id == len(more) - 1
+
+    # another seed (or travel year) is a new model
+    assert train("PK", market("LHE", "DXB"), 2024, more, seed=1, previous=model).counts != updated.counts
+
+
+def test_stored_centroids_weigh_as_many_sales_as_they_stand_for():
+    model = SegmentationModel("PK", "*", 2024, 42, ["a", "b"], {}, [], [[0.0, 0.0], [10.0, 10.0]], [3.0, 1.0], [None, None])
+    centroids = update(model, np.array([[1.0, 1.0]]))
+    assert np.allclose(centroids, [[0.25, 0.25], [10.0, 10.0]])
+
+
+def test_peds_of_small_clusters_are_missing(sales):
+    model = train("PK", market("LHE", "DXB"), 2024, sales.head(120))
+    labels = model.assign(sales.head(120))
+    pax = sales.head(120).groupby(labels)["pax"].sum()
+    for label in range(model.n_clusters):
+        assert (model.peds[label] is None) == (pax.get(label, 0) < 50)
+
+
+def test_rbd_buckets():
+    assert [bucket(rank) for rank in (1, 0.75, 0.5, 0.25)] == ["top", "second", "third", "fourth"]
@@ -0,0 +1,243 @@
+"""
+small in memory evaluator of the aggregation stages and expressions market analytics pipelines use,
+it follows MongoDB semantics where they matter for cubes (missing fields, `$sum` / `$avg` of numeric values only)
+"""
+import copy
+import functools
+from typing import Any, Dict, List
+
+MISSING = object()
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def get(doc: Dict[str, Any], path: str) -> Any:
+    value = doc
+    for name in path.split("."):
+        if not isinstance(value, dict) or name not in value:
+            return MISSING
+        value = value[name]
+    return value
+
+
+def value_of(value: Any) -> Any:
+    return None if value is MISSING else value
+
+
+def compare(a: Any, b: Any) -> int:
+    """order of values (null and missing ones first, numbers before strings)"""
+    a, b = value_of(a), value_of(b)
+
+    def rank(value):
+        return 0 if value is None else 1 if is_number(value) else 2 if isinstance(value, str) else 3
+
+    if rank(a) != rank(b):
+        return -1 if rank(a) < rank(b) else 1
+    if a is None or a == b:
+        return 0
+    return -1 if a < b else 1
+
+
+def evaluate(expression: Any, doc: Dict[str, Any]) -> Any:
+    if isinstance(expression, str):
+        return get(doc, expression[1:]) if expression.startswith("$") else expression
+    if isinstance(expression, list):
+        return [value_of(evaluate(item, doc)) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if not any(key.startswith("$") for key in expression):
+        result = {key: evaluate(value, doc) for key, value in expression.items()}
+        return {key: value for key, value in result.items() if value is not MISSING}
+
+    (operator, args), = expression.items()
+    if operator == "$literal":
+        return args
+    if operator == "$cond":
+        if isinstance(args, dict):
+            args = [args["if"], args["then"], args["else"]]
+        return evaluate(args[1] if truthy(evaluate(args[0], doc)) else args[2], doc)
+    if operator == "$switch":
+        for branch in args["branches"]:
+            if truthy(evaluate(branch["case"], doc)):
+                return evaluate(branch["then"], doc)
+        return evaluate(args["default"], doc)
+    if operator == "$ifNull":
+        value = evaluate(args[0], doc)
+        return evaluate(args[1], doc) if value_of(value) is None else value
+    if operator == "$isNumber":
+        return is_number(evaluate(args, doc))
+    if operator == "$not":
+        return not truthy(evaluate(args[0] if isinstance(args, list) else args, doc))
+
+    values = [evaluate(arg, doc) for arg in (args if isinstance(args, list) else [args])]
+    plain = [value_of(value) for value in values]
+    if operator == "$and":
+        return all(truthy(value) for value in values)
+    if operator == "$or":
+        return any(truthy(value) for value in values)
+    if operator == "$in":
+        return plain[0] in plain[1]
+    if operator in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte"):
+        order = compare(*values)
+        return {"$eq": order == 0, "$ne": order != 0, "$gt": order > 0, "$gte": order >= 0, "$lt": order < 0, "$lte": order <= 0}[
+            operator
+        ]
+    if operator == "$add":
+        return sum(plain)
+    if operator == "$multiply":
+        return functools.reduce(lambda a, b: a * b, plain)
+    if operator == "$divide":
+        return plain[0] / plain[1]
+    if operator == "$toString":
+        return None if plain[0] is None else str(plain[0])
+    if operator == "$toInt":
+        return None if plain[0] is None else int(plain[0])
+    if operator == "$substr":
+        return (plain[0] or "")[plain[1] : plain[1] + plain[2]]
+    if operator == "$concatArrays":
+        return [item for value in plain for item in value]
+    raise NotImplementedError(operator)
+
+
+def truthy(value: Any) -> bool:
+    return value not in (MISSING, None, False, 0)
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for name, condition in query.items():
+        if name == "$and":
+            ok = all(matches(doc, sub_query) for sub_query in condition)
+        elif name == "$or":
+            ok = any(matches(doc, sub_query) for sub_query in condition)
+        elif name == "$nor":
+            ok = not any(matches(doc, sub_query) for sub_query in condition)
+        elif isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+            value = get(doc, name)
+            ok = all(field_matches(value, operator, arg) for operator, arg in condition.items())
+        else:
+            ok = field_matches(get(doc, name), "$eq", condition)
+        if not ok:
+            return False
+    return True
+
+
+def field_matches(value: Any, operator: str, arg: Any) -> bool:
+    if operator == "$eq":
+        return value_of(value) == arg and (arg is None or value is not MISSING)
+    if operator == "$ne":
+        return not field_matches(value, "$eq", arg)
+    if operator == "$in":
+        return any(field_matches(value, "$eq", item) for item in arg)
+    if operator == "$nin":
+        return not field_matches(value, "$in", arg)
+    if value is MISSING or value is None or (is_number(value) != is_number(arg)):
+        # comparisons only match values of the same type
+        return False
+    return {"$gt": value > arg, "$gte": value >= arg, "$lt": value < arg, "$lte": value <= arg}[operator]
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def group(docs: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for doc in docs:
+        key = value_of(evaluate(spec["_id"], doc))
+        groups.setdefault(freeze(key), {"_id": key, "docs": []})["docs"].append(doc)
+
+    result = []
+    for item in groups.values():
+        out = {"_id": item["_id"]}
+        for name, accumulator in spec.items():
+            if name == "_id":
+                continue
+            (operator, arg), = accumulator.items()
+            values = [evaluate(arg, doc) for doc in item["docs"]]
+            numbers = [value for value in values if is_number(value)]
+            if operator == "$sum":
+                out[name] = sum(numbers)
+            elif operator == "$avg":
+                out[name] = sum(numbers) / len(numbers) if numbers else None
+            elif operator == "$push":
+                out[name] = [value_of(value) for value in values]
+            elif operator == "$addToSet":
+                out[name] = list({freeze(value_of(value)): value_of(value) for value in values}.values())
+            elif operator in ("$min", "$max"):
+                present = [value for value in values if value_of(value) is not None]
+                ordered = sorted(present, key=functools.cmp_to_key(compare))
+                out[name] = (ordered[0] if operator == "$min" else ordered[-1]) if ordered else None
+            else:
+                raise NotImplementedError(operator)
+        result.append(out)
+    return result
+
+
+def project(doc: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+    values = [value for name, value in spec.items() if name != "_id"]
+    if values and all(value in (0, False) for value in values) or (not values and spec.get("_id") in (0, False)):
+        return {name: value for name, value in doc.items() if name not in spec}
+
+    result = {}
+    if spec.get("_id", 1) not in (0, False) and "_id" in doc:
+        result["_id"] = doc["_id"]
+    for name, value in spec.items():
+        if name == "_id":
+            continue
+        if value is True or (type(value) in (int, float) and value != 0):
+            found = get(doc, name)
+        elif type(value) in (int, float) or value is False:
+            continue
+        else:
+            found = evaluate(value, doc)
+        if found is not MISSING:
+            result[name] = found
+    return result
+
+
+def aggregate(docs: List[Dict[str, Any]], pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    docs = copy.deepcopy(docs)
+    for stage in pipeline:
+        (operator, spec), = stage.items()
+        if operator == "$match":
+            docs = [doc for doc in docs if matches(doc, spec)]
+        elif operator == "$project":
+            docs = [project(doc, spec) for doc in docs]
+        elif operator in ("$addFields", "$set"):
+            for doc in docs:
+                for name, expression in spec.items():
+                    value = evaluate(expression, doc)
+                    if value is MISSING:
+                        doc.pop(name, None)
+                    else:
+                        doc[name] = value
+        elif operator == "$unset":
+            for doc in docs:
+                for name in [spec] if isinstance(spec, str) else spec:
+                    doc.pop(name, None)
+        elif operator == "$group":
+            docs = group(docs, spec)
+        elif operator == "$facet":
+            docs = [{name: aggregate(docs, sub_pipeline) for name, sub_pipeline in spec.items()}]
+        elif operator == "$unwind":
+            path = spec if isinstance(spec, str) else spec["path"]
+            docs = [{**doc, path[1:]: item} for doc in docs for item in (get(doc, path[1:]) or [])]
+        elif operator == "$sort":
+
+            def order(a, b):
+                for name, direction in spec.items():
+                    result = compare(get(a, name), get(b, name))
+                    if result:
+                        return result * direction
+                return 0
+
+            docs = sorted(docs, key=functools.cmp_to_key(order))
+        else:
+            raise NotImplementedError(operator)
+    return docs
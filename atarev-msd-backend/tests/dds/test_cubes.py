@@ -0,0 +1,393 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from dds.cubes import CUBES, DOC_COUNT, CubePlanner, is_usable
+from tests.dds.pipeline import aggregate
+
+FILTERS = {
+    "orig_code": ["LHR", "KHI"],
+    "dest_code": ["KHI", "DXB", "ISB"],
+    "seg_class": ["Y", "J"],
+    "country_of_sale": ["PK", "AE"],
+    "distribution_channel": ["GDS", "WEB"],
+    "is_group": [True, False],
+}
+AGENCIES = [(1, "Travel One", "PK"), (2, "Sky Tours", "GB"), (3, "Gulf Trips", "AE")]
+
+
+def make_docs(count: int, seed: int = 7) -> list:
+    """raw `dds_pgs` documents, fares are missing or not numeric from time to time (they are not averaged then)"""
+    rand = random.Random(seed)
+    docs = []
+    for _ in range(count):
+        travel_date = date(2023, 1, 1) + timedelta(days=rand.randrange(120))
+        agency_id, agency_name, agency_country = rand.choice(AGENCIES)
+        doc = {
+            "dom_op_al_code": rand.choice(["PK", "EK", "QR", "OTH"]),
+            # most sales share the same point of sale, channel ... (cube documents sum many raw ones)
+            **{name: rand.choices(values, weights=[8] + [1] * (len(values) - 1))[0] for name, values in FILTERS.items()},
+            "travel_year": travel_date.year,
+            "travel_month": travel_date.month,
+            "travel_date": int(travel_date.strftime("%Y%m%d")),
+            "travel_day_of_week": travel_date.isoweekday(),
+            "days_sold_prior_to_travel": rand.randrange(0, 120, 7),
+            "local_dep_time": rand.choice(["0930", "1845"]),
+            "rbkd": rand.choice(["Y", "B", "M", None]),
+            "agency_id": agency_id,
+            "agency_name": agency_name,
+            "agency_country": agency_country,
+            "prev_dest": rand.choice(["", "LHE"]),
+            "sell_year": 2022,
+            "sell_month": rand.randint(1, 12),
+            "pax": rand.randint(1, 6),
+            "blended_rev": round(rand.uniform(50, 900), 2),
+            "blended_fare": rand.choice([round(rand.uniform(50, 500), 2), round(rand.uniform(50, 500), 2), None, "-"]),
+        }
+        if rand.random() < 0.05:
+            del doc["blended_rev"]
+        docs.append(doc)
+    return docs
+
+
+DOCS = make_docs(3000)
+CUBE_DOCS = {cube.name: aggregate(DOCS, cube.stages()) for cube in CUBES}
+# documents of cubes built from the whole of `dds_pgs` (fixtures are too small to have the same proportions)
+SIZES = {"monthly": 40_000, "daily": 300_000, "class_mix": 150_000, "booking_curve": 2_000_000, "agency": 900_000}
+planner = CubePlanner()
+
+
+def normalized(value):
+    """results with floats rounded (sums are added in another order) and arrays sorted (their order is not defined)"""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {name: normalized(item) for name, item in value.items()}
+    if isinstance(value, list):
+        return sorted((normalized(item) for item in value), key=repr)
+    return value
+
+
+def assert_routed(pipeline: list, cube: str, sizes: dict = SIZES):
+    plan = planner.plan(pipeline, sizes)
+    assert plan is not None and plan.cube.name == cube
+    assert normalized(aggregate(CUBE_DOCS[cube], plan.pipeline)) == normalized(aggregate(DOCS, pipeline))
+
+
+def market_match(**extra) -> dict:
+    return {"orig_code": "LHR", "dest_code": {"$in": ["KHI", "DXB"]}, "dom_op_al_code": {"$in": ["PK", "EK", "QR"]}, **extra}
+
+
+def date_range(start: int, end: int) -> dict:
+    return {"$and": [{"travel_date": {"$gte": start}}, {"travel_date": {"$lte": end}}]}
+
+
+# shapes of `FareBookingBuilder`
+
+
+def booking_trends(monthly: bool) -> list:
+    if monthly:
+        group = {"travel_year": "$travel_year", "travel_month": "$travel_month"}
+        project = {"travel_year": "$_id.travel_year", "travel_month": "$_id.travel_month"}
+    else:
+        group = {"travel_date": "$travel_date"}
+        project = {
+            "travel_date": "$_id.travel_date",
+            "travel_year": {"$toInt": {"$substr": [{"$toString": "$_id.travel_date"}, 0, 4]}},
+            "travel_month": {"$toInt": {"$substr": [{"$toString": "$_id.travel_date"}, 4, 2]}},
+        }
+    return [
+        {"$match": market_match(seg_class="Y", is_group=False)},
+        {"$match": {"$and": [{"dom_op_al_code": {"$in": ["PK", "EK"]}}, {"dom_op_al_code": {"$ne": "OTH"}}]}},
+        {"$group": {"_id": {"dom_op_al_code": "$dom_op_al_code", **group}, "pax": {"$sum": "$pax"}}},
+        {"$project": {"_id": 0, "pax": 1, "dom_op_al_code": "$_id.dom_op_al_code", **project}},
+    ]
+
+
+def booking_curve(agg_type: str, dtd: int = None) -> list:
+    group = {
+        "_id": {"dom_op_al_code": "$dom_op_al_code", "days_sold_prior_to_travel": "$days_sold_prior_to_travel"},
+        "pax": {"$sum": "$pax"},
+        "days_sold_prior_to_travel": {"$push": "days_sold_prior_to_travel"},
+    }
+    project = {"pax": 1, "dom_op_al_code": "$_id.dom_op_al_code", "days_sold_prior_to_travel": "$_id.days_sold_prior_to_travel"}
+    if agg_type == "day-of-week-time":
+        group["_id"].update(travel_day_of_week="$travel_day_of_week", local_dep_time="$local_dep_time")
+        project.update(travel_day_of_week="$_id.travel_day_of_week", local_dep_time="$_id.local_dep_time")
+
+    match = market_match(travel_year=2023, travel_month=2)
+    if dtd is not None:
+        match["days_sold_prior_to_travel"] = {"$lte": dtd}
+    return [
+        {"$match": match},
+        {"$match": {"$and": [{"dom_op_al_code": {"$ne": "OTH"}}, {"dom_op_al_code": {"$in": ["PK", "QR"]}}]}},
+        {"$group": group},
+        {"$project": {"_id": 0, **project}},
+        {"$sort": {"days_sold_prior_to_travel": -1}},
+    ]
+
+
+# shapes of `FareRevenueBuilder`
+
+
+def fare_trends(monthly: bool) -> list:
+    if monthly:
+        group = {"dom_op_al_code": "$dom_op_al_code", "travel_month": "$travel_month", "travel_year": "$travel_year"}
+        project = {"travel_month": "$_id.travel_month", "travel_year": "$_id.travel_year"}
+    else:
+        group = {"dom_op_al_code": "$dom_op_al_code", "travel_date": "$travel_date"}
+        project = {"travel_date": "$_id.travel_date"}
+    return [
+        {"$match": market_match(**date_range(20230115, 20230331))},
+        {"$match": {"dom_op_al_code": {"$ne": "OTH"}}},
+        {"$group": {"_id": {**group, "dom_op_al_code": "$dom_op_al_code"}, "blended_fare": {"$avg": "$blended_fare"}}},
+        {"$project": {"_id": 0, "blended_fare": 1, "dom_op_al_code": "$_id.dom_op_al_code", **project}},
+    ]
+
+
+def revenue_by(*fields: str, **match) -> list:
+    return [
+        {"$match": market_match(**match)},
+        {"$match": {"dom_op_al_code": {"$ne": "OTH"}}},
+        {
+            "$group": {
+                "_id": {"dom_op_al_code": "$dom_op_al_code", **{name: f"${name}" for name in fields}},
+                "blended_rev": {"$sum": "$blended_rev"},
+            }
+        },
+        {"$project": {"_id": 0, "dom_op_al_code": "$_id.dom_op_al_code", **{name: f"$_id.{name}" for name in fields}, "blended_rev": 1}},
+    ]
+
+
+def class_mix_averages() -> list:
+    return [
+        {"$match": market_match(travel_year=2023, travel_month=3)},
+        {
+            "$group": {
+                "_id": {"dom_op_al_code": "$dom_op_al_code", "seg_class": "$seg_class", "rbkd": "$rbkd"},
+                "blended_fare": {"$avg": "$blended_fare"},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "dom_op_al_code": "$_id.dom_op_al_code",
+                "blended_fare": 1,
+                "seg_class": "$_id.seg_class",
+                "rbkd": {"$cond": [{"$not": ["$_id.rbkd"]}, "-", "$_id.rbkd"]},
+            }
+        },
+        {"$sort": {"blended_fare": 1}},
+    ]
+
+
+# shapes of `AgencyBuilder`
+
+
+def agency_table(monthly: bool) -> list:
+    group = {
+        "agency_id": "$agency_id",
+        "agency_name": "$agency_name",
+        "agency_country": "$agency_country",
+        "dom_op_al_code": "$dom_op_al_code",
+        "travel_year": "$travel_year",
+    }
+    project = {"_id": 0, **{name: f"$_id.{name}" for name in group}, "pax": 1, "blended_rev": 1, "blended_fare": 1}
+    if monthly:
+        period = {"$or": [{"travel_year": 2023, "travel_month": 3}, {"travel_year": 2023, "travel_month": 2}]}
+        group["travel_month"] = "$travel_month"
+        project["travel_month"] = "$_id.travel_month"
+    else:
+        period = {"$or": [{"travel_year": 2023}, {"travel_year": 2022}]}
+    return [
+        {"$match": {"country_of_sale": {"$in": ["PK", "AE"]}, "dom_op_al_code": {"$in": ["PK", "EK"]}, **period}},
+        {
+            "$group": {
+                "_id": group,
+                "pax": {"$sum": "$pax"},
+                "blended_rev": {"$sum": "$blended_rev"},
+                "blended_fare": {"$avg": "$blended_fare"},
+            }
+        },
+        {"$project": project},
+    ]
+
+
+# shapes of `DdsRepository`
+
+
+def pax_by_field(field: str, match: dict) -> list:
+    return [
+        {"$match": match},
+        {"$group": {"_id": {field: f"${field}"}, "pax": {"$sum": "$pax"}}},
+        {"$project": {"_id": 0, "pax": 1, field: f"$_id.{field}"}},
+    ]
+
+
+def segmentation_graphs() -> list:
+    def breakdown(field: str, cat_type: str, match: dict = None) -> list:
+        stages = [{"$match": match}] if match else []
+        return [
+            *stages,
+            {"$group": {"_id": f"${field}", "pax": {"$sum": "$pax"}, "avg_blended_fare": {"$avg": "$blended_fare"}}},
+            {"$project": {"_id": 0, "cat_name": "$_id", "cat_type": cat_type, "pax": 1, "avg_blended_fare": 1}},
+        ]
+
+    pax_type = [
+        {
+            "$project": {
+                "pax": 1,
+                "blended_fare": 1,
+                "cat_type": "pax_type",
+                "cat_name": {"$switch": {"branches": [{"case": {"$eq": ["$pax", 5]}, "then": "1"}], "default": "+9"}},
+            }
+        },
+        {
+            "$group": {
+                "_id": {"cat_name": "$cat_name", "cat_type": "$cat_type"},
+                "pax": {"$sum": "$pax"},
+                "avg_blended_fare": {"$avg": "$blended_fare"},
+            }
+        },
+    ]
+    return [
+        {"$match": {"orig_code": "LHR", "travel_year": 2023}},
+        {"$project": {"prev_dest": 1, "seg_class": 1, "country_of_sale": 1, "pax": 1, "blended_fare": 1}},
+        {
+            "$facet": {
+                "two": breakdown("prev_dest", "inbound_breakdown", {"prev_dest": {"$ne": ""}}),
+                "four": pax_type,
+                "seven": breakdown("seg_class", "class_bd"),
+            }
+        },
+        {"$project": {"result": {"$concatArrays": ["$two", "$four", "$seven"]}}},
+        {"$unwind": {"path": "$result"}},
+    ]
+
+
+def routable_breakdowns() -> list:
+    def breakdown(field: str, cat_type: str) -> list:
+        return [
+            {"$group": {"_id": f"${field}", "pax": {"$sum": "$pax"}, "avg_blended_fare": {"$avg": "$blended_fare"}}},
+            {"$project": {"_id": 0, "cat_name": "$_id", "cat_type": cat_type, "pax": 1, "avg_blended_fare": 1}},
+        ]
+
+    return [
+        {"$match": {"orig_code": "LHR", "travel_year": 2023}},
+        {"$project": {"seg_class": 1, "country_of_sale": 1, "pax": 1, "blended_fare": 1}},
+        {"$facet": {"seven": breakdown("seg_class", "class_bd"), "eight": breakdown("country_of_sale", "cos_bd")}},
+        {"$project": {"result": {"$concatArrays": ["$seven", "$eight"]}}},
+        {"$unwind": {"path": "$result"}},
+        {"$project": {"pax": "$result.pax", "cat_type": "$result.cat_type", "cat_name": "$result.cat_name"}},
+    ]
+
+
+@pytest.mark.parametrize("monthly, cube", [(True, "monthly"), (False, "daily")])
+def test_booking_trends(monthly, cube):
+    assert_routed(booking_trends(monthly), cube)
+
+
+@pytest.mark.parametrize("agg_type, dtd", [("overall", None), ("overall", 30), ("day-of-week-time", None)])
+def test_booking_curve(agg_type, dtd):
+    # pushed values are dropped by the projection, they do not need raw documents
+    assert_routed(booking_curve(agg_type, dtd), "booking_curve")
+
+
+@pytest.mark.parametrize("monthly", [True, False])
+def test_fare_trends(monthly):
+    # travel dates are filtered, only the daily cube has them
+    assert_routed(fare_trends(monthly), "daily")
+
+
+def test_revenue_per_day_of_week():
+    assert_routed(revenue_by("travel_year", "travel_month", "travel_day_of_week", travel_year=2023, travel_month=2), "monthly")
+
+
+def test_revenue_trends():
+    assert_routed(revenue_by("travel_year", "travel_month", **date_range(20230101, 20230228)), "daily")
+
+
+def test_class_mix_averages():
+    assert_routed(class_mix_averages(), "class_mix")
+
+
+@pytest.mark.parametrize("monthly", [True, False])
+def test_agency_table(monthly):
+    assert_routed(agency_table(monthly), "agency")
+
+
+@pytest.mark.parametrize("field", ["seg_class", "country_of_sale", "dom_op_al_code"])
+def test_pax_by_field(field):
+    assert_routed(pax_by_field(field, {"orig_code": "LHR", "travel_year": 2023}), "monthly")
+
+
+def test_facet_of_cube_dimensions():
+    assert_routed(routable_breakdowns(), "monthly")
+
+
+def test_counts_and_dimension_accumulators():
+    pipeline = [
+        {"$match": {"dom_op_al_code": {"$in": ["PK", "EK"]}}},
+        {"$addFields": {"is_weekend": {"$cond": [{"$in": ["$travel_day_of_week", [5, 6, 7]]}, True, False]}}},
+        {
+            "$group": {
+                "_id": {"dom_op_al_code": "$dom_op_al_code", "is_weekend": "$is_weekend"},
+                "bookings": {"$sum": 1},
+                "double": {"$sum": 2},
+                "months": {"$addToSet": "$travel_month"},
+                "first_day": {"$min": "$travel_date"},
+                "fare": {"$avg": "$blended_fare"},
+            }
+        },
+    ]
+    assert_routed(pipeline, "daily")
+
+
+def test_coarsest_cube_is_chosen():
+    pipeline = revenue_by("travel_year", "travel_month", travel_year=2023)
+    assert_routed(pipeline, "monthly")
+    # cubes that are not built (or stale) are not used
+    assert_routed(pipeline, "daily", {"daily": SIZES["daily"], "agency": SIZES["agency"]})
+    assert planner.plan(pipeline, {}) is None
+
+
+@pytest.mark.parametrize(
+    "pipeline",
+    [
+        # documents themselves (market share, histograms, agency graph, segmentation table)
+        [{"$match": market_match()}, {"$project": {"dom_op_al_code": 1, "blended_fare": 1, "pax": 1}}],
+        [{"$match": market_match()}, {"$sort": {"travel_year": -1}}],
+        # dimensions no cube has
+        pax_by_field("prev_dest", {"orig_code": "LHR"}),
+        [{"$match": {"sell_year": 2022, "sell_month": 3}}, {"$group": {"_id": None, "pax": {"$sum": "$pax"}}}],
+        # measures used as dimensions
+        segmentation_graphs(),
+        [{"$match": {"pax": {"$gt": 2}}}, {"$group": {"_id": "$seg_class", "pax": {"$sum": "$pax"}}}],
+        [{"$group": {"_id": "$pax", "count": {"$sum": 1}}}],
+        # results depending on raw documents
+        [{"$group": {"_id": "$seg_class", "fares": {"$push": "$blended_fare"}}}],
+        [{"$group": {"_id": "$seg_class", "dtd": {"$avg": "$days_sold_prior_to_travel"}}}],
+        [{"$limit": 10}, {"$group": {"_id": "$seg_class", "pax": {"$sum": "$pax"}}}],
+        [{"$match": {"$expr": {"$gt": ["$pax", 2]}}}, {"$group": {"_id": "$seg_class", "pax": {"$sum": "$pax"}}}],
+    ],
+)
+def test_raw_pipelines_are_not_routed(pipeline):
+    assert planner.plan(pipeline, SIZES) is None
+
+
+def test_cube_documents_add_up_to_raw_ones():
+    for docs in CUBE_DOCS.values():
+        assert len(docs) < len(DOCS)
+        assert sum(doc[DOC_COUNT] for doc in docs) == len(DOCS)
+        assert sum(doc["pax"] for doc in docs) == sum(doc["pax"] for doc in DOCS)
+
+
+def test_cubes_are_usable_from_their_build_until_dds_data_changes():
+    built_at = datetime(2024, 3, 1, 2)
+    assert not is_usable({"_id": "monthly", "build_started_at": built_at})
+    assert is_usable({"_id": "monthly", "built_at": built_at, "doc_count": 10})
+    assert is_usable({"_id": "monthly", "built_at": built_at, "data_changed_at": built_at - timedelta(hours=1)})
+    # loaders that changed data while the cube was built
+    assert not is_usable({"_id": "monthly", "built_at": built_at, "data_changed_at": built_at})
+    assert not is_usable({"_id": "monthly", "built_at": built_at, "data_changed_at": built_at + timedelta(hours=1)})
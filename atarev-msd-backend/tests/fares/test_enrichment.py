@@ -0,0 +1,97 @@
+import calendar
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from base.helpers.datetime import Date, Time
+from base.helpers.duration import Duration
+from fares.enrichment import av_trends_fields, days_between, format_clock, format_durations, format_times, prefix_dates
+
+SYMBOLS = {"EUR": "€", "TRY": "₺", "USD": "$"}
+
+
+def reference_av_trends_fields(df: pd.DataFrame, consider_flight_number: bool) -> pd.DataFrame:
+    """row by row enrichment fares had before it was vectorized"""
+    dt = lambda val: datetime.strptime(Date(val).humanize(), "%Y-%m-%d").date()
+    formatted_time = lambda val: Time(val).humanize()
+    formatted_duration = lambda val: f"{Time(val).humanize().replace(':', '.')}h"
+    formatted_conn_keys = lambda val: val[:-1] if isinstance(val, str) else None
+    dtd = lambda row: (row["outboundDate"] - date(row["scrapeTime"].year, row["scrapeTime"].month, row["scrapeTime"].day)).days
+
+    def line_id(row: pd.Series) -> str:
+        if consider_flight_number:
+            return f"{row.carrierCode}-{row.marketOrigin}-{row.marketDestination}-{row.fltNum}"
+        return f"{row.carrierCode}"
+
+    df["outboundDate"] = df["outboundDate"].apply(dt)
+    df["scrapeTime"] = df["scrapeTime"].apply(lambda val: val.date())
+    df["formatted_date"] = df.outboundDate.apply(lambda val: datetime.strftime(val, "%b %d %Y"))
+    df["weekday"] = df.outboundDate.apply(lambda val: calendar.day_abbr[val.weekday()])
+    df["lineId"] = df.apply(line_id, axis=1)
+    df["currency_symbol"] = df.fareCurrency.map(SYMBOLS)
+    df["formatted_time"] = df.time.apply(lambda val: Duration.format(val))
+    df["maf"] = df.apply(lambda row: f"{row['currency_symbol']} {row['fareAmount']}", axis=1)
+    df["deptTime"] = df["time"].apply(formatted_time)
+    df["duration"] = df["duration"].apply(formatted_duration)
+    df = df.replace({np.nan: None})
+    df["connecting_flight_keys"] = df["connecting_flight_keys"].apply(formatted_conn_keys)
+    df["inFltNum"] = df["inFltNum"].apply(formatted_conn_keys)
+    df["dtd"] = df.apply(dtd, axis=1)
+    return df
+
+
+def golden_fares(rows: int, converted: bool) -> pd.DataFrame:
+    """fares shaped like `FareData` results, with times of every length and missing connections"""
+    rng = np.random.default_rng(7)
+    outbound = pd.Timestamp("2024-02-20") + pd.to_timedelta(rng.integers(0, 120, rows), unit="D")
+    amounts = rng.uniform(40, 2500, rows)
+    return pd.DataFrame(
+        {
+            "carrierCode": rng.choice(["PY", "LH", "TK"], rows),
+            "outboundDate": outbound.strftime("%Y%m%d").astype(int),
+            "marketOrigin": rng.choice(["IST", "AMS"], rows),
+            "marketDestination": rng.choice(["LHR", "PBM"], rows),
+            "fltNum": rng.integers(1, 9999, rows),
+            "fareAmount": np.round(amounts, 2) if converted else np.round(amounts).astype(int),
+            "fareCurrency": rng.choice(list(SYMBOLS), rows),
+            "time": rng.choice([5, 45, 930, 1650, 2359, 0], rows),
+            "cabinName": rng.choice(["Economy", "Business"], rows),
+            "scrapeTime": outbound - pd.to_timedelta(rng.integers(1, 90 * 24, rows), unit="h"),
+            "duration": rng.choice([1, 55, 135, 1210], rows),
+            "inFltNum": [None] * rows,
+            "is_connecting": rng.choice([True, False], rows),
+            "connecting_flight_keys": rng.choice(np.array(["PY123-", "LH1-TK22-", None], dtype=object), rows),
+            "type": "OW",
+        }
+    )
+
+
+@pytest.mark.parametrize("converted", [False, True])
+@pytest.mark.parametrize("consider_flight_number", [False, True])
+def test_av_trends_fields_match_row_by_row_enrichment(converted, consider_flight_number):
+    df = golden_fares(500, converted)
+
+    expected = reference_av_trends_fields(df.copy(), consider_flight_number)
+    result = av_trends_fields(df.copy(), SYMBOLS, consider_flight_number)
+
+    assert list(result.columns) == list(expected.columns)
+    assert list(result.dtypes) == list(expected.dtypes)
+    assert result.to_csv() == expected.to_csv()
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_time_formats_match_helpers():
+    values = pd.Series([0, 5, 45, 930, 1650, 2359, 100, 7])
+    assert format_times(values).tolist() == [Time(val).humanize() for val in values.tolist()]
+    assert format_durations(values).tolist() == [f"{Time(val).humanize().replace(':', '.')}h" for val in values.tolist()]
+
+    mixed = pd.Series([5, 930, "-", "12:30", None], dtype=object)
+    assert format_clock(mixed).tolist() == [Duration.format(val) for val in mixed.tolist()]
+
+
+def test_dates():
+    assert days_between(pd.Series([20240305, 20240101]), pd.Series([20240301, 20231231])).tolist() == [4, 1]
+    assert days_between(pd.Series(["-"]), pd.Series(["-"]), errors="coerce").isna().all()
+    assert prefix_dates(pd.Series([202403051230, 202312310000])).tolist() == [date(2024, 3, 5), date(2023, 12, 31)]
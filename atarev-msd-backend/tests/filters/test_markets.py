@@ -0,0 +1,97 @@
+"""
+market filter options of the prefix index compared with the previous dataframe based options (`MarketService`)
+"""
+import pandas as pd
+import pytest
+
+from filters.markets import MarketOptionIndex
+
+
+def region(city, city_name, airport, airport_name, country="PK", region_code="ASIA") -> dict:
+    return {
+        "city_code": city,
+        "city_name": city_name,
+        "airport_code": airport,
+        "airport_name": airport_name,
+        "country_code": country,
+        "region_code": region_code,
+    }
+
+
+RECORDS = [
+    region("LON", "London", "LHR", "Heathrow", "GB", "EU"),
+    region("KHI", "Karachi", "KHI", "Jinnah"),
+    region("LON", "London", "LGW", "Gatwick", "GB", "EU"),
+    # METROPOLITAN duplicates of region data
+    region("LON", "London", "LHR", "Heathrow", "GB", "EU"),
+    region("ISB", "Islamabad", "ISB", "Islamabad Intl"),
+    region("DXB", "Dubai", "DXB", "Dubai Intl", "AE", "ME"),
+    region("DXB", "Dubai", "DWC", "Al Maktoum", "AE", "ME"),
+    region("LHE", "Lahore", "LHE", "Allama Iqbal"),
+    region("PAR", "Paris", "CDG", "Charles de Gaulle", "FR", "EU"),
+]
+CITIES = ["LON", "KHI", "ISB", "DXB", "LHE"]
+
+
+def old_options(codes, lookup="", selected=(), lookup_group=()) -> list:
+    """previous `MarketService.__get_market_options` and `__filter_by_lookup`"""
+    df = pd.DataFrame(RECORDS)
+    df = df[df.city_code.isin(CITIES)].drop_duplicates(["city_code", "airport_code"])
+    filtered = df[df["city_code"].isin(codes)]
+
+    if lookup:
+        lookup = lookup.lower()
+        lookup_df = filtered[
+            (filtered.city_code.str.lower().str.match(f"^{lookup}.*"))
+            | (filtered.airport_code.str.lower().str.match(f"^{lookup}.*"))
+        ].sort_values(["city_code", "airport_code"])
+        selected_df = filtered[filtered.airport_code.isin(selected)].sort_values("airport_code")
+        filtered = pd.concat([lookup_df, selected_df]).drop_duplicates(["city_code", "airport_code"])
+
+    options = []
+    for _, row in filtered.drop_duplicates("city_code")[["city_code", "city_name"]].iterrows():
+        city_code, city_name = row
+        airports_df = filtered[filtered.city_code == city_code][["airport_name", "airport_code", "city_code"]]
+        if lookup_group:
+            airports_df = airports_df[airports_df.airport_code.isin(lookup_group)]
+        if airports_df.empty:
+            continue
+        options.append({"code": city_code, "name": city_name, "airports": airports_df.to_dict("records")})
+    return options
+
+
+INDEX = MarketOptionIndex.build(RECORDS, CITIES)
+
+
+def test_regions_and_countries_of_market_cities():
+    assert INDEX.regions == ["EU", "ASIA", "ME"]
+    assert INDEX.countries == ["GB", "PK", "AE"]
+
+
+@pytest.mark.parametrize(
+    "codes, lookup, selected, lookup_group",
+    [
+        (CITIES, "", (), ()),
+        (["DXB", "LON"], "", (), ()),
+        (CITIES, "", (), ("LHR", "DWC", "KHI")),
+        (CITIES, "l", (), ()),
+        (CITIES, "L", ("DXB", "KHI"), ()),
+        (CITIES, "lh", ("LGW",), ()),
+        (CITIES, "dw", (), ()),
+        (CITIES, "is", ("LHE", "CDG"), ("ISB", "LHE")),
+        (["KHI", "ISB"], "l", ("LHR",), ()),
+        (CITIES, "x", ("DXB",), ()),
+        (CITIES, "zz", (), ()),
+    ],
+)
+def test_options_match_previous_options(codes, lookup, selected, lookup_group):
+    # name prefixes below are the ones code prefixes match too
+    assert INDEX.options(codes, lookup, selected, lookup_group or None) == old_options(codes, lookup, selected, lookup_group)
+
+
+def test_lookup_matches_start_of_city_and_airport_names():
+    assert INDEX.options(CITIES, "gat") == [
+        {"code": "LON", "name": "London", "airports": [{"airport_name": "Gatwick", "airport_code": "LGW", "city_code": "LON"}]}
+    ]
+    assert [option["code"] for option in INDEX.options(CITIES, "dub")] == ["DXB"]
+    assert old_options(CITIES, "gat") == []
@@ -0,0 +1,112 @@
+import copy
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from kpi.engine import KpiWindows, MonthlyTotals
+
+FIELDS = ["revenue_total", "passengers_total", "load_factor"]
+
+
+@dataclass
+class Record:
+    """same shape as `SalesTotalsRecord` and `BudgetRecord`"""
+
+    sell_year: int = 0
+    sell_month: int = 0
+    revenue_total: float = 0
+    passengers_total: float = 0
+    load_factor: float = 0
+
+
+def reference_windows(records: list, start: date, current_date: date) -> dict:
+    """list scans KPIs had before amounts were indexed by month"""
+    data = list(records)
+    day, end = date(start.year, start.month, 1), date(current_date.year, current_date.month, 28)
+    while day <= end:
+        if next(filter(lambda rec: (rec.sell_year, rec.sell_month) == (day.year, day.month), data), None) is None:
+            missing = copy.copy(Record())
+            missing.sell_year, missing.sell_month = day.year, day.month
+            data.append(missing)
+        day += timedelta(days=31)
+    data = sorted(data, key=lambda rec: (rec.sell_year, rec.sell_month))
+
+    def month(day: date):
+        return next(filter(lambda rec: rec.sell_year == day.year and rec.sell_month == day.month, data), Record())
+
+    def between(start: date, end: date) -> list:
+        start, end = date(start.year, start.month, 1), date(end.year, end.month, 1)
+        return [rec for rec in data if start <= date(rec.sell_year, rec.sell_month, 1) <= end]
+
+    def total(start: date, end: date) -> Record:
+        recs = between(start, end)
+        return Record(
+            revenue_total=np.sum([rec.revenue_total for rec in recs]),
+            passengers_total=np.sum([rec.passengers_total for rec in recs]),
+            load_factor=np.mean([rec.load_factor for rec in recs]),
+        )
+
+    year = current_date.year
+    graph_end = date(year, current_date.month, 1) - relativedelta(days=1)
+    return {
+        "current_month": month(current_date),
+        "last_month": month(current_date - relativedelta(months=1)),
+        "last_year_same_month": month(current_date - relativedelta(years=1)),
+        "current_year_ytd": total(date(year, 1, 1), current_date),
+        "last_year_ytd": total(date(year - 1, 1, 1), date(year - 1, current_date.month, current_date.day)),
+        "entire_last_year": total(date(year - 1, 1, 1), date(year, 1, 1) - relativedelta(days=1)),
+        "graph": between(date(graph_end.year, graph_end.month, 1) - relativedelta(months=12), graph_end),
+    }
+
+
+def fixture_records(rnd: random.Random, start: date, current_date: date, floats: bool) -> list:
+    """monthly totals with gaps, revenue either integers or floats"""
+    records = []
+    day = start
+    while day <= current_date + relativedelta(months=1):
+        if rnd.random() < 0.8:
+            revenue = rnd.uniform(0, 1e6) if floats else rnd.randint(0, 10**6)
+            records.append(Record(day.year, day.month, revenue, rnd.randint(0, 500), rnd.random()))
+        day += relativedelta(months=1)
+    rnd.shuffle(records)
+    return records
+
+
+def as_tuple(rec: Record) -> tuple:
+    return tuple((type(getattr(rec, name)), getattr(rec, name)) for name in FIELDS)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_windows_match_list_scans(seed):
+    rnd = random.Random(seed)
+    current_date = date(rnd.choice([2022, 2023, 2024]), rnd.randint(1, 12), rnd.randint(1, 28))
+    start = date(current_date.year - 1, 1, 1)
+    records = fixture_records(rnd, start, current_date, floats=seed % 2 == 0)
+
+    expected = reference_windows(records, start, current_date)
+    totals = MonthlyTotals(records, Record(), FIELDS, start, current_date, averaged=["load_factor"])
+    windows = KpiWindows(current_date)
+    actual = windows.resolve(totals)
+
+    for name, rec in actual.items():
+        assert as_tuple(rec) == as_tuple(expected[name]), name
+    assert [as_tuple(rec) for rec in totals.between(*windows.graph)] == [as_tuple(rec) for rec in expected["graph"]]
+
+
+def test_months_without_records_are_zeros():
+    totals = MonthlyTotals(
+        [Record(2023, 3, 10.5, 2, 0.5)], Record(), FIELDS, date(2023, 1, 1), date(2023, 4, 15), averaged=["load_factor"]
+    )
+
+    assert totals.month(date(2023, 2, 1)).revenue_total == 0
+    assert totals.month(date(2023, 2, 1)).sell_month == 2
+    assert totals.month(date(2020, 1, 1)) == Record()
+
+    [ytd] = totals.totals([(date(2023, 1, 1), date(2023, 4, 15))])
+    assert ytd.revenue_total == 10.5
+    assert ytd.passengers_total == 2
+    assert ytd.load_factor == pytest.approx(0.5 / 4)
@@ -0,0 +1,78 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import ConfigurationError
+
+from kpi.rollup import monthly_totals_stages
+from tests.dds.pipeline import aggregate
+from tests.kpi.test_rollup import SALES, raw_sales_actuals, rebuild, rounded
+
+try:
+    from kpi import kpi_repository
+except ConfigurationError:
+    # repositories need database settings of .env
+    pytest.skip("database settings are missing", allow_module_level=True)
+
+ORIG_CODES, DEST_CODES = ["KHI", "LHE"], ["DXB", "LHR"]
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    monkeypatch.setattr(kpi_repository, "request", SimpleNamespace(user=SimpleNamespace(carrier="PK")))
+    monkeypatch.setattr(kpi_repository, "is_demo_mode", lambda: False)
+    repository = kpi_repository.KpiRepository()
+    # raw sales of the whole month of `start` until `end`
+    monkeypatch.setattr(
+        repository,
+        "get_raw_sales_actuals",
+        lambda start, end, orig, dest: raw_sales_actuals(SALES, "PK", date(start.year, start.month, 1), end, orig, dest),
+    )
+    return repository
+
+
+def use_rollup(monkeypatch, rollup: list) -> None:
+    monkeypatch.setattr(
+        kpi_repository.rollup_repo,
+        "get_monthly_totals",
+        lambda *args: aggregate(rollup, monthly_totals_stages(*args)),
+    )
+
+
+def actuals(repository, start: date, end: date) -> list:
+    return rounded([record.to_dict() for record in repository.get_sales_actuals(start, end, ORIG_CODES, DEST_CODES)])
+
+
+ROLLUP = list(rebuild(SALES).values())
+# months DDS loaders refreshed before the whole rollup was built
+PARTLY_BUILT = [doc for doc in ROLLUP if (doc["sell_year"], doc["sell_month"]) in [(2023, 12), (2024, 2)]]
+
+
+@pytest.mark.parametrize("rollup", [ROLLUP, [], PARTLY_BUILT], ids=["built", "not built", "partly built"])
+@pytest.mark.parametrize(
+    "start, end",
+    [(date(2023, 11, 5), date(2024, 2, 10)), (date(2024, 2, 3), date(2024, 2, 20)), (date(2023, 11, 5), date(2024, 3, 2))],
+)
+def test_sales_actuals_are_raw_actuals_whether_rollup_is_built_or_not(repository, monkeypatch, rollup, start, end):
+    use_rollup(monkeypatch, rollup)
+    expected = [
+        {**record, "cargo_total": 0, "avg_load_factor": 0.70, "capacity_total": 0}
+        for record in raw_sales_actuals(SALES, "PK", date(start.year, start.month, 1), end, ORIG_CODES, DEST_CODES)
+    ]
+    assert actuals(repository, start, end) == rounded(expected)
+
+
+def test_only_months_missing_from_rollup_are_aggregated_from_raw_sales(repository, monkeypatch):
+    use_rollup(monkeypatch, PARTLY_BUILT)
+    calls = []
+    raw = repository.get_raw_sales_actuals
+    monkeypatch.setattr(repository, "get_raw_sales_actuals", lambda *args: calls.append(args[:2]) or raw(*args))
+
+    actuals(repository, date(2023, 11, 5), date(2024, 3, 2))
+    # from the first missing month to the last one (months of the rollup are dropped), then the current month
+    assert calls == [(date(2023, 11, 5), date(2024, 1, 31)), (date(2024, 3, 1), date(2024, 3, 2))]
+
+    calls.clear()
+    use_rollup(monkeypatch, ROLLUP)
+    actuals(repository, date(2023, 11, 5), date(2024, 2, 10))
+    assert calls == [(date(2024, 2, 1), date(2024, 2, 10))]
@@ -0,0 +1,211 @@
+"""
+rollup stages evaluated in memory : rollup totals compared with the raw aggregation KPIs had before the rollup,
+refreshes of uploaded months compared with a rebuild, and the copies of the stages the scheduler refreshes with
+"""
+import ast
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from kpi.rollup import (
+    KEY,
+    TOTALS,
+    missing_months,
+    mismatches,
+    monthly_totals_stages,
+    raw_check_stages,
+    rollup_check_stages,
+    rollup_stages,
+    sell_period,
+)
+from tests.dds.pipeline import aggregate, matches
+
+SCHEDULER = Path(__file__).resolve().parents[3] / "scheduler"
+NOW = datetime(2024, 3, 1)
+
+
+def make_sales(count: int, seed: int = 3) -> list:
+    rand = random.Random(seed)
+    docs = []
+    for _id in range(count):
+        sell_date = date(2023, 11, 1) + timedelta(days=rand.randrange(120))
+        docs.append(
+            {
+                "_id": _id,
+                "dom_op_al_code": rand.choice(["PK", "EK"]),
+                "orig_code": rand.choice(["KHI", "LHE"]),
+                "dest_code": rand.choice(["DXB", "LHR", "ISB"]),
+                "sell_year": sell_date.year,
+                "sell_month": sell_date.month,
+                "sell_date": int(sell_date.strftime("%Y%m%d")),
+                "pax": rand.randint(1, 4),
+                "blended_rev": round(rand.uniform(50, 900), 2),
+            }
+        )
+    return docs
+
+
+SALES = make_sales(400)
+
+
+def raw_sales_actuals(docs: list, carrier: str, start: date, end: date, orig_codes: list, dest_codes: list) -> list:
+    """`KpiRepository.get_raw_sales_actuals` pipeline"""
+    return aggregate(
+        docs,
+        [
+            {
+                "$match": {
+                    "$and": [
+                        {"sell_date": {"$gte": int(start.strftime("%Y%m%d"))}},
+                        {"sell_date": {"$lte": int(end.strftime("%Y%m%d"))}},
+                    ],
+                    "orig_code": {"$in": orig_codes},
+                    "dest_code": {"$in": dest_codes},
+                    "dom_op_al_code": carrier,
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"sell_year": "$sell_year", "sell_month": "$sell_month"},
+                    "revenue_total": {"$sum": "$blended_rev"},
+                    "passengers_total": {"$sum": "$pax"},
+                    "bookings_total": {"$sum": 1},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "sell_year": "$_id.sell_year",
+                    "sell_month": "$_id.sell_month",
+                    "revenue_total": "$revenue_total",
+                    "passengers_total": "$passengers_total",
+                    "bookings_total": "$bookings_total",
+                }
+            },
+            {"$sort": {"sell_year": 1, "sell_month": 1}},
+        ],
+    )
+
+
+def rebuild(docs: list) -> dict:
+    """rollup documents by `_id`, as `DdsMonthlyRollupRepository.rebuild` builds them"""
+    return {tuple(doc["_id"].values()): doc for doc in aggregate(docs, rollup_stages(NOW))}
+
+
+def refresh(rollup: dict, docs: list, months: set, refreshed_at: datetime) -> None:
+    """`MonthlyRollup.refresh` / `refresh_rollup` of the scheduler ($merge on `_id`, then stale markets are deleted)"""
+    match = {"$or": [{"dom_op_al_code": carrier, "sell_year": year, "sell_month": month} for carrier, year, month in months]}
+    for doc in aggregate(docs, [{"$match": match}, *rollup_stages(refreshed_at)]):
+        rollup[tuple(doc["_id"].values())] = doc
+    for _id, doc in list(rollup.items()):
+        if matches(doc, {**match, "refreshed_at": {"$ne": refreshed_at}}):
+            del rollup[_id]
+
+
+def totals(docs) -> list:
+    return sorted(
+        ({field: doc[field] for field in [*KEY, *TOTALS]} for doc in docs), key=lambda doc: [doc[field] for field in KEY]
+    )
+
+
+def rounded(records: list) -> list:
+    return [{**record, "revenue_total": round(record["revenue_total"], 6)} for record in records]
+
+
+@pytest.mark.parametrize(
+    "carrier, start, end, orig_codes, dest_codes",
+    [
+        ("PK", date(2023, 11, 1), date(2024, 3, 1), ["KHI", "LHE"], ["DXB", "LHR", "ISB"]),
+        ("EK", date(2023, 12, 1), date(2024, 2, 1), ["KHI"], ["DXB", "LHR"]),
+        ("PK", date(2024, 1, 1), date(2024, 1, 1), ["LHE"], ["ISB"]),
+        ("QR", date(2023, 11, 1), date(2024, 3, 1), ["KHI"], ["DXB"]),
+    ],
+)
+def test_monthly_totals_of_rollup_match_raw_sales_actuals(carrier, start, end, orig_codes, dest_codes):
+    # past months (before the month of `end`) are read from the rollup
+    rollup = list(rebuild(SALES).values())
+    result = aggregate(
+        rollup,
+        monthly_totals_stages(
+            carrier, sell_period(start.year, start.month), sell_period(end.year, end.month), orig_codes, dest_codes
+        ),
+    )
+    expected = raw_sales_actuals(SALES, carrier, start, end - timedelta(days=1), orig_codes, dest_codes)
+    assert rounded(sorted(result, key=lambda record: (record["sell_year"], record["sell_month"]))) == rounded(expected)
+
+
+def test_missing_months_of_a_range():
+    assert missing_months(date(2023, 11, 5), date(2024, 3, 1), [(2023, 12), (2024, 2), (2024, 3)]) == [
+        date(2023, 11, 1),
+        date(2024, 1, 1),
+    ]
+    assert missing_months(date(2024, 3, 5), date(2024, 3, 20), []) == []
+    assert missing_months(date(2023, 12, 31), date(2024, 2, 1), [(2023, 12), (2024, 1)]) == []
+
+
+def test_refresh_of_uploaded_months_is_a_rebuild_of_them():
+    rollup = rebuild(SALES)
+    # an upload changes sales of a month in place, adds a month and removes every sale of a market in another month
+    updated = [
+        {**doc, "pax": doc["pax"] + 1} if doc["sell_month"] == 12 and doc["dom_op_al_code"] == "PK" else doc for doc in SALES
+    ]
+    updated = [
+        doc
+        for doc in updated
+        if not (
+            doc["sell_month"] == 1 and doc["dom_op_al_code"] == "EK" and (doc["orig_code"], doc["dest_code"]) == ("KHI", "DXB")
+        )
+    ]
+    updated.append(
+        {**SALES[0], "_id": len(SALES), "dom_op_al_code": "PK", "sell_year": 2024, "sell_month": 4, "sell_date": 20240402}
+    )
+    assert totals(rollup.values()) != totals(rebuild(updated).values())
+
+    refresh(rollup, updated, {("PK", 2023, 12), ("EK", 2024, 1), ("PK", 2024, 4)}, datetime(2024, 4, 2))
+    assert totals(rollup.values()) == totals(rebuild(updated).values())
+    assert not [key for key in rollup if key[:3] == ("EK", "KHI", "DXB") and key[4] == 1]
+
+
+def test_check_reports_months_rollup_differs_for():
+    rollup = rebuild(SALES)
+    assert mismatches(aggregate(SALES, raw_check_stages({})), aggregate(list(rollup.values()), rollup_check_stages({}))) == []
+
+    # sales uploaded without a refresh of the rollup, and a month of another carrier missing from the rollup
+    updated = SALES + [
+        {**SALES[1], "_id": len(SALES), "dom_op_al_code": "PK", "sell_year": 2024, "sell_month": 1, "pax": 2, "blended_rev": 10.0}
+    ]
+    stale = [doc for doc in rollup.values() if (doc["dom_op_al_code"], doc["sell_month"]) != ("EK", 2)]
+    result = mismatches(aggregate(updated, raw_check_stages({})), aggregate(stale, rollup_check_stages({})))
+    assert [mismatch["key"] for mismatch in result] == [
+        {"dom_op_al_code": "EK", "sell_year": 2024, "sell_month": 2},
+        {"dom_op_al_code": "PK", "sell_year": 2024, "sell_month": 1},
+    ]
+    assert result[0]["rollup"] == {field: None for field in TOTALS}
+    assert result[1]["raw"]["bookings_total"] == result[1]["rollup"]["bookings_total"] + 1
+
+    # only months of the checked carrier
+    match = {"dom_op_al_code": "PK"}
+    assert mismatches(aggregate(updated, raw_check_stages(match)), aggregate(stale, rollup_check_stages(match))) == result[1:]
+
+
+def scheduler_rollup_stages(path: str):
+    """`rollup_stages` of a scheduler module (only `KEY` and the function are run, the module needs scheduler settings)"""
+    tree = ast.parse((SCHEDULER / path).read_text())
+    body = [
+        node
+        for node in tree.body
+        if (isinstance(node, ast.FunctionDef) and node.name == "rollup_stages")
+        or (isinstance(node, ast.Assign) and [target.id for target in node.targets if isinstance(target, ast.Name)] == ["KEY"])
+    ]
+    namespace = {"datetime": datetime}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), namespace)
+    return namespace["rollup_stages"]
+
+
+@pytest.mark.parametrize("path", ["share/core/rollup.py", "jobs/lib/utils/dds_rollup.py"])
+def test_scheduler_refreshes_with_the_same_stages(path):
+    if not (SCHEDULER / path).exists():
+        pytest.skip("scheduler sources are missing")
+    assert scheduler_rollup_stages(path)(NOW) == rollup_stages(NOW)
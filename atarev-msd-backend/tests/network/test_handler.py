@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+from pymongo.errors import ConfigurationError
+
+from tests.base.row_handler import assert_same_records, handle_rows_by_row
+
+try:
+    from base.entities.currency import Currency
+    from network.handler import NetworkBeyondPointsHandler, NetworkHandler
+except ConfigurationError:
+    # network handlers import repositories (database settings of .env are needed)
+    pytest.skip("database settings are missing", allow_module_level=True)
+
+COLORS = {"PK": "#00ff00", "EK": "#ff0000"}
+
+
+class CellHandler:
+    """previous cell handlers of `NetworkHandler`"""
+
+    CARRIER_COLOR_MAP = COLORS
+
+    def dom_op_al_code_handler(self, row, col):
+        return {"color": self.CARRIER_COLOR_MAP[row[col]] if row[col] in self.CARRIER_COLOR_MAP else "#ffffff", "value": row[col]}
+
+    def blended_rev_handler(self, row, col):
+        if row.get("currency"):
+            return {"displayVal": Currency.attach_currency(f"{int(row[col]):,}", row["currency"]), "value": int(row[col])}
+        return {"displayVal": Currency.attach_currency(f"{int(row[col]):,}", "USD"), "value": int(row[col])}
+
+    def pax_sum_handler(self, row, col):
+        return {"displayVal": f"{row[col]}", "value": row[col]}
+
+    def pax_handler(self, row, col):
+        return {"displayVal": f"{row[col]}", "value": row[col]}
+
+    def path_handler(self, row, col):
+        if row["bound"] == "Inbound":
+            val = row[col].split("-")
+            return f"{val[1]}-{val[0]}"
+        return row[col]
+
+
+class BeyondPointsCellHandler:
+    """previous cell handlers of `NetworkBeyondPointsHandler`"""
+
+    def pax_handler(self, row, col):
+        return f"{row[col]:,}"
+
+    def blended_rev_handler(self, row, col):
+        return "$" + f"{row[col]:,}"
+
+    def blended_fare_handler(self, row, col):
+        return "$" + f"{row[col]:,}"
+
+    def is_direct_handler(self, row, col):
+        return row[col]
+
+
+def network_handler() -> NetworkHandler:
+    # colors are given instead of being read for markets of the request
+    handler = NetworkHandler.__new__(NetworkHandler)
+    handler.CARRIER_COLOR_MAP = COLORS
+    return handler
+
+
+FRAME = pd.DataFrame(
+    {
+        "dom_op_al_code": ["PK", "EK", "QR", "PK"],
+        "bound": ["Outbound", "Inbound", "Inbound", "Outbound"],
+        "path": ["KHI-DXB", "DXB-LHR", "DOH-KHI", "ISB-KHI"],
+        "pax": [1200, 5, 30000, 0],
+        "pax_sum": [10, 20, 30, 40],
+        "blended_rev": [1234567.8, 99.2, 0.0, 45000.0],
+    }
+)
+
+
+def test_network_columns_match_cell_handlers():
+    for df in (FRAME, FRAME.assign(currency=["EUR", "", None, "PKR"])):
+        assert_same_records(network_handler().handle_rows(df), handle_rows_by_row(CellHandler(), df))
+
+
+def test_beyond_points_columns_match_cell_handlers():
+    df = FRAME[["pax"]].assign(
+        blended_rev=[1200, 3, 450000, 0], blended_fare=[120, 3, 45, 0], is_direct=[True, False, True, True]
+    )
+    assert_same_records(NetworkBeyondPointsHandler().handle_rows(df), handle_rows_by_row(BeyondPointsCellHandler(), df))
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+import pytest
+
+from rules.core.batch import FactTable, evaluate_batch
+from rules.core.eval import Evaluate
+from tests.rules.test_compiled import CITIES, REQUIRED, random_fact, random_rule
+
+
+def uniform_fact(rand: random.Random) -> dict:
+    """fact whose values of a path all have the same type (batches of them are compared column wise)"""
+    fact = {
+        "market": {"originCityCode": rand.choice(CITIES), "destCityCode": rand.choice(CITIES + [""])},
+        "cabin": {"cabinCode": rand.choice(["ECONOMY", "BUSINESS"])},
+        "leg": {"deptDate": rand.choice([20230701, 20230715, 20230801, 0]), "deptTime": rand.choice([0, 930, 1845])},
+        "competitor": {"competitorCode": rand.choice(["A3", "OA"]), "departureTimeDifferenceInHoursMin": rand.choice([-3, -1, 0, 2])},
+        "fares": {"maf": rand.choice([120.0, 80.5, None])},
+    }
+    if rand.random() < 0.1:
+        del fact["competitor"]
+    return fact
+
+
+@pytest.mark.parametrize("required", [[], REQUIRED])
+@pytest.mark.parametrize("make_fact", [random_fact, uniform_fact])
+def test_batch_evaluation_matches_evaluate(required, make_fact):
+    rand = random.Random(4)
+    for _ in range(40):
+        table = FactTable([make_fact(rand) for _ in range(rand.choice([1, 5, 50]))])
+        for _ in range(5):
+            conditions = random_rule(rand)
+            res = evaluate_batch(table, conditions, required)
+            for idx, fact in enumerate(table.facts):
+                expected = Evaluate(conditions, fact, required=required)()
+                assert bool(res.matched[idx]) is expected.result
+                assert res[idx].reason == expected.reason
+                for position, condition in enumerate(conditions):
+                    failed = not Evaluate([condition], fact, required=required)().result
+                    assert bool(res.failures.iloc[idx, position]) is failed
+
+
+def test_batch_evaluation_flags_every_failed_condition():
+    facts = [
+        {"market": {"originCityCode": "LCA"}, "cabin": {"cabinCode": "ECONOMY"}, "fares": {"maf": 10.0}},
+        {"market": {"originCityCode": "ATH"}, "cabin": {"cabinCode": "BUSINESS"}, "fares": {"maf": -5.0}},
+        {"market": {"originCityCode": "LCA"}, "cabin": {"cabinCode": "ECONOMY"}},
+    ]
+    conditions = [
+        {"value": ["LCA", "PFO"], "operator": "in", "path": "market.originCityCode", "fact": "market"},
+        {"value": "ECONOMY", "operator": "equal", "path": "cabin.cabinCode", "fact": "cabin"},
+        {
+            "field": "maf",
+            "all": [
+                {"value": 0, "operator": "greaterThan", "path": "fares.maf", "fact": "fares"},
+                {"value": 50, "operator": "lessThanInclusive", "path": "fares.maf", "fact": "fares"},
+            ],
+        },
+    ]
+    res = evaluate_batch(FactTable(facts), conditions, ["fares.maf"])
+
+    assert res.failures.to_numpy().tolist() == [[False, False, False], [True, True, True], [False, False, True]]
+    assert res.matched.tolist() == [True, False, False]
+    assert res.matched_facts == facts[:1]
+    assert res[1].failure == (conditions[0], facts[1])
+    assert np.array_equal(res.table.frame["market.originCityCode"].to_numpy(), np.array(["LCA", "ATH", "LCA"], dtype=object))
+
+
+def test_rule_without_conditions_matches_every_fact():
+    res = evaluate_batch(FactTable([{}, {"cabin": {"cabinCode": "ECONOMY"}}]), [])
+    assert res.matched.tolist() == [True, True]
+    assert res[0].result is True
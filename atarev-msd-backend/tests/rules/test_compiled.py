@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from rules.core.compiled import RuleCache, compile_conditions
+from rules.core.eval import Evaluate, Evaluation
+
+REQUIRED = ["market.originCityCode", "cabin.cabinCode", "fares.maf"]
+CITIES = ["AMS", "PBM", "LCA", "ATH"]
+
+
+def random_fact(rand: random.Random) -> dict:
+    """fact shaped like flight rule facts, values are falsy or missing from time to time"""
+    fact = {
+        "market": {"originCityCode": rand.choice(CITIES), "destCityCode": rand.choice(CITIES + [""])},
+        "cabin": {"cabinCode": rand.choice(["ECONOMY", "BUSINESS", None])},
+        "leg": {"deptDate": rand.choice([20230701, 20230715, 20230801, 0]), "deptTime": rand.choice([0, 930, 1845])},
+        "competitor": {"competitorCode": rand.choice(["A3", "OA"]), "departureTimeDifferenceInHoursMin": rand.choice([-3, -1, 0, 2])},
+        "fares": {"maf": rand.choice([120, 120.0, "120", None])},
+    }
+    if rand.random() < 0.1:
+        del fact["competitor"]
+    return fact
+
+
+def random_rule(rand: random.Random) -> list:
+    conditions = [
+        {"value": rand.sample(CITIES, 2), "operator": "in", "path": "market.originCityCode", "fact": "market"},
+        {"value": rand.sample(CITIES, 3), "operator": "in", "path": "market.destCityCode", "fact": "market"},
+        {"value": "ECONOMY", "operator": "equal", "path": "cabin.cabinCode", "fact": "cabin"},
+        {
+            "field": "departure_date",
+            rand.choice(["all", "any"]): [
+                {"value": 20230710, "operator": "greaterThanInclusive", "path": "leg.deptDate", "fact": "leg"},
+                {"value": 20230731, "operator": "lessThanInclusive", "path": "leg.deptDate", "fact": "leg"},
+            ],
+        },
+        {"value": rand.choice([-2, 0]), "operator": "greaterThan", "path": "competitor.departureTimeDifferenceInHoursMin", "fact": "competitor"},
+        {"value": 1000, "operator": "lessThan", "path": "leg.deptTime", "fact": "leg"},
+        {"value": rand.choice([120, 120.0]), "operator": "equal", "path": "fares.maf", "fact": "fares"},
+    ]
+    rand.shuffle(conditions)
+    return conditions
+
+
+@pytest.mark.parametrize("required", [[], REQUIRED])
+def test_compiled_conditions_match_evaluate(required):
+    rand = random.Random(3)
+    for _ in range(300):
+        conditions = random_rule(rand)
+        compiled = compile_conditions(conditions, required)
+        for _ in range(20):
+            fact = random_fact(rand)
+            expected = Evaluate(conditions, fact, required=required)()
+            res = compiled(fact)
+            assert type(res) is Evaluation
+            assert res.result is expected.result
+            assert res.reason == expected.reason
+
+
+def test_reason_is_generated_when_read():
+    conditions = [{"value": ["m", "f"], "operator": "in", "path": "nature.creature.gender", "fact": "fact"}]
+    res = compile_conditions(conditions)({"nature": {"creature": {"gender": "unknown"}}})
+    assert res.result is False
+    assert "reason" not in res.__dict__
+    assert res.reason == {"operator": "in", "path": "nature.creature.gender", "value": "unknown", "accept": ["m", "f"]}
+
+
+def test_rules_are_compiled_once_per_conditions():
+    cache = RuleCache(size=2)
+    rule = {"_id": "r1", "updated_at": 1, "conditions": {"all": [{"value": "ECONOMY", "operator": "equal", "path": "cabin", "fact": "cabin"}]}}
+
+    compiled = cache.get(rule)
+    assert cache.get(dict(rule)) is compiled
+    assert cache.get(rule, REQUIRED) is not compiled
+
+    updated = {**rule, "updated_at": 2, "conditions": {"all": [{"value": "BUSINESS", "operator": "equal", "path": "cabin", "fact": "cabin"}]}}
+    assert cache.get(updated)({"cabin": "BUSINESS"}).result is True
+    # least recently used rules are dropped
+    assert cache.get(rule) is not compiled
+
+
+def test_rules_edited_without_a_new_version_are_compiled_again():
+    # event rules were saved without `updated_at`
+    cache = RuleCache(size=8)
+    rule = {"_id": "e1", "conditions": {"all": [{"value": ["ECONOMY"], "operator": "in", "path": "cabin", "fact": "cabin"}]}}
+    compiled = cache.get(rule)
+    assert cache.get({**rule, "conditions": {"all": [dict(condition) for condition in rule["conditions"]["all"]]}}) is compiled
+
+    edited = {**rule, "conditions": {"all": [{"value": ["BUSINESS"], "operator": "in", "path": "cabin", "fact": "cabin"}]}}
+    assert cache.get(edited)({"cabin": "BUSINESS"}).result is True
+    assert cache.get(rule)({"cabin": "BUSINESS"}).result is False
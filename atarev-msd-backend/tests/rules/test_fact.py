@@ -1,7 +1,9 @@
+import random
+
 import pandas as pd
 import pytest
 
-from rules.flights.evaluation.fact import BestFare, HostBestFare, MainCompetitorBestFare, fare_fact
+from rules.flights.evaluation.fact import BestFare, Fact, FareIndex, FlightFacts, HostBestFare, MainCompetitorBestFare, fare_fact
 
 
 @pytest.fixture
@@ -122,3 +124,65 @@ def test_fare_fact(flight, fares):
     assert "deptDate" in fact
     assert "deptTime" in fact
     assert "lf" in fact
+
+
+def random_fares(rand: random.Random, count: int) -> pd.DataFrame:
+    """fares of a few flights, several classes per flight and equal fares from time to time"""
+    rows = []
+    for _ in range(count):
+        carrier = rand.choice(["CY", "A3", "OA"])
+        departure_date = rand.choice([20230927, 20230928, 20230929])
+        departure_time = rand.choice([0, 630, 1200, 1500, 1630, 2330])
+        rows.append(
+            {
+                "carrier_code": carrier,
+                "origin": "LCA",
+                "destination": "ATH",
+                "cabin": "ECONOMY",
+                "class": rand.choice(["Y", "B", "M"]),
+                "departure_date": departure_date,
+                "departure_time": departure_time,
+                "arrival_date": departure_date,
+                "arrival_time": departure_time + 45,
+                "flt_num": departure_time // 100 + (4000 if carrier == "CY" else 6000),
+                "fare": rand.choice([90.5, 100.0, 120.25, 150.0]),
+                "currency": "EUR",
+                "is_connecting": False,
+                "op_code": carrier,
+                "mk_code": carrier,
+                "lf": rand.randint(0, 100),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def test_flight_facts_match_fact(flight):
+    rand = random.Random(5)
+    for _ in range(20):
+        fares = random_fares(rand, 60)
+        index = FareIndex(fares)
+        for departure_date in [20230927, 20230928, 20230929]:
+            for departure_time in [630, 1500, 1630, 1700]:
+                flt = {
+                    **flight,
+                    "departure_date": departure_date,
+                    "arrival_date": departure_date,
+                    "departure_time": departure_time,
+                    "arrival_time": departure_time + 45,
+                    "flt_num": departure_time // 100 + 4000,
+                }
+                flight_facts = FlightFacts(index=index, flight=flt, cabin="ECONOMY")
+                for code in ["A3", "OA", "W6", None]:
+                    criteria = {"code": code, "range": rand.choice([(0, 2), (-3, 3), (1, 24), (0, 48)])}
+                    expected = Fact(fares=fares, flight=flt, cabin="ECONOMY", competitor_criteria=criteria).get()
+                    assert flight_facts.get(criteria) == expected
+
+
+def test_flight_facts_are_computed_once_per_criteria(flight, fares):
+    flight_facts = FlightFacts(index=FareIndex(fares), flight=flight, cabin="ECONOMY")
+    facts = flight_facts.get({"code": "A3", "range": (-2, 2)})
+
+    assert flight_facts.get({"code": "A3", "range": (-2, 2)}) is facts
+    assert facts["mainCompetitorFare"]["fareAmount"] == 118.94
+    assert facts["lowestFare"]["fareAmount"] == 76.94
+    assert flight_facts.get({"code": "OA", "range": (-2, 2)})["mainCompetitorFare"]["fareAmount"] == 90.92
@@ -0,0 +1,178 @@
+import pandas as pd
+import pytest
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+from rules.core.eval import Evaluate
+from rules.flights.evaluation.fact import Fact
+from rules.flights.evaluation.incremental import PartitionPool, Scope, evaluate, partitions, required, writes
+from rules.flights.evaluation.utils import competitor_criterica
+
+inline = PartitionPool(max_workers=1)
+
+
+def make_flight(destination: str, flt_num: int, departure_time: int) -> dict:
+    return {
+        "flt_num": flt_num,
+        "flt_key": f"CY{flt_num}|20230928|LCA{destination}",
+        "origin": "LCA",
+        "destination": destination,
+        "carrier_code": "CY",
+        "departure_date": 20230928,
+        "departure_time": departure_time,
+        "arrival_date": 20230928,
+        "arrival_time": departure_time + 100,
+        "departure_day": 28,
+        "departure_month": 9,
+        "departure_year": 2023,
+        "arrival_day": 28,
+        "arrival_month": 9,
+        "arrival_year": 2023,
+        "dtd": 2,
+        "dow": 4,
+        "market": f"LCA-{destination}",
+    }
+
+
+def make_fare(flt: dict, carrier_code: str, flt_num: int, departure_time: int, fare: float) -> dict:
+    return {
+        "carrier_code": carrier_code,
+        "origin": flt["origin"],
+        "destination": flt["destination"],
+        "cabin": "ECONOMY",
+        "class": "Y",
+        "departure_date": flt["departure_date"],
+        "departure_time": departure_time,
+        "arrival_date": flt["arrival_date"],
+        "arrival_time": flt["arrival_time"] if carrier_code == "CY" else departure_time + 100,
+        "flt_num": flt_num,
+        "fare": fare,
+        "currency": "EUR",
+        "is_connecting": False,
+        "op_code": carrier_code,
+        "mk_code": carrier_code,
+        "lf": 40,
+    }
+
+
+def make_rule(_id: str, competitor: str, max_maf: int) -> dict:
+    return {
+        "_id": _id,
+        "updated_at": 1,
+        "ruleName": f"rule {_id}",
+        "rulePriority": 1,
+        "event": {"type": "alert"},
+        "conditions": {
+            "all": [
+                {"value": ["LCA"], "operator": "in", "path": "market.originCityCode", "fact": "market"},
+                {"value": "ECONOMY", "operator": "equal", "path": "cabin.cabinCode", "fact": "cabin"},
+                {
+                    "value": competitor,
+                    "operator": "equal",
+                    "path": "mainCompetitorFare.carrierCode",
+                    "fact": "mainCompetitorFare",
+                },
+                {
+                    "field": "competitor_range",
+                    "all": [
+                        {"value": 0, "operator": "greaterThanInclusive", "path": "competitor.departureTimeDifferenceInHoursMin"},
+                        {"value": 3, "operator": "lessThanInclusive", "path": "competitor.departureTimeDifferenceInHoursMax"},
+                    ],
+                },
+                {"value": max_maf, "operator": "lessThan", "path": "fares.maf", "fact": "fares"},
+            ]
+        },
+    }
+
+
+@pytest.fixture
+def flights():
+    return [
+        make_flight("ATH", 310, 900),
+        make_flight("ATH", 312, 1500),
+        make_flight("SKG", 410, 1100),
+        make_flight("SKG", 412, 1800),
+    ]
+
+
+@pytest.fixture
+def fares(flights):
+    rows = []
+    for position, flt in enumerate(flights):
+        rows.append(make_fare(flt, "CY", flt["flt_num"], flt["departure_time"], 100.0 + 10 * position))
+        rows.append(make_fare(flt, "A3", 6000 + position, flt["departure_time"] + 100, 90.0 + 20 * position))
+        rows.append(make_fare(flt, "OA", 7000 + position, flt["departure_time"] + 200, 120.0 - 5 * position))
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def scope(fares):
+    return Scope(fares, [make_rule("r1", "A3", 15), make_rule("r2", "OA", 0), make_rule("r3", "A3", 100)], "CY", "economy")
+
+
+def stored(results) -> dict:
+    return {key: value for res in results for key, value in res.fingerprints.items()}
+
+
+def matches(results) -> set:
+    return {(item["identifier"], item["ruleId"]) for res in results for item in res.success}
+
+
+def test_results_match_evaluation_of_every_flight_and_rule(scope, flights):
+    expected = set()
+    for flt in flights:
+        for rule in scope.rules:
+            facts = Fact(fares=scope.fares, flight=flt, cabin="ECONOMY", competitor_criteria=competitor_criterica(rule)).get()
+            if Evaluate(rule["conditions"]["all"], facts, required=required)().result:
+                expected.add((f"LCA-{flt['destination']}-20230928-economy-CY-{flt['flt_num']}", rule["_id"]))
+
+    results = evaluate(scope, flights, {}, pool=inline)
+    assert expected and matches(results) == expected
+    assert len(stored(results)) == len(flights)
+
+
+def test_rerun_without_changes_writes_nothing(scope, flights):
+    results = evaluate(scope, flights, {}, pool=inline)
+    result_ops, fingerprint_ops = writes(results)
+    assert len(fingerprint_ops) == len(flights)
+    assert all(type(op) in (DeleteMany, ReplaceOne) for op in result_ops)
+
+    rerun = evaluate(scope, flights, stored(results), pool=inline)
+    assert writes(rerun) == ([], [])
+    assert not matches(rerun)
+
+
+def test_only_changed_flights_are_evaluated_again(scope, flights, fares):
+    fingerprints = stored(evaluate(scope, flights, {}, pool=inline))
+
+    # new scrape of the host fare of the second flight
+    changed = fares.copy()
+    changed.loc[(changed.carrier_code == "CY") & (changed.flt_num == 312), "fare"] = 500.0
+    results = evaluate(Scope(changed, scope.rules, "CY", "economy"), flights, fingerprints, pool=inline)
+    assert list(stored(results)) == ["LCA-ATH-20230928-economy-CY-312"]
+
+    # the flight matches no rule anymore, its results are removed
+    result_ops, fingerprint_ops = writes(results)
+    assert result_ops == [
+        DeleteMany({"identifier": "LCA-ATH-20230928-economy-CY-312", "ruleId": {"$nin": []}, "type": {"$ne": "E"}})
+    ]
+    assert type(fingerprint_ops[0]) is UpdateOne
+
+    # a new version of a rule changes every flight
+    rules = [{**scope.rules[0], "updated_at": 2}, *scope.rules[1:]]
+    assert len(stored(evaluate(Scope(scope.fares, rules, "CY", "economy"), flights, fingerprints, pool=inline))) == len(flights)
+
+
+def test_flights_are_partitioned_by_market(flights):
+    items = partitions(flights + [make_flight("HER", 510, 700)], {}, [str(idx) for idx in range(5)], count=2)
+    assert sorted(sorted(item.markets) for item in items) == [["LCA-ATH", "LCA-HER"], ["LCA-SKG"]]
+    assert sorted(len(item.flights) for item in items) == [2, 3]
+    assert len(partitions(flights, {}, ["a", "b", "c", "d"], count=8)) == 2
+
+
+def test_partitions_evaluated_in_worker_processes_match(scope, flights):
+    expected = evaluate(scope, flights, {}, pool=inline)
+    pool = PartitionPool(max_workers=2)
+    results = evaluate(scope, flights, {}, pool=pool)
+    assert pool._pool is not None
+    assert matches(results) == matches(expected)
+    assert stored(results) == stored(expected)
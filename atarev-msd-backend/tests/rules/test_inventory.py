@@ -0,0 +1,87 @@
+import random
+from datetime import timedelta
+
+import pandas as pd
+
+from base.helpers.datetime import Date
+from rules.events.evaluation.fact import Fact, cabin_fact
+from rules.events.evaluation.inventory import COLUMNS, bins, by_departure_date, snapshot_dates
+
+DEPARTURE_DATES = [20240401, 20240402, 20240415]
+
+
+def random_inventory(rand: random.Random) -> pd.DataFrame:
+    """legs of flights departing on a few dates (second legs depart the day after), some values are missing"""
+    rows = []
+    for departure_date in DEPARTURE_DATES:
+        for _ in range(rand.randint(5, 40)):
+            leg_date = rand.choice([departure_date, departure_date + 1])
+            rows.append(
+                {
+                    "departure_date": departure_date,
+                    "date": rand.choice(snapshot_dates(departure_date)),
+                    "dept_date": Date(leg_date).humanize(),
+                    "origin": rand.choice(["CDG", "ATH", "XXX"]),
+                    "country_code": rand.choice(["FR", "GR", None]),
+                    "cabin": rand.choice(["Y", "J"]),
+                    "cap": rand.randint(1, 180),
+                    "total_booking": rand.choice([None, rand.randint(0, 180)]),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def reference(inv_df: pd.DataFrame) -> pd.DataFrame:
+    """inventory of a departure date as it was computed by one query for each of them"""
+    grouped_df = (
+        inv_df.groupby(["country_code", "cabin", "date", "dept_date"])
+        .apply(lambda grouped: round((grouped.total_booking.sum() / grouped.cap.sum()) * 100))
+        .reset_index()
+        .rename(columns={0: "lf"})
+    )
+    grouped_df["dte"] = grouped_df.apply(lambda row: (Date(row.dept_date).date() - Date(row.date).date()).days, axis=1)
+    return grouped_df.sort_values("dte", ascending=False)
+
+
+def test_snapshot_dates_are_the_ones_of_bins():
+    assert snapshot_dates(20240401) == [Date(Date(20240401).date() - timedelta(days=bin)).noramlize() for bin in bins]
+    assert snapshot_dates(20240401)[0] == 20230402
+    assert snapshot_dates(20240401)[-1] == 20240331
+
+
+def test_inventory_sliced_by_departure_date_matches_one_query_per_date():
+    rand = random.Random(7)
+    for _ in range(20):
+        inv_df = random_inventory(rand)
+        slices = by_departure_date(inv_df, DEPARTURE_DATES + [20240501])
+
+        for departure_date in DEPARTURE_DATES:
+            expected = reference(inv_df[inv_df.departure_date == departure_date].drop(columns="departure_date"))
+            pd.testing.assert_frame_equal(slices[departure_date], expected)
+            for (c_code, cabin), g_df in slices[departure_date].groupby(["country_code", "cabin"]):
+                expected_g_df = expected[(expected.country_code == c_code) & (expected.cabin == cabin)]
+                assert cabin_fact(g_df, cabin) == cabin_fact(expected_g_df, cabin)
+
+        assert slices[20240501].empty
+        assert tuple(slices[20240501].columns) == COLUMNS
+
+
+def test_fact_is_made_of_event_and_cabin_facts():
+    event = pd.Series(
+        {
+            "event_name": "Easter",
+            "country_code": "GR",
+            "type": "holiday",
+            "sub_type": None,
+            "start_date": 20240505,
+            "end_date": 20240506,
+            "id": "1",
+            "city": "",
+        }
+    )
+    inventory = pd.DataFrame({"dte": [365, 270, 180], "lf": [10, 25, 25]})
+    fact = Fact(event, inventory, "Y").get()
+
+    assert fact["event"]["city"] is None
+    assert fact["flight"] == cabin_fact(inventory, "Y")
+    assert fact["flight"]["pickup"]["lf"]["365_270"] == {"value": -15, "ratio": -2}
@@ -1,8 +1,13 @@
 from typing import Dict, List
 
+from flask import g, has_app_context
+
 from base.helpers.duration import Duration
 from base.repository import BaseRepository
 
+# key under flask `g` where request scoped profile snapshots are stored
+PROFILES_CONTEXT_KEY = "user_profiles"
+
 
 class UserRepository(BaseRepository):
     collection = "profiles"
@@ -14,23 +19,30 @@ class UserRepository(BaseRepository):
         selected_filter_options = user.get("selected_filter_options", {})
         selected_filter_options = {**selected_filter_options, **kwargs}
         self.update_one({"username": username}, {**user, "selected_filter_options": selected_filter_options})
+        self.invalidate_user(username)
 
     def get_user(self, username: str, drop_id=False) -> Dict:
         redis_key = f"user_{username}"
         # generrate_prefix = false (prevent redis from creating prefix which needs access to reqeust.user before assigning user to request"
-        cached = self.redis.get(redis_key, generate_prefix=False)
-        if cached:
-            return cached
+        user = self.redis.get(redis_key, generate_prefix=False)
 
-        user: Dict = self.stringify(self.find_one({"username": username}))
-        if drop_id:
-            del user["id"]
-        assert bool(user), "user is not found"
-        # generrate_prefix = false (prevent redis from creating prefix which needs access to reqeust.user before assigning user to request"
-        self.redis.set(redis_key, user, Duration.hours(3), generate_prefix=False)
+        if not user:
+            user: Dict = self.stringify(self.find_one({"username": username}))
+            assert bool(user), "user is not found"
+            # generrate_prefix = false (prevent redis from creating prefix which needs access to reqeust.user before assigning user to request"
+            self.redis.set(redis_key, user, Duration.hours(3), generate_prefix=False)
 
+        if drop_id:
+            return {key: value for key, value in user.items() if key != "id"}
         return user
 
+    def invalidate_user(self, username: str) -> None:
+        """remove cached user document so that next read gets the updated version"""
+        self.redis.delete(f"user_{username}")
+        # snapshots built from the old document during this request are stale as well
+        if has_app_context():
+            g.pop(PROFILES_CONTEXT_KEY, None)
+
     def get_user_roles_perms(self, username: str) -> List[set]:
         user = self.get_user(username)
         return [
@@ -10,6 +10,7 @@ from typing import List
 
 from jobs.lib.utils.logger import setup_logging
 from jobs.lib.utils.mongo_wrapper import MongoWrapper
+from jobs.lib.utils.redis_cache_client import RedisCacheClient
 from jobs.lib.utils.rt_rate_handler import RoundTripRateHandler
 
 setup_logging()
@@ -219,6 +220,10 @@ class BaseScrapedFareProcessingJob:
         self.flush_data_buffer(True)
         self.print_stats()
 
+        # API responses built from old fares are not valid anymore
+        if self.stats["total_inserted"] and not self.args.dry_run:
+            RedisCacheClient().invalidate_namespace(self.args.host_carrier_code, "fares")
+
     @abstractmethod
     def process_single_record(self, item, *args):
         pass
@@ -5,6 +5,8 @@ from datetime import date, datetime, timedelta
 import time
 from dotenv import load_dotenv
 from pymongo import InsertOne, DeleteMany
+from jobs.lib.utils.dds_cubes import mark_cubes_stale
+from jobs.lib.utils.dds_rollup import refresh_rollup, sell_months
 from jobs.lib.utils.logger import setup_logging
 from jobs.lib.utils.mongo_wrapper import MongoWrapper
 from jobs.lib.utils.mysql_wrapper import MysqlWrapper
@@ -148,6 +150,9 @@ def _upload_data_to_mongo(df):
             total_count += len(buffer)
             logger.info(f"Progress: {total_count}/{len(df)}")
 
+        #refresh monthly rollup (KPI actuals) of uploaded sell months
+        refresh_rollup(df[['dom_op_al_code', 'sell_year', 'sell_month']].drop_duplicates().itertuples(index=False))
+        mark_cubes_stale()
         logger.debug("--- %s seconds ---" % (time.time() - start_time))
     else:
         logger.info("Dryrun mode is ON - no data was stored in database")
@@ -169,7 +174,10 @@ def delete_outdated_forward_data_from_db(snapshot_date:date):
         #delete data in mongo
         travel_date=int(snapshot_date.strftime("%Y%m%d"))
         mongo = MongoWrapper()
+        months = sell_months({'is_historical':False, 'travel_date':{'$lt':travel_date}})
         mongo.col_dds().delete_many({'is_historical':False, 'travel_date':{'$lt':travel_date}})
+        refresh_rollup(months)
+        mark_cubes_stale()
     else:
         logger.info("Dryrun mode is ON - no data was deleted from database")
 
@@ -188,7 +196,10 @@ def delete_all_forward_data_from_db():
 
         #delete data in mongo
         mongo = MongoWrapper()
+        months = sell_months({'is_historical':False})
         mongo.col_dds().delete_many({'is_historical':False})
+        refresh_rollup(months)
+        mark_cubes_stale()
     else:
         logger.info("Dryrun mode is ON - no data was deleted from database")
 
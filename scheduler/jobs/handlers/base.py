@@ -1,4 +1,5 @@
-from typing import List
+from typing import Any, Dict, List
+
 import pandas as pd
 
 
@@ -6,25 +7,34 @@ class FieldsHandler:
     """ 
         some fields need to be handled (shaped in certain form) this handle will
         take care of that 
+
+        a field is handled by a column handler `<field>_column(df, col)` returning a Series of the whole column,
+        per cell handlers `<field>_handler(row, col)` are still supported but they run row by row
     """
 
-    def handle_rows(self, df: pd.DataFrame):
-        columns = df.columns
-        result = []
-        for _, row in df.iterrows():
-            record = self.__handle_row(row, columns)
-            result.append(record)
-        return result
-
-    def __handle_row(self, row: pd.Series, cols: List[str]):
-        obj = {}
-        for col in cols:
-            # for every column : 
-            # if handler exists (<column_name>_handler) -> run that handler 
-            # otherwise get value as is 
-            if hasattr(self, f"{col}_handler"):
-                method = getattr(self, f"{col}_handler")
-                obj[col] = method(row, col)
+    def handle_rows(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        columns = list(df.columns)
+        values: Dict[str, list] = {}
+        cell_handlers = []
+
+        for col in columns:
+            # for every column :
+            # if column handler exists (<column_name>_column) -> run it once for the whole column
+            # if cell handler exists (<column_name>_handler) -> run it for every row
+            # otherwise get values as is
+            if hasattr(self, f"{col}_column"):
+                values[col] = getattr(self, f"{col}_column")(df, col).tolist()
+            elif hasattr(self, f"{col}_handler"):
+                cell_handlers.append((col, getattr(self, f"{col}_handler")))
             else:
-                obj[col] = row[col]
-        return obj
+                # column by column, values keep their type (datetimes stay timestamps)
+                values[col] = df[col].astype(object).tolist()
+
+        if cell_handlers:
+            for col, _ in cell_handlers:
+                values[col] = []
+            for _, row in df.iterrows():
+                for col, method in cell_handlers:
+                    values[col].append(method(row, col))
+
+        return [dict(zip(columns, record)) for record in zip(*(values[col] for col in columns))]
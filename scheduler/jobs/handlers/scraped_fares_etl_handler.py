@@ -1,11 +1,15 @@
 from .base import FieldsHandler
 from datetime import datetime
 
+import pandas as pd
+
 
 class ScraperFaresEtlHandler(FieldsHandler):
 
-    def scrapeTime_handler(self, row, col):
+    def scrapeTime_column(self, df: pd.DataFrame, col: str) -> pd.Series:
         # sometimes i get scrapeTime as string and sometimes i get it as datetime object
         # i need to make sure it is always datetime
-        return (datetime.strptime(row[col].split('.')[0], "%Y-%m-%d %H:%M:%S")
-                if type(row[col]) == str else row[col])
+        values = df[col].astype(object)
+        is_str = values.map(type) == str
+        parsed = values[is_str].map(lambda val: datetime.strptime(val.split('.')[0], "%Y-%m-%d %H:%M:%S"))
+        return values.where(~is_str, parsed)
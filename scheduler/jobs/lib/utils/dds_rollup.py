@@ -0,0 +1,68 @@
+"""
+incremental refresh of `dds_monthly_rollup` (sales of `dds_pgs` summed per carrier, market and sell month),
+stages are the ones the backend rebuilds the rollup with (`kpi/rollup.py`)
+"""
+from datetime import datetime
+from typing import Iterable, Set, Tuple
+
+from jobs.lib.utils.mongo_wrapper import MongoWrapper
+from jobs.lib.utils.redis_cache_client import RedisCacheClient
+
+KEY = ['dom_op_al_code', 'orig_code', 'dest_code', 'sell_year', 'sell_month']
+
+# (carrier, sell year, sell month)
+SellMonth = Tuple[str, int, int]
+
+
+def rollup_stages(refreshed_at: datetime) -> list:
+    return [
+        {
+            '$group': {
+                '_id': {field: f'${field}' for field in KEY},
+                'revenue_total': {'$sum': '$blended_rev'},
+                'passengers_total': {'$sum': '$pax'},
+                'bookings_total': {'$sum': 1},
+            }
+        },
+        {
+            '$set': {
+                **{field: f'$_id.{field}' for field in KEY},
+                'sell_period': {'$add': [{'$multiply': ['$_id.sell_year', 100]}, '$_id.sell_month']},
+                'refreshed_at': refreshed_at,
+            }
+        },
+    ]
+
+
+def sell_months(match: dict) -> Set[SellMonth]:
+    """carrier sell months of dds documents matching `match` (months a delete is about to change)"""
+    cursor = MongoWrapper().col_dds().aggregate(
+        [{'$match': match}, {'$group': {'_id': {'c': '$dom_op_al_code', 'y': '$sell_year', 'm': '$sell_month'}}}],
+        allowDiskUse=True,
+    )
+    return {(doc['_id']['c'], doc['_id']['y'], doc['_id']['m']) for doc in cursor}
+
+
+def refresh_rollup(months: Iterable[SellMonth]) -> None:
+    """aggregate carrier sell months again and merge them into the rollup, cached dds responses of the carriers are dropped"""
+    months = {(carrier, int(year), int(month)) for carrier, year, month in months}
+    if not months:
+        return
+
+    mongo = MongoWrapper()
+    match = {'$or': [{'dom_op_al_code': carrier, 'sell_year': year, 'sell_month': month} for carrier, year, month in months]}
+    refreshed_at = datetime.now()
+    mongo.col_dds().aggregate(
+        [
+            {'$match': match},
+            *rollup_stages(refreshed_at),
+            {'$merge': {'into': 'dds_monthly_rollup', 'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+        ],
+        allowDiskUse=True,
+    )
+    # markets that have no sales anymore in refreshed months
+    mongo.col_dds_monthly_rollup().delete_many({**match, 'refreshed_at': {'$ne': refreshed_at}})
+
+    cache = RedisCacheClient()
+    for carrier in {carrier for carrier, _, _ in months}:
+        cache.invalidate_namespace(carrier, 'dds')
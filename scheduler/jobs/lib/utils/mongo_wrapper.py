@@ -44,6 +44,12 @@ class MongoWrapper:
     def col_dds(self):
         return self.get_mongo_client()["dds_pgs"]
 
+    def col_dds_monthly_rollup(self):
+        return self.get_mongo_client()["dds_monthly_rollup"]
+
+    def col_dds_cubes(self):
+        return self.get_mongo_client()["dds_cubes"]
+
     def col_airports(self):
         return self.get_mongo_client()["airports"]
 
@@ -62,6 +62,13 @@ class RedisCacheClient:
             logger.warning(f"got json.decoder.JSONDecodeError while retrieving value from cache for key:[{_key}]")
             return self.redis_client.get(_key)
 
+    def invalidate_namespace(self, host: str, namespace: str):
+        """bump generation of a cache namespace (fares, dds, config) so API drops cached data of that domain"""
+        if not self.is_redis_enabled():
+            return None
+        self.redis_client.hincrby(self._create_prefixed_key("cache_generations"), f"{host}:{namespace}", 1)
+        logger.info(f"Cache namespace [{namespace}] invalidated for host [{host}]")
+
     def clear_cache(self):
         """clear all key-values from cache that were previously stored there"""
         if not self.is_redis_enabled():
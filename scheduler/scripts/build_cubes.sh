@@ -0,0 +1,9 @@
+#!/bin/bash
+BASEDIR=$(dirname "$0")
+#This script builds dds_pgs cubes of the backend (market analytics) that DDS loaders made stale.
+#Loaders only mark cubes stale, pages aggregate raw sales until the cubes are built again.
+BACKEND_DIR=${MSD_BACKEND_DIR:-${BASEDIR}/../../atarev-msd-backend}
+source ${BACKEND_DIR}/.venv/bin/activate
+cd ${BACKEND_DIR}
+python3 manage.py build_cubes
+echo "Done"
@@ -0,0 +1,10 @@
+#!/bin/bash
+BASEDIR=$(dirname "$0")
+#This script trains customer segmentation models of the backend with sales DDS loaders uploaded.
+#Without arguments stored models only get sales with an _id above the last one they were trained on,
+#pass --full to train them from scratch (applies sales loaders updated in place, run it periodically).
+BACKEND_DIR=${MSD_BACKEND_DIR:-${BASEDIR}/../../atarev-msd-backend}
+source ${BACKEND_DIR}/.venv/bin/activate
+cd ${BACKEND_DIR}
+python3 manage.py train_segmentation "$@"
+echo "Done"
@@ -0,0 +1,19 @@
+"""
+generations of the backend response cache (`base/redis.py` of the backend), bumping the generation of a
+(host, namespace) pair makes every cached response of that domain unreachable at once
+"""
+from typing import Iterable
+
+import redis
+from core.env import REDIS_ENABLED, REDIS_HOST, REDIS_KEY_PREFIX, REDIS_PASSWORD, REDIS_PORT
+
+
+def invalidate_namespace(hosts: Iterable[str], namespace: str) -> None:
+    if REDIS_ENABLED.lower() != "true":
+        return
+
+    client = redis.Redis(host=REDIS_HOST, port=int(REDIS_PORT), password=REDIS_PASSWORD or None, db=0)
+    pipeline = client.pipeline(transaction=False)
+    for host in set(hosts):
+        pipeline.hincrby(f"{REDIS_KEY_PREFIX}_cache_generations", f"{host}:{namespace}", 1)
+    pipeline.execute()
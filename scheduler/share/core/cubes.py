@@ -0,0 +1,10 @@
+"""
+cubes of `dds_pgs` (pre-aggregated market analytics, `dds/cubes.py` of the backend) built before DDS data changes
+are not used anymore until they are built again (`python manage.py build_cubes`, run hourly by `scripts/build_cubes.sh`)
+"""
+from core.db import DB
+
+
+def mark_cubes_stale() -> None:
+    # time of the database server, cubes are built with it too
+    DB().dds_cubes.update_many({}, [{"$set": {"data_changed_at": "$$NOW"}}])
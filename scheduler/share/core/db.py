@@ -12,6 +12,8 @@ class Collection(Enum):
     AUTH_RESULT = "authorization_results"
     FS = "fs"
     DDS = "dds_pgs"
+    DDS_MONTHLY_ROLLUP = "dds_monthly_rollup"
+    DDS_CUBES = "dds_cubes"
     AIRPORT = "airports"
     CURRENCY = "currencies"
 
@@ -57,6 +59,14 @@ class DB:
     def dds(self) -> Collection:
         return self.db[Collection.DDS.value]
 
+    @property
+    def dds_monthly_rollup(self) -> Collection:
+        return self.db[Collection.DDS_MONTHLY_ROLLUP.value]
+
+    @property
+    def dds_cubes(self) -> Collection:
+        return self.db[Collection.DDS_CUBES.value]
+
     @property
     def airports(self) -> Collection:
         return self.db[Collection.AIRPORT.value]
@@ -31,3 +31,10 @@ ATPCO_FILES_PATH = get_env_key("ATPCO_FILES_PATH")
 HITIT_AUTHORIZATION_STORE_TO = get_env_key("HITIT_AUTHORIZATION_STORE_TO")
 HITIT_USERNAME = get_env_key("HITIT_USERNAME")
 HITIT_UPDATE_INVENTORY_DAY_COUNT = get_env_key("HITIT_UPDATE_INVENTORY_DAY_COUNT")
+
+# *************** REDIS ***************
+REDIS_ENABLED = get_env_key("REDIS_ENABLED", "false")
+REDIS_HOST = get_env_key("REDIS_HOST", "localhost")
+REDIS_PORT = get_env_key("REDIS_PORT", "6379")
+REDIS_PASSWORD = get_env_key("REDIS_PASSWORD", "")
+REDIS_KEY_PREFIX = get_env_key("REDIS_KEY_PREFIX", "defaultprefix")
@@ -0,0 +1,67 @@
+"""
+incremental refresh of `dds_monthly_rollup` (sales of `dds_pgs` summed per carrier, market and sell month),
+stages are the ones the backend rebuilds the rollup with (`kpi/rollup.py`)
+"""
+from datetime import datetime
+from typing import Iterable, Set, Tuple
+
+from core.cache import invalidate_namespace
+from core.db import DB, Collection
+
+KEY = ["dom_op_al_code", "orig_code", "dest_code", "sell_year", "sell_month"]
+
+# (carrier, sell year, sell month)
+SellMonth = Tuple[str, int, int]
+
+
+def rollup_stages(refreshed_at: datetime) -> list:
+    return [
+        {
+            "$group": {
+                "_id": {field: f"${field}" for field in KEY},
+                "revenue_total": {"$sum": "$blended_rev"},
+                "passengers_total": {"$sum": "$pax"},
+                "bookings_total": {"$sum": 1},
+            }
+        },
+        {
+            "$set": {
+                **{field: f"$_id.{field}" for field in KEY},
+                "sell_period": {"$add": [{"$multiply": ["$_id.sell_year", 100]}, "$_id.sell_month"]},
+                "refreshed_at": refreshed_at,
+            }
+        },
+    ]
+
+
+class MonthlyRollup:
+    """refreshes rollup documents of carrier sell months a DDS upload touched (and drops cached dds responses)"""
+
+    def __init__(self):
+        self.db = DB()
+
+    def refresh(self, months: Iterable[SellMonth]) -> None:
+        months: Set[SellMonth] = set(months)
+        if not months:
+            return
+
+        match = {"$or": [{"dom_op_al_code": carrier, "sell_year": year, "sell_month": month} for carrier, year, month in months]}
+        refreshed_at = datetime.now()
+        self.db.dds.aggregate(
+            [
+                {"$match": match},
+                *rollup_stages(refreshed_at),
+                {
+                    "$merge": {
+                        "into": Collection.DDS_MONTHLY_ROLLUP.value,
+                        "on": "_id",
+                        "whenMatched": "replace",
+                        "whenNotMatched": "insert",
+                    }
+                },
+            ],
+            allowDiskUse=True,
+        )
+        # markets that have no sales anymore in refreshed months
+        self.db.dds_monthly_rollup.delete_many({**match, "refreshed_at": {"$ne": refreshed_at}})
+        invalidate_namespace((carrier for carrier, _, _ in months), "dds")
@@ -4,8 +4,10 @@ from datetime import datetime
 
 from __handlers.cyp.dds.source import DDsSource
 from core.checker import Check
+from core.cubes import mark_cubes_stale
 from core.db import Collection
 from core.logger import Logger
+from core.rollup import MonthlyRollup
 from core.stream import Stream
 from core.validators import Validator, is_reprsenting_date
 from pydantic import BaseModel, field_validator
@@ -168,6 +170,7 @@ class Handler:
     def parse(self):
         stream = Stream(Collection.DDS)
         dt = int(datetime.now().strftime("%Y%m%d%H%M%S"))
+        sell_months = set()
 
         for _, data in self.data:
             none_obj = {k: None for k in none_values}
@@ -187,8 +190,11 @@ class Handler:
                 },
                 upsert=True,
             )
+            sell_months.add((obj["dom_op_al_code"], obj["sell_year"], obj["sell_month"]))
 
         stream.update(upsert=True)
+        MonthlyRollup().refresh(sell_months)
+        mark_cubes_stale()
         logger.info("CY DDs data has been uploaded successfully !")
 
 
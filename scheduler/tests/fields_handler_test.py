@@ -0,0 +1,53 @@
+import unittest
+from datetime import datetime
+
+import pandas as pd
+
+from jobs.handlers.base import FieldsHandler
+from jobs.handlers.scraped_fares_etl_handler import ScraperFaresEtlHandler
+
+
+def handle_rows_by_row(handler, df: pd.DataFrame):
+    """previous row by row `FieldsHandler.handle_rows` (iterrows)"""
+    result = []
+    for _, row in df.iterrows():
+        result.append({col: getattr(handler, f"{col}_handler")(row, col) if hasattr(handler, f"{col}_handler") else row[col]
+                       for col in df.columns})
+    return result
+
+
+class CellHandler:
+    """previous cell handler of `ScraperFaresEtlHandler`"""
+
+    def scrapeTime_handler(self, row, col):
+        return (datetime.strptime(row[col].split('.')[0], "%Y-%m-%d %H:%M:%S")
+                if type(row[col]) == str else row[col])
+
+
+class FieldsHandlerTest(unittest.TestCase):
+
+    def test_scrape_times_match_cell_handler(self):
+        df = pd.DataFrame({
+            # scrape times come as strings or as datetimes
+            'scrapeTime': pd.Series(['2024-03-01 10:15:30.123', datetime(2024, 3, 2, 8, 0), '2024-03-03 23:59:59'], dtype=object),
+            'fareAmount': [120.5, 99.0, 80.25],
+            'carrierCode': ['CY', 'A3', 'CY'],
+        })
+        records = ScraperFaresEtlHandler().handle_rows(df)
+        self.assertEqual(records, handle_rows_by_row(CellHandler(), df))
+        self.assertEqual(records[0]['scrapeTime'], datetime(2024, 3, 1, 10, 15, 30))
+
+    def test_untouched_values_match_row_by_row_handling(self):
+        frames = [
+            pd.DataFrame({'scrapeTime': pd.to_datetime(['2024-03-01 10:15', '2024-03-02']),
+                          'departure': pd.to_datetime(['2024-04-01', '2024-04-02'])}),
+            pd.DataFrame({'fltNum': [310, 312], 'fareAmount': [120.5, 99.0], 'carrierCode': ['CY', None]}),
+            pd.DataFrame({'fltNum': [310, 312], 'seats': [3, 4]}),
+        ]
+        for df in frames:
+            self.assertEqual(FieldsHandler().handle_rows(df), handle_rows_by_row(FieldsHandler(), df))
+
+    def test_datetimes_stay_timestamps(self):
+        df = pd.DataFrame({'scrapeTime': pd.to_datetime(['2024-03-01 10:15']), 'departure': pd.to_datetime(['2024-04-01'])})
+        record, = ScraperFaresEtlHandler().handle_rows(df)
+        self.assertEqual(record, {'scrapeTime': pd.Timestamp('2024-03-01 10:15'), 'departure': pd.Timestamp('2024-04-01')})